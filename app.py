@@ -1,3 +1,4 @@
+import logging
 from flask import Flask
 from flask_login import current_user
 from flask_login import LoginManager
@@ -11,12 +12,25 @@ from routes.padres import padre_bp
 from routes.perfil import perfil
 from config import Config
 from extensions import init_app 
+from services.identidad_service import cargar_usuario_sesion
+from services.periodo_service import asignar_periodos_historicos
+from services.planificador_service import iniciar_planificador
+from services.instrumentacion_service import init_instrumentacion
+from services.logging_service import configurar_logging
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 app.config.from_object(Config)
+if app.config.get('PROXY_SALTOS'):
+    saltos = app.config['PROXY_SALTOS']
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=saltos, x_proto=saltos)
+configurar_logging(app)
 init_app(app)
+init_instrumentacion(app)
 
 app.jinja_env.globals.update(getattr=getattr)
 
@@ -28,12 +42,12 @@ login_manager.login_message_category = 'info'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return Usuario.query.get(int(user_id))
+    return cargar_usuario_sesion(user_id)
 
 def create_initial_data():
     with app.app_context():
         db.create_all()
-        print("Base de datos y tablas verificadas/creadas.")
+        logger.info("Base de datos y tablas verificadas/creadas.")
 
         roles_to_create = ['Super Admin', 'Profesor', 'Estudiante', 'Padre']
 
@@ -43,7 +57,7 @@ def create_initial_data():
                 role = Rol(nombre=role_name)
                 db.session.add(role)
                 db.session.commit()
-                print(f"Rol '{role_name}' creado.")
+                logger.info(f"Rol '{role_name}' creado.")
 
         if not Usuario.query.filter_by(no_identidad='000000000').first():
             super_admin_role = Rol.query.filter_by(nombre='Super Admin').first()
@@ -65,10 +79,10 @@ def create_initial_data():
                 super_admin.set_password('admin123')
                 db.session.add(super_admin)
                 db.session.commit()
-                print(" Usuario 'Super Administrador' creado con contraseña 'admin123'.")
-                print(" Email marcado como VERIFICADO automáticamente.")
+                logger.info("Usuario 'Super Administrador' creado con contraseña 'admin123'.")
+                logger.info("Email marcado como VERIFICADO automáticamente.")
             else:
-                print(" Rol 'Super Admin' no encontrado. No se pudo crear el usuario superadmin.")
+                logger.warning("Rol 'Super Admin' no encontrado. No se pudo crear el usuario superadmin.")
         else:
             existing_admin = Usuario.query.filter_by(no_identidad='000000000').first()
             if existing_admin and not existing_admin.email_verified:
@@ -77,7 +91,19 @@ def create_initial_data():
                 existing_admin.verification_code_expires = None
                 existing_admin.verification_attempts = 0
                 db.session.commit()
-                print(" Usuario Super Administrador actualizado: email marcado como VERIFICADO.")
+                logger.info("Usuario Super Administrador actualizado: email marcado como VERIFICADO.")
+
+        from services.calendario_service import sincronizar_destinatarios
+        eventos_sincronizados = sincronizar_destinatarios()
+        if eventos_sincronizados:
+            logger.info(f"Destinatarios normalizados para {eventos_sincronizados} eventos.")
+
+        periodos_asignados, error = asignar_periodos_historicos()
+        if error:
+            logger.error(error)
+        elif any(periodos_asignados.values()):
+            logger.info(f"Periodo asignado a {periodos_asignados['calificaciones']} calificaciones "
+                        f"y {periodos_asignados['asistencias']} asistencias históricas.")
 
 UPLOAD_FOLDER = os.path.join(os.getcwd(), "static", "images", "candidatos")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -90,6 +116,17 @@ app.register_blueprint(estudiante_bp)
 app.register_blueprint(padre_bp)
 app.register_blueprint(profesor_bp)
 app.register_blueprint(perfil)
+
+# Cada worker (gunicorn, uwsgi, flask run) inicia su planificador al cargar la
+# aplicación. Con el recargador de depuración el proceso padre solo vigila los
+# archivos, así que lo inicia únicamente el hijo que atiende las peticiones
+# (WERKZEUG_RUN_MAIN). Con gunicorn --preload los hilos no sobreviven al fork:
+# no usar --preload o iniciarlo en el hook post_fork.
+def _es_proceso_recargador():
+    return os.environ.get('WERKZEUG_RUN_MAIN') != 'true' and (app.debug or __name__ == '__main__')
+
+if app.config.get('PLANIFICADOR_ENABLED') and not _es_proceso_recargador():
+    iniciar_planificador(app)
 @app.context_processor
 def inject_unread_notifications():
     try:
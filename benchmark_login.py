@@ -0,0 +1,76 @@
+# benchmark_login.py
+"""
+Benchmark de verificación de contraseñas para dimensionar los servidores de login
+
+Mide cuántas verificaciones por segundo sostiene un núcleo con la política de
+hashing configurada (o la indicada con --metodo), repite la medida con varios
+hilos y estima cuántos núcleos hacen falta para que todos los usuarios inicien
+sesión dentro de la ventana dada (por defecto, 15 minutos el primer día).
+
+Uso:
+    python benchmark_login.py --usuarios 1200 --ventana 15
+    python benchmark_login.py --metodo pbkdf2:sha256:600000 --hilos 8
+"""
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from services.password_service import generar_hash, verificar_password
+
+
+def medir(password_hash, password, segundos, hilos):
+    """Devuelve verificaciones por segundo con `hilos` hilos en paralelo"""
+    limite = time.perf_counter() + segundos
+
+    def trabajador():
+        hechas = 0
+        while time.perf_counter() < limite:
+            verificar_password(password_hash, password)
+            hechas += 1
+        return hechas
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        total = sum(pool.map(lambda _: trabajador(), range(hilos)))
+    return total / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--metodo', default=Config.PASSWORD_HASH_METHOD, help='Método de hashing de werkzeug')
+    parser.add_argument('--segundos', type=float, default=5.0, help='Duración de cada medida')
+    parser.add_argument('--hilos', type=int, default=os.cpu_count() or 1, help='Hilos de la segunda medida')
+    parser.add_argument('--usuarios', type=int, default=1000, help='Usuarios que inician sesión en la ventana')
+    parser.add_argument('--ventana', type=float, default=15.0, help='Ventana de llegada en minutos')
+    parser.add_argument('--pico', type=float, default=3.0, help='Factor pico / media de las llegadas')
+    args = parser.parse_args()
+
+    password = 'Benchmark#2024'
+    inicio = time.perf_counter()
+    password_hash = generar_hash(password, metodo=args.metodo)
+    costo_ms = (time.perf_counter() - inicio) * 1000
+
+    print(f'Método: {password_hash.split("$", 1)[0]}  ({costo_ms:.1f} ms por hash)')
+
+    por_nucleo = medir(password_hash, password, args.segundos, 1)
+    print(f'1 hilo:      {por_nucleo:8.1f} logins/s')
+
+    if args.hilos > 1:
+        paralelo = medir(password_hash, password, args.segundos, args.hilos)
+        print(f'{args.hilos} hilos:    {paralelo:8.1f} logins/s  '
+              f'(escala x{paralelo / por_nucleo:.1f} en {os.cpu_count()} CPUs)')
+
+    media = args.usuarios / (args.ventana * 60)
+    pico = media * args.pico
+    nucleos = math.ceil(pico / por_nucleo) if por_nucleo else 0
+    print()
+    print(f'{args.usuarios} usuarios en {args.ventana:g} min: {media:.2f} logins/s de media, '
+          f'{pico:.2f} logins/s en pico (x{args.pico:g})')
+    print(f'Núcleos necesarios solo para verificar contraseñas: {nucleos}')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,100 @@ class Config:
     
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'una-llave-secreta-para-proteger-las-sesiones'
 
+    # Hashing de contraseñas: 'scrypt:N:r:p' o 'pbkdf2:sha256:iteraciones'.
+    # Cambiarlo regenera cada hash en el siguiente login correcto del usuario.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    PASSWORD_SALT_LENGTH = 16
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 4)
+
+    # Límite de intentos en login y verificación: (intentos, ventana en segundos)
+    # por IP + cuenta y por IP. Con varios workers usar 'redis://host:6379/0'.
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL') or 'memory://'
+    RATE_LIMITS = {
+        'login': {'ip_cuenta': (5, 300), 'ip': (50, 300)},
+        'verificacion': {'ip_cuenta': (5, 900), 'ip': (30, 900)},
+        'verificacion_check': {'ip_cuenta': (20, 900), 'ip': (100, 900)},
+        'reenvio': {'ip_cuenta': (3, 3600), 'ip': (10, 3600)},
+    }
+
+    # Proxies inversos delante de la aplicación. Con N > 0 se confía en los
+    # últimos N valores de X-Forwarded-For y X-Forwarded-Proto para obtener
+    # la IP del cliente (límite de intentos, registro); con 0 se usa la IP de
+    # la conexión.
+    # No activarlo si la aplicación es accesible sin pasar por el proxy.
+    PROXY_SALTOS = int(os.environ.get('PROXY_SALTOS') or 0)
+
+    # Días de validez del enlace de suscripción al calendario (.ics)
+    CALENDARIO_ICS_DIAS = 365
+
+    # Planificador de tareas periódicas (services/planificador_service.py).
+    # Cada worker revisa las tareas vencidas cada PLANIFICADOR_INTERVALO
+    # segundos; PLANIFICADOR_TAREAS ajusta por nombre 'intervalo',
+    # 'max_reintentos', 'reintento_segundos' o 'duracion_maxima'.
+    PLANIFICADOR_ENABLED = True
+    PLANIFICADOR_INTERVALO = 30
+    PLANIFICADOR_HISTORIAL_DIAS = 30
+    PLANIFICADOR_TAREAS = {
+        'reloj_academico': {'intervalo': 900},
+    }
+    BORRADORES_DIAS_RETENCION = 90
+
+    # Retención de notificaciones: las leídas más antiguas se archivan y cada
+    # usuario conserva como mucho NOTIFICACIONES_MAX_POR_USUARIO activas
+    NOTIFICACIONES_DIAS_RETENCION = 90
+    NOTIFICACIONES_MAX_POR_USUARIO = 200
+    NOTIFICACIONES_LOTE_RETENCION = 1000
+
+    # Buzón: a papelera tras COMUNICACIONES_DIAS_PAPELERA días y eliminadas
+    # tras COMUNICACIONES_DIAS_ELIMINACION (salvo política del usuario), por
+    # lotes de COMUNICACIONES_LOTE_RETENCION filas
+    COMUNICACIONES_DIAS_PAPELERA = 30
+    COMUNICACIONES_DIAS_ELIMINACION = 60
+    COMUNICACIONES_LOTE_RETENCION = 500
+
+    # Alerta temprana: peso de cada factor del puntaje de riesgo (0-100) y
+    # puntajes desde los que un estudiante está en riesgo medio o alto
+    RIESGO_PESOS = {
+        'rendimiento': 0.35,
+        'categorias': 0.15,
+        'tendencia': 0.15,
+        'asistencia': 0.25,
+        'tareas': 0.10
+    }
+    RIESGO_UMBRAL_MEDIO = 35
+    RIESGO_UMBRAL_ALTO = 60
+
+    # Avisos en tiempo real (SSE con long-poll de respaldo). Con varios
+    # workers usar 'redis://host:6379/0' para repartir entre procesos.
+    TIEMPO_REAL_ENABLED = True
+    TIEMPO_REAL_URL = os.environ.get('TIEMPO_REAL_URL') or 'memory://'
+    TIEMPO_REAL_MAX_CONEXIONES = 100
+    TIEMPO_REAL_MAX_POR_USUARIO = 5
+    TIEMPO_REAL_HEARTBEAT = 20
+    TIEMPO_REAL_LONG_POLL = 25
+
+    # Instrumentación de consultas por petición: aviso de N+1 cuando una
+    # consulta se repite UMBRAL_N1 veces, resumen por endpoint de las últimas
+    # MUESTRAS peticiones y, si SERVER_TIMING está activo, cabecera
+    # Server-Timing en las respuestas a administradores
+    INSTRUMENTACION_ENABLED = True
+    INSTRUMENTACION_UMBRAL_N1 = 10
+    INSTRUMENTACION_MUESTRAS = 200
+    INSTRUMENTACION_SERVER_TIMING = False
+
+    # Registro: JSON por línea (o 'texto'), nivel general y por módulo, uno de
+    # cada MUESTREO_DEBUG registros DEBUG por línea de código y registros en
+    # cola (se descartan si hay más de COLA_MAXIMA pendientes)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
+    LOG_FORMATO = 'json'
+    LOG_LEVELS = {
+        'sqlalchemy.engine': 'WARNING',
+        'werkzeug': 'INFO'
+    }
+    LOG_MUESTREO_DEBUG = 100
+    LOG_COLA_MAXIMA = 10000
+
 
     MAIL_SERVER = 'smtp.gmail.com'
     MAIL_PORT = 587
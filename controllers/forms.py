@@ -8,21 +8,22 @@ from wtforms_sqlalchemy.fields import QuerySelectField
 import re
 from extensions import db
 from controllers.models import Usuario, Rol, Sede, Curso, Asignatura, Equipo, Salon
+from services.catalogo_service import listar
 
 def get_all_roles():
-    return Rol.query.order_by(Rol.nombre).all()
+    return listar(Rol)
 
 def get_all_sedes():
-    return Sede.query.order_by(Sede.nombre).all()
+    return listar(Sede)
 
 def get_all_courses():
-    return Curso.query.order_by(Curso.nombreCurso).all()
+    return listar(Curso)
 
 def get_all_subjects():
-    return Asignatura.query.order_by(Asignatura.nombre).all()
+    return listar(Asignatura)
 
 def get_all_salones():
-    return Salon.query.join(Sede).order_by(Salon.nombre).all()
+    return listar(Salon)
 
 class LoginForm(FlaskForm):
     correo = StringField('Correo Electrónico', validators=[DataRequired(), Email()], render_kw={"placeholder": "tu@correo.com"})
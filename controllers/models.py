@@ -1,7 +1,7 @@
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from extensions import db
-from controllers.permisos import ROLE_PERMISSIONS
+from controllers.permisos import RolesMixin
+from services.password_service import generar_hash, verificar_password, necesita_rehash
 from datetime import datetime, time, date
 import json
 
@@ -37,7 +37,7 @@ class Rol(db.Model):
         return f'<Rol {self.nombre}>'
 
 
-class Usuario(db.Model, UserMixin):
+class Usuario(db.Model, UserMixin, RolesMixin):
     __tablename__ = 'usuarios'
     
     id_usuario = db.Column(db.Integer, primary_key=True)
@@ -104,34 +104,17 @@ class Usuario(db.Model, UserMixin):
         return self.rol.nombre if self.rol else None
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generar_hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verificar_password(self.password_hash, password)
+
+    def password_necesita_rehash(self):
+        return necesita_rehash(self.password_hash)
     
     def get_id(self):
         return str(self.id_usuario)
 
-    def has_role(self, role_name):
-        return self.rol.nombre.lower() == role_name.lower() if self.rol else False
-        
-    def has_permission(self, permiso_nombre):
-        if not self.rol:
-            return False
-        return permiso_nombre in ROLE_PERMISSIONS.get(self.rol.nombre, [])
-    
-    def es_estudiante(self):
-        return self.has_role('estudiante')
-    
-    def es_profesor(self):
-        return self.has_role('profesor')
-    
-    def es_padre(self):
-        return self.has_role('padre')
-    
-    def es_admin(self):
-        return self.has_role('super admin') or self.has_role('admin')
-    
     def to_dict(self):
         return {
             'id_usuario': self.id_usuario,
@@ -263,9 +246,16 @@ class Asistencia(db.Model):
     estado = db.Column(db.String(20), nullable=False, default='presente')
     fecha_registro = db.Column(db.DateTime, default=datetime.utcnow)
     excusa = db.Column(db.Boolean, default=False)  
+    periodo_academico_id = db.Column(db.Integer, db.ForeignKey('periodo_academico.id_periodo'), nullable=True)
     
     estudiante_rel = db.relationship('Usuario', back_populates='asistencias', foreign_keys=[estudianteId])
     clase = db.relationship('Clase', back_populates='asistencias', foreign_keys=[claseId])
+    periodo = db.relationship('PeriodoAcademico', foreign_keys=[periodo_academico_id])
+
+    __table_args__ = (
+        db.Index('ix_asistencia_periodo_estudiante_fecha', 'periodo_academico_id', 'estudianteId', 'fecha'),
+        db.Index('ix_asistencia_periodo_clase_fecha', 'periodo_academico_id', 'claseId', 'fecha'),
+    )
 
     def __repr__(self):
         return f'<Asistencia {self.estudianteId} - {self.fecha}>'
@@ -321,11 +311,22 @@ class Calificacion(db.Model):
     fecha_vencimiento = db.Column(db.DateTime, nullable=True)  
     es_tarea_publicada = db.Column(db.Boolean, default=False)  
     profesor_id = db.Column(db.Integer, db.ForeignKey('usuarios.id_usuario'), nullable=True)  
+    periodo_academico_id = db.Column(db.Integer, db.ForeignKey('periodo_academico.id_periodo'), nullable=True)
+    # Versión de la celda para la concurrencia optimista del libro de calificaciones
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     estudiante = db.relationship('Usuario', back_populates='calificaciones', foreign_keys=[estudianteId])
     asignatura = db.relationship('Asignatura', back_populates='calificaciones', foreign_keys=[asignaturaId])
     categoria = db.relationship('CategoriaCalificacion', back_populates='calificaciones', foreign_keys=[categoriaId])
     profesor = db.relationship('Usuario', foreign_keys=[profesor_id])
+    periodo = db.relationship('PeriodoAcademico', foreign_keys=[periodo_academico_id])
+
+    __table_args__ = (
+        db.Index('ix_calificacion_periodo_estudiante_asignatura', 'periodo_academico_id', 'estudianteId', 'asignaturaId'),
+        db.Index('ix_calificacion_periodo_asignatura', 'periodo_academico_id', 'asignaturaId'),
+        db.Index('ix_calificacion_asignatura_estudiante', 'asignaturaId', 'estudianteId'),
+    )
+    __mapper_args__ = {'version_id_col': version}
 
     def __repr__(self):
         return f'<Calificacion {self.estudianteId} - {self.valor}>'
@@ -712,9 +713,20 @@ class Evento(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
     descripcion = db.Column(db.Text, nullable=False)
-    fecha = db.Column(db.Date, nullable=False)
+    fecha = db.Column(db.Date, nullable=False, index=True)
     hora = db.Column(db.Time, nullable=False)
     rol_destino = db.Column(db.String(50), nullable=False)
+    recurrencia = db.Column(db.Enum('diaria', 'semanal', 'mensual', name='recurrencia_evento_enum'), nullable=True)
+    recurrencia_hasta = db.Column(db.Date, nullable=True)
+
+    destinatarios = db.relationship('EventoDestinatario', back_populates='evento',
+                                    cascade='all, delete-orphan', lazy='selectin')
+
+    @property
+    def roles_destino(self):
+        if self.destinatarios:
+            return [d.rol for d in self.destinatarios]
+        return [r.strip() for r in self.rol_destino.split(',') if r.strip()] if self.rol_destino else []
 
     def to_dict(self):
         return {
@@ -723,13 +735,31 @@ class Evento(db.Model):
             "Descripcion": self.descripcion,
             "Fecha": self.fecha.isoformat(),
             "Hora": self.hora.strftime("%H:%M"),
-            "RolDestino": self.rol_destino
+            "RolDestino": self.rol_destino,
+            "Recurrencia": self.recurrencia,
+            "RecurrenciaHasta": self.recurrencia_hasta.isoformat() if self.recurrencia_hasta else None
         }
 
     def __repr__(self):
         return f"<Evento {self.nombre}>"
 
 
+class EventoDestinatario(db.Model):
+    __tablename__ = "evento_destinatario"
+
+    evento_id = db.Column(db.Integer, db.ForeignKey('eventos.id', ondelete='CASCADE'), primary_key=True)
+    rol = db.Column(db.String(50), primary_key=True)
+
+    evento = db.relationship('Evento', back_populates='destinatarios')
+
+    __table_args__ = (
+        db.Index('ix_evento_destinatario_rol_evento', 'rol', 'evento_id'),
+    )
+
+    def __repr__(self):
+        return f"<EventoDestinatario {self.evento_id} - {self.rol}>"
+
+
 
 class Comunicacion(db.Model):
     __tablename__ = 'comunicaciones'
@@ -746,6 +776,10 @@ class Comunicacion(db.Model):
     remitente = db.relationship('Usuario', foreign_keys=[remitente_id], backref='comunicaciones_enviadas')
     destinatario = db.relationship('Usuario', foreign_keys=[destinatario_id], backref='comunicaciones_recibidas')
     
+    __table_args__ = (
+        db.Index('ix_comunicaciones_estado_fecha', 'estado', 'fecha_envio'),
+    )
+    
     def to_dict(self):
         return {
             'id_comunicacion': self.id_comunicacion,
@@ -951,9 +985,23 @@ class Notificacion(db.Model):
     link = db.Column(db.String(500), nullable=True)
     leida = db.Column(db.Boolean, default=False)
     creada_en = db.Column(db.DateTime, default=datetime.utcnow)
+    tipo_evento = db.Column(db.String(50), nullable=True)
+    # Las programadas se crean con enviada=False y las publica el despachador
+    enviada = db.Column(db.Boolean, default=True, nullable=False)
+    programada_para = db.Column(db.DateTime, nullable=True)
+    ciclo_academico_id = db.Column(db.Integer, db.ForeignKey("ciclo_academico.id_ciclo"), nullable=True)
+    periodo_academico_id = db.Column(db.Integer, db.ForeignKey("periodo_academico.id_periodo"), nullable=True)
     
     usuario = db.relationship("Usuario", back_populates="notificaciones")
     
+    __table_args__ = (
+        # El despachador busca (enviada=False, programada_para<=ahora) y solo lee el id
+        db.Index('ix_notificaciones_enviada_programada', 'enviada', 'programada_para', 'id_notificacion'),
+        # Listados por usuario (más recientes primero) y recálculo del contador de no leídas
+        db.Index('ix_notificaciones_usuario_creada', 'usuario_id', 'creada_en'),
+        db.Index('ix_notificaciones_usuario_enviada_leida', 'usuario_id', 'enviada', 'leida'),
+    )
+    
     def to_dict(self):
         return {
             "id_notificacion": self.id_notificacion,
@@ -969,6 +1017,55 @@ class Notificacion(db.Model):
         return f"<Notificacion {self.id_notificacion} - {self.titulo}>"
 
 
+# Notificaciones leídas que la retención retira de la tabla activa
+class NotificacionArchivada(db.Model):
+    __tablename__ = "notificaciones_archivadas"
+    
+    id_notificacion = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    usuario_id = db.Column(db.Integer, nullable=False, index=True)
+    titulo = db.Column(db.String(200), nullable=False)
+    mensaje = db.Column(db.Text, nullable=False)
+    tipo = db.Column(db.String(50), nullable=False)
+    tipo_evento = db.Column(db.String(50), nullable=True)
+    creada_en = db.Column(db.DateTime)
+    archivada_en = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<NotificacionArchivada {self.id_notificacion}>"
+
+
+# No leídas por usuario, mantenido en la misma transacción que cada cambio
+class ContadorNotificaciones(db.Model):
+    __tablename__ = "notificaciones_contadores"
+    
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id_usuario", ondelete="CASCADE"), primary_key=True)
+    no_leidas = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<ContadorNotificaciones {self.usuario_id}: {self.no_leidas}>"
+
+
+# Retención del buzón de un usuario; los valores nulos usan los de Config
+class PoliticaRetencionBuzon(db.Model):
+    __tablename__ = "politicas_retencion_buzon"
+    
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id_usuario", ondelete="CASCADE"), primary_key=True)
+    dias_papelera = db.Column(db.Integer, nullable=True)
+    dias_eliminacion = db.Column(db.Integer, nullable=True)
+    actualizada_en = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'usuario_id': self.usuario_id,
+            'dias_papelera': self.dias_papelera,
+            'dias_eliminacion': self.dias_eliminacion,
+            'actualizada_en': self.actualizada_en.strftime('%Y-%m-%d %H:%M:%S') if self.actualizada_en else None
+        }
+    
+    def __repr__(self):
+        return f"<PoliticaRetencionBuzon {self.usuario_id}>"
+
+
 # ================================
 # Modelos de Gestión Académica por Periodos
 # ================================
@@ -1013,6 +1110,7 @@ class PeriodoAcademico(db.Model):
     fecha_cierre_notas = db.Column(db.Date, nullable=False)
     estado = db.Column(db.Enum('planificado', 'activo', 'en_cierre', 'cerrado', name='estado_periodo_enum'), default='planificado')
     dias_notificacion_anticipada = db.Column(db.Integer, default=7)
+    ultima_revision = db.Column(db.Date, nullable=True)  # último día revisado por el reloj académico
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relaciones
@@ -1059,4 +1157,88 @@ class PeriodoAcademico(db.Model):
         return None
     
     def __repr__(self):
-        return f"<PeriodoAcademico {self.id_periodo} - {self.nombre}>"
\ No newline at end of file
+        return f"<PeriodoAcademico {self.id_periodo} - {self.nombre}>"
+
+
+# ================================
+# Modelos del Planificador de Tareas
+# ================================
+
+class TareaProgramada(db.Model):
+    __tablename__ = 'tareas_programadas'
+    
+    id_tarea = db.Column(db.Integer, primary_key=True)
+    nombre = db.Column(db.String(100), unique=True, nullable=False)
+    descripcion = db.Column(db.String(255))
+    intervalo_segundos = db.Column(db.Integer, nullable=False)
+    activa = db.Column(db.Boolean, default=True, nullable=False)
+    proxima_ejecucion = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Bloqueo de la tarea: el worker que lo toma es quien la ejecuta
+    bloqueada_por = db.Column(db.String(100), nullable=True)
+    bloqueada_hasta = db.Column(db.DateTime, nullable=True)
+    intentos_fallidos = db.Column(db.Integer, default=0, nullable=False)
+    max_reintentos = db.Column(db.Integer, default=3, nullable=False)
+    ultima_ejecucion = db.Column(db.DateTime, nullable=True)
+    ultimo_estado = db.Column(db.String(20), nullable=True)
+    # Avance de la ejecución en curso (o de la última), en JSON
+    progreso = db.Column(db.Text, nullable=True)
+    
+    ejecuciones = db.relationship('EjecucionTarea', back_populates='tarea', cascade='all, delete-orphan', lazy='dynamic')
+    
+    __table_args__ = (
+        db.Index('ix_tareas_programadas_pendientes', 'activa', 'proxima_ejecucion'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id_tarea': self.id_tarea,
+            'nombre': self.nombre,
+            'descripcion': self.descripcion,
+            'intervalo_segundos': self.intervalo_segundos,
+            'activa': self.activa,
+            'proxima_ejecucion': self.proxima_ejecucion.strftime('%Y-%m-%d %H:%M:%S') if self.proxima_ejecucion else None,
+            'en_ejecucion': bool(self.bloqueada_hasta and self.bloqueada_hasta > datetime.utcnow()),
+            'intentos_fallidos': self.intentos_fallidos,
+            'max_reintentos': self.max_reintentos,
+            'ultima_ejecucion': self.ultima_ejecucion.strftime('%Y-%m-%d %H:%M:%S') if self.ultima_ejecucion else None,
+            'ultimo_estado': self.ultimo_estado,
+            'progreso': json.loads(self.progreso) if self.progreso else None
+        }
+    
+    def __repr__(self):
+        return f"<TareaProgramada {self.nombre}>"
+
+
+class EjecucionTarea(db.Model):
+    __tablename__ = 'ejecuciones_tareas'
+    
+    id_ejecucion = db.Column(db.Integer, primary_key=True)
+    tarea_id = db.Column(db.Integer, db.ForeignKey('tareas_programadas.id_tarea'), nullable=False)
+    trabajador = db.Column(db.String(100), nullable=False)
+    intento = db.Column(db.Integer, default=1, nullable=False)
+    inicio = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    fin = db.Column(db.DateTime, nullable=True)
+    estado = db.Column(db.Enum('exito', 'error', name='estado_ejecucion_enum'), nullable=False)
+    resultado = db.Column(db.Text, nullable=True)
+    
+    tarea = db.relationship('TareaProgramada', back_populates='ejecuciones')
+    
+    __table_args__ = (
+        db.Index('ix_ejecuciones_tareas_tarea_inicio', 'tarea_id', 'inicio'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id_ejecucion': self.id_ejecucion,
+            'tarea_id': self.tarea_id,
+            'trabajador': self.trabajador,
+            'intento': self.intento,
+            'inicio': self.inicio.strftime('%Y-%m-%d %H:%M:%S') if self.inicio else None,
+            'fin': self.fin.strftime('%Y-%m-%d %H:%M:%S') if self.fin else None,
+            'duracion_ms': int((self.fin - self.inicio).total_seconds() * 1000) if self.fin and self.inicio else None,
+            'estado': self.estado,
+            'resultado': self.resultado
+        }
+    
+    def __repr__(self):
+        return f"<EjecucionTarea {self.id_ejecucion} - {self.estado}>"
@@ -19,3 +19,36 @@ ROLE_PERMISSIONS = {
         'gestion_comunicaciones', 'acceso_soporte'
     ]
 }
+
+
+PERMISOS_POR_ROL = {rol: frozenset(permisos) for rol, permisos in ROLE_PERMISSIONS.items()}
+
+ROLES_ADMIN = frozenset({'super admin', 'admin'})
+
+
+class RolesMixin:
+    """
+    Comprobaciones de rol y permiso a partir de `rol_nombre`
+
+    La comparte el modelo Usuario y la identidad cacheada de la sesión.
+    """
+
+    def has_role(self, role_name):
+        nombre = self.rol_nombre
+        return nombre is not None and nombre.lower() == role_name.lower()
+
+    def has_permission(self, permiso_nombre):
+        return permiso_nombre in PERMISOS_POR_ROL.get(self.rol_nombre, ())
+
+    def es_estudiante(self):
+        return self.has_role('estudiante')
+
+    def es_profesor(self):
+        return self.has_role('profesor')
+
+    def es_padre(self):
+        return self.has_role('padre')
+
+    def es_admin(self):
+        nombre = self.rol_nombre
+        return nombre is not None and nombre.lower() in ROLES_ADMIN
@@ -1,3 +1,4 @@
+import logging
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
 from sqlalchemy.exc import IntegrityError
@@ -12,9 +13,18 @@ from extensions import db
 from services.notification_service import (
     notificar_nuevo_evento, 
     notificar_evento_actualizado, 
-    notificar_evento_eliminado
+    notificar_evento_eliminado,
+    contar_notificaciones_no_leidas
+)
+from services.calendario_service import (
+    asignar_destinatarios,
+    normalizar_roles,
+    leer_recurrencia,
+    obtener_ventana,
+    ocurrencias_en_ventana
 )
 from services.email_service import send_welcome_email, generate_verification_code, send_verification_success_email, send_welcome_email_with_retry, get_verification_info
+from services.catalogo_service import rol_por_nombre, curso_por_id, sede_por_id, asignatura_por_id
 from controllers.forms import RegistrationForm, UserEditForm, SalonForm, CursoForm, SedeForm, EquipoForm
 from controllers.models import (
     Usuario, Rol, Clase, Curso, Asignatura, Sede, Salon, 
@@ -24,6 +34,8 @@ from controllers.models import (
     CicloAcademico, PeriodoAcademico,EstadoPublicacion, Voto
 )
 
+logger = logging.getLogger(__name__)
+
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 # ========== FUNCIÓN AUXILIAR==========
@@ -35,9 +47,9 @@ def get_sidebar_counts():
         # DEBUG: Ver qué valores de estado existen
         estados = db.session.query(Comunicacion.estado).distinct().all()
         estados_lista = [e[0] for e in estados]
-        print("🔍 VALORES DE 'estado' EN COMUNICACIONES:", estados_lista)
+        logger.debug("🔍 VALORES DE 'estado' EN COMUNICACIONES: %s", estados_lista)
     except Exception as e:
-        print("❌ Error en debug de estados:", e)
+        logger.exception(f'❌ Error en debug de estados: {e}')
         estados_lista = []
     
     # Determinar el valor correcto para mensajes no leídos
@@ -53,7 +65,7 @@ def get_sidebar_counts():
     elif 'nuevo' in estados_lista:
         estado_no_leido = 'nuevo'
     
-    print(f"🎯 Usando estado: '{estado_no_leido}' para mensajes no leídos")
+    logger.debug("🎯 Usando estado: '%s' para mensajes no leídos", estado_no_leido)
     
     # Mensajes no leídos (para comunicaciones)
     unread_messages = Comunicacion.query.filter_by(
@@ -62,33 +74,18 @@ def get_sidebar_counts():
     ).count()
     
     # Notificaciones no leídas (para notificaciones)
-    unread_notifications = Notificacion.query.filter_by(
-        usuario_id=current_user.id_usuario,
-        leida=False
-    ).count()
+    unread_notifications = contar_notificaciones_no_leidas(current_user.id_usuario)
     
     # ✅ VERSIÓN CORREGIDA: Eventos próximos con filtro más estricto
     hoy = datetime.now().date()
     
-    # Obtener TODOS los eventos para debug
-    todos_eventos = Evento.query.all()
-    print(f"📋 TODOS LOS EVENTOS EN BD ({len(todos_eventos)} total):")
-    for evento in todos_eventos:
-        print(f"   - ID: {evento.id}, Nombre: '{evento.nombre}', Fecha: {evento.fecha}, Rol: {evento.rol_destino}")
-    
     # Eventos que cumplen el filtro estricto
-    eventos_filtrados = Evento.query.filter(
+    upcoming_events = Evento.query.filter(
         Evento.fecha.isnot(None),  # Excluir eventos sin fecha
         Evento.fecha >= hoy        # Solo eventos de hoy en adelante
-    ).all()
-    
-    print(f"🎯 EVENTOS FILTRADOS (fecha >= {hoy} y fecha NOT NULL): {len(eventos_filtrados)} eventos")
-    for evento in eventos_filtrados:
-        print(f"   ✅ INCLUIDO - ID: {evento.id}, Nombre: '{evento.nombre}', Fecha: {evento.fecha}")
-    
-    upcoming_events = len(eventos_filtrados)
+    ).count()
     
-    print(f"📊 RESUMEN CONTADORES - Mensajes: {unread_messages}, Notificaciones: {unread_notifications}, Eventos: {upcoming_events}")
+    logger.debug("📊 RESUMEN CONTADORES - Mensajes: %s, Notificaciones: %s, Eventos: %s", unread_messages, unread_notifications, upcoming_events)
     
     return {
         'unread_messages': unread_messages,
@@ -127,7 +124,7 @@ def buscar_usuario():
     
     usuarios_encontrados = []
     
-    rol_profesor = Rol.query.filter_by(nombre='Profesor').first()
+    rol_profesor = rol_por_nombre('Profesor')
     if rol_profesor:
         profesores = Usuario.query.filter(
             Usuario.id_rol_fk == rol_profesor.id_rol,
@@ -147,7 +144,7 @@ def buscar_usuario():
                 'rolUrl': url_for('admin.profesores')
             })
     
-    rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+    rol_estudiante = rol_por_nombre('Estudiante')
     if rol_estudiante:
         estudiantes = Usuario.query.filter(
             Usuario.id_rol_fk == rol_estudiante.id_rol,
@@ -167,7 +164,7 @@ def buscar_usuario():
                 'rolUrl': url_for('admin.estudiantes')
             })
     
-    rol_padre = Rol.query.filter_by(nombre='Padre').first()
+    rol_padre = rol_por_nombre('Padre')
     if rol_padre:
         padres = Usuario.query.filter(
             Usuario.id_rol_fk == rol_padre.id_rol,
@@ -187,7 +184,7 @@ def buscar_usuario():
                 'rolUrl': url_for('admin.padres')
             })
     
-    rol_admin = Rol.query.filter_by(nombre='Administrador Institucional').first()
+    rol_admin = rol_por_nombre('Administrador Institucional')
     if rol_admin:
         admins = Usuario.query.filter(
             Usuario.id_rol_fk == rol_admin.id_rol,
@@ -227,7 +224,7 @@ def profesores():
 def api_profesores():
     try:
         filter_id = request.args.get('filter_id', '')
-        rol_profesor = Rol.query.filter_by(nombre='Profesor').first()
+        rol_profesor = rol_por_nombre('Profesor')
         
         if filter_id:
             profesores = Usuario.query.filter_by(id_rol_fk=rol_profesor.id_rol, no_identidad=filter_id).all() if rol_profesor else []
@@ -243,13 +240,13 @@ def api_profesores():
             
             if clases:
                 for clase in clases:
-                    curso = Curso.query.filter_by(id_curso=clase.cursoId).first()
+                    curso = curso_por_id(clase.cursoId)
                     if curso:
                         cursos_asignados.add(curso.nombreCurso)
-                        sede = Sede.query.filter_by(id_sede=curso.sedeId).first()
+                        sede = sede_por_id(curso.sedeId)
                         if sede:
                             sedes_asignadas.add(sede.nombre)
-                    asignatura = Asignatura.query.filter_by(id_asignatura=clase.asignaturaId).first()
+                    asignatura = asignatura_por_id(clase.asignaturaId)
                     if asignatura:
                         materias_asignadas.add(asignatura.nombre)
             
@@ -271,7 +268,7 @@ def api_profesores():
             
         return jsonify({"data": lista_profesores})
     except Exception as e:
-        print(f"Error en la API de profesores: {e}")
+        logger.exception(f"Error en la API de profesores: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
 
 @admin_bp.route('/estudiantes')
@@ -279,7 +276,7 @@ def api_profesores():
 @role_required(1)
 def estudiantes():
     filter_id = request.args.get('filter_id', '')
-    rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+    rol_estudiante = rol_por_nombre('Estudiante')
     
     if filter_id:
         estudiantes = Usuario.query.filter_by(
@@ -317,7 +314,7 @@ def estudiantes():
                     padres_dict[estudiante_id] = []
                 padres_dict[estudiante_id].append(f"{row[2]} {row[3]}")
         except Exception as e:
-            print(f"Error cargando padres: {e}")
+            logger.exception(f"Error cargando padres: {e}")
             padres_dict = {}
         
         matriculas_por_estudiante = {}
@@ -365,7 +362,7 @@ def estudiantes():
 def api_estudiantes():
     try:
         filter_id = request.args.get('filter_id', '')
-        rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+        rol_estudiante = rol_por_nombre('Estudiante')
         
         if filter_id:
             estudiantes = Usuario.query.filter_by(id_rol_fk=rol_estudiante.id_rol, no_identidad=filter_id).all() if rol_estudiante else []
@@ -401,7 +398,7 @@ def api_estudiantes():
             
         return jsonify({"data": lista_estudiantes})
     except Exception as e:
-        print(f"Error en la API de estudiantes: {e}")
+        logger.exception(f"Error en la API de estudiantes: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
 
 @admin_bp.route('/api/estudiantes/<int:id>', methods=['GET'])
@@ -410,7 +407,7 @@ def api_estudiantes():
 def api_detalles_estudiante(id):
     try:
         
-        rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+        rol_estudiante = rol_por_nombre('Estudiante')
         if not rol_estudiante:
             return jsonify({"success": False, "message": "Rol 'Estudiante' no encontrado"}), 500
 
@@ -459,7 +456,7 @@ def api_detalles_estudiante(id):
         })
 
     except Exception as e:
-        print(f"[ERROR API ESTUDIANTE] ID {id}: {str(e)}")
+        logger.exception(f"[ERROR API ESTUDIANTE] ID {id}: {str(e)}")
         return jsonify({"success": False, "message": "Error interno del servidor"}), 500
 
 @admin_bp.route('/estudiantes/crear', methods=['GET', 'POST'])
@@ -471,7 +468,7 @@ def crear_estudiante():
     roles = Rol.query.all()
     form.rol.choices = [(str(r.id_rol), r.nombre) for r in roles] if roles else []
     
-    rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+    rol_estudiante = rol_por_nombre('Estudiante')
     if not rol_estudiante:
         flash('Error: Rol de Estudiante no encontrado', 'error')
         return redirect(url_for('admin.estudiantes'))
@@ -486,8 +483,6 @@ def crear_estudiante():
             from datetime import datetime, timedelta
             verification_code = generate_verification_code()
             
-            print(f"DEBUG: Creando estudiante - Contraseña del formulario: {form.password.data}")
-            
             new_user = Usuario(
                 tipo_doc=form.tipo_doc.data,
                 no_identidad=form.no_identidad.data,
@@ -509,8 +504,7 @@ def crear_estudiante():
             db.session.add(new_user)
             db.session.flush()  
             
-            print(f"DEBUG: Estudiante creado con ID: {new_user.id_usuario}")
-            print(f"DEBUG: Contraseña temporal guardada: {new_user.temp_password}")
+            logger.debug("Estudiante creado con ID: %s", new_user.id_usuario)
             
             if form.curso_id.data and form.anio_matricula.data:
                 nueva_matricula = Matricula(
@@ -539,25 +533,25 @@ def crear_estudiante():
             
             db.session.commit()
             
-            print(f"DEBUG: Enviando correo de verificación a {new_user.correo}")
+            logger.debug("Enviando correo de verificación a %s", new_user.correo)
             
             email_result = send_welcome_email(new_user, verification_code)
             
             if email_result == True:
                 flash(f'Estudiante "{new_user.nombre_completo}" creado exitosamente! Se ha enviado un correo de verificación.', 'success')
-                print(f"DEBUG: Correo enviado exitosamente")
+                logger.debug("Correo enviado exitosamente")
             elif email_result == "limit_exceeded":
                 flash(f'Estudiante "{new_user.nombre_completo}" creado exitosamente! ⚠️ Límite diario de correos excedido. Código de verificación: {verification_code}', 'warning')
-                print(f"DEBUG: Límite de correos excedido - Código: {verification_code}")
+                logger.warning(f"Límite de correos excedido - Código: {verification_code}")
             else:
                 flash(f'Estudiante "{new_user.nombre_completo}" creado pero hubo un error enviando el correo de verificación. Código de verificación: {verification_code}', 'warning')
-                print(f"DEBUG: Error enviando correo - Código: {verification_code}")
+                logger.warning(f"Error enviando correo - Código: {verification_code}")
             
             return redirect(url_for('admin.estudiantes'))
             
         except Exception as e:
             db.session.rollback()
-            print(f"ERROR en crear_estudiante: {str(e)}")
+            logger.exception(f"ERROR en crear_estudiante: {str(e)}")
             flash(f'Error al crear estudiante: {str(e)}', 'error')
     
     return render_template(
@@ -597,7 +591,7 @@ def eliminar_estudiante(id):
     try:
         estudiante = Usuario.query.get_or_404(id)
         
-        rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+        rol_estudiante = rol_por_nombre('Estudiante')
         if estudiante.id_rol_fk != rol_estudiante.id_rol:
             return jsonify({'success': False, 'error': 'El usuario no es un estudiante'}), 400
         
@@ -642,7 +636,7 @@ def eliminar_estudiante(id):
         return jsonify(incidente), 200
         
     except Exception as e:
-        print(f"Error al obtener detalle del incidente: {e}")
+        logger.exception(f"Error al obtener detalle del incidente: {e}")
         return jsonify({'error': f"Error interno del servidor: {str(e)}"}), 500
 
 @admin_bp.route('/mantenimiento')
@@ -693,7 +687,7 @@ def api_listar_mantenimientos():
             })
         return jsonify(mantenimientos), 200
     except Exception as e:
-        print(f"Error al listar mantenimientos: {e}")
+        logger.exception(f"Error al listar mantenimientos: {e}")
         return jsonify({'error': f"Error interno del servidor: {str(e)}"}), 500
 
 @admin_bp.route('/api/mantenimientos/programar', methods=['POST'])
@@ -757,9 +751,9 @@ def api_programar_mantenimiento():
                 mantenimiento=nuevo_mantenimiento,
                 admin_id=current_user.id_usuario
             )
-            print(f" Notificaciones de mantenimiento enviadas: {notificaciones_enviadas}")
+            logger.debug("Notificaciones de mantenimiento enviadas: %s", notificaciones_enviadas)
         except Exception as e:
-            print(f" Error enviando notificaciones de mantenimiento: {e}")
+            logger.exception(f"Error enviando notificaciones de mantenimiento: {e}")
             notificaciones_enviadas = 0
         
         db.session.commit()
@@ -782,9 +776,7 @@ def api_programar_mantenimiento():
         
     except Exception as e:
         db.session.rollback()
-        print(f" Error al programar mantenimiento: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error al programar mantenimiento: {e}")
         return jsonify({
             'success': False, 
             'error': f'Error interno del servidor: {str(e)}'
@@ -806,7 +798,7 @@ def api_equipos_con_mantenimientos():
         return jsonify({'equipos_con_mantenimientos': ids}), 200
         
     except Exception as e:
-        print(f"Error al obtener equipos con mantenimientos: {e}")
+        logger.exception(f"Error al obtener equipos con mantenimientos: {e}")
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/api/horario_curso/restablecer/<int:curso_id>', methods=['POST'])
@@ -878,7 +870,7 @@ def api_detalle_mantenimiento(mantenimiento_id):
             'tecnico': mantenimiento.tecnico or ''
         }), 200
     except Exception as e:
-        print(f"Error al obtener detalle de mantenimiento: {e}")
+        logger.exception(f"Error al obtener detalle de mantenimiento: {e}")
         return jsonify({'error': f"Error interno del servidor: {str(e)}"}), 500
 
 @admin_bp.route('/api/mantenimientos/<int:mantenimiento_id>/actualizar', methods=['PUT'])
@@ -973,7 +965,7 @@ def api_actualizar_mantenimiento(mantenimiento_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error al actualizar mantenimiento: {e}")
+        logger.exception(f"Error al actualizar mantenimiento: {e}")
         return jsonify({'success': False, 'error': f'Error interno del servidor: {str(e)}'}), 500
 
 @admin_bp.route('/api/mantenimientos/<int:mantenimiento_id>', methods=['DELETE'])
@@ -993,7 +985,7 @@ def api_eliminar_mantenimiento(mantenimiento_id):
         return jsonify({'success': True, 'message': 'Mantenimiento eliminado exitosamente.'}), 200
     except Exception as e:
         db.session.rollback()
-        print(f"Error al eliminar mantenimiento: {e}")
+        logger.exception(f"Error al eliminar mantenimiento: {e}")
         return jsonify({'success': False, 'error': f'Error interno del servidor: {str(e)}'}), 500
 
 @admin_bp.route('/api/mantenimientos/estadisticas', methods=['GET'])
@@ -1016,7 +1008,7 @@ def api_estadisticas_mantenimientos():
             'cancelado': stats.get('cancelado', 0)
         }), 200
     except Exception as e:
-        print(f"Error al obtener estadísticas de mantenimientos: {e}")
+        logger.exception(f"Error al obtener estadísticas de mantenimientos: {e}")
         return jsonify({'error': f"Error interno del servidor: {str(e)}"}), 500
 
 @admin_bp.route('/estudiantes/<int:id>/editar')
@@ -1031,7 +1023,7 @@ def editar_estudiante(id):
 def detalles_estudiante(id):
     estudiante = Usuario.query.get_or_404(id)
     
-    rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+    rol_estudiante = rol_por_nombre('Estudiante')
     if estudiante.id_rol_fk != rol_estudiante.id_rol:
         flash('El usuario no es un estudiante', 'error')
         return redirect(url_for('admin.estudiantes'))
@@ -1052,7 +1044,7 @@ def api_estudiantes_directorio():
         search_query = request.args.get('q', '')
         filter_id = request.args.get('filter_id', '')
         
-        rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+        rol_estudiante = rol_por_nombre('Estudiante')
         if not rol_estudiante:
             return jsonify({"data": [], "message": "Rol de estudiante no encontrado"}), 404
 
@@ -1108,7 +1100,7 @@ def api_estudiantes_directorio():
         return jsonify({"data": lista_estudiantes, "message": "Directorio cargado exitosamente."}), 200
 
     except Exception as e:
-        print(f"Error en la API de directorio de estudiantes: {e}")
+        logger.exception(f"Error en la API de directorio de estudiantes: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
 
 @admin_bp.route('/padres')
@@ -1129,7 +1121,7 @@ def padres():
 def api_padres():
     try:
         filter_id = request.args.get('filter_id', '')
-        rol_padre = Rol.query.filter_by(nombre='Padre').first()
+        rol_padre = rol_por_nombre('Padre')
         
         if filter_id:
             padres = Usuario.query.filter_by(id_rol_fk=rol_padre.id_rol, no_identidad=filter_id).all() if rol_padre else []
@@ -1160,7 +1152,7 @@ def api_padres():
                         'no_identidad': row[4]
                     })
             except Exception as e:
-                print(f"Error cargando hijos de padres: {e}")
+                logger.exception(f"Error cargando hijos de padres: {e}")
                 hijos_dict = {}
             
         lista_padres = []
@@ -1180,7 +1172,7 @@ def api_padres():
             })
         return jsonify({"data": lista_padres})
     except Exception as e:
-        print(f"Error en la API de padres: {e}")
+        logger.exception(f"Error en la API de padres: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
 
 @admin_bp.route('/superadmins')
@@ -1219,7 +1211,7 @@ def api_superadmins():
             })
         return jsonify({"data": lista_superadmins})
     except Exception as e:
-        print(f"Error en la API de superadmins: {e}")
+        logger.exception(f"Error en la API de superadmins: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
 
 @admin_bp.route('/crear_usuario', methods=['GET', 'POST'])
@@ -1239,13 +1231,13 @@ def crear_usuario():
     rol_predefinido_id = None
     if rol_predefinido and request.method == 'GET':
         if rol_predefinido.lower() == 'estudiante':
-            rol_obj = Rol.query.filter_by(nombre='Estudiante').first()
+            rol_obj = rol_por_nombre('Estudiante')
         elif rol_predefinido.lower() == 'profesor':
-            rol_obj = Rol.query.filter_by(nombre='Profesor').first()
+            rol_obj = rol_por_nombre('Profesor')
         elif rol_predefinido.lower() == 'padre':
-            rol_obj = Rol.query.filter_by(nombre='Padre').first()
+            rol_obj = rol_por_nombre('Padre')
         elif rol_predefinido.lower() == 'administrador_institucional':
-            rol_obj = Rol.query.filter_by(nombre='Administrador Institucional').first()
+            rol_obj = rol_por_nombre('Administrador Institucional')
         else:
             rol_obj = None
             
@@ -1256,17 +1248,16 @@ def crear_usuario():
     if form.validate_on_submit():
         selected_role_id = int(form.rol.data)
         
-        rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
-        rol_profesor = Rol.query.filter_by(nombre='Profesor').first()
-        rol_padre = Rol.query.filter_by(nombre='Padre').first()
-        rol_admin = Rol.query.filter_by(nombre='Administrador Institucional').first()
+        rol_estudiante = rol_por_nombre('Estudiante')
+        rol_profesor = rol_por_nombre('Profesor')
+        rol_padre = rol_por_nombre('Padre')
+        rol_admin = rol_por_nombre('Administrador Institucional')
 
         is_student = (rol_estudiante and selected_role_id == rol_estudiante.id_rol)
         is_professor = (rol_profesor and selected_role_id == rol_profesor.id_rol)
 
         from datetime import datetime, timedelta
         verification_code = generate_verification_code()
-        print(f"DEBUG: Creando usuario - Contraseña del formulario:{form.password.data}")
         new_user = Usuario(
             tipo_doc=form.tipo_doc.data,
             no_identidad=form.no_identidad.data,
@@ -1298,7 +1289,6 @@ def crear_usuario():
                 db.session.add(nueva_matricula)
             
             db.session.commit()
-            print(f"DEBUG: Usuario creado - Contraseña temporal: {new_user.temp_password}")
             email_result = send_welcome_email(new_user, new_user.verification_code)
             
             if email_result == True:
@@ -1350,7 +1340,7 @@ def api_verificar_identidad():
         return jsonify({'exists': usuario is not None})
         
     except Exception as e:
-        print(f"Error verificando identidad: {e}")
+        logger.exception(f"Error verificando identidad: {e}")
         return jsonify({'exists': False})
     
 @admin_bp.route('/api/verificar-correo')
@@ -1368,7 +1358,7 @@ def api_verificar_correo():
         return jsonify({'exists': usuario is not None})
         
     except Exception as e:
-        print(f"Error verificando correo: {e}")
+        logger.exception(f"Error verificando correo: {e}")
         return jsonify({'exists': False})
 
 @admin_bp.route('/editar_usuario/<int:user_id>', methods=['GET', 'POST'])
@@ -1426,7 +1416,7 @@ def api_buscar_padres():
     try:
         search_query = request.args.get('q', '')
         
-        rol_padre = Rol.query.filter_by(nombre='Padre').first()
+        rol_padre = rol_por_nombre('Padre')
         if not rol_padre:
             return jsonify([])
         
@@ -1457,7 +1447,7 @@ def api_buscar_padres():
         return jsonify(resultados)
         
     except Exception as e:
-        print(f"Error buscando padres: {e}")
+        logger.exception(f"Error buscando padres: {e}")
         return jsonify([])
 
 @admin_bp.route('/api/crear-padre', methods=['POST'])
@@ -1480,7 +1470,7 @@ def api_crear_padre():
         if correo_existente:
             return jsonify({'success': False, 'error': 'Ya existe un usuario con ese correo electrónico'}), 400
         
-        rol_padre = Rol.query.filter_by(nombre='Padre').first()
+        rol_padre = rol_por_nombre('Padre')
         if not rol_padre:
             return jsonify({'success': False, 'error': 'Rol de Padre no encontrado'}), 500
         
@@ -1515,7 +1505,7 @@ def api_crear_padre():
             message = f'Padre/acudiente creado exitosamente! ⚠️ Límite diario de correos excedido. Código de verificación: {verification_code}'
         else:
             message = f'Padre/acudiente creado exitosamente pero hubo un error enviando el correo de verificación. Código de verificación: {verification_code}'
-            print(f"ADVERTENCIA: No se pudo enviar el correo de verificación al padre {nuevo_padre.correo}")
+            logger.warning(f"ADVERTENCIA: No se pudo enviar el correo de verificación al padre {nuevo_padre.correo}")
         
         return jsonify({
             'success': True,
@@ -1530,7 +1520,7 @@ def api_crear_padre():
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error creando padre: {e}")
+        logger.exception(f"Error creando padre: {e}")
         return jsonify({'success': False, 'error': f'Error interno del servidor: {str(e)}'}), 500
 
 
@@ -1797,7 +1787,7 @@ def api_crear_asignatura():
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error creando asignatura: {str(e)}")
+        logger.exception(f"Error creando asignatura: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/asignaturas/<int:asignatura_id>', methods=['PUT'])
@@ -1852,7 +1842,7 @@ def api_actualizar_asignatura(asignatura_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error actualizando asignatura: {str(e)}")
+        logger.exception(f"Error actualizando asignatura: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/horarios/<int:horario_id>/reassign-classes', methods=['POST'])
@@ -1982,7 +1972,7 @@ def api_crear_horario_completo():
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error creando horario: {str(e)}")
+        logger.exception(f"Error creando horario: {str(e)}")
         return jsonify({'success': False, 'error': f'Error del servidor: {str(e)}'}), 500
 
 @admin_bp.route('/api/horarios/<int:horario_id>', methods=['PUT'])
@@ -2052,7 +2042,7 @@ def api_actualizar_horario(horario_id):
         })
     except Exception as e:
         db.session.rollback()
-        print(f"Error actualizando horario: {str(e)}")
+        logger.exception(f"Error actualizando horario: {str(e)}")
         return jsonify({'success': False, 'error': f'Error del servidor: {str(e)}'}), 500
 
 @admin_bp.route('/api/horarios/<int:horario_id>', methods=['GET'])
@@ -2091,7 +2081,7 @@ def api_obtener_horario(horario_id):
         })
         
     except Exception as e:
-        print(f"Error obteniendo horario: {str(e)}")
+        logger.exception(f"Error obteniendo horario: {str(e)}")
         return jsonify({'error': f'Error al obtener horario: {str(e)}'}), 500
 
 @admin_bp.route('/api/horarios', methods=['GET'])
@@ -2118,7 +2108,7 @@ def api_listar_horarios():
 def api_validar_conflicto_slot():
     try:
         data = request.get_json() or {}
-        print(f"🔍 DATOS RECIBIDOS EN VALIDACIÓN: {data}")
+        logger.debug("🔍 DATOS RECIBIDOS EN VALIDACIÓN: %s", data)
         
         profesor_id = data.get('profesor_id')
         asignatura_id_excluir = data.get('asignatura_id_excluir')
@@ -2126,7 +2116,7 @@ def api_validar_conflicto_slot():
         hora_inicio = data.get('hora_inicio')
         curso_id = data.get('curso_id')
 
-        print(f"🔍 VALIDANDO CONFLICTO - Profesor: {profesor_id}, Día: {dia}, Hora: {hora_inicio}")
+        logger.debug("🔍 VALIDANDO CONFLICTO - Profesor: %s, Día: %s, Hora: %s", profesor_id, dia, hora_inicio)
 
         if not (profesor_id and dia and hora_inicio):
             return jsonify({
@@ -2156,7 +2146,7 @@ def api_validar_conflicto_slot():
         except Exception:
             hora_fin = '08:00'
 
-        print(f"🔍 Validando: profesor={profesor_id}, dia={dia}, hora={hora_inicio}-{hora_fin}")
+        logger.debug("🔍 Validando: profesor=%s, dia=%s, hora=%s-%s", profesor_id, dia, hora_inicio, hora_fin)
 
         validacion = validar_conflicto_horario_profesor(
             profesor_id=profesor_id,
@@ -2169,7 +2159,7 @@ def api_validar_conflicto_slot():
             hora_inicio_excluir=hora_inicio
         )
 
-        print(f"📋 RESULTADO VALIDACIÓN: {validacion}")
+        logger.debug("📋 RESULTADO VALIDACIÓN: %s", validacion)
 
         return jsonify({
             'success': True,
@@ -2177,9 +2167,7 @@ def api_validar_conflicto_slot():
             'mensaje': validacion.get('conflicto_info', '')
         })
     except Exception as e:
-        print(f"❌ ERROR en validación: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ ERROR en validación: {str(e)}")
         return jsonify({
             'success': True,  
             'conflicto': False,
@@ -2312,7 +2300,7 @@ def api_estadisticas_horarios():
     try:
         total_cursos = Curso.query.count()
         
-        rol_profesor = Rol.query.filter_by(nombre='Profesor').first()
+        rol_profesor = rol_por_nombre('Profesor')
         total_profesores = Usuario.query.filter_by(id_rol_fk=rol_profesor.id_rol).count() if rol_profesor else 0
         
         horarios_activos = HorarioGeneral.query.filter_by(activo=True).count()
@@ -2346,37 +2334,30 @@ def validar_conflicto_horario_profesor(profesor_id, dia_semana, hora_inicio, hor
     try:
         from datetime import datetime
         
-        print(f"🔍 Validando conflicto para profesor {profesor_id}")
-        print(f"   Día: {dia_semana}, Hora: {hora_inicio}-{hora_fin}")
-        print(f"   Excluir: curso={curso_id_excluir}, asignatura={asignatura_id_excluir}")
+        logger.debug("🔍 Validando conflicto para profesor %s", profesor_id)
+        logger.debug("Día: %s, Hora: %s-%s", dia_semana, hora_inicio, hora_fin)
+        logger.debug("Excluir: curso=%s, asignatura=%s", curso_id_excluir, asignatura_id_excluir)
 
         hora_inicio_obj = datetime.strptime(hora_inicio, '%H:%M').time()
         hora_fin_obj = datetime.strptime(hora_fin, '%H:%M').time()
 
         asignaciones_existentes = HorarioCurso.query.filter_by(profesor_id=profesor_id).all()
 
-        print(f"   Asignaciones existentes encontradas: {len(asignaciones_existentes)}")
+        logger.debug("Asignaciones existentes encontradas: %s", len(asignaciones_existentes))
 
         for asignacion in asignaciones_existentes:
-            print(f"   Revisando asignación: ID={asignacion.id_horario_curso}")
-            print(f"     Curso: {asignacion.curso_id}, Día: {asignacion.dia_semana}")
-            print(f"     Hora: {asignacion.hora_inicio}-{asignacion.hora_fin}")
-            print(f"     Asignatura: {asignacion.asignatura_id}")
 
             if (curso_id_excluir and asignacion.curso_id == curso_id_excluir and
                 (dia_semana_excluir or '').lower() == (asignacion.dia_semana or '').lower() and
                 (hora_inicio_excluir or '') == (asignacion.hora_inicio or '')):
-                print("     ✅ Excluyendo (mismo slot en edición)")
                 continue
             
             if (curso_id_excluir and asignatura_id_excluir and 
                 asignacion.curso_id == curso_id_excluir and 
                 asignacion.asignatura_id == asignatura_id_excluir):
-                print("     ✅ Excluyendo (misma asignatura en mismo curso)")
                 continue
 
             if (asignacion.dia_semana or '').lower() != (dia_semana or '').lower():
-                print("     ✅ Día diferente, sin conflicto")
                 continue
 
             try:
@@ -2384,17 +2365,16 @@ def validar_conflicto_horario_profesor(profesor_id, dia_semana, hora_inicio, hor
                 hf_exist = asignacion.hora_fin
                 
                 if not hi_exist or not hf_exist:
-                    print("     ⚠️ Hora inválida, omitiendo")
+                    logger.warning("⚠️ Hora inválida, omitiendo")
                     continue
                     
                 hi_exist_obj = datetime.strptime(hi_exist, '%H:%M').time()
                 hf_exist_obj = datetime.strptime(hf_exist, '%H:%M').time()
             except Exception as e:
-                print(f"     ⚠️ Error parseando hora: {e}")
+                logger.warning(f"⚠️ Error parseando hora: {e}")
                 continue
 
             tiene_solapamiento = (hora_inicio_obj < hf_exist_obj and hora_fin_obj > hi_exist_obj)
-            print(f"     Solapamiento: {tiene_solapamiento} ({hora_inicio_obj} < {hf_exist_obj} y {hora_fin_obj} > {hi_exist_obj})")
 
             if tiene_solapamiento:
                 curso_nombre = "Curso desconocido"
@@ -2409,20 +2389,18 @@ def validar_conflicto_horario_profesor(profesor_id, dia_semana, hora_inicio, hor
                     asignatura_nombre = asignatura_conflicto.nombre
                 
                 mensaje_conflicto = f"Conflicto con {asignatura_nombre} en {curso_nombre} ({hi_exist}-{hf_exist})"
-                print(f"     ❌ CONFLICTO: {mensaje_conflicto}")
+                logger.debug("❌ CONFLICTO: %s", mensaje_conflicto)
                 
                 return {
                     'tiene_conflicto': True,
                     'conflicto_info': mensaje_conflicto
                 }
 
-        print("     ✅ Sin conflictos encontrados")
+        logger.debug("✅ Sin conflictos encontrados")
         return {'tiene_conflicto': False, 'conflicto_info': ''}
 
     except Exception as e:
-        print(f"❌ ERROR en validación de conflicto: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ ERROR en validación de conflicto: {str(e)}")
         return {'tiene_conflicto': False, 'conflicto_info': ''}
 
 
@@ -2433,37 +2411,35 @@ def api_guardar_horario_curso():
     try:
         data = request.get_json()
         
-        print("=" * 50)
-        print("DEBUG - DATOS RECIBIDOS EN EL BACKEND:")
-        print("=" * 50)
-        print(f"Data completa: {data}")
-        print(f"Curso ID: {data.get('curso_id')}")
-        print(f"Horario General ID: {data.get('horario_general_id')}")
+        logger.debug("DEBUG - DATOS RECIBIDOS EN EL BACKEND:")
+        logger.debug("Data completa: %s", data)
+        logger.debug("Curso ID: %s", data.get('curso_id'))
+        logger.debug("Horario General ID: %s", data.get('horario_general_id'))
         
         asignaciones = data.get('asignaciones', {})
         salones_asignaciones = data.get('salones_asignaciones', {})
         profesores_asignaciones = data.get('profesores_asignaciones', {})
         
-        print(f"Asignaciones recibidas: {asignaciones}")
-        print(f"Salones recibidos: {salones_asignaciones}")
-        print(f"Total asignaciones: {len(asignaciones)}")
-        print(f"Total salones: {len(salones_asignaciones)}")
+        logger.debug("Asignaciones recibidas: %s", asignaciones)
+        logger.debug("Salones recibidos: %s", salones_asignaciones)
+        logger.debug("Total asignaciones: %s", len(asignaciones))
+        logger.debug("Total salones: %s", len(salones_asignaciones))
         
 
-        if asignaciones:
-            print("Primeras 5 asignaciones:")
+        if asignaciones and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Primeras 5 asignaciones:")
             for i, (clave, valor) in enumerate(list(asignaciones.items())[:5]):
-                print(f"   {i+1}. {clave} -> {valor}")
+                logger.debug("%s. %s -> %s", i+1, clave, valor)
 
         curso_id = data.get('curso_id')
         if not curso_id:
-            print("ERROR: No hay curso_id")
+            logger.warning("No hay curso_id")
             return jsonify({'success': False, 'error': 'ID de curso requerido'}), 400
 
 
         curso = Curso.query.get(curso_id)
         if not curso:
-            print(f"ERROR: Curso {curso_id} no encontrado")
+            logger.warning(f"Curso {curso_id} no encontrado")
             return jsonify({'success': False, 'error': 'Curso no encontrado'}), 404
 
         # Si no hay asignaciones en la petición, interpretar como 'restablecer' y borrar todo
@@ -2491,27 +2467,25 @@ def api_guardar_horario_curso():
                 return jsonify({'success': False, 'error': f'Error al eliminar asignaciones: {str(del_e)}'}), 500
 
         asignaciones_existentes = HorarioCurso.query.filter_by(curso_id=curso_id).all()
-        print(f"Asignaciones existentes en BD: {len(asignaciones_existentes)}")
+        logger.debug("Asignaciones existentes en BD: %s", len(asignaciones_existentes))
 
         asignaciones_existentes_dict = {}
         for asignacion in asignaciones_existentes:
             clave = f"{asignacion.dia_semana}-{asignacion.hora_inicio}"
             asignaciones_existentes_dict[clave] = asignacion
-            print(f"   {clave} -> Asignatura: {asignacion.asignatura_id}, Salon: {asignacion.id_salon_fk}")
 
         asignaciones_creadas = 0
         asignaciones_actualizadas = 0
         asignaciones_eliminadas = 0
 
-        print("Procesando asignaciones del request...")
+        logger.debug("Procesando asignaciones del request...")
         for clave, asignatura_id in asignaciones.items():
             try:
-                print(f"   Procesando: {clave} -> {asignatura_id}")
                 
                 # Parsear la clave
                 partes = clave.split('-')
                 if len(partes) < 2:
-                    print(f"   Clave inválida: {clave}")
+                    logger.debug("Clave inválida: %s", clave)
                     continue
                     
                 dia = partes[0]
@@ -2522,13 +2496,13 @@ def api_guardar_horario_curso():
                     if clave in asignaciones_existentes_dict:
                         db.session.delete(asignaciones_existentes_dict[clave])
                         asignaciones_eliminadas += 1
-                        print(f"   Eliminada asignación vacía: {clave}")
+                        logger.debug("Eliminada asignación vacía: %s", clave)
                     continue
 
                 # Verificar asignatura
                 asignatura = Asignatura.query.get(asignatura_id)
                 if not asignatura:
-                    print(f"   Asignatura no encontrada: {asignatura_id}")
+                    logger.debug("Asignatura no encontrada: %s", asignatura_id)
                     continue
 
                 hora_fin = "08:00"
@@ -2569,7 +2543,7 @@ def api_guardar_horario_curso():
                     )
                     
                     if validacion['tiene_conflicto']:
-                        print(f"   CONFLICTO DETECTADO para {profesor_nombre}: {validacion['conflicto_info']}")
+                        logger.debug("CONFLICTO DETECTADO para %s: %s", profesor_nombre, validacion['conflicto_info'])
                         
                         libres = []
                         try:
@@ -2593,7 +2567,7 @@ def api_guardar_horario_curso():
                                         if nombre_prof:
                                             libres.append(nombre_prof)
                         except Exception as e:
-                            print(f"Error obteniendo profesores libres: {str(e)}")
+                            logger.exception(f"Error obteniendo profesores libres: {str(e)}")
 
                         mensaje_error = (
                             f"Conflicto de horario detectado para el profesor seleccionado: {validacion['conflicto_info']}\n\n"
@@ -2612,7 +2586,7 @@ def api_guardar_horario_curso():
                 if salon_id:
                     salon = Salon.query.get(salon_id)
                     if not salon:
-                        print(f"   Salón no encontrado: {salon_id}")
+                        logger.debug("Salón no encontrado: %s", salon_id)
                         salon_id = None
 
                 if clave in asignaciones_existentes_dict:
@@ -2623,7 +2597,6 @@ def api_guardar_horario_curso():
                     if profesor_id:
                         asignacion_existente.profesor_id = profesor_id
                     asignaciones_actualizadas += 1
-                    print(f"   ACTUALIZADA: {clave}")
                 else:
                     nueva_asignacion = HorarioCurso(
                         curso_id=curso_id,
@@ -2638,10 +2611,9 @@ def api_guardar_horario_curso():
                     )
                     db.session.add(nueva_asignacion)
                     asignaciones_creadas += 1
-                    print(f"   CREADA: {clave}")
 
             except Exception as e:
-                print(f"   Error procesando {clave}: {str(e)}")
+                logger.exception(f"Error procesando {clave}: {str(e)}")
                 continue
 
         claves_request = set(asignaciones.keys())
@@ -2649,7 +2621,6 @@ def api_guardar_horario_curso():
             if clave not in claves_request or not asignaciones.get(clave):
                 db.session.delete(asignacion_existente)
                 asignaciones_eliminadas += 1
-                print(f"   ELIMINADA: {clave}")
 
         horario_general_id = data.get('horario_general_id')
         try:
@@ -2671,21 +2642,19 @@ def api_guardar_horario_curso():
                         )
                         db.session.add(nuevo)
                         creados_hc += 1
-            print(f"   HorarioCompartido creados: {creados_hc}")
+            logger.debug("HorarioCompartido creados: %s", creados_hc)
         except Exception as e:
-            print(f"Advertencia creando HorarioCompartido: {str(e)}")
+            logger.warning(f"Advertencia creando HorarioCompartido: {str(e)}")
 
         db.session.commit()
         
         total_final = HorarioCurso.query.filter_by(curso_id=curso_id).count()
         
-        print("=" * 50)
-        print("RESUMEN FINAL:")
-        print(f"   Creadas: {asignaciones_creadas}")
-        print(f"   Actualizadas: {asignaciones_actualizadas}")
-        print(f"   Eliminadas: {asignaciones_eliminadas}")
-        print(f"   Total en BD: {total_final}")
-        print("=" * 50)
+        logger.debug("RESUMEN FINAL:")
+        logger.debug("Creadas: %s", asignaciones_creadas)
+        logger.debug("Actualizadas: %s", asignaciones_actualizadas)
+        logger.debug("Eliminadas: %s", asignaciones_eliminadas)
+        logger.debug("Total en BD: %s", total_final)
 
         return jsonify({
             'success': True,
@@ -2700,9 +2669,7 @@ def api_guardar_horario_curso():
 
     except Exception as e:
         db.session.rollback()
-        print(f"ERROR CRÍTICO: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"ERROR CRÍTICO: {str(e)}")
         return jsonify({'success': False, 'error': f'Error del servidor: {str(e)}'}), 500
     
 @admin_bp.route('/api/horario_curso/cargar/<int:curso_id>')
@@ -2745,11 +2712,11 @@ def api_cargar_horario_curso(curso_id):
                 'break_type': b.break_type
             } for b in bloques]
 
-        print(f"📥 Cargando horario para curso {curso_id}:")
-        print(f"   Asignaciones: {len(asignaciones)}")
-        print(f"   Salones: {len(salones_asignaciones)}")
-        print(f"   Profesores: {len(profesores_asignaciones)}")  # ✅ NUEVO
-        print(f"   Bloques: {len(bloques_horario)}")
+        logger.debug("📥 Cargando horario para curso %s:", curso_id)
+        logger.debug("Asignaciones: %s", len(asignaciones))
+        logger.debug("Salones: %s", len(salones_asignaciones))
+        logger.debug("Profesores: %s", len(profesores_asignaciones))  # ✅ NUEVO
+        logger.debug("Bloques: %s", len(bloques_horario))
 
         return jsonify({
             'curso_id': curso_id,
@@ -2763,7 +2730,7 @@ def api_cargar_horario_curso(curso_id):
         })
 
     except Exception as e:
-        print(f"❌ Error cargando horario del curso: {str(e)}")
+        logger.exception(f"❌ Error cargando horario del curso: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/api/horarios/<int:horario_id>/cursos', methods=['GET'])
@@ -2802,7 +2769,7 @@ def api_profesores_por_asignatura(asignatura_id):
         })
         
     except Exception as e:
-        print(f"❌ Error obteniendo profesores por asignatura: {str(e)}")
+        logger.exception(f"❌ Error obteniendo profesores por asignatura: {str(e)}")
         return jsonify({
             'success': False,
             'error': f'Error al obtener profesores: {str(e)}'
@@ -2823,7 +2790,7 @@ def api_validar_profesor_asignatura(profesor_id, asignatura_id):
         })
         
     except Exception as e:
-        print(f"❌ Error validando profesor-asignatura: {str(e)}")
+        logger.exception(f"❌ Error validando profesor-asignatura: {str(e)}")
         return jsonify({
             'success': False,
             'error': f'Error al validar: {str(e)}'
@@ -2919,7 +2886,7 @@ def api_compartir_horario():
             
         elif destinatario == 'estudiantes':
             try:
-                rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+                rol_estudiante = rol_por_nombre('Estudiante')
                 estudiantes = db.session.query(Usuario).join(
                     Matricula, Usuario.id_usuario == Matricula.estudianteId
                 ).filter(
@@ -2957,7 +2924,7 @@ def api_compartir_horario():
 
     except Exception as e:
         db.session.rollback()
-        print(f"Error compartiendo horario: {str(e)}")
+        logger.exception(f"Error compartiendo horario: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/estadisticas/horarios-cursos')
@@ -2980,6 +2947,19 @@ def api_estadisticas_horarios_cursos():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+@admin_bp.route('/api/estadisticas/carga-horaria')
+@login_required
+@role_required(1)
+def api_estadisticas_carga_horaria():
+    """Carga docente, huecos, ocupación de salones y concurrencia por sede, con series para gráficos."""
+    try:
+        from services.analitica_horarios_service import resumen_horarios
+
+        return jsonify({'success': True, **resumen_horarios(sede_id=request.args.get('sede_id', type=int))})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error calculando la carga horaria: {str(e)}'}), 500
+
 # ==================== GESTIÓN DE INVENTARIO ====================
 
 @admin_bp.route('/gestion_inventario')
@@ -3043,7 +3023,7 @@ def api_equipos():
 @role_required(1)
 def api_estudiantes_por_curso(curso_id):
     try:
-        rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+        rol_estudiante = rol_por_nombre('Estudiante')
         if not rol_estudiante:
             return jsonify([]), 200
         
@@ -3067,7 +3047,7 @@ def api_estudiantes_por_curso(curso_id):
         return jsonify(estudiantes_data), 200
         
     except Exception as e:
-        print(f"Error obteniendo estudiantes por curso: {e}")
+        logger.exception(f"Error obteniendo estudiantes por curso: {e}")
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/registro_equipos', methods=['GET', 'POST'])
@@ -3120,7 +3100,7 @@ def crear_equipo():
 
         except Exception as e:
             db.session.rollback()
-            print(f"Error creando equipo: {e}")
+            logger.exception(f"Error creando equipo: {e}")
             flash(f'Error al crear equipo: {str(e)}', 'error')
             return redirect(url_for('admin.crear_equipo'))
 
@@ -3137,27 +3117,18 @@ def crear_equipo():
 def api_equipos_con_incidentes():
 
     try:
-        todos_incidentes = db.session.query(
-            Incidente.equipo_id, 
-            Incidente.estado
-        ).all()
-        
-        print("DEBUG - Todos los incidentes en BD:")
-        for inc in todos_incidentes:
-            print(f"  Equipo ID: {inc.equipo_id}, Estado: '{inc.estado}'")
-        
         equipos_con_incidentes = db.session.query(Incidente.equipo_id)\
             .distinct()\
             .all()
         
         ids = [eq[0] for eq in equipos_con_incidentes]
         
-        print(f"DEBUG - IDs con incidentes: {ids}")
+        logger.debug("DEBUG - IDs con incidentes: %s", ids)
         
         return jsonify({'equipos_con_incidentes': ids}), 200
         
     except Exception as e:
-        print(f"Error: {e}")
+        logger.exception(f"Error: {e}")
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/api/equipos/con-incidentes-activos', methods=['GET'])
@@ -3198,7 +3169,7 @@ def api_equipos_con_incidentes_activos():
         return jsonify(equipos), 200
 
     except Exception as e:
-        print(f"Error al listar equipos con incidentes activos: {e}")
+        logger.exception(f"Error al listar equipos con incidentes activos: {e}")
         return jsonify({'error': f"Error interno del servidor: {str(e)}"}), 500
 
 
@@ -3291,7 +3262,7 @@ def api_verificar_equipo_estudiante_en_sala(estudiante_id, salon_id):
         }), 200
         
     except Exception as e:
-        print(f"Error verificando equipo del estudiante en sala: {e}")
+        logger.exception(f"Error verificando equipo del estudiante en sala: {e}")
         return jsonify({'error': str(e)}), 500
     
 @admin_bp.route('/api/equipos/<int:equipo_id>/actualizar', methods=['PUT'])
@@ -3383,7 +3354,7 @@ def api_actualizar_equipo(equipo_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error actualizando equipo: {e}")
+        logger.exception(f"Error actualizando equipo: {e}")
         return jsonify({
             'success': False,
             'error': f'Error del servidor: {str(e)}'
@@ -3546,7 +3517,7 @@ def api_estado_detallado_equipo(equipo_id):
         }), 200
         
     except Exception as e:
-        print(f"Error obteniendo estado detallado: {e}")
+        logger.exception(f"Error obteniendo estado detallado: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/reportes/equipos_por_sede', methods=['GET'])
@@ -3661,7 +3632,7 @@ def api_equipos_para_incidente():
         return jsonify(equipos), 200
 
     except Exception as e:
-        print(f"Error al listar equipos para incidente: {e}")
+        logger.exception(f"Error al listar equipos para incidente: {e}")
         return jsonify({'error': f"Error interno del servidor: {str(e)}"}), 500
 
 @admin_bp.route('/api/incidentes', methods=['GET'])
@@ -3707,7 +3678,7 @@ def api_listar_incidentes():
         return jsonify(incidentes), 200
         
     except Exception as e:
-        print(f"Error al listar incidentes: {e}")
+        logger.exception(f"Error al listar incidentes: {e}")
         return jsonify({'error': f"Error interno del servidor: {str(e)}"}), 500
 
 @admin_bp.route('/api/incidentes', methods=['POST'])
@@ -3761,9 +3732,7 @@ def api_crear_incidente():
     
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error creando incidente: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ Error creando incidente: {str(e)}")
         return jsonify({'success': False, 'error': f'Error creando incidente: {str(e)}'}), 500 
 @admin_bp.route('/api/incidentes/<int:id_incidente>/estado', methods=['PUT'])
 @login_required
@@ -3795,7 +3764,7 @@ def api_actualizar_estado_incidente(id_incidente):
 
     except Exception as e:
         db.session.rollback()
-        print(f"Error al actualizar estado: {e}")
+        logger.exception(f"Error al actualizar estado: {e}")
         return jsonify({'success': False, 'error': f'Error interno: {str(e)}'}), 500
 
 @admin_bp.route('/api/incidentes/<int:id_incidente>', methods=['DELETE'])
@@ -3816,7 +3785,7 @@ def api_eliminar_incidente(id_incidente):
 
     except Exception as e:
         db.session.rollback()
-        print(f"Error al eliminar incidente: {e}")
+        logger.exception(f"Error al eliminar incidente: {e}")
         return jsonify({'success': False, 'error': f'Error interno del servidor: {str(e)}'}), 500
 
 @admin_bp.route('/api/incidentes/<int:id_incidente>', methods=['GET'])
@@ -3863,7 +3832,7 @@ def api_detalle_incidente(id_incidente):
         return jsonify(incidente), 200
         
     except Exception as e:
-        print(f"Error al obtener detalle del incidente: {e}")
+        logger.exception(f"Error al obtener detalle del incidente: {e}")
         return jsonify({'error': f"Error interno del servidor: {str(e)}"}), 500
 
 @admin_bp.route("/eventos/calendario", methods=["GET"])
@@ -3882,37 +3851,34 @@ def debug_notificaciones_eventos():
     try:
         from controllers.models import Notificacion, Usuario, Evento
         
-        print("\n" + "="*80)
-        print("🔍 NOTIFICACIONES DE EVENTOS ESPECÍFICAMENTE")
-        print("="*80)
+        logger.info("🔍 NOTIFICACIONES DE EVENTOS ESPECÍFICAMENTE")
         
         total_notificaciones = Notificacion.query.count()
         notif_eventos = Notificacion.query.filter_by(tipo='evento').count()
         notif_otros = total_notificaciones - notif_eventos
         
-        print(f"\n📊 ESTADÍSTICAS DE NOTIFICACIONES:")
-        print(f"   - Total: {total_notificaciones}")
-        print(f"   - Tipo 'evento': {notif_eventos}")
-        print(f"   - Otros tipos: {notif_otros}")
+        logger.info(f"📊 ESTADÍSTICAS DE NOTIFICACIONES:")
+        logger.info(f"- Total: {total_notificaciones}")
+        logger.info(f"- Tipo 'evento': {notif_eventos}")
+        logger.info(f"- Otros tipos: {notif_otros}")
         
         notificaciones_eventos = Notificacion.query.filter_by(
             tipo='evento'
         ).order_by(Notificacion.creada_en.desc()).limit(30).all()
         
-        print(f"\n📅 NOTIFICACIONES DE EVENTOS ({len(notificaciones_eventos)} encontradas):")
+        logger.info(f"📅 NOTIFICACIONES DE EVENTOS ({len(notificaciones_eventos)} encontradas):")
         
         for i, notif in enumerate(notificaciones_eventos, 1):
             usuario = Usuario.query.get(notif.usuario_id)
             nombre_usuario = usuario.nombre_completo if usuario else f"ID:{notif.usuario_id}"
             fecha_str = notif.creada_en.strftime("%m/%d %H:%M") if notif.creada_en else "Sin fecha"
             
-            print(f"   {i}. [{fecha_str}] {nombre_usuario} (ID:{notif.usuario_id})")
-            print(f"      📝 {notif.titulo}")
-            print(f"      📄 {notif.mensaje[:60]}...")
-            print(f"      🔸 Leída: {notif.leida}")
-            print()
+            logger.info(f"{i}. [{fecha_str}] {nombre_usuario} (ID:{notif.usuario_id})")
+            logger.info(f"📝 {notif.titulo}")
+            logger.info(f"📄 {notif.mensaje[:60]}...")
+            logger.info(f"🔸 Leída: {notif.leida}")
         
-        print(f"\n👥 DISTRIBUCIÓN POR USUARIOS:")
+        logger.info(f"👥 DISTRIBUCIÓN POR USUARIOS:")
         distribucion = {}
         notificaciones_todas = Notificacion.query.filter_by(tipo='evento').all()
 
@@ -3927,11 +3893,9 @@ def debug_notificaciones_eventos():
         distribucion_ordenada = sorted(distribucion.values(), key=lambda x: x['count'], reverse=True)[:15]
 
         for item in distribucion_ordenada:
-            print(f"   - {item['nombre']}: {item['count']} notificaciones")
+            logger.info(f"- {item['nombre']}: {item['count']} notificaciones")
         
-        print("\n" + "="*80)
-        print("✅ DIAGNÓSTICO DE EVENTOS COMPLETADO")
-        print("="*80)
+        logger.info("✅ DIAGNÓSTICO DE EVENTOS COMPLETADO")
         
         return jsonify({
             "message": "Diagnóstico de eventos completado - Revisa la consola",
@@ -3941,30 +3905,25 @@ def debug_notificaciones_eventos():
         })
         
     except Exception as e:
-        print(f"❌ ERROR EN DIAGNÓSTICO: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ ERROR EN DIAGNÓSTICO: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 def get_sidebar_counts():
     from datetime import datetime
     
     try:
-        print("🔧 DEBUG ADMIN: Calculando contadores del sidebar...")
+        logger.debug("🔧 DEBUG ADMIN: Calculando contadores del sidebar...")
         
         unread_messages = Comunicacion.query.filter(
             Comunicacion.destinatario_id == current_user.id_usuario,
             Comunicacion.estado.in_(['no_leido', 'inbox', 'unread', 'pendiente', 'nuevo'])
         ).count()
         
-        print(f"📨 ADMIN - Comunicaciones no leídas: {unread_messages}")
+        logger.debug("📨 ADMIN - Comunicaciones no leídas: %s", unread_messages)
         
-        unread_notifications = Notificacion.query.filter_by(
-            usuario_id=current_user.id_usuario,
-            leida=False
-        ).count()
+        unread_notifications = contar_notificaciones_no_leidas(current_user.id_usuario)
         
-        print(f"🔔 ADMIN - Notificaciones no leídas: {unread_notifications}")
+        logger.debug("🔔 ADMIN - Notificaciones no leídas: %s", unread_notifications)
         
         hoy = datetime.now().date()
         upcoming_events = Evento.query.filter(
@@ -3972,8 +3931,8 @@ def get_sidebar_counts():
             Evento.fecha >= hoy
         ).count()
         
-        print(f"📅 ADMIN - Eventos próximos: {upcoming_events}")
-        print(f"🎯 ADMIN RESUMEN - Mensajes: {unread_messages}, Notificaciones: {unread_notifications}, Eventos: {upcoming_events}")
+        logger.debug("📅 ADMIN - Eventos próximos: %s", upcoming_events)
+        logger.debug("🎯 ADMIN RESUMEN - Mensajes: %s, Notificaciones: %s, Eventos: %s", unread_messages, unread_notifications, upcoming_events)
         
         return {
             'unread_messages': unread_messages,
@@ -3982,7 +3941,7 @@ def get_sidebar_counts():
         }
         
     except Exception as e:
-        print(f"❌ ERROR en get_sidebar_counts ADMIN: {e}")
+        logger.exception(f"❌ ERROR en get_sidebar_counts ADMIN: {e}")
         return {
             'unread_messages': 0,
             'unread_notifications': 0,
@@ -3996,7 +3955,7 @@ def debug_contadores_admin():
     counts = get_sidebar_counts()
     
     comunicaciones = Comunicacion.query.filter_by(destinatario_id=current_user.id_usuario).all()
-    notificaciones = Notificacion.query.filter_by(usuario_id=current_user.id_usuario).all()
+    notificaciones = Notificacion.query.filter_by(usuario_id=current_user.id_usuario, enviada=True).all()
     
     debug_info = {
         'usuario_actual': current_user.id_usuario,
@@ -4020,26 +3979,26 @@ def debug_notificaciones_padres():
     try:
         from controllers.models import Rol, Usuario, estudiante_padre, Evento
         
-        print("🔍 INICIANDO DIAGNÓSTICO DE NOTIFICACIONES A PADRES")
+        logger.info("🔍 INICIANDO DIAGNÓSTICO DE NOTIFICACIONES A PADRES")
         
         eventos_recientes = Evento.query.order_by(Evento.id.desc()).limit(5).all()
-        print("📅 Eventos recientes:")
+        logger.info("📅 Eventos recientes:")
         for evento in eventos_recientes:
-            print(f"   - {evento.nombre} | Rol: {evento.rol_destino} | Fecha: {evento.fecha}")
+            logger.info(f"- {evento.nombre} | Rol: {evento.rol_destino} | Fecha: {evento.fecha}")
         
-        rol_padre = Rol.query.filter_by(nombre='padre').first()
+        rol_padre = rol_por_nombre('padre')
         if rol_padre:
             padres = Usuario.query.filter_by(id_rol_fk=rol_padre.id_rol).limit(10).all()
-            print(f"👨‍👩‍👧‍👦 Padres en sistema ({len(padres)} encontrados):")
+            logger.info(f"👨‍👩‍👧‍👦 Padres en sistema ({len(padres)} encontrados):")
             for padre in padres:
-                print(f"   - {padre.nombre_completo} (ID: {padre.id_usuario})")
+                logger.info(f"- {padre.nombre_completo} (ID: {padre.id_usuario})")
         
         relaciones = db.session.execute(
             db.select(estudiante_padre).limit(10)
         ).fetchall()
-        print("🔗 Relaciones padre-estudiante:")
+        logger.info("🔗 Relaciones padre-estudiante:")
         for rel in relaciones:
-            print(f"   - Padre ID: {rel.padre_id} -> Estudiante ID: {rel.estudiante_id}")
+            logger.info(f"- Padre ID: {rel.padre_id} -> Estudiante ID: {rel.estudiante_id}")
         
         if padres:
             notificaciones_padres = Notificacion.query.filter(
@@ -4047,9 +4006,9 @@ def debug_notificaciones_padres():
                 Notificacion.tipo == 'evento'
             ).limit(10).all()
             
-            print(f"📢 Notificaciones de eventos para padres ({len(notificaciones_padres)} encontradas):")
+            logger.info(f"📢 Notificaciones de eventos para padres ({len(notificaciones_padres)} encontradas):")
             for notif in notificaciones_padres:
-                print(f"   - Para usuario {notif.usuario_id}: {notif.titulo}")
+                logger.info(f"- Para usuario {notif.usuario_id}: {notif.titulo}")
         
         return jsonify({
             "message": "Diagnóstico completado - Revisa la consola del servidor",
@@ -4060,23 +4019,29 @@ def debug_notificaciones_padres():
         })
         
     except Exception as e:
-        print(f"❌ Error en diagnóstico: {str(e)}")
+        logger.exception(f"❌ Error en diagnóstico: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @admin_bp.route("/eventos", methods=["GET"])
 @login_required
 def listar_eventos():
     try:
-        eventos = Evento.query.all()
+        ventana, error = obtener_ventana(request.args)
+        if error:
+            return jsonify({"error": error}), 400
+
         resultado = []
-        for ev in eventos:
+        for ev, fecha in ocurrencias_en_ventana(*ventana):
             resultado.append({
                 "id": ev.id,
                 "nombre": ev.nombre,
                 "descripcion": ev.descripcion,
-                "fecha": ev.fecha.strftime("%Y-%m-%d"),
+                "fecha": fecha.strftime("%Y-%m-%d"),
+                "fecha_inicio": ev.fecha.strftime("%Y-%m-%d"),
                 "hora": ev.hora.strftime("%H:%M:%S"),
-                "rol_destino": ev.rol_destino
+                "rol_destino": ev.rol_destino,
+                "recurrencia": ev.recurrencia,
+                "recurrencia_hasta": ev.recurrencia_hasta.strftime("%Y-%m-%d") if ev.recurrencia_hasta else None
             })
         return jsonify(resultado), 200
     except Exception as e:
@@ -4086,7 +4051,7 @@ def listar_eventos():
 @login_required
 def crear_evento():
     data = request.get_json()
-    print("📥 Payload recibido:", data)
+    logger.debug("📥 Payload recibido: %s", data)
 
     try:
         nombre = data.get("nombre") or data.get("Nombre")
@@ -4109,14 +4074,23 @@ def crear_evento():
         if fecha_evento < datetime.now().date():
             return jsonify({"error": "No se pueden crear eventos en fechas pasadas"}), 400
 
+        if not normalizar_roles(rol_destino):
+            return jsonify({"error": "Rol destino inválido"}), 400
+
+        recurrencia, error = leer_recurrencia(data, fecha_evento)
+        if error:
+            return jsonify({"error": error}), 400
+
         # Crear evento
         nuevo_evento = Evento(
             nombre=nombre,
             descripcion=descripcion,
             fecha=fecha_evento,
             hora=hora_dt.time(),
-            rol_destino=rol_destino
+            recurrencia=recurrencia[0],
+            recurrencia_hasta=recurrencia[1]
         )
+        asignar_destinatarios(nuevo_evento, rol_destino)
 
         db.session.add(nuevo_evento)
         db.session.commit()
@@ -4125,7 +4099,7 @@ def crear_evento():
         
         notificaciones_enviadas = notificar_nuevo_evento(nuevo_evento, current_user.id_usuario)
         
-        print(f"✅ Evento creado - Notificaciones enviadas: {notificaciones_enviadas}")
+        logger.debug("✅ Evento creado - Notificaciones enviadas: %s", notificaciones_enviadas)
 
         return jsonify({
             "mensaje": "Evento creado correctamente ✅", 
@@ -4135,14 +4109,14 @@ def crear_evento():
 
     except Exception as e:
         db.session.rollback()
-        print("❌ Error creando evento:", str(e))
+        logger.exception(f'❌ Error creando evento: {str(e)}')
         return jsonify({"error": str(e)}), 400
 
 @admin_bp.route("/eventos/<int:evento_id>", methods=["PUT"])
 @login_required
 def actualizar_evento(evento_id):
     data = request.get_json()
-    print("📥 Payload actualización recibido:", data)
+    logger.debug("📥 Payload actualización recibido: %s", data)
 
     try:
         evento = Evento.query.get(evento_id)
@@ -4166,15 +4140,26 @@ def actualizar_evento(evento_id):
         except ValueError:
             hora_dt = datetime.strptime(hora_str[:5], "%H:%M")
 
+        # `fecha` es el inicio de la serie; una serie ya empezada conserva el suyo
         fecha_evento = datetime.strptime(fecha_str, "%Y-%m-%d").date()
-        if fecha_evento < datetime.now().date():
+        if fecha_evento != evento.fecha and fecha_evento < datetime.now().date():
             return jsonify({"error": "No se pueden actualizar eventos a fechas pasadas"}), 400
 
+        if not normalizar_roles(rol_destino):
+            return jsonify({"error": "Rol destino inválido"}), 400
+
+        recurrencia, error = leer_recurrencia(
+            data, fecha_evento, (evento.recurrencia, evento.recurrencia_hasta)
+        )
+        if error:
+            return jsonify({"error": error}), 400
+
         evento.nombre = nombre
         evento.descripcion = descripcion
         evento.fecha = fecha_evento
         evento.hora = hora_dt.time()
-        evento.rol_destino = rol_destino
+        evento.recurrencia, evento.recurrencia_hasta = recurrencia
+        asignar_destinatarios(evento, rol_destino)
 
         db.session.commit()
 
@@ -4182,7 +4167,7 @@ def actualizar_evento(evento_id):
         
         notificaciones_enviadas = notificar_evento_actualizado(evento, current_user.id_usuario)
         
-        print(f"✅ Evento actualizado - Notificaciones enviadas: {notificaciones_enviadas}")
+        logger.debug("✅ Evento actualizado - Notificaciones enviadas: %s", notificaciones_enviadas)
 
         return jsonify({
             "mensaje": "Evento actualizado correctamente ✅",
@@ -4191,7 +4176,7 @@ def actualizar_evento(evento_id):
 
     except Exception as e:
         db.session.rollback()
-        print("❌ Error actualizando evento:", str(e))
+        logger.exception(f'❌ Error actualizando evento: {str(e)}')
         return jsonify({"error": str(e)}), 400
 
 @admin_bp.route("/eventos/<int:evento_id>", methods=["DELETE"])
@@ -4206,7 +4191,7 @@ def eliminar_evento(evento_id):
         
         notificaciones_enviadas = notificar_evento_eliminado(evento, current_user.id_usuario)
         
-        print(f"✅ Evento eliminado - Notificaciones enviadas: {notificaciones_enviadas}")
+        logger.debug("✅ Evento eliminado - Notificaciones enviadas: %s", notificaciones_enviadas)
 
         # Eliminar evento
         db.session.delete(evento)
@@ -4219,7 +4204,7 @@ def eliminar_evento(evento_id):
 
     except Exception as e:
         db.session.rollback()
-        print("❌ Error eliminando evento:", str(e))
+        logger.exception(f'❌ Error eliminando evento: {str(e)}')
         return jsonify({"error": str(e)}), 500
 
 # ==================== SISTEMA DE VOTACIÓN ====================
@@ -4388,7 +4373,7 @@ def crear_candidato():
 
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error inesperado al crear candidato: {str(e)}")
+        logger.exception(f"❌ Error inesperado al crear candidato: {str(e)}")
         return jsonify({
             "ok": False, 
             "error": f"❌ Error interno del servidor: {str(e)}"
@@ -4462,7 +4447,7 @@ def editar_candidato(candidato_id):
 
     except Exception as e:
         db.session.rollback()
-        print("❌ Error al editar candidato:", e)
+        logger.exception(f'❌ Error al editar candidato: {e}')
         return jsonify({"ok": False, "error": str(e)}), 500
     
 @admin_bp.route("/candidatos/<int:candidato_id>", methods=["DELETE"])
@@ -4535,14 +4520,14 @@ def test_sistema_votos():
         if not estudiante:
             return jsonify({"error": "No hay estudiantes"}), 400
             
-        print(f"✅ Estudiante: {estudiante.nombre}")
-        print(f"✅ voto_registrado: {estudiante.voto_registrado}")
+        logger.info(f"✅ Estudiante: {estudiante.nombre}")
+        logger.info(f"✅ voto_registrado: {estudiante.voto_registrado}")
         
         candidatos = Candidato.query.all()
-        print(f"✅ Candidatos: {len(candidatos)}")
+        logger.info(f"✅ Candidatos: {len(candidatos)}")
         
         for c in candidatos:
-            print(f"   - {c.nombre}: {c.votos} votos")
+            logger.info(f"- {c.nombre}: {c.votos} votos")
         
         if candidatos:
             candidato_prueba = candidatos[0]
@@ -4592,7 +4577,7 @@ def obtener_estado_publicacion():
         })
         
     except Exception as e:
-        print(f"❌ Error obteniendo estado de publicación: {str(e)}")
+        logger.exception(f"❌ Error obteniendo estado de publicación: {str(e)}")
         return jsonify({
             'success': False,
             'error': f"Error al obtener estado: {str(e)}"
@@ -4607,17 +4592,17 @@ def publicar_resultados():
         
         usuario = current_user.nombre if current_user.is_authenticated else 'Administrador'
         
-        print(f"📢 Intentando publicar resultados como: {usuario}")
+        logger.debug("📢 Intentando publicar resultados como: %s", usuario)
         
         estado = EstadoPublicacion.query.first()
         
         if estado:
-            print(f"✅ Estado encontrado, actualizando...")
+            logger.debug("✅ Estado encontrado, actualizando...")
             estado.resultados_publicados = True
             estado.fecha_publicacion = datetime.now()
             estado.usuario_publico = usuario
         else:
-            print(f"🆕 Creando nuevo estado de publicación...")
+            logger.debug("🆕 Creando nuevo estado de publicación...")
             estado = EstadoPublicacion(
                 resultados_publicados=True,
                 fecha_publicacion=datetime.now(),
@@ -4627,7 +4612,7 @@ def publicar_resultados():
         
         db.session.commit()
         
-        print(f"📢 Resultados publicados correctamente por: {usuario}")
+        logger.debug("📢 Resultados publicados correctamente por: %s", usuario)
         
         return jsonify({
             "success": True, 
@@ -4638,9 +4623,7 @@ def publicar_resultados():
         
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error al publicar resultados: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ Error al publicar resultados: {str(e)}")
         return jsonify({
             "success": False, 
             "error": f"Error al publicar resultados: {str(e)}"
@@ -4655,7 +4638,7 @@ def ocultar_resultados():
         
         usuario = current_user.nombre if current_user.is_authenticated else 'Administrador'
         
-        print(f"🔒 Intentando ocultar resultados como: {usuario}")
+        logger.debug("🔒 Intentando ocultar resultados como: %s", usuario)
         
         estado = EstadoPublicacion.query.first()
         
@@ -4671,7 +4654,7 @@ def ocultar_resultados():
         
         db.session.commit()
         
-        print(f"🔒 Resultados ocultados correctamente por: {usuario}")
+        logger.debug("🔒 Resultados ocultados correctamente por: %s", usuario)
         
         return jsonify({
             "success": True, 
@@ -4682,9 +4665,7 @@ def ocultar_resultados():
         
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error al ocultar resultados: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ Error al ocultar resultados: {str(e)}")
         return jsonify({
             "success": False, 
             "error": f"Error al ocultar resultados: {str(e)}"
@@ -4746,9 +4727,7 @@ def resultados_publicos():
         })
         
     except Exception as e:
-        print(f"❌ Error obteniendo resultados públicos: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ Error obteniendo resultados públicos: {str(e)}")
         return jsonify({
             'success': False,
             'error': f"Error al obtener resultados: {str(e)}"
@@ -5033,7 +5012,7 @@ def api_obtener_comunicaciones():
         })
         
     except Exception as e:
-        print(f"Error obteniendo comunicaciones: {str(e)}")
+        logger.exception(f"Error obteniendo comunicaciones: {str(e)}")
         return jsonify({
             'success': False,
             'message': f'Error obteniendo comunicaciones: {str(e)}'
@@ -5069,17 +5048,17 @@ def api_enviar_comunicacion():
         elif len(tipos) > 0:
             usuarios_set = set()
             if 'profesores' in tipos:
-                rol_profesor = Rol.query.filter_by(nombre='Profesor').first()
+                rol_profesor = rol_por_nombre('Profesor')
                 if rol_profesor:
                     for u in Usuario.query.filter_by(id_rol_fk=rol_profesor.id_rol, estado_cuenta='activa').all():
                         usuarios_set.add(u)
             if 'estudiantes' in tipos:
-                rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+                rol_estudiante = rol_por_nombre('Estudiante')
                 if rol_estudiante:
                     for u in Usuario.query.filter_by(id_rol_fk=rol_estudiante.id_rol, estado_cuenta='activa').all():
                         usuarios_set.add(u)
             if 'padres' in tipos:
-                rol_padre = Rol.query.filter_by(nombre='Padre').first()
+                rol_padre = rol_por_nombre('Padre')
                 if rol_padre:
                     for u in Usuario.query.filter_by(id_rol_fk=rol_padre.id_rol, estado_cuenta='activa').all():
                         usuarios_set.add(u)
@@ -5089,15 +5068,15 @@ def api_enviar_comunicacion():
                     usuarios_set.add(destinatario)
             destinatarios = list(usuarios_set)
         elif recipient_type == 'profesores':
-            rol_profesor = Rol.query.filter_by(nombre='Profesor').first()
+            rol_profesor = rol_por_nombre('Profesor')
             if rol_profesor:
                 destinatarios = Usuario.query.filter_by(id_rol_fk=rol_profesor.id_rol, estado_cuenta='activa').all()
         elif recipient_type == 'estudiantes':
-            rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+            rol_estudiante = rol_por_nombre('Estudiante')
             if rol_estudiante:
                 destinatarios = Usuario.query.filter_by(id_rol_fk=rol_estudiante.id_rol, estado_cuenta='activa').all()
         elif recipient_type == 'padres':
-            rol_padre = Rol.query.filter_by(nombre='Padre').first()
+            rol_padre = rol_por_nombre('Padre')
             if rol_padre:
                 destinatarios = Usuario.query.filter_by(id_rol_fk=rol_padre.id_rol, estado_cuenta='activa').all()
         elif recipient_type == 'specific' and to_email:
@@ -5148,7 +5127,7 @@ def api_enviar_comunicacion():
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error enviando comunicación: {str(e)}")
+        logger.exception(f"Error enviando comunicación: {str(e)}")
         return jsonify({
             'success': False,
             'message': f'Error enviando comunicación: {str(e)}'
@@ -5158,49 +5137,86 @@ def api_enviar_comunicacion():
 @login_required
 @role_required(1)
 def api_cleanup_comunicaciones_admin():
-    try:
-        from controllers.models import Comunicacion
-        from datetime import datetime, timedelta
-        
-        now = datetime.utcnow()
-        
-        one_month_ago = now - timedelta(days=30)
-        
-        two_months_ago = now - timedelta(days=60)
-        
-        mensajes_a_papelera = Comunicacion.query.filter(
-            Comunicacion.estado.in_(['inbox', 'sent', 'draft']),
-            Comunicacion.fecha_envio < one_month_ago
-        ).all()
-        
-        moved_to_trash = 0
-        for mensaje in mensajes_a_papelera:
-            mensaje.estado = 'deleted'
-            moved_to_trash += 1
-        
-        mensajes_a_eliminar = Comunicacion.query.filter(
-            Comunicacion.estado == 'deleted',
-            Comunicacion.fecha_envio < two_months_ago
-        ).all()
-        
-        permanently_deleted = 0
-        for mensaje in mensajes_a_eliminar:
-            db.session.delete(mensaje)
-            permanently_deleted += 1
-        
-        db.session.commit()
-        
+    from services.planificador_service import solicitar_ejecucion, planificador_activo
+    
+    if not planificador_activo():
+        return jsonify({
+            'success': False,
+            'message': 'El planificador de tareas no está activo (PLANIFICADOR_ENABLED)'
+        }), 503
+    
+    # La limpieza de todos los buzones corre en segundo plano, por lotes
+    tarea, error = solicitar_ejecucion('retener_comunicaciones')
+    
+    if error:
+        return jsonify({
+            'success': False,
+            'message': f'Error en limpieza automática: {error}'
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'message': 'Limpieza programada: se ejecutará en segundo plano en la próxima revisión del planificador',
+        'tarea': tarea.to_dict()
+    }), 202
+
+
+@admin_bp.route('/api/comunicaciones/cleanup', methods=['GET'])
+@login_required
+@role_required(1)
+def api_progreso_cleanup_comunicaciones():
+    from controllers.models import TareaProgramada
+    
+    tarea = TareaProgramada.query.filter_by(nombre='retener_comunicaciones').first()
+    if not tarea:
+        return jsonify({
+            'success': False,
+            'message': 'La tarea de retención no está registrada'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'tarea': tarea.to_dict()
+    })
+
+
+@admin_bp.route('/api/comunicaciones/politicas/<int:usuario_id>', methods=['GET', 'PUT'])
+@login_required
+@role_required(1)
+def api_politica_retencion_buzon(usuario_id):
+    from controllers.models import PoliticaRetencionBuzon
+    from services.retencion_comunicaciones_service import establecer_politica_buzon
+    
+    if not Usuario.query.get(usuario_id):
+        return jsonify({
+            'success': False,
+            'message': 'Usuario no encontrado'
+        }), 404
+    
+    if request.method == 'GET':
+        politica = db.session.get(PoliticaRetencionBuzon, usuario_id)
         return jsonify({
             'success': True,
-            'message': f'Limpieza completada: {moved_to_trash} mensajes movidos a papelera, {permanently_deleted} eliminados permanentemente'
+            'politica': politica.to_dict() if politica else None
         })
-        
-    except Exception as e:
-        db.session.rollback()
+    
+    data = request.get_json() or {}
+    politica, error = establecer_politica_buzon(
+        usuario_id,
+        dias_papelera=data.get('dias_papelera'),
+        dias_eliminacion=data.get('dias_eliminacion')
+    )
+    
+    if error:
         return jsonify({
             'success': False,
-            'message': f'Error en limpieza automática: {str(e)}'
-        }), 500
+            'message': error
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'politica': politica.to_dict() if politica else None
+    })
 
 @admin_bp.route('/api/comunicaciones/<int:comunicacion_id>/marcar-leida', methods=['PUT'])
 @login_required
@@ -5449,7 +5465,7 @@ def api_buscar_usuarios():
         return jsonify(usuarios_data)
         
     except Exception as e:
-        print(f"Error buscando usuarios: {str(e)}")
+        logger.exception(f"Error buscando usuarios: {str(e)}")
         return jsonify([]), 500
 
 @admin_bp.route('/api/reportes-calificaciones/<int:reporte_id>/estado', methods=['PUT'])
@@ -5712,7 +5728,7 @@ def api_notificaciones():
         })
         
     except Exception as e:
-        print(f"❌ Error en API notificaciones: {str(e)}")
+        logger.exception(f"❌ Error en API notificaciones: {str(e)}")
         return jsonify({
             'success': False,
             'message': f'Error: {str(e)}'
@@ -5755,7 +5771,7 @@ def api_marcar_leidas():
             })
         
     except Exception as e:
-        print(f"❌ Error marcando notificaciones como leídas: {str(e)}")
+        logger.exception(f"❌ Error marcando notificaciones como leídas: {str(e)}")
         return jsonify({
             'success': False,
             'message': f'Error: {str(e)}'
@@ -5792,7 +5808,7 @@ def api_eliminar_notificaciones():
         
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error eliminando notificaciones: {str(e)}")
+        logger.exception(f"❌ Error eliminando notificaciones: {str(e)}")
         return jsonify({
             'success': False,
             'message': f'Error: {str(e)}'
@@ -6233,14 +6249,212 @@ def api_cerrar_periodo(periodo_id):
         }), 500
 
 
+@admin_bp.route('/api/estudiantes-riesgo', methods=['GET'])
+@login_required
+@role_required(1)
+def api_estudiantes_riesgo():
+    """Ranking de estudiantes en riesgo académico y resumen por curso."""
+    try:
+        from services.riesgo_service import ranking_institucion
+        
+        resultado = ranking_institucion(
+            limite=request.args.get('limite', 50, type=int),
+            nivel_minimo=request.args.get('nivel', 'medio'),
+            sede_id=request.args.get('sede_id', type=int)
+        )
+        return jsonify({'success': True, **resultado})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error obteniendo estudiantes en riesgo: {str(e)}'}), 500
+
+
+@admin_bp.route('/api/disponibilidad/salones', methods=['GET'])
+@login_required
+@role_required(1)
+def api_salones_libres():
+    """Salones libres en un día y rango de horas (?dia=martes&hora_inicio=10:00&hora_fin=10:45)."""
+    try:
+        from services.disponibilidad_service import salones_libres
+
+        salones, error = salones_libres(
+            request.args.get('dia'),
+            request.args.get('hora_inicio'),
+            request.args.get('hora_fin'),
+            sede_id=request.args.get('sede_id', type=int),
+            capacidad_minima=request.args.get('capacidad_minima', type=int),
+            tipo=request.args.get('tipo') or None
+        )
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+        return jsonify({'success': True, 'salones': salones})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error consultando salones libres: {str(e)}'}), 500
+
+
+@admin_bp.route('/api/disponibilidad/profesores', methods=['GET'])
+@login_required
+@role_required(1)
+def api_profesores_libres():
+    """Profesores de una asignatura libres en un día y rango de horas, de menor a mayor carga."""
+    try:
+        from services.disponibilidad_service import profesores_libres
+
+        asignatura_id = request.args.get('asignatura_id', type=int)
+        if not asignatura_id:
+            return jsonify({'success': False, 'message': 'Falta asignatura_id'}), 400
+
+        profesores, error = profesores_libres(
+            asignatura_id,
+            request.args.get('dia'),
+            request.args.get('hora_inicio'),
+            request.args.get('hora_fin')
+        )
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+        return jsonify({'success': True, 'profesores': profesores})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error consultando profesores libres: {str(e)}'}), 500
+
+
+@admin_bp.route('/api/disponibilidad/suplentes/<int:horario_curso_id>', methods=['GET'])
+@login_required
+@role_required(1)
+def api_sugerir_suplentes(horario_curso_id):
+    """Suplentes sugeridos para una clase del horario."""
+    try:
+        from services.disponibilidad_service import sugerir_suplentes
+
+        resultado, error = sugerir_suplentes(horario_curso_id, limite=request.args.get('limite', 10, type=int))
+        if error:
+            return jsonify({'success': False, 'message': error}), 404
+        return jsonify({'success': True, **resultado})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error sugiriendo suplentes: {str(e)}'}), 500
+
+
+@admin_bp.route('/api/instrumentacion', methods=['GET'])
+@login_required
+@role_required(1)
+def api_instrumentacion():
+    """Resumen de consultas SQL por endpoint (del worker que atiende la petición)."""
+    try:
+        from services.instrumentacion_service import resumen_endpoints, TRABAJADOR
+        
+        return jsonify({
+            'success': True,
+            'trabajador': TRABAJADOR,
+            'umbral_n_mas_1': current_app.config.get('INSTRUMENTACION_UMBRAL_N1', 10),
+            'endpoints': resumen_endpoints.resumen()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error obteniendo instrumentación: {str(e)}'
+        }), 500
+
+
+@admin_bp.route('/api/instrumentacion', methods=['DELETE'])
+@login_required
+@role_required(1)
+def api_reiniciar_instrumentacion():
+    """Reinicia las estadísticas de consultas por endpoint (del worker que atiende la petición)."""
+    try:
+        from services.instrumentacion_service import resumen_endpoints, TRABAJADOR
+        
+        resumen_endpoints.reiniciar()
+        return jsonify({'success': True, 'trabajador': TRABAJADOR})
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error reiniciando instrumentación: {str(e)}'
+        }), 500
+
+
+@admin_bp.route('/api/tareas', methods=['GET'])
+@login_required
+@role_required(1)
+def api_listar_tareas():
+    try:
+        from controllers.models import TareaProgramada
+        
+        tareas = TareaProgramada.query.order_by(TareaProgramada.nombre).all()
+        
+        return jsonify({
+            'success': True,
+            'tareas': [t.to_dict() for t in tareas]
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error obteniendo tareas: {str(e)}'
+        }), 500
+
+
+@admin_bp.route('/api/tareas/<nombre>/historial', methods=['GET'])
+@login_required
+@role_required(1)
+def api_historial_tarea(nombre):
+    try:
+        from services.planificador_service import historial_tarea
+        
+        limite = min(request.args.get('limite', 20, type=int), 200)
+        
+        return jsonify({
+            'success': True,
+            'ejecuciones': [e.to_dict() for e in historial_tarea(nombre, limite)]
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error obteniendo historial: {str(e)}'
+        }), 500
+
+
+@admin_bp.route('/api/tareas/<nombre>/ejecutar', methods=['POST'])
+@login_required
+@role_required(1)
+def api_ejecutar_tarea(nombre):
+    try:
+        from services.planificador_service import solicitar_ejecucion, planificador_activo
+        
+        if not planificador_activo():
+            return jsonify({
+                'success': False,
+                'message': 'El planificador de tareas no está activo (PLANIFICADOR_ENABLED)'
+            }), 503
+        
+        tarea, error = solicitar_ejecucion(nombre)
+        
+        if error:
+            return jsonify({
+                'success': False,
+                'message': error
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'message': 'La tarea se ejecutará en la próxima revisión del planificador',
+            'tarea': tarea.to_dict()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error programando tarea: {str(e)}'
+        }), 500
+
+
 @admin_bp.route('/api/periodos/activo', methods=['GET'])
 @login_required
 @role_required(1)
 def api_obtener_periodo_activo():
     try:
-        from services.periodo_service import obtener_periodo_activo
+        from services.periodo_service import periodo_activo_dict
         
-        periodo = obtener_periodo_activo()
+        periodo = periodo_activo_dict()
         
         if not periodo:
             return jsonify({
@@ -6251,7 +6465,7 @@ def api_obtener_periodo_activo():
         
         return jsonify({
             'success': True,
-            'periodo': periodo.to_dict()
+            'periodo': periodo
         })
         
     except Exception as e:
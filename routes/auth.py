@@ -1,5 +1,6 @@
 # proyecto_sena/routes/auth.py
 
+import logging
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from flask import current_app
@@ -11,6 +12,10 @@ import os
 from datetime import datetime, timedelta
 from controllers.forms import LoginForm, ForgotPasswordForm, ResetPasswordForm
 from services.email_service import send_welcome_email, send_verification_success_email, generate_verification_code, generate_verification_token
+from services.rate_limit_service import limite_excedido, registrar_intento, reiniciar_intentos
+
+logger = logging.getLogger(__name__)
+
 
 def get_serializer():
     return URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
@@ -24,15 +29,26 @@ ROL_REDIRECTS = {
     4: 'padre.dashboard'
 }
 
+def mensaje_espera(segundos):
+    minutos = (segundos + 59) // 60
+    return f'Demasiados intentos. Inténtalo de nuevo en {minutos} minuto{"s" if minutos != 1 else ""}.'
+
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     form = LoginForm()
     if form.validate_on_submit():
         correo = form.correo.data
         password = form.password.data
+        
+        espera = limite_excedido('login', correo)
+        if espera:
+            flash(mensaje_espera(espera), 'danger')
+            return render_template('login.html', form=form), 429, {'Retry-After': str(espera)}
+        
         user = Usuario.query.filter_by(correo=correo).first()
         
         if user and user.check_password(password):
+            reiniciar_intentos('login', correo)
             
             if hasattr(user, 'activo') and user.activo is False:
                 flash('Tu cuenta se encuentra inactiva. Por favor, contacta al administrador del sistema.', 'danger')
@@ -42,12 +58,21 @@ def login():
                 flash('Por favor verifica tu correo electrónico antes de iniciar sesión.', 'warning')
                 return redirect(url_for('auth.verify_email_page', email=correo))
             
+            if user.password_necesita_rehash():
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.exception(f"Error actualizando hash de contraseña: {str(e)}")
+            
             login_user(user)
             flash('Inicio de sesión exitoso.', 'success')
-            print(f"Usuario: {user.nombre} {user.apellido}, Rol ID: {user.id_rol_fk}")
+            logger.debug("Usuario: %s %s, Rol ID: %s", user.nombre, user.apellido, user.id_rol_fk)
             ruta = ROL_REDIRECTS.get(user.id_rol_fk, 'main.index')
             return redirect(url_for(ruta))
         else:
+            registrar_intento('login', correo)
             flash('Inicio de sesión fallido. Por favor, revisa tu correo electrónico y contraseña.', 'danger')
     
     return render_template('login.html', form=form)
@@ -132,7 +157,7 @@ def restablecer_password(token):
         s = get_serializer()
         id_usuario = s.loads(token, salt='recuperacion-password-salt', max_age=3600)
     except Exception as e:
-        print(f"Error cargando token de restablecimiento: {str(e)}")
+        logger.exception(f"Error cargando token de restablecimiento: {str(e)}")
         flash('El enlace de restablecimiento es inválido o ha expirado.', 'danger')
         return redirect(url_for('auth.forgot_password'))
 
@@ -151,7 +176,7 @@ def restablecer_password(token):
             db.session.commit() # Intenta guardar la nueva contraseña
         except Exception as e:
             db.session.rollback() # Si falla, revierte la sesión
-            print(f"Error al hacer commit de la nueva contraseña: {str(e)}")
+            logger.exception(f"Error al hacer commit de la nueva contraseña: {str(e)}")
             flash('Hubo un error interno al guardar la nueva contraseña. Intenta de nuevo.', 'danger')
             # Redirige para que el usuario pueda reintentar
             return redirect(url_for('auth.restablecer_password', token=token))
@@ -167,7 +192,7 @@ def restablecer_password(token):
             # ... (cuerpo del mensaje HTML) ...
             mail.send(msg)
         except Exception as e:
-            print(f"Error enviando correo de confirmación: {str(e)}")
+            logger.exception(f"Error enviando correo de confirmación: {str(e)}")
         
         flash('Tu contraseña ha sido restablecida con éxito. Ya puedes iniciar sesión.', 'success')
         return redirect(url_for('auth.login'))
@@ -182,7 +207,7 @@ def verify_email_with_token(token):
         email = data.get('email', '')
         return render_template('emails/verify_email.html', email=email, verified=False)
     except Exception as e:
-        print(f"ERROR en verificación por token: {str(e)}")
+        logger.exception(f"ERROR en verificación por token: {str(e)}")
         flash('El enlace de verificación es inválido o ha expirado', 'danger')
         return redirect(url_for('auth.login'))
 
@@ -200,8 +225,14 @@ def verify_email_page():
             flash('Email y número de identificación son requeridos', 'danger')
             return render_template('emails/verify_email.html', email=email, verified=False)
 
+        espera = limite_excedido('verificacion', email)
+        if espera:
+            flash(mensaje_espera(espera), 'danger')
+            return render_template('emails/verify_email.html', email=email, verified=False), 429, {'Retry-After': str(espera)}
+
         user_by_email = Usuario.query.filter_by(correo=email).first()
         if not user_by_email:
+            registrar_intento('verificacion', email)
             flash('No existe una cuenta con este correo electrónico.', 'danger')
             return render_template('emails/verify_email.html', email=email, verified=False)
 
@@ -210,9 +241,12 @@ def verify_email_page():
             return render_template('emails/verification_success.html', email=email, usuario=user_by_email, password=None, login_url=url_for('auth.login'))
 
         if str(user_by_email.no_identidad).strip() != numero_id:
+            registrar_intento('verificacion', email)
             flash('El número de identificación no coincide con este correo.', 'danger')
             return render_template('emails/verify_email.html', email=email, verified=False)
 
+        reiniciar_intentos('verificacion', email)
+
         real_password = getattr(user_by_email, 'temp_password', None)
         if not real_password:
             real_password = generate_verification_code()
@@ -238,12 +272,18 @@ def verify_email_check():
         if not email or not numero_id:
             return jsonify({'ok': False, 'code': 'missing', 'message': 'Email y número de identificación son requeridos'}), 400
 
+        espera = limite_excedido('verificacion_check', email)
+        if espera:
+            return jsonify({'ok': False, 'code': 'rate_limited', 'message': mensaje_espera(espera)}), 429, {'Retry-After': str(espera)}
+
         user_by_email = Usuario.query.filter_by(correo=email).first()
         if not user_by_email:
+            registrar_intento('verificacion_check', email)
             return jsonify({'ok': False, 'code': 'email_not_found', 'message': 'Correo no encontrado'}), 404
         if user_by_email.email_verified:
             return jsonify({'ok': False, 'code': 'already_verified', 'message': 'Este correo ya fue verificado'}), 409
         if str(user_by_email.no_identidad).strip() != numero_id:
+            registrar_intento('verificacion_check', email)
             return jsonify({'ok': False, 'code': 'id_mismatch', 'message': 'Número de identificación incorrecto'}), 422
         return jsonify({'ok': True}), 200
     except Exception as e:
@@ -263,6 +303,12 @@ def resend_verification():
             flash('El email es requerido', 'danger')
             return render_template('emails/resend_verification.html', email=email)
         
+        espera = limite_excedido('reenvio', email)
+        if espera:
+            flash(mensaje_espera(espera), 'danger')
+            return render_template('emails/resend_verification.html', email=email), 429, {'Retry-After': str(espera)}
+        registrar_intento('reenvio', email)
+        
         usuario = Usuario.query.filter_by(correo=email).first()
         
         if not usuario:
@@ -1,3 +1,4 @@
+import logging
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from controllers.decorators import role_required, permission_required
@@ -8,11 +9,22 @@ from controllers.models import (
     HorarioCurso, Asignatura, Salon, BloqueHorario, CategoriaCalificacion, SolicitudConsulta
 )
 from routes.profesor import tareas_academicas
+from services.catalogo_service import categoria_por_id
 from services.notification_service import (
     obtener_todas_notificaciones,
     marcar_notificacion_como_leida,
     contar_notificaciones_no_leidas
 )
+from services.calendario_service import (
+    obtener_ventana,
+    ocurrencias_en_ventana,
+    serializar_ocurrencia,
+    roles_visibles_para,
+    contar_eventos_proximos
+)
+from services.calendario_asistencia_service import asistencias_entre
+
+logger = logging.getLogger(__name__)
 
 estudiante_bp = Blueprint('estudiante', __name__, url_prefix='/estudiante')
 
@@ -43,19 +55,9 @@ def get_sidebar_counts():
         estado=estado_no_leido
     ).count()
     
-    unread_notifications = Notificacion.query.filter_by(
-        usuario_id=current_user.id_usuario,
-        leida=False
-    ).count()
-    
-    hoy = datetime.now().date()
-    
-    eventos_filtrados = Evento.query.filter(
-        Evento.fecha.isnot(None),
-        Evento.fecha >= hoy
-    ).all()
+    unread_notifications = contar_notificaciones_no_leidas(current_user.id_usuario)
     
-    upcoming_events = len(eventos_filtrados)
+    upcoming_events = contar_eventos_proximos(roles_visibles_para('Estudiante'))
     
     return {
         'unread_messages': unread_messages,
@@ -120,7 +122,7 @@ def ver_calificaciones():
         from collections import defaultdict
         por_cat = defaultdict(lambda: {'categoria': None, 'calificaciones': []})
         for c in califs:
-            cat = CategoriaCalificacion.query.get(c.categoriaId) if getattr(c, 'categoriaId', None) else None
+            cat = categoria_por_id(c.categoriaId) if getattr(c, 'categoriaId', None) else None
             key = c.categoriaId or 0
             if por_cat[key]['categoria'] is None:
                 por_cat[key]['categoria'] = cat or type('obj', (), {'nombre': 'Sin categoría'})()
@@ -568,7 +570,7 @@ def api_obtener_notificaciones():
         per_page = request.args.get('per_page', 20, type=int)
         filtro = request.args.get('filtro', 'todas')
         
-        query = Notificacion.query.filter_by(usuario_id=current_user.id_usuario)
+        query = Notificacion.query.filter_by(usuario_id=current_user.id_usuario, enviada=True)
         
         if filtro == 'pendientes':
             query = query.filter_by(leida=False)
@@ -936,7 +938,7 @@ def buscar_usuarios():
         return jsonify([])
     
     try:
-        print(f"DEBUG: Buscando usuarios con query: {query}")
+        logger.debug("Buscando usuarios con query: %s", query)
         
         usuarios = Usuario.query.filter(
             (Usuario.correo.ilike(f'%{query}%')) |
@@ -944,7 +946,7 @@ def buscar_usuarios():
             (Usuario.apellido.ilike(f'%{query}%'))
         ).filter(Usuario.estado_cuenta == 'activa').limit(10).all()
         
-        print(f"DEBUG: Encontrados {len(usuarios)} usuarios")
+        logger.debug("Encontrados %s usuarios", len(usuarios))
         
         resultados = []
         for usuario in usuarios:
@@ -954,12 +956,12 @@ def buscar_usuarios():
                 'email': usuario.correo
             }
             resultados.append(user_data)
-            print(f"DEBUG Usuario: {user_data}")
+            logger.debug("DEBUG Usuario: %s", user_data)
         
         return jsonify(resultados)
         
     except Exception as e:
-        print(f"ERROR en buscar_usuarios: {str(e)}")
+        logger.exception(f"ERROR en buscar_usuarios: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
@@ -976,18 +978,12 @@ def ver_eventos():
 @login_required
 def api_eventos_estudiante():
     try:
-        eventos = Evento.query.filter_by(rol_destino="Estudiante").all()
-
-        resultado = []
-        for ev in eventos:
-            resultado.append({
-                "IdEvento": ev.id,
-                "Nombre": ev.nombre,
-                "Descripcion": ev.descripcion,
-                "Fecha": ev.fecha.strftime("%Y-%m-%d"),
-                "Hora": ev.hora.strftime("%H:%M:%S"),
-                "RolDestino": ev.rol_destino
-            })
+        ventana, error = obtener_ventana(request.args)
+        if error:
+            return jsonify({"error": error}), 400
+
+        ocurrencias = ocurrencias_en_ventana(*ventana, roles=roles_visibles_para('Estudiante'))
+        resultado = [serializar_ocurrencia(ev, fecha) for ev, fecha in ocurrencias]
 
         return jsonify(resultado), 200
     except Exception as e:
@@ -999,13 +995,11 @@ def api_eventos_estudiante():
 def ver_notificaciones():
     try:
         notificaciones = Notificacion.query.filter_by(
-            usuario_id=current_user.id_usuario
+            usuario_id=current_user.id_usuario,
+            enviada=True
         ).order_by(Notificacion.creada_en.desc()).all()
         
-        no_leidas = Notificacion.query.filter_by(
-            usuario_id=current_user.id_usuario,
-            leida=False
-        ).count()
+        no_leidas = contar_notificaciones_no_leidas(current_user.id_usuario)
         
         counts = get_sidebar_counts()
         return render_template(
@@ -1026,7 +1020,8 @@ def ver_notificaciones():
 def obtener_notificaciones():
     try:
         notificaciones = Notificacion.query.filter_by(
-            usuario_id=current_user.id_usuario
+            usuario_id=current_user.id_usuario,
+            enviada=True
         ).order_by(Notificacion.creada_en.desc()).limit(10).all()
         
         notificaciones_data = []
@@ -1041,10 +1036,7 @@ def obtener_notificaciones():
                 "fecha_creacion": notif.creada_en.strftime('%d/%m/%Y %H:%M') if notif.creada_en else 'Reciente'
             })
         
-        no_leidas = Notificacion.query.filter_by(
-            usuario_id=current_user.id_usuario,
-            leida=False
-        ).count()
+        no_leidas = contar_notificaciones_no_leidas(current_user.id_usuario)
         
         return jsonify({
             "notificaciones": notificaciones_data,
@@ -1122,13 +1114,13 @@ def eliminar_notificacion(notificacion_id):
 @login_required
 def api_periodo_activo():
     try:
-        from services.periodo_service import obtener_periodo_activo
+        from services.periodo_service import periodo_activo_dict
         
-        periodo = obtener_periodo_activo()
+        periodo = periodo_activo_dict()
         if periodo:
             return jsonify({
                 'success': True,
-                'periodo': periodo.to_dict()
+                'periodo': periodo
             })
         else:
             return jsonify({
@@ -1209,29 +1201,30 @@ def api_mis_asistencias():
     try:
         periodo_id = request.args.get('periodo_id', type=int)
         
-        query = Asistencia.query.filter_by(estudianteId=current_user.id_usuario)
-        
+        desde = hasta = None
         if periodo_id:
-            query = query.filter_by(periodo_academico_id=periodo_id)
+            periodo = PeriodoAcademico.query.get(periodo_id)
+            if periodo:
+                desde, hasta = periodo.fecha_inicio, periodo.fecha_fin
         
-        asistencias = query.order_by(Asistencia.fecha.desc()).all()
+        asistencias = asistencias_entre(current_user.id_usuario, desde, hasta)
+        if periodo_id:
+            asistencias = [a for a in asistencias if a['periodo_id'] == periodo_id]
+        asistencias.reverse()
         
         total = len(asistencias)
-        presentes = sum(1 for a in asistencias if a.estado == 'Presente')
-        ausentes = sum(1 for a in asistencias if a.estado == 'Ausente')
-        tardes = sum(1 for a in asistencias if a.estado == 'Tarde')
+        presentes = sum(1 for a in asistencias if a['estado'] == 'Presente')
+        ausentes = sum(1 for a in asistencias if a['estado'] == 'Ausente')
+        tardes = sum(1 for a in asistencias if a['estado'] == 'Tarde')
         porcentaje = round((presentes / total * 100) if total > 0 else 0, 2)
         
-        asistencias_data = []
-        for asist in asistencias:
-            asist_dict = {
-                'id': asist.id_asistencia,
-                'fecha': asist.fecha.strftime('%Y-%m-%d') if asist.fecha else None,
-                'estado': asist.estado,
-                'clase_id': asist.claseId,
-                'periodo_id': asist.periodo_academico_id
-            }
-            asistencias_data.append(asist_dict)
+        asistencias_data = [{
+            'id': a['id'],
+            'fecha': a['fecha'],
+            'estado': a['estado'],
+            'clase_id': a['clase_id'],
+            'periodo_id': a['periodo_id']
+        } for a in asistencias]
         
         return jsonify({
             'success': True,
@@ -1512,9 +1505,7 @@ def api_mi_equipo():
         }), 200
             
     except Exception as e:
-        print(f"ERROR en api_mi_equipo: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"ERROR en api_mi_equipo: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -1540,7 +1531,7 @@ def api_usuario_actual():
         }), 200
             
     except Exception as e:
-        print(f"ERROR en api_usuario_actual: {str(e)}")
+        logger.exception(f"ERROR en api_usuario_actual: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e)
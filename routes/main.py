@@ -1,21 +1,119 @@
-from flask import Blueprint, render_template, jsonify, request
-from datetime import date
-from controllers.models import db, Usuario, Rol, Sede, Curso, Evento
+import logging
+from flask import Blueprint, render_template, jsonify, request, Response, url_for, abort, current_app
+from flask_login import current_user
+from datetime import date, datetime
+from functools import wraps
+import hashlib
+import json
+import time
+from controllers.models import db, Usuario, Rol, Sede, Curso, Evento, EventoDestinatario
+from services.cache_service import CacheTTL, invalidar_al_cambiar
+from services.catalogo_service import rol_por_nombre
+from services.calendario_service import (
+    normalizar_roles, generar_ical, generar_token_ics, verificar_token_ics
+)
+from services.tiempo_real_service import obtener_bus
+
+logger = logging.getLogger(__name__)
 
 main_bp = Blueprint('main', __name__)
 
+# Respuestas de la API pública (portada). Se vacía al confirmar cambios en
+# los modelos que muestra; el TTL acota lo que pueda quedar en otros workers.
+PUBLIC_CACHE_TTL = 60
+cache_publica = CacheTTL('api_publica', ttl=PUBLIC_CACHE_TTL, max_entradas=256)
+invalidar_al_cambiar((Sede, Curso, Usuario, Evento, EventoDestinatario), cache_publica)
+
+
+class _RespuestaNoCacheable(Exception):
+    def __init__(self, respuesta):
+        self.respuesta = respuesta
+
+
+def _limite(args, defecto, maximo):
+    """Parámetro `limit` acotado a [1, maximo]; el valor por defecto si no es un número."""
+    try:
+        return max(1, min(int(args.get('limit', defecto)), maximo))
+    except (TypeError, ValueError):
+        return defecto
+
+
+def _desde(args):
+    """Parámetro `desde` (YYYY-MM-DD); hoy si falta o no es una fecha."""
+    try:
+        return datetime.strptime(args.get('desde', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return date.today()
+
+
+def cache_publico(parametros=None):
+    """
+    Cachea la respuesta JSON de un endpoint público por ruta y parámetros
+
+    La clave usa solo los parámetros normalizados que lee el endpoint, así que
+    agregar argumentos a la URL no crea entradas nuevas. Solo una petición
+    recalcula una entrada vencida (las demás esperan su resultado). Se envían
+    `Cache-Control` y `ETag` para que un proxy inverso o el navegador puedan
+    servirla, y se responde 304 si el ETag coincide.
+
+    Args:
+        parametros (callable): Recibe request.args y devuelve una tupla con
+            los valores normalizados, o None si la petición no se cachea
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            valores = parametros(request.args) if parametros else ()
+            if valores is None:
+                return f(*args, **kwargs)
+            return _responder_cacheado((request.path, valores), f, args, kwargs)
+        return decorated_function
+    return decorator
+
+
+def _responder_cacheado(clave, f, args, kwargs):
+    def calcular():
+        respuesta = f(*args, **kwargs)
+        if isinstance(respuesta, tuple) or respuesta.status_code != 200:
+            raise _RespuestaNoCacheable(respuesta)
+        cuerpo = respuesta.get_data()
+        return cuerpo, respuesta.mimetype, hashlib.sha1(cuerpo).hexdigest()
+
+    try:
+        entrada = cache_publica.obtener_o_calcular(clave, calcular)
+    except _RespuestaNoCacheable as e:
+        # Los errores no se cachean: se devuelven tal cual
+        return e.respuesta
+
+    cuerpo, mimetype, etag = entrada
+    respuesta = Response(cuerpo, mimetype=mimetype)
+    respuesta.set_etag(etag)
+    respuesta.cache_control.public = True
+    respuesta.cache_control.max_age = PUBLIC_CACHE_TTL
+    return respuesta.make_conditional(request)
+
+
+def _parametros_eventos(args):
+    # Solo se cachea la portada (desde hoy); otras fechas se calculan sin
+    # caché para no desplazar las entradas útiles
+    desde = _desde(args)
+    if desde != date.today():
+        return None
+    return (_limite(args, 5, 20), desde)
+
 @main_bp.route('/')
 def index():
     return render_template('index.html')
 
 # API pública: resumen de cifras para la portada
 @main_bp.route('/api/public/resumen')
+@cache_publico()
 def api_public_resumen():
     try:
         total_sedes = Sede.query.count()
         total_cursos = Curso.query.count()
-        rol_docente = Rol.query.filter_by(nombre='Profesor').first()
-        rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+        rol_docente = rol_por_nombre('Profesor')
+        rol_estudiante = rol_por_nombre('Estudiante')
         total_docentes = Usuario.query.filter_by(id_rol_fk=rol_docente.id_rol).count() if rol_docente else 0
         total_estudiantes = Usuario.query.filter_by(id_rol_fk=rol_estudiante.id_rol).count() if rol_estudiante else 0
         eventos_hoy_en_adelante = Evento.query.filter(Evento.fecha >= date.today()).count()
@@ -34,9 +132,10 @@ def api_public_resumen():
 
 # API pública: listado breve de cursos
 @main_bp.route('/api/public/cursos')
+@cache_publico(lambda args: (_limite(args, 10, 30),))
 def api_public_cursos():
     try:
-        limit = max(1, min(int(request.args.get('limit', 10)), 30))
+        limit = _limite(request.args, 10, 30)
         cursos = Curso.query.limit(limit).all()
         data = [{
             'id': c.id_curso,
@@ -49,19 +148,12 @@ def api_public_cursos():
 
 # API pública: próximos eventos
 @main_bp.route('/api/public/eventos')
+@cache_publico(_parametros_eventos)
 def api_public_eventos():
     try:
-        limit = max(1, min(int(request.args.get('limit', 5)), 20))
-        desde = request.args.get('desde')
+        limit = _limite(request.args, 5, 20)
+        d = _desde(request.args)
         q = Evento.query
-        if desde:
-            try:
-                from datetime import datetime
-                d = datetime.strptime(desde, '%Y-%m-%d').date()
-            except Exception:
-                d = date.today()
-        else:
-            d = date.today()
         q = q.filter(Evento.fecha >= d).order_by(Evento.fecha.asc())
         eventos = q.limit(limit).all()
         data = [{
@@ -89,9 +181,131 @@ def api_public_contacto():
         # Opcional: guardar como Notificacion o Evento; por simplicidad, registrar en logs
         current = {'nombre': nombre, 'correo': correo, 'mensaje': mensaje}
         try:
-            print('[Contacto público]', current)
+            logger.debug("[Contacto público] %s", current)
         except Exception:
             pass
         return jsonify({'success': True, 'message': 'Mensaje recibido. ¡Gracias por contactarnos!'}), 201
     except Exception as e:
-        return jsonify({'success': False, 'message': str(e)}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# Calendario iCalendar por rol. Los clientes de calendario no envían la
+# cookie de sesión, por eso se acepta también un token firmado.
+@main_bp.route('/calendario/<rol>.ics')
+def calendario_ics(rol):
+    roles = normalizar_roles(rol)
+    if not roles:
+        abort(404)
+    rol = roles[0]
+
+    token = request.args.get('token')
+    if token:
+        if verificar_token_ics(token) != rol:
+            abort(403)
+    elif not current_user.is_authenticated:
+        abort(401)
+    elif not (current_user.has_role(rol) or current_user.es_admin()):
+        abort(403)
+
+    return Response(
+        generar_ical(rol),
+        mimetype='text/calendar',
+        headers={'Content-Disposition': f'inline; filename="eventos-{rol.lower()}.ics"'}
+    )
+
+# Enlace de suscripción al calendario del usuario actual
+@main_bp.route('/api/calendario/suscripcion')
+def api_calendario_suscripcion():
+    if not current_user.is_authenticated:
+        return jsonify({'success': False, 'message': 'No autenticado'}), 401
+    roles = normalizar_roles(current_user.rol_nombre)
+    if not roles:
+        return jsonify({'success': False, 'message': 'Tu rol no tiene calendario de eventos'}), 404
+    url = url_for('main.calendario_ics', rol=roles[0].lower(),
+                  token=generar_token_ics(current_user, roles[0]), _external=True)
+    return jsonify({'success': True, 'url': url})
+
+
+# ============================================================================
+# AVISOS EN TIEMPO REAL
+# ============================================================================
+
+def _formato_sse(aviso):
+    return f"id: {aviso['id']}\nevent: {aviso['tipo']}\ndata: {json.dumps(aviso['datos'])}\n\n"
+
+
+def _sin_capacidad():
+    # El navegador pasa a long-poll o, si tampoco hay lugar, a consultar cada tanto
+    respuesta = jsonify({'success': False, 'message': 'Demasiadas conexiones en tiempo real'})
+    respuesta.status_code = 503
+    respuesta.headers['Retry-After'] = '30'
+    return respuesta
+
+
+# Canal SSE del usuario actual: avisa cuando le llega una notificación o un mensaje
+@main_bp.route('/api/tiempo-real/stream')
+def api_tiempo_real_stream():
+    if not current_user.is_authenticated:
+        return jsonify({'success': False, 'message': 'No autenticado'}), 401
+    if not current_app.config.get('TIEMPO_REAL_ENABLED', True):
+        return _sin_capacidad()
+
+    usuario_id = current_user.id_usuario
+    bus = obtener_bus()
+    suscripcion = bus.suscribir(usuario_id)
+    if suscripcion is None:
+        return _sin_capacidad()
+
+    ultimo = request.headers.get('Last-Event-ID', 0, type=int)
+    latido = current_app.config.get('TIEMPO_REAL_HEARTBEAT', 20)
+
+    def generar():
+        try:
+            yield 'retry: 5000\n\n'
+            # Lo publicado mientras el navegador se reconectaba
+            for aviso in (bus.pendientes(usuario_id, ultimo) if ultimo else ()):
+                yield _formato_sse(aviso)
+            while True:
+                aviso = suscripcion.esperar(latido)
+                yield _formato_sse(aviso) if aviso else ': ping\n\n'
+        finally:
+            bus.cancelar(suscripcion)
+
+    respuesta = Response(generar(), mimetype='text/event-stream')
+    respuesta.headers['Cache-Control'] = 'no-cache'
+    respuesta.headers['X-Accel-Buffering'] = 'no'
+    return respuesta
+
+
+# Alternativa long-poll al canal SSE: espera hasta `timeout` segundos un aviso posterior a `desde`
+@main_bp.route('/api/tiempo-real/esperar')
+def api_tiempo_real_esperar():
+    if not current_user.is_authenticated:
+        return jsonify({'success': False, 'message': 'No autenticado'}), 401
+    if not current_app.config.get('TIEMPO_REAL_ENABLED', True):
+        return _sin_capacidad()
+
+    usuario_id = current_user.id_usuario
+    maximo = current_app.config.get('TIEMPO_REAL_LONG_POLL', 25)
+    espera = max(0, min(request.args.get('timeout', maximo, type=int), maximo))
+    desde = request.args.get('desde', 0, type=int)
+    bus = obtener_bus()
+
+    avisos = bus.pendientes(usuario_id, desde) if desde else []
+    if not avisos:
+        suscripcion = bus.suscribir(usuario_id)
+        if suscripcion is None:
+            return _sin_capacidad()
+        try:
+            # Pudo llegar algo entre la primera revisión y la suscripción
+            avisos = bus.pendientes(usuario_id, desde) if desde else []
+            if not avisos:
+                aviso = suscripcion.esperar(espera)
+                avisos = [aviso] if aviso else []
+        finally:
+            bus.cancelar(suscripcion)
+
+    return jsonify({
+        'success': True,
+        'avisos': avisos,
+        'ultimo': avisos[-1]['id'] if avisos else (desde or time.time_ns())
+    })
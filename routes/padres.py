@@ -1,3 +1,4 @@
+import logging
 from flask import Blueprint, render_template, redirect, url_for, request, jsonify, flash, current_app
 from flask_login import login_required, current_user
 from datetime import datetime
@@ -8,6 +9,21 @@ from controllers.models import (
     CicloAcademico, PeriodoAcademico, CategoriaCalificacion, Notificacion, Evento
     )
 from routes.profesor import tareas_academicas
+from services.catalogo_service import listar, categoria_por_id
+from services.notification_service import contar_notificaciones_no_leidas
+from services.calendario_service import (
+    asignar_destinatarios,
+    obtener_ventana,
+    ocurrencias_en_ventana,
+    serializar_ocurrencia,
+    roles_visibles_para,
+    contar_eventos_proximos
+)
+from services.resumen_padre_service import resumen_padre, resumen_hijos
+from services.calendario_asistencia_service import calendario_mes
+from services.riesgo_service import ranking_hijos
+
+logger = logging.getLogger(__name__)
 
 
 padre_bp = Blueprint('padre', __name__, url_prefix='/padre')
@@ -20,9 +36,9 @@ def get_sidebar_counts():
         # DEBUG: Ver qué valores de estado existen
         estados = db.session.query(Comunicacion.estado).distinct().all()
         estados_lista = [e[0] for e in estados]
-        print("🔍 VALORES DE 'estado' EN COMUNICACIONES:", estados_lista)
+        logger.debug("🔍 VALORES DE 'estado' EN COMUNICACIONES: %s", estados_lista)
     except Exception as e:
-        print("❌ Error en debug de estados:", e)
+        logger.exception(f'❌ Error en debug de estados: {e}')
         estados_lista = []
     
     # Determinar el valor correcto para mensajes no leídos
@@ -38,7 +54,7 @@ def get_sidebar_counts():
     elif 'nuevo' in estados_lista:
         estado_no_leido = 'nuevo'
     
-    print(f"🎯 Usando estado: '{estado_no_leido}' para mensajes no leídos")
+    logger.debug("🎯 Usando estado: '%s' para mensajes no leídos", estado_no_leido)
     
     # Mensajes no leídos (para comunicaciones)
     unread_messages = Comunicacion.query.filter_by(
@@ -47,33 +63,18 @@ def get_sidebar_counts():
     ).count()
     
     # Notificaciones no leídas (para notificaciones)
-    unread_notifications = Notificacion.query.filter_by(
-        usuario_id=current_user.id_usuario,
-        leida=False
-    ).count()
+    unread_notifications = contar_notificaciones_no_leidas(current_user.id_usuario)
     
     # ✅ VERSIÓN CORREGIDA: Eventos próximos con filtro más estricto
     hoy = datetime.now().date()
     
-    # Obtener TODOS los eventos para debug
-    todos_eventos = Evento.query.all()
-    print(f"📋 TODOS LOS EVENTOS EN BD ({len(todos_eventos)} total):")
-    for evento in todos_eventos:
-        print(f"   - ID: {evento.id}, Nombre: '{evento.nombre}', Fecha: {evento.fecha}, Rol: {evento.rol_destino}")
-    
     # Eventos que cumplen el filtro estricto
-    eventos_filtrados = Evento.query.filter(
+    upcoming_events = Evento.query.filter(
         Evento.fecha.isnot(None),  # Excluir eventos sin fecha
         Evento.fecha >= hoy        # Solo eventos de hoy en adelante
-    ).all()
-    
-    print(f"🎯 EVENTOS FILTRADOS (fecha >= {hoy} y fecha NOT NULL): {len(eventos_filtrados)} eventos")
-    for evento in eventos_filtrados:
-        print(f"   ✅ INCLUIDO - ID: {evento.id}, Nombre: '{evento.nombre}', Fecha: {evento.fecha}")
-    
-    upcoming_events = len(eventos_filtrados)
+    ).count()
     
-    print(f"📊 RESUMEN CONTADORES - Mensajes: {unread_messages}, Notificaciones: {unread_notifications}, Eventos: {upcoming_events}")
+    logger.debug("📊 RESUMEN CONTADORES - Mensajes: %s, Notificaciones: %s, Eventos: %s", unread_messages, unread_notifications, upcoming_events)
     
     return {
         'unread_messages': unread_messages,
@@ -94,7 +95,7 @@ def verificar_relacion_padre_hijo(padre_id, hijo_id):
         
         return result is not None
     except Exception as e:
-        print(f"Error verificando relación padre-hijo: {e}")
+        logger.exception(f"Error verificando relación padre-hijo: {e}")
         return False
 
 @padre_bp.route('/dashboard')
@@ -102,10 +103,6 @@ def verificar_relacion_padre_hijo(padre_id, hijo_id):
 @role_required('Padre')
 def dashboard():
     """Muestra el panel principal del padre con un resumen del progreso del hijo/a."""
-    from controllers.models import Calificacion, Matricula, Asistencia, Clase
-    from sqlalchemy import func, and_
-    from datetime import datetime, timedelta
-    
     try:
         # Obtener hijos del padre
         hijos = current_user.hijos.all()
@@ -119,33 +116,11 @@ def dashboard():
         anuncios_importantes = []
         
         if hijos:
-            # Calcular promedio general de todos los hijos
-            promedios_hijos = []
-            for hijo in hijos:
-                # Obtener calificaciones del hijo
-                calificaciones_hijo = Calificacion.query.filter_by(estudianteId=hijo.id_usuario).all()
-                if calificaciones_hijo:
-                    try:
-                        valores = [float(cal.valor) for cal in calificaciones_hijo if cal.valor is not None and cal.valor != '']
-                        if valores:
-                            promedio_hijo = sum(valores) / len(valores)
-                            promedios_hijos.append(promedio_hijo)
-                    except (ValueError, TypeError) as e:
-                        print(f"Error calculando promedio para hijo {hijo.id_usuario}: {e}")
-                        continue
-         
-                # Obtener clases inscritas del hijo
-                clases_hijo = Matricula.query.filter_by(estudianteId=hijo.id_usuario).count()
-                total_clases_inscritas += clases_hijo
-                
-                # Obtener calificaciones recientes (últimas 5)
-                calificaciones_recientes_hijo = Calificacion.query.filter_by(
-                    estudianteId=hijo.id_usuario
-                ).order_by(Calificacion.fecha_registro.desc()).limit(5).all()
-                calificaciones_recientes.extend(calificaciones_recientes_hijo)
-            
-            if promedios_hijos:
-                promedio_general = round(sum(promedios_hijos) / len(promedios_hijos), 2)
+            # Promedios, clases y calificaciones recientes de todos los hijos a la vez
+            resumen = resumen_padre([hijo.id_usuario for hijo in hijos])
+            promedio_general = resumen['promedio_general']
+            total_clases_inscritas = resumen['total_clases_inscritas']
+            calificaciones_recientes = resumen['calificaciones_recientes']
                  
             # Obtener mensajes de profesores (comunicaciones donde el padre es destinatario)
             mensajes_profesores = Comunicacion.query.filter_by(destinatario_id=current_user.id_usuario).count()
@@ -232,7 +207,8 @@ def notificaciones():
         
         # Obtener todas las notificaciones del usuario padre para la página
         notificaciones_list = Notificacion.query.filter_by(
-            usuario_id=current_user.id_usuario
+            usuario_id=current_user.id_usuario,
+            enviada=True
         ).order_by(Notificacion.creada_en.desc()).all()
         
         return render_template(
@@ -387,7 +363,7 @@ def ver_calificaciones_historial(estudiante_id):
         from collections import defaultdict
         por_cat = defaultdict(lambda: {'categoria': None, 'calificaciones': []})
         for c in califs:
-            cat = CategoriaCalificacion.query.get(getattr(c, 'categoriaId', None)) if getattr(c, 'categoriaId', None) else None
+            cat = categoria_por_id(getattr(c, 'categoriaId', None)) if getattr(c, 'categoriaId', None) else None
             key = c.categoriaId or 0
             if por_cat[key]['categoria'] is None:
                 por_cat[key]['categoria'] = cat or type('obj', (), {'nombre': 'Sin categoría'})()
@@ -429,51 +405,38 @@ def api_estadisticas_estudiante(estudiante_id):
         if not verificar_relacion_padre_hijo(current_user.id_usuario, estudiante_id):
             return jsonify({'success': False, 'message': 'No tienes permisos'}), 403
         
-        # Calcular promedio general de todas las calificaciones
-        from sqlalchemy import func
-        calificaciones = Calificacion.query.filter_by(estudianteId=estudiante_id).filter(Calificacion.valor.isnot(None)).all()
-        
-        if calificaciones:
-            suma_notas = sum([float(cal.valor) for cal in calificaciones if cal.valor is not None])
-            promedio_general = round(suma_notas / len(calificaciones), 2) if calificaciones else 0
-        else:
-            promedio_general = 0
-        
-        # Contar asistencias
-        total_asistencias = Asistencia.query.filter_by(
-            estudianteId=estudiante_id,
-            estado='presente'
-        ).count()
-        
-        # Contar fallas
-        total_fallas = Asistencia.query.filter_by(
-            estudianteId=estudiante_id,
-            estado='falta'
-        ).count()
+        resumen = resumen_hijos([estudiante_id])[estudiante_id]
+        asistencias = resumen['asistencias']
         
-        # Contar retardos
-        total_retardos = Asistencia.query.filter_by(
-            estudianteId=estudiante_id,
-            estado='retardo'
-        ).count()
+        return jsonify({
+            'success': True,
+            'promedio_general': resumen['promedio'] or 0,
+            'total_asistencias': asistencias.get('presente', 0),
+            'total_fallas': asistencias.get('falta', 0),
+            'total_retardos': asistencias.get('retardo', 0),
+            'tareas_pendientes': resumen['tareas_pendientes']
+        })
         
-        # Contar tareas pendientes
-        tareas_pendientes = Calificacion.query.filter_by(
-            estudianteId=estudiante_id,
-            es_tarea_publicada=True
-        ).filter(Calificacion.valor.is_(None)).count()
+    except Exception as e:
+        current_app.logger.error(f"Error obteniendo estadísticas: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@padre_bp.route('/api/riesgo_hijos')
+@login_required
+@role_required('Padre')
+def api_riesgo_hijos():
+    """API con el puntaje de riesgo académico de cada hijo, del mayor al menor."""
+    try:
+        hijos_ids = [hijo.id_usuario for hijo in current_user.hijos.all()]
+        ranking = ranking_hijos(hijos_ids)
         
         return jsonify({
             'success': True,
-            'promedio_general': promedio_general,
-            'total_asistencias': total_asistencias,
-            'total_fallas': total_fallas,
-            'total_retardos': total_retardos,
-            'tareas_pendientes': tareas_pendientes
+            'hijos': ranking
         })
         
     except Exception as e:
-        current_app.logger.error(f"Error obteniendo estadísticas: {e}")
+        current_app.logger.error(f"Error obteniendo riesgo de los hijos: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @padre_bp.route('/api/promedios_estudiante/<int:estudiante_id>')
@@ -584,59 +547,8 @@ def api_asistencia_mes(estudiante_id):
             year = now.year
             month = now.month
         
-        # Obtener asistencias del mes con información de asignatura
-        from datetime import datetime
-        fecha_inicio = datetime(year, month, 1)
-        if month == 12:
-            fecha_fin = datetime(year + 1, 1, 1)
-        else:
-            fecha_fin = datetime(year, month + 1, 1)
-        
-        asistencias = db.session.query(
-            Asistencia, Clase, Asignatura, Usuario, HorarioCurso, Salon
-        ).join(
-            Clase, Asistencia.claseId == Clase.id_clase
-        ).join(
-            Asignatura, Clase.asignaturaId == Asignatura.id_asignatura
-        ).join(
-            Usuario, Clase.profesorId == Usuario.id_usuario
-        ).outerjoin(
-            HorarioCurso, 
-            db.and_(
-                HorarioCurso.curso_id == Clase.cursoId,
-                HorarioCurso.asignatura_id == Clase.asignaturaId
-            )
-        ).outerjoin(
-            Salon, HorarioCurso.id_salon_fk == Salon.id_salon
-        ).filter(
-            Asistencia.estudianteId == estudiante_id,
-            Asistencia.fecha >= fecha_inicio,
-            Asistencia.fecha < fecha_fin
-        ).order_by(Asistencia.fecha).all()
-        
-        # Agrupar por día
-        asistencias_por_dia = {}
-        for asistencia, clase, asignatura, profesor, horario_curso, salon in asistencias:
-            fecha_key = asistencia.fecha.strftime('%Y-%m-%d')
-            
-            if fecha_key not in asistencias_por_dia:
-                asistencias_por_dia[fecha_key] = []
-            
-            # Obtener hora del horario_curso si existe, sino usar valores por defecto
-            hora_inicio = horario_curso.hora_inicio if horario_curso else '--'
-            hora_fin = horario_curso.hora_fin if horario_curso else '--'
-            salon_nombre = salon.nombre if salon else 'Sin asignar'
-            
-            asistencias_por_dia[fecha_key].append({
-                'asignatura': asignatura.nombre,
-                'estado': asistencia.estado,
-                'excusa': asistencia.excusa if asistencia.excusa else False,
-                'observaciones': getattr(asistencia, 'observaciones', ''),
-                'hora_inicio': hora_inicio,
-                'hora_fin': hora_fin,
-                'profesor': profesor.nombre_completo if profesor else 'Sin asignar',
-                'salon': salon_nombre
-            })
+        # Una fila por asistencia, con el bloque del horario de ese día de la semana
+        asistencias_por_dia = calendario_mes(estudiante_id, year, month)
         
         return jsonify({
             'success': True,
@@ -670,8 +582,8 @@ def api_tareas_estudiante(estudiante_id):
             Calificacion.fecha_registro.desc()
         ).all()
         
-        current_app.logger.info(f"Buscando tareas para estudiante {estudiante_id}")
-        current_app.logger.info(f"Tareas encontradas: {len(tareas)}")
+        logger.debug("Buscando tareas para estudiante %s", estudiante_id)
+        logger.debug("Tareas encontradas: %s", len(tareas))
         
         tareas_list = []
         for tarea, asignatura in tareas:
@@ -1214,7 +1126,7 @@ def ver_calificaciones_estudiante(estudiante_id, asignatura_id):
                 break
     
     # Obtener TODAS las categorías de calificación
-    categorias = CategoriaCalificacion.query.all()
+    categorias = listar(CategoriaCalificacion)
     
     # Organizar calificaciones por categoría (TODAS las categorías, incluso sin calificaciones)
     calificaciones_por_categoria = {}
@@ -1689,13 +1601,13 @@ def api_contador_notificaciones():
 def api_periodo_activo():
     """API para obtener el periodo académico activo."""
     try:
-        from services.periodo_service import obtener_periodo_activo
+        from services.periodo_service import periodo_activo_dict
         
-        periodo = obtener_periodo_activo()
+        periodo = periodo_activo_dict()
         if periodo:
             return jsonify({
                 'success': True,
-                'periodo': periodo.to_dict()
+                'periodo': periodo
             })
         else:
             return jsonify({
@@ -2071,12 +1983,12 @@ def crear_notificacion_evento_padres(evento):
             db.session.add(notificacion)
         
         db.session.commit()
-        print(f"✅ Notificaciones de evento creadas para {len(padres_ids)} padres")
+        logger.debug("✅ Notificaciones de evento creadas para %s padres", len(padres_ids))
         return True
         
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error creando notificaciones: {e}")
+        logger.exception(f"❌ Error creando notificaciones: {e}")
         return False
 
 def crear_notificacion_general(usuario_id, titulo, mensaje, tipo="sistema", link=None):
@@ -2092,12 +2004,12 @@ def crear_notificacion_general(usuario_id, titulo, mensaje, tipo="sistema", link
         )
         db.session.add(notificacion)
         db.session.commit()
-        print(f"✅ Notificación creada para usuario {usuario_id}")
+        logger.debug("✅ Notificación creada para usuario %s", usuario_id)
         return True
         
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error creando notificación: {e}")
+        logger.exception(f"❌ Error creando notificación: {e}")
         return False
 # ========== FIN SERVICIO DE NOTIFICACIONES ==========
 
@@ -2141,6 +2053,7 @@ def crear_evento_con_notificacion():
             hora=datetime.strptime(data['hora'], '%H:%M').time(),
             rol_destino="Estudiante"
         )
+        asignar_destinatarios(nuevo_evento, ['Estudiante'])
         
         db.session.add(nuevo_evento)
         db.session.commit()
@@ -2176,11 +2089,7 @@ def api_eventos_contador():
     """API para obtener el contador de eventos próximos"""
     try:
         from datetime import datetime
-        hoy = datetime.now().date()
-        count = Evento.query.filter(
-            Evento.fecha.isnot(None),
-            Evento.fecha >= hoy
-        ).count()
+        count = contar_eventos_proximos(roles_visibles_para('Padre'))
         return jsonify({'success': True, 'count': count})
     except Exception as e:
         return jsonify({'success': False, 'count': 0})
@@ -2189,19 +2098,14 @@ def api_eventos_contador():
 @login_required
 @role_required('Padre')
 def api_eventos_padre():
-    """API para listar eventos del rol estudiante"""
+    """API para listar eventos dirigidos a padres y a sus hijos"""
     try:
-        eventos = Evento.query.filter_by(rol_destino="Estudiante").all()
-        resultado = []
-        for ev in eventos:
-            resultado.append({
-                "IdEvento": ev.id,
-                "Nombre": ev.nombre,
-                "Descripcion": ev.descripcion,
-                "Fecha": ev.fecha.strftime("%Y-%m-%d"),
-                "Hora": ev.hora.strftime("%H:%M:%S"),
-                "RolDestino": ev.rol_destino
-            })
+        ventana, error = obtener_ventana(request.args)
+        if error:
+            return jsonify({"error": error}), 400
+
+        ocurrencias = ocurrencias_en_ventana(*ventana, roles=roles_visibles_para('Padre'))
+        resultado = [serializar_ocurrencia(ev, fecha) for ev, fecha in ocurrencias]
         return jsonify(resultado), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -2216,7 +2120,7 @@ def api_obtener_notificaciones_padre():
         per_page = request.args.get('per_page', 20, type=int)
         filtro = request.args.get('filtro', 'todas')
         
-        query = Notificacion.query.filter_by(usuario_id=current_user.id_usuario)
+        query = Notificacion.query.filter_by(usuario_id=current_user.id_usuario, enviada=True)
         
         if filtro == 'pendientes':
             query = query.filter_by(leida=False)
@@ -2332,15 +2236,10 @@ def get_sidebar_counts():
         ).count()
         
         # Notificaciones no leídas
-        unread_notifications = Notificacion.query.filter_by(
-            usuario_id=current_user.id_usuario,
-            leida=False
-        ).count()
+        unread_notifications = contar_notificaciones_no_leidas(current_user.id_usuario)
         
         # Eventos próximos
-        hoy = datetime.now().date()
-        eventos_proximos = Evento.query.filter(Evento.fecha >= hoy).all()
-        upcoming_events = len(eventos_proximos)
+        upcoming_events = contar_eventos_proximos(roles_visibles_para('Padre'))
         
         return {
             'unread_messages': unread_messages,
@@ -2349,7 +2248,7 @@ def get_sidebar_counts():
         }
         
     except Exception as e:
-        print(f"❌ Error en get_sidebar_counts: {e}")
+        logger.exception(f"❌ Error en get_sidebar_counts: {e}")
         return {
             'unread_messages': 0,
             'unread_notifications': 0,
@@ -1,4 +1,8 @@
-from flask import Blueprint, render_template, session, request, redirect, url_for, flash, jsonify, current_app
+import logging
+from flask import (
+    Blueprint, render_template, session, request, redirect, url_for, flash, jsonify, current_app,
+    Response, stream_with_context
+)
 from flask_login import login_required, current_user
 from controllers.models import (
     db, Usuario, Asignatura, Clase, Matricula, Calificacion, Curso, Rol,
@@ -10,6 +14,28 @@ from datetime import datetime, date
 import json
 import os
 from werkzeug.utils import secure_filename
+from services.catalogo_service import listar, rol_por_nombre, asignatura_por_id, categoria_por_id
+from services.escala_calificacion_service import obtener_escala, nota_aprobacion, escala_a_dict
+from services.notification_service import contar_notificaciones_no_leidas
+from services.calendario_service import (
+    obtener_ventana,
+    ocurrencias_en_ventana,
+    serializar_ocurrencia,
+    roles_visibles_para,
+    contar_eventos_proximos
+)
+from services.calendario_asistencia_service import asistencias_del_mes
+from services.riesgo_service import ranking_curso, contar_en_riesgo
+from services.libro_calificaciones_service import cargar_libro, guardar_cambios_libro
+from services.horario_profesor_service import horarios_profesor, clase_actual, proxima_clase
+from services.roster_service import (
+    estudiantes_del_curso,
+    ids_estudiantes_curso,
+    contar_estudiantes_curso,
+    contar_estudiantes_cursos
+)
+
+logger = logging.getLogger(__name__)
 
 profesor_bp = Blueprint('profesor', __name__, url_prefix='/profesor')
 
@@ -45,49 +71,16 @@ def obtener_cursos_del_profesor(profesor_id):
     todos = {c.id_curso: c for c in (cursos_horarios + cursos_clases)}.values()
     todos_cursos = list(todos)
 
-    # Agregar total de estudiantes por curso
+    # Agregar total de estudiantes por curso (los que no estén en caché, en una consulta)
+    totales = contar_estudiantes_cursos([curso.id_curso for curso in todos_cursos])
     for curso in todos_cursos:
-        curso.total_estudiantes = len(obtener_estudiantes_por_curso(curso.id_curso))
+        curso.total_estudiantes = totales.get(curso.id_curso, 0)
 
     return todos_cursos
 
 def obtener_horarios_detallados_profesor(profesor_id):
-    """Obtiene horarios detallados del profesor directamente desde HorarioCurso."""
-    # Consultar directamente HorarioCurso donde el profesor está asignado
-    horarios_curso = db.session.query(HorarioCurso, Curso, Asignatura, Salon, Sede)\
-        .join(Curso, HorarioCurso.curso_id == Curso.id_curso)\
-        .join(Asignatura, HorarioCurso.asignatura_id == Asignatura.id_asignatura)\
-        .outerjoin(Salon, HorarioCurso.id_salon_fk == Salon.id_salon)\
-        .outerjoin(Sede, Salon.id_sede_fk == Sede.id_sede)\
-        .filter(HorarioCurso.profesor_id == profesor_id)\
-        .all()
-    
-    horarios_detallados = []
-
-    for hc, curso, asignatura, salon, sede in horarios_curso:
-        # Obtener sede del curso si no se obtuvo del salon
-        sede_nombre = 'N/A'
-        if sede:
-            sede_nombre = sede.nombre
-        elif hasattr(curso, 'sede') and curso.sede:
-            sede_nombre = curso.sede.nombre
-        elif hasattr(curso, 'sedeId') and curso.sedeId:
-            sede_obj = Sede.query.get(curso.sedeId)
-            if sede_obj:
-                sede_nombre = sede_obj.nombre
-
-        horarios_detallados.append({
-            'curso_nombre': curso.nombreCurso if curso else 'N/A',
-            'asignatura_nombre': asignatura.nombre if asignatura else 'N/A',
-            'dia_semana': hc.dia_semana if hc.dia_semana else 'N/A',
-            'hora_inicio': hc.hora_inicio if hc.hora_inicio else 'N/A',
-            'hora_fin': hc.hora_fin if hc.hora_fin else 'N/A',
-            'salon': salon.nombre if salon else 'N/A',
-            'sede': sede_nombre,
-            'origen_id_horario_curso': hc.id_horario_curso if hc else None
-        })
-
-    return horarios_detallados
+    """Obtiene los bloques del horario del profesor (HorarioCurso), desde el índice semanal en caché."""
+    return horarios_profesor(profesor_id)
 
 def verificar_acceso_curso_profesor(profesor_id, curso_id):
     """Verifica si el profesor tiene acceso a un curso específico (por HorarioCompartido o Clase)."""
@@ -103,7 +96,8 @@ def verificar_acceso_curso_profesor(profesor_id, curso_id):
     return bool(acceso_horario or acceso_clase)
 
 def obtener_estudiantes_por_curso(curso_id):
-    """Obtiene estudiantes matriculados en un curso."""
+    """Obtiene los Usuario completos de los estudiantes de un curso.
+    Para la lista (id, nombre, apellido), los IDs o la cantidad usar services.roster_service."""
     if not curso_id:
         return []
     estudiantes = db.session.query(Usuario).join(
@@ -173,17 +167,25 @@ def obtener_asignaturas_del_profesor(profesor_id):
     asignaturas = {a.id_asignatura: a for a in (asignaturas_horario + asignaturas_clase)}.values()
     return list(asignaturas)
 
+def asignaturas_ofertadas_en_curso(curso_id):
+    """Subconsulta con los IDs de las asignaturas que se dictan en el curso (por Clase u HorarioCurso)."""
+    return db.select(Clase.asignaturaId).where(Clase.cursoId == curso_id).union(
+        db.select(HorarioCurso.asignatura_id).where(HorarioCurso.curso_id == curso_id)
+    )
+
+def filtro_calificaciones_curso(curso_id):
+    """Condiciones de las calificaciones de un curso: de sus estudiantes matriculados y en asignaturas del curso.
+    Con IN en lugar de JOIN, cada calificación sale una sola vez aunque la asignatura tenga varias clases."""
+    return (
+        Calificacion.estudianteId.in_(db.select(Matricula.estudianteId).where(Matricula.cursoId == curso_id)),
+        Calificacion.asignaturaId.in_(asignaturas_ofertadas_en_curso(curso_id))
+    )
+
 def obtener_calificaciones_por_curso(curso_id):
-    """Obtiene todas las calificaciones de un curso (uniendo con Clase para filtrar por curso)."""
+    """Obtiene todas las calificaciones de los estudiantes del curso en las asignaturas del curso."""
     if not curso_id:
         return []
-    # Unir Calificacion con Clase por asignatura para determinar curso
-    califs = db.session.query(Calificacion).join(
-        Clase, Clase.asignaturaId == Calificacion.asignaturaId
-    ).filter(
-        Clase.cursoId == curso_id
-    ).all()
-    return califs
+    return Calificacion.query.filter(*filtro_calificaciones_curso(curso_id)).all()
 
 def obtener_asistencias_por_curso(curso_id):
     """Obtiene todas las asistencias de un curso (uniendo con Clase)."""
@@ -278,7 +280,7 @@ def obtener_profesores_por_asignatura(asignatura_id):
             } for prof in profesores
         ]
     except Exception as e:
-        print(f"Error obteniendo profesores por asignatura: {str(e)}")
+        logger.exception(f"Error obteniendo profesores por asignatura: {str(e)}")
         return []
 
 def validar_profesor_asignatura(profesor_id, asignatura_id):
@@ -293,7 +295,7 @@ def validar_profesor_asignatura(profesor_id, asignatura_id):
         
         return asignacion is not None
     except Exception as e:
-        print(f"Error validando profesor-asignatura: {str(e)}")
+        logger.exception(f"Error validando profesor-asignatura: {str(e)}")
         return False
 
 def calcular_pendientes(profesor_id, curso_id):
@@ -301,7 +303,7 @@ def calcular_pendientes(profesor_id, curso_id):
     if not curso_id:
         return 0
     today = date.today()
-    estudiantes = obtener_estudiantes_por_curso(curso_id)
+    total_estudiantes = contar_estudiantes_curso(curso_id)
     clase_id = obtener_clase_para_asistencia(curso_id, profesor_id)
     if not clase_id:
         return 0
@@ -309,7 +311,7 @@ def calcular_pendientes(profesor_id, curso_id):
         claseId=clase_id,
         fecha=today
     ).count()
-    return len(estudiantes) - asistencias_hoy
+    return total_estudiantes - asistencias_hoy
 
 
 # ============================================================================ #
@@ -334,44 +336,25 @@ def _hora_a_minutos(hora_str):
         return 24 * 60  # valor alto si no se puede parsear
 
 def obtener_proxima_clase(profesor_id):
-    """Busca la próxima clase en la semana basándose en horarios compartidos.
+    """Busca la próxima clase en la semana en el índice semanal del profesor.
     Retorna un dict con claves similares a las usadas en templates o None.
     """
     try:
-        horarios = obtener_horarios_detallados_profesor(profesor_id)
-        if not horarios:
+        mejor = proxima_clase(profesor_id)
+        if not mejor:
             return None
-
-        hoy_idx = datetime.today().weekday()  # 0=Monday
-        candidatos = []
-        for h in horarios:
-            dia = h.get('dia_semana') or h.get('dia') or h.get('diaSemana')
-            hora = h.get('hora_inicio') or h.get('horaInicio') or h.get('hora') or '23:59'
-            dia_idx = _dia_semana_a_indice(dia)
-            if dia_idx is None:
-                continue
-            dias_adelante = (dia_idx - hoy_idx) % 7
-            minutos = _hora_a_minutos(hora)
-            candidatos.append((dias_adelante, minutos, h))
-
-        if not candidatos:
-            return None
-
-        candidatos.sort(key=lambda x: (x[0], x[1]))
-        mejor = candidatos[0][2]
         # Normalizar salida
         return {
-            'asignatura_nombre': mejor.get('asignatura_nombre') or mejor.get('asignatura') or mejor.get('asignatura_nombre', 'N/A'),
-            'curso_nombre': mejor.get('curso_nombre') or mejor.get('curso') or mejor.get('curso_nombre', 'N/A'),
-            'dia_semana': mejor.get('dia_semana') or mejor.get('dia') or 'N/A',
-            'hora_inicio': mejor.get('hora_inicio') or mejor.get('horaInicio') or 'N/A',
-            'hora_fin': mejor.get('hora_fin') or mejor.get('hora_fin') or 'N/A',
-            'salon': mejor.get('salon') or 'N/A'
+            'asignatura_nombre': mejor['asignatura_nombre'],
+            'curso_nombre': mejor['curso_nombre'],
+            'dia_semana': mejor['dia_semana'],
+            'hora_inicio': mejor['hora_inicio'],
+            'hora_fin': mejor['hora_fin'],
+            'salon': mejor['salon']
         }
     except Exception:
         return None
 
-
 def generar_matriz_horario_profesor(profesor_id):
     """Genera una matriz (dias x bloques) basada en los BloquesHorario del HorarioGeneral.
     Retorna (dias, bloques, matriz) donde:
@@ -566,7 +549,7 @@ def profesor_context():
         curso_id = session.get('curso_seleccionado')
         asignaturas_count = len(obtener_asignaturas_del_profesor(user_id)) if user_id else 0
         # Estudiantes del curso seleccionado (si hay)
-        estudiantes_count = len(obtener_estudiantes_por_curso(curso_id)) if curso_id else sum((getattr(c, 'total_estudiantes', 0) for c in obtener_cursos_del_profesor(user_id))) if user_id else 0
+        estudiantes_count = contar_estudiantes_curso(curso_id) if curso_id else sum((getattr(c, 'total_estudiantes', 0) for c in obtener_cursos_del_profesor(user_id))) if user_id else 0
         pendientes_count = calcular_pendientes(user_id, curso_id) if user_id else 0
         unread_messages = 0
         proxima_clase = obtener_proxima_clase(user_id) if user_id else None
@@ -613,7 +596,7 @@ def calcular_estadisticas_asistencia_curso(profesor_id, curso_id):
         promedio = (asistencias_presente / total_asistencias * 100) if total_asistencias > 0 else 0
         
         # Obtener total de estudiantes
-        total_estudiantes = len(obtener_estudiantes_por_curso(curso_id))
+        total_estudiantes = contar_estudiantes_curso(curso_id)
         
         return {
             'promedio': round(promedio, 2),
@@ -621,7 +604,7 @@ def calcular_estadisticas_asistencia_curso(profesor_id, curso_id):
             'total_estudiantes': total_estudiantes
         }
     except Exception as e:
-        print(f"Error calculando estadísticas de asistencia: {e}")
+        logger.exception(f"Error calculando estadísticas de asistencia: {e}")
         return {'promedio': 0, 'total_clases': 0, 'total_estudiantes': 0}
 
 def calcular_estadisticas_calificaciones_curso(profesor_id, curso_id):
@@ -646,12 +629,11 @@ def calcular_estadisticas_calificaciones_curso(profesor_id, curso_id):
         valores = [float(c.valor) for c in calificaciones_con_valor]
         promedio = sum(valores) / len(valores)
         
-        # Obtener configuración de aprobación
-        config = ConfiguracionCalificacion.query.first()
-        nota_aprobacion = float(config.notaMinimaAprobacion) if config else 60.0
-        
-        # Calcular porcentaje de aprobación
-        aprobados = len([v for v in valores if v >= nota_aprobacion])
+        # Calcular porcentaje de aprobación con el umbral de cada asignatura
+        aprobados = len([
+            c for c in calificaciones_con_valor
+            if float(c.valor) >= float(nota_aprobacion(c.asignaturaId))
+        ])
         porcentaje_aprobacion = (aprobados / len(valores)) * 100
         
         return {
@@ -660,157 +642,33 @@ def calcular_estadisticas_calificaciones_curso(profesor_id, curso_id):
             'total_calificaciones': len(calificaciones_con_valor)
         }
     except Exception as e:
-        print(f"Error calculando estadísticas de calificaciones: {e}")
+        logger.exception(f"Error calculando estadísticas de calificaciones: {e}")
         return {'promedio': 0, 'aprobacion': 0, 'total_calificaciones': 0}
 
 def obtener_clase_actual(profesor_id):
-    """Obtiene la clase actual en curso basada en la hora y día actual."""
+    """Obtiene la clase actual en curso según el día y la hora actual (búsqueda binaria en el índice semanal)."""
     try:
-        from datetime import datetime
-        ahora = datetime.now()
-        dia_actual = ahora.strftime('%A').lower()
-        hora_actual = ahora.strftime('%H:%M')
-        
-        # Mapeo de días en español
-        dias_espanol = {
-            'monday': 'lunes',
-            'tuesday': 'martes', 
-            'wednesday': 'miércoles',
-            'thursday': 'jueves',
-            'friday': 'viernes',
-            'saturday': 'sábado',
-            'sunday': 'domingo'
-        }
-        
-        dia_actual_es = dias_espanol.get(dia_actual, '')
-        
-        if not dia_actual_es:
+        actual = clase_actual(profesor_id)
+        if not actual:
             return None
-        
-        # Usar la matriz de horarios para obtener datos más precisos
-        dias_semana, bloques_semana, matriz_horario = generar_matriz_horario_profesor(profesor_id)
-        
-        # Buscar en la matriz del día actual
-        if dia_actual_es in matriz_horario:
-            for bloque_key, bloque_data in matriz_horario[dia_actual_es].items():
-                # La nueva estructura: bloque_data es un dict con 'tipo' y 'asignaturas'
-                asignaturas = bloque_data.get('asignaturas', [])
-                if asignaturas and bloque_data.get('tipo') != 'descanso':
-                    # Verificar si la hora actual está dentro del rango del bloque
-                    bloque_parts = bloque_key.split('-')
-                    if len(bloque_parts) == 2:
-                        hora_inicio_bloque = bloque_parts[0]
-                        hora_fin_bloque = bloque_parts[1]
-                        
-                        # Convertir a minutos para comparación
-                        def hora_a_minutos(hora_str):
-                            try:
-                                h, m = map(int, hora_str.split(':'))
-                                return h * 60 + m
-                            except Exception:
-                                return 0
-
-                        hora_actual_min = hora_a_minutos(hora_actual)
-                        hora_inicio_min = hora_a_minutos(hora_inicio_bloque)
-                        hora_fin_min = hora_a_minutos(hora_fin_bloque)
-                        
-                        # Verificar si estamos dentro del rango del bloque
-                        if hora_inicio_min <= hora_actual_min < hora_fin_min:
-                            # Retornar la primera asignatura (o podrías retornar todas)
-                            entrada = asignaturas[0]
-                            return {
-                                'asignatura_nombre': entrada.get('asignatura_nombre', 'N/A'),
-                                'curso_nombre': entrada.get('curso_nombre', 'N/A'),
-                                'hora_inicio': hora_inicio_bloque,
-                                'hora_fin': hora_fin_bloque,
-                                'salon': entrada.get('salon', 'N/A'),
-                                'sede': entrada.get('sede', 'N/A')
-                            }
-        
-        return None
+        return {
+            'asignatura_nombre': actual['asignatura_nombre'],
+            'curso_nombre': actual['curso_nombre'],
+            'hora_inicio': actual['hora_inicio'],
+            'hora_fin': actual['hora_fin'],
+            'salon': actual['salon'],
+            'sede': actual['sede']
+        }
     except Exception as e:
-        print(f"Error obteniendo clase actual: {e}")
+        logger.exception(f"Error obteniendo clase actual: {e}")
         return None
 
 def obtener_proxima_clase_mejorada(profesor_id):
-    """Obtiene la próxima clase del profesor de manera más precisa."""
+    """Obtiene la próxima clase del profesor (la primera que empieza después de ahora, o la primera de la semana siguiente)."""
     try:
-        from datetime import datetime, time
-        ahora = datetime.now()
-        dia_actual = ahora.strftime('%A').lower()
-        hora_actual = ahora.time()
-        
-        # Mapeo de días en español
-        dias_espanol = {
-            'monday': 'lunes',
-            'tuesday': 'martes', 
-            'wednesday': 'miercoles',
-            'thursday': 'jueves',
-            'friday': 'viernes',
-            'saturday': 'sabado',
-            'sunday': 'domingo'
-        }
-        
-        dia_actual_es = dias_espanol.get(dia_actual, '')
-        
-        # Obtener todos los horarios del profesor
-        horarios = obtener_horarios_detallados_profesor(profesor_id)
-        
-        if not horarios:
-            return None
-        
-        # Ordenar horarios por día y hora
-        horarios_ordenados = []
-        for horario in horarios:
-            dia = horario.get('dia_semana', '').lower()
-            hora_str = horario.get('hora_inicio', '00:00')
-            
-            # Convertir hora string a objeto time
-            try:
-                hora_obj = datetime.strptime(hora_str, '%H:%M').time()
-            except:
-                continue
-            
-            # Asignar peso numérico al día
-            dias_semana = ['lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo']
-            peso_dia = dias_semana.index(dia) if dia in dias_semana else 999
-            
-            horarios_ordenados.append({
-                'horario': horario,
-                'dia': dia,
-                'hora': hora_obj,
-                'peso_dia': peso_dia
-            })
-        
-        # Ordenar por día y hora
-        horarios_ordenados.sort(key=lambda x: (x['peso_dia'], x['hora']))
-        
-        # Buscar la próxima clase
-        for horario_info in horarios_ordenados:
-            dia = horario_info['dia']
-            hora = horario_info['hora']
-            
-            # Si es hoy y la hora es futura
-            if dia == dia_actual_es and hora > hora_actual:
-                return horario_info['horario']
-            
-            # Si es un día futuro
-            if dia != dia_actual_es:
-                peso_dia_actual = dias_semana.index(dia_actual_es) if dia_actual_es in dias_semana else -1
-                peso_dia_clase = horario_info['peso_dia']
-                
-                # Si el día de la clase es después del día actual
-                if peso_dia_clase > peso_dia_actual:
-                    return horario_info['horario']
-        
-        # Si no hay clases futuras esta semana, tomar la primera del siguiente ciclo
-        if horarios_ordenados:
-            return horarios_ordenados[0]['horario']
-        
-        return None
-        
+        return proxima_clase(profesor_id)
     except Exception as e:
-        print(f"Error obteniendo próxima clase: {e}")
+        logger.exception(f"Error obteniendo próxima clase: {e}")
         return None
 
 def obtener_datos_grafico_asistencia(profesor_id, curso_id, meses=6):
@@ -868,7 +726,7 @@ def obtener_datos_grafico_asistencia(profesor_id, curso_id, meses=6):
         
         return {'labels': labels, 'data': data}
     except Exception as e:
-        print(f"Error obteniendo datos de gráfico de asistencia: {e}")
+        logger.exception(f"Error obteniendo datos de gráfico de asistencia: {e}")
         return {'labels': [], 'data': []}
 
 def obtener_datos_grafico_calificaciones(profesor_id, curso_id):
@@ -901,7 +759,7 @@ def obtener_datos_grafico_calificaciones(profesor_id, curso_id):
         
         return {'labels': labels, 'data': data}
     except Exception as e:
-        print(f"Error obteniendo datos de gráfico de calificaciones: {e}")
+        logger.exception(f"Error obteniendo datos de gráfico de calificaciones: {e}")
         return {'labels': [], 'data': []}
 
 def obtener_notificaciones_profesor(profesor_id, curso_id):
@@ -919,21 +777,9 @@ def obtener_notificaciones_profesor(profesor_id, curso_id):
                 'color': 'accent1'
             })
         
-        # Estudiantes en riesgo (bajas calificaciones)
+        # Estudiantes en riesgo (riesgo medio o alto según el puntaje de alerta temprana)
         if curso_id:
-            estudiantes = obtener_estudiantes_por_curso(curso_id)
-            estudiantes_riesgo = 0
-            
-            for estudiante in estudiantes:
-                calificaciones = Calificacion.query.filter_by(
-                    estudianteId=estudiante.id_usuario
-                ).all()
-                
-                calificaciones_con_valor = [c for c in calificaciones if c.valor is not None]
-                if calificaciones_con_valor:
-                    promedio = sum(float(c.valor) for c in calificaciones_con_valor) / len(calificaciones_con_valor)
-                    if promedio < 60:  # Umbral de riesgo
-                        estudiantes_riesgo += 1
+            estudiantes_riesgo = contar_en_riesgo(curso_id)
             
             if estudiantes_riesgo > 0:
                 notificaciones.append({
@@ -971,7 +817,7 @@ def obtener_notificaciones_profesor(profesor_id, curso_id):
         
         return notificaciones
     except Exception as e:
-        print(f"Error obteniendo notificaciones: {e}")
+        logger.exception(f"Error obteniendo notificaciones: {e}")
         return []
 
 # ============================================================================ #
@@ -1146,10 +992,10 @@ def gestion_lc():
 
     curso = Curso.query.get(curso_id)
     asignatura = Asignatura.query.get(asignatura_id)
-    estudiantes = obtener_estudiantes_por_curso(curso_id)
+    estudiantes = estudiantes_del_curso(curso_id)
     # Solo mostrar la asignatura seleccionada
     asignaturas = [asignatura] if asignatura else []
-    categorias = CategoriaCalificacion.query.all()
+    categorias = listar(CategoriaCalificacion)
     calificaciones = obtener_calificaciones_por_curso(curso_id)
     # Preparar versiones serializables (dicts) para uso en JS dentro de la plantilla
     def _serialize_estudiante(e):
@@ -1327,7 +1173,7 @@ def registrar_calificaciones():
 
     estudiantes = obtener_estudiantes_por_curso(curso_id)
     asignaturas = obtener_asignaturas_por_curso_y_profesor(curso_id, current_user.id_usuario)
-    categorias = CategoriaCalificacion.query.all()
+    categorias = listar(CategoriaCalificacion)
     calificaciones = obtener_calificaciones_por_curso(curso_id)
     curso = Curso.query.get(curso_id)
 
@@ -1628,55 +1474,22 @@ def api_enviar_comunicacion():
 @profesor_bp.route('/api/comunicaciones/cleanup', methods=['POST'])
 @login_required
 def api_cleanup_comunicaciones():
-    """API para limpiar comunicaciones automáticamente."""
-    try:
-        from controllers.models import Comunicacion
-        from datetime import datetime, timedelta
-        
-        # Fecha actual
-        now = datetime.utcnow()
-        
-        # Mensajes de más de 1 mes (30 días) - mover a papelera
-        one_month_ago = now - timedelta(days=30)
-        
-        # Mensajes de más de 2 meses (60 días) en papelera - eliminar permanentemente
-        two_months_ago = now - timedelta(days=60)
-        
-        # Mover mensajes antiguos a papelera
-        mensajes_a_papelera = Comunicacion.query.filter(
-            Comunicacion.estado.in_(['inbox', 'sent', 'draft']),
-            Comunicacion.fecha_envio < one_month_ago
-        ).all()
-        
-        moved_to_trash = 0
-        for mensaje in mensajes_a_papelera:
-            mensaje.estado = 'deleted'
-            moved_to_trash += 1
-        
-        # Eliminar permanentemente mensajes muy antiguos en papelera
-        mensajes_a_eliminar = Comunicacion.query.filter(
-            Comunicacion.estado == 'deleted',
-            Comunicacion.fecha_envio < two_months_ago
-        ).all()
-        
-        permanently_deleted = 0
-        for mensaje in mensajes_a_eliminar:
-            db.session.delete(mensaje)
-            permanently_deleted += 1
-        
-        db.session.commit()
-        
-        return jsonify({
-            'success': True,
-            'message': f'Limpieza completada: {moved_to_trash} mensajes movidos a papelera, {permanently_deleted} eliminados permanentemente'
-        })
-        
-    except Exception as e:
-        db.session.rollback()
+    """API para limpiar las comunicaciones antiguas del buzón del profesor."""
+    from services.retencion_comunicaciones_service import aplicar_retencion_comunicaciones
+    
+    # Solo el buzón propio; la limpieza de todos los buzones la hace el planificador
+    progreso, error = aplicar_retencion_comunicaciones(usuario_id=current_user.id_usuario)
+    
+    if error:
         return jsonify({
             'success': False,
-            'message': f'Error en limpieza automática: {str(e)}'
+            'message': f'Error en limpieza automática: {error}'
         }), 500
+    
+    return jsonify({
+        'success': True,
+        'message': f'Limpieza completada: {progreso["movidas_a_papelera"]} mensajes movidos a papelera, {progreso["eliminadas"]} eliminados permanentemente'
+    })
 
 @profesor_bp.route('/api/comunicaciones/draft', methods=['POST'])
 @login_required
@@ -1955,7 +1768,7 @@ def api_asignatura_detalle(asignatura_id):
                 'curso_id': curso.id_curso,
                 'curso_nombre': curso.nombreCurso,
                 'promedio': promedio,
-                'estudiantes': len(obtener_estudiantes_por_curso(curso.id_curso))
+                'estudiantes': contar_estudiantes_curso(curso.id_curso)
             })
 
         asign = Asignatura.query.get(asignatura_id)
@@ -2043,21 +1856,32 @@ def api_obtener_asistencias():
         if not verificar_acceso_curso_profesor(current_user.id_usuario, curso_id):
             return jsonify({'success': False, 'message': 'No tienes acceso a este curso'}), 403
 
-        asistencias = db.session.query(Asistencia).join(
-            Clase, Asistencia.claseId == Clase.id_clase
+        if not año or not mes:
+            return jsonify({'success': False, 'message': 'Año y mes son requeridos'}), 400
+
+        # Asistencias del mes registradas en las clases de este profesor en el curso,
+        # incluidas las de estudiantes que ya no están matriculados en él
+        clases_profesor = {c.id_clase for c in Clase.query.with_entities(Clase.id_clase).filter_by(
+            cursoId=curso_id,
+            profesorId=current_user.id_usuario
+        )}
+        inicio_mes = date(año, mes, 1)
+        fin_mes = date(año + 1, 1, 1) if mes == 12 else date(año, mes + 1, 1)
+        estudiantes_ids = [fila.estudianteId for fila in db.session.query(
+            Asistencia.estudianteId
         ).filter(
-            Clase.cursoId == curso_id,
-            Clase.profesorId == current_user.id_usuario,
-            db.extract('year', Asistencia.fecha) == año,
-            db.extract('month', Asistencia.fecha) == mes
-        ).all()
+            Asistencia.claseId.in_(clases_profesor),
+            Asistencia.fecha >= inicio_mes,
+            Asistencia.fecha < fin_mes
+        ).distinct()] if clases_profesor else []
 
         asistencias_data = [{
-            'estudiante_id': a.estudianteId,
-            'fecha': a.fecha.strftime('%Y-%m-%d'),
-            'estado': a.estado,
-            'excusa': a.excusa
-        } for a in asistencias]
+            'estudiante_id': a['estudiante_id'],
+            'fecha': a['fecha'],
+            'estado': a['estado'],
+            'excusa': a['excusa']
+        } for filas in asistencias_del_mes(estudiantes_ids, año, mes).values()
+            for a in filas if a['clase_id'] in clases_profesor]
 
         return jsonify({'success': True, 'asistencias': asistencias_data})
     except Exception as e:
@@ -2103,52 +1927,68 @@ def api_guardar_asistencia():
 # APIs - CALIFICACIONES
 # ============================================================================ #
 
+# Columnas de cada fila de /api/obtener-calificaciones
+COLUMNAS_CALIFICACIONES = (
+    'id', 'estudiante_id', 'asignatura_id', 'categoria_id', 'valor', 'observaciones', 'nombre_calificacion'
+)
+LOTE_CALIFICACIONES = 1000
+
 @profesor_bp.route('/api/obtener-calificaciones', methods=['GET'])
 @login_required
 def obtener_calificaciones_api():
-    """API para obtener calificaciones del curso."""
-    try:
-        curso_id = session.get('curso_seleccionado')
-
-        if not curso_id:
-            return jsonify({'success': False, 'message': 'No hay curso seleccionado'}), 400
+    """API para obtener calificaciones del curso, en streaming.
+    Cada calificación es un arreglo con COLUMNAS_CALIFICACIONES; los nombres de
+    estudiantes, asignaturas y categorías van una sola vez, por id, al final."""
+    curso_id = session.get('curso_seleccionado')
 
-        if not verificar_acceso_curso_profesor(current_user.id_usuario, curso_id):
-            return jsonify({'success': False, 'message': 'No tienes acceso a este curso'}), 403
+    if not curso_id:
+        return jsonify({'success': False, 'message': 'No hay curso seleccionado'}), 400
 
-        # Traer calificaciones que correspondan al curso uniendo por Clase -> asignatura
-        rows = db.session.query(
-            Calificacion, Usuario, Asignatura, CategoriaCalificacion
-        ).join(
-            Usuario, Usuario.id_usuario == Calificacion.estudianteId
-        ).join(
-            Asignatura, Asignatura.id_asignatura == Calificacion.asignaturaId
-        ).join(
-            CategoriaCalificacion, CategoriaCalificacion.id_categoria == Calificacion.categoriaId
-        ).join(
-            Clase, Clase.asignaturaId == Calificacion.asignaturaId
-        ).filter(
-            Clase.cursoId == curso_id
-        ).all()
+    if not verificar_acceso_curso_profesor(current_user.id_usuario, curso_id):
+        return jsonify({'success': False, 'message': 'No tienes acceso a este curso'}), 403
+
+    consulta = db.session.query(
+        Calificacion.id_calificacion,
+        Calificacion.estudianteId,
+        Calificacion.asignaturaId,
+        Calificacion.categoriaId,
+        Calificacion.valor,
+        Calificacion.observaciones,
+        Calificacion.nombre_calificacion
+    ).filter(
+        *filtro_calificaciones_curso(curso_id)
+    ).order_by(Calificacion.id_calificacion).execution_options(yield_per=LOTE_CALIFICACIONES)
+
+    def generar():
+        # "success" va al final: solo se sabe si todo salió bien al terminar
+        yield '{"columnas": ' + json.dumps(COLUMNAS_CALIFICACIONES) + ', "calificaciones": ['
+        asignaturas, categorias = set(), set()
+        total = 0
+        try:
+            for fila in consulta:
+                asignaturas.add(fila[2])
+                categorias.add(fila[3])
+                fila = list(fila)
+                fila[4] = float(fila[4]) if fila[4] is not None else None
+                yield (',' if total else '') + json.dumps(fila, ensure_ascii=False, separators=(',', ':'))
+                total += 1
+        except Exception as e:
+            # El estado HTTP ya se envió: el cliente detecta el error en el cierre
+            logger.exception(f"Error transmitiendo calificaciones del curso {curso_id}: {e}")
+            yield '], "message": ' + json.dumps(f'Error al obtener calificaciones: {str(e)}') + ', "success": false}'
+            return
 
-        calificaciones_data = []
-        for cal, usuario, asign, cat in rows:
-            calificaciones_data.append({
-                'id': cal.id_calificacion,
-                'estudiante_id': cal.estudianteId,
-                'estudiante_nombre': f"{usuario.nombre} {usuario.apellido}",
-                'asignatura_id': cal.asignaturaId,
-                'asignatura_nombre': asign.nombre if asign else '',
-                'categoria_id': cal.categoriaId,
-                'categoria_nombre': cat.nombre if cat else '',
-                'valor': float(cal.valor) if cal.valor is not None else None,
-                'observaciones': cal.observaciones,
-                'nombre_calificacion': getattr(cal, 'nombre_calificacion', None)
-            })
+        estudiantes = {
+            e.id_usuario: f"{e.nombre} {e.apellido}" for e in estudiantes_del_curso(curso_id)
+        }
+        yield '], "total": ' + str(total) + ', "estudiantes": ' + json.dumps(estudiantes, ensure_ascii=False) \
+            + ', "asignaturas": ' + json.dumps(
+                {a: getattr(asignatura_por_id(a), 'nombre', '') for a in asignaturas}, ensure_ascii=False
+            ) + ', "categorias": ' + json.dumps(
+                {c: getattr(categoria_por_id(c), 'nombre', '') for c in categorias}, ensure_ascii=False
+            ) + ', "success": true}'
 
-        return jsonify({'success': True, 'calificaciones': calificaciones_data})
-    except Exception as e:
-        return jsonify({'success': False, 'message': f'Error al obtener calificaciones: {str(e)}'}), 500
+    return Response(stream_with_context(generar()), mimetype='application/json')
 
 @profesor_bp.route('/api/guardar-calificacion', methods=['POST'])
 @login_required
@@ -2205,6 +2045,45 @@ def guardar_calificacion():
         return jsonify({'success': False, 'message': f'Error al guardar calificación: {str(e)}'}), 500
 
 
+@profesor_bp.route('/api/libro-calificaciones', methods=['GET', 'POST'])
+@login_required
+def api_libro_calificaciones():
+    """Libro de calificaciones (estudiantes × asignaciones) de una asignatura del curso.
+    GET: ?asignatura_id=&curso_id= (por defecto el curso seleccionado)
+    POST: { asignatura_id, curso_id?, cambios: [{ estudiante_id, categoria_id, nombre_calificacion, valor, observaciones?, version }] }
+    """
+    try:
+        if request.method == 'GET':
+            data = {}
+            asignatura_id = request.args.get('asignatura_id', type=int)
+            curso_id = request.args.get('curso_id', type=int)
+        else:
+            data = request.get_json(silent=True) or {}
+            asignatura_id = data.get('asignatura_id')
+            curso_id = data.get('curso_id')
+        curso_id = curso_id or session.get('curso_seleccionado')
+
+        if not curso_id or not asignatura_id:
+            return jsonify({'success': False, 'message': 'Curso y asignatura requeridos'}), 400
+
+        if not verificar_asignatura_profesor_en_curso(asignatura_id, current_user.id_usuario, curso_id):
+            return jsonify({'success': False, 'message': 'No tienes esta asignatura en el curso'}), 403
+
+        if request.method == 'GET':
+            return jsonify({'success': True, 'curso_id': curso_id, 'asignatura_id': asignatura_id,
+                            **cargar_libro(curso_id, asignatura_id)})
+
+        resultado, error = guardar_cambios_libro(curso_id, asignatura_id, data.get('cambios'), current_user.id_usuario)
+        if error:
+            if resultado and resultado.get('conflictos'):
+                return jsonify({'success': False, 'message': error, 'conflictos': resultado['conflictos']}), 409
+            return jsonify({'success': False, 'message': error}), 400
+
+        return jsonify({'success': True, 'message': 'Calificaciones guardadas correctamente', **resultado})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error en el libro de calificaciones: {str(e)}'}), 500
+
+
 @profesor_bp.route('/api/crear-asignacion', methods=['POST'])
 @login_required
 def api_crear_asignacion():
@@ -2224,13 +2103,16 @@ def api_crear_asignacion():
         if not verificar_asignatura_profesor_en_curso(asignatura_id, current_user.id_usuario, curso_id):
             return jsonify({'success': False, 'message': 'No tienes acceso a esa asignatura en el curso'}), 403
 
-        estudiantes = obtener_estudiantes_por_curso(curso_id)
+        estudiantes_ids = ids_estudiantes_curso(curso_id)
+        if not categoria_id:
+            categorias = listar(CategoriaCalificacion)
+            categoria_id = categorias[0].id_categoria if categorias else None
         creadas = []
-        for est in estudiantes:
+        for est_id in estudiantes_ids:
             nueva = Calificacion(
-                estudianteId=getattr(est, 'id_usuario', None),
+                estudianteId=est_id,
                 asignaturaId=asignatura_id,
-                categoriaId=categoria_id or (CategoriaCalificacion.query.first().id_categoria if CategoriaCalificacion.query.first() else None),
+                categoriaId=categoria_id,
                 valor=None,
                 observaciones='',
                 nombre_calificacion=nombre
@@ -2301,7 +2183,7 @@ def api_eliminar_asignacion():
 @login_required
 def api_categorias():
     if request.method == 'GET':
-        cats = CategoriaCalificacion.query.all()
+        cats = listar(CategoriaCalificacion)
         data = [{'id': c.id_categoria, 'nombre': c.nombre, 'color': c.color, 'porcentaje': float(c.porcentaje)} for c in cats]
         return jsonify({'success': True, 'categorias': data})
 
@@ -2452,7 +2334,7 @@ def api_crear_tarea():
                 return jsonify({'success': False, 'message': 'Formato de fecha inválido'}), 400
 
         # Obtener estudiantes del curso
-        estudiantes = obtener_estudiantes_por_curso(curso_id)
+        estudiantes = estudiantes_del_curso(curso_id)
         if not estudiantes:
             return jsonify({'success': False, 'message': 'No hay estudiantes matriculados en este curso'}), 400
 
@@ -2501,7 +2383,7 @@ def api_crear_tarea():
                         auto_commit=False
                     )
                 except Exception as e:
-                    print(f'Error creando notificación para estudiante {est_id}: {str(e)}')
+                    logger.exception(f'Error creando notificación para estudiante {est_id}: {str(e)}')
                 
                 # Notificar a los padres del estudiante (sin commit automático)
                 try:
@@ -2520,11 +2402,11 @@ def api_crear_tarea():
                                     auto_commit=False
                                 )
                             except Exception as e:
-                                print(f'Error creando notificación para padre {padre.id_usuario}: {str(e)}')
+                                logger.exception(f'Error creando notificación para padre {padre.id_usuario}: {str(e)}')
                 except Exception as e:
-                    print(f'Error obteniendo padres del estudiante {est_id}: {str(e)}')
+                    logger.exception(f'Error obteniendo padres del estudiante {est_id}: {str(e)}')
         except ImportError:
-            print('Servicio de notificaciones no disponible')
+            logger.debug('Servicio de notificaciones no disponible')
 
         # Guardar todas las tareas y notificaciones en una sola transacción
         db.session.commit()
@@ -2560,8 +2442,7 @@ def api_obtener_tareas():
         asignatura_id = request.args.get('asignatura_id')
         
         # Obtener IDs de estudiantes del curso
-        estudiantes = obtener_estudiantes_por_curso(curso_id)
-        estudiantes_ids = [getattr(est, 'id_usuario', None) for est in estudiantes if hasattr(est, 'id_usuario')]
+        estudiantes_ids = ids_estudiantes_curso(curso_id)
         
         if not estudiantes_ids:
             return jsonify({'success': True, 'tareas': []})
@@ -2685,7 +2566,7 @@ def tareas_academicas():
     
     # Obtener asignaturas del profesor en este curso
     asignaturas = obtener_asignaturas_del_profesor_en_curso(current_user.id_usuario, curso_id)
-    categorias = CategoriaCalificacion.query.all()
+    categorias = listar(CategoriaCalificacion)
     
     return render_template('profesores/tareas.html', 
                          curso=curso, 
@@ -2919,6 +2800,31 @@ def api_dashboard_resumen():
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error obteniendo resumen: {str(e)}'}), 500
 
+@profesor_bp.route('/api/estudiantes-riesgo', methods=['GET'])
+@login_required
+def api_estudiantes_riesgo():
+    """Estudiantes del curso ordenados por puntaje de riesgo (por defecto el curso seleccionado)."""
+    try:
+        curso_id = request.args.get('curso_id', type=int) or session.get('curso_seleccionado')
+        if not curso_id:
+            return jsonify({'success': False, 'message': 'Selecciona un curso'}), 400
+        if not verificar_acceso_curso_profesor(current_user.id_usuario, curso_id):
+            return jsonify({'success': False, 'message': 'No tienes acceso a este curso'}), 403
+
+        ranking = ranking_curso(
+            curso_id,
+            limite=request.args.get('limite', type=int),
+            nivel_minimo=request.args.get('nivel')
+        )
+        return jsonify({
+            'success': True,
+            'curso_id': curso_id,
+            'estudiantes': ranking,
+            'total': len(ranking)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error obteniendo estudiantes en riesgo: {str(e)}'}), 500
+
 # ============================================================================ #
 # APIs - CONFIGURACIÓN DE CALIFICACIONES
 # ============================================================================ #
@@ -2932,35 +2838,10 @@ def api_configuracion_calificaciones():
         asignatura_id = session.get('asignatura_seleccionada')
         
         if request.method == 'GET':
-            # Buscar configuración específica de la asignatura primero
-            cfg = None
-            if asignatura_id:
-                cfg = ConfiguracionCalificacion.query.filter_by(asignatura_id=asignatura_id).first()
-            
-            # Si no hay configuración específica, usar la global
-            if not cfg:
-                cfg = ConfiguracionCalificacion.query.filter_by(asignatura_id=None).first()
-            
-            if not cfg:
-                # valores por defecto
-                return jsonify({
-                    'success': True, 
-                    'configuracion': {
-                        'notaMinima': 0, 
-                        'notaMaxima': 100, 
-                        'notaMinimaAprobacion': 60,
-                        'es_especifica': False
-                    }
-                })
-            
+            # Configuración específica de la asignatura, la global o la por defecto
             return jsonify({
                 'success': True, 
-                'configuracion': {
-                    'notaMinima': float(cfg.notaMinima), 
-                    'notaMaxima': float(cfg.notaMaxima), 
-                    'notaMinimaAprobacion': float(cfg.notaMinimaAprobacion),
-                    'es_especifica': cfg.asignatura_id is not None
-                }
+                'configuracion': escala_a_dict(obtener_escala(asignatura_id))
             })
 
         # POST: upsert
@@ -2976,10 +2857,10 @@ def api_configuracion_calificaciones():
         if notaMinimaAprobacion < notaMinima or notaMinimaAprobacion > notaMaxima:
             return jsonify({'success': False, 'message': 'La nota de aprobación debe estar entre la mínima y máxima'}), 400
 
-        # Obtener o crear configuración específica de la asignatura
-        cfg = None
-        if asignatura_id:
-            cfg = ConfiguracionCalificacion.query.filter_by(asignatura_id=asignatura_id).first()
+        # Obtener o crear la configuración de la asignatura (o la global si no hay asignatura)
+        cfg = ConfiguracionCalificacion.query.filter_by(asignatura_id=asignatura_id).order_by(
+            ConfiguracionCalificacion.id_configuracion
+        ).first()
         
         if not cfg:
             cfg = ConfiguracionCalificacion(asignatura_id=asignatura_id)
@@ -3036,17 +2917,11 @@ def api_generar_reporte_calificaciones():
 
         # Obtener configuración de calificaciones específica por asignatura
         # Si no existe configuración específica, usar la global
-        config_calificaciones = ConfiguracionCalificacion.query.filter_by(
-            asignatura_id=asignatura_id
-        ).first()
-        
-        if not config_calificaciones:
-            config_calificaciones = ConfiguracionCalificacion.query.first()
-        
+        escala = obtener_escala(asignatura_id)
         configuracion_notas = {
-            'nota_minima': float(config_calificaciones.notaMinima) if config_calificaciones else 0,
-            'nota_maxima': float(config_calificaciones.notaMaxima) if config_calificaciones else 100,
-            'nota_aprobacion': float(config_calificaciones.notaMinimaAprobacion) if config_calificaciones else 60
+            'nota_minima': float(escala.nota_minima),
+            'nota_maxima': float(escala.nota_maxima),
+            'nota_aprobacion': float(escala.nota_aprobacion)
         }
 
         # Obtener categorías de calificaciones específicas de esta asignatura
@@ -3253,23 +3128,17 @@ def ver_eventos():
 @login_required
 def api_eventos_profesor():
     try:
+        ventana, error = obtener_ventana(request.args)
+        if error:
+            return jsonify({"error": error}), 400
+
         # Filtrar por rol del usuario logueado
-        eventos = Evento.query.filter_by(rol_destino="Profesor").all()
-
-        resultado = []
-        for ev in eventos:
-            resultado.append({
-                "IdEvento": ev.id,
-                "Nombre": ev.nombre,
-                "Descripcion": ev.descripcion,
-                "Fecha": ev.fecha.strftime("%Y-%m-%d"),
-                "Hora": ev.hora.strftime("%H:%M:%S") if ev.hora else "",
-                "RolDestino": ev.rol_destino
-            })
+        ocurrencias = ocurrencias_en_ventana(*ventana, roles=roles_visibles_para('Profesor'))
+        resultado = [serializar_ocurrencia(ev, fecha) for ev, fecha in ocurrencias]
 
         return jsonify(resultado), 200
     except Exception as e:
-        print(f"Error en api_eventos_profesor: {str(e)}")
+        logger.exception(f"Error en api_eventos_profesor: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
@@ -3461,9 +3330,9 @@ def api_estadisticas_solicitudes():
 def api_obtener_periodo_activo_profesor():
     """Obtiene el periodo académico activo actual."""
     try:
-        from services.periodo_service import obtener_periodo_activo
+        from services.periodo_service import periodo_activo_dict
         
-        periodo = obtener_periodo_activo()
+        periodo = periodo_activo_dict()
         
         if not periodo:
             return jsonify({
@@ -3473,14 +3342,11 @@ def api_obtener_periodo_activo_profesor():
             })
         
         # Incluir información adicional útil para el profesor
-        dias_restantes = periodo.dias_para_cierre()
-        
         return jsonify({
             'success': True,
             'periodo': {
-                **periodo.to_dict(),
-                'dias_para_cierre': dias_restantes,
-                'puede_modificar': periodo.puede_modificar_notas()
+                **periodo,
+                'puede_modificar': periodo['puede_modificar_notas']
             }
         })
         
@@ -3535,12 +3401,12 @@ def crear_notificacion_profesor(usuario_id, titulo, mensaje, tipo="sistema", lin
         )
         db.session.add(notificacion)
         db.session.commit()
-        print(f"✅ Notificación creada para profesor {usuario_id}")
+        logger.debug("✅ Notificación creada para profesor %s", usuario_id)
         return True
         
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error creando notificación: {e}")
+        logger.exception(f"❌ Error creando notificación: {e}")
         return False
 
 def get_sidebar_counts_profesor():
@@ -3555,18 +3421,10 @@ def get_sidebar_counts_profesor():
         ).count()
         
         # Notificaciones no leídas (para notificaciones)
-        unread_notifications = Notificacion.query.filter_by(
-            usuario_id=current_user.id_usuario,
-            leida=False
-        ).count()
+        unread_notifications = contar_notificaciones_no_leidas(current_user.id_usuario)
         
         # Eventos próximos (para calendario)
-        hoy = datetime.now().date()
-        eventos_proximos = Evento.query.filter(
-            Evento.fecha >= hoy,
-            Evento.rol_destino == "Profesor"
-        ).all()
-        upcoming_events = len(eventos_proximos)
+        upcoming_events = contar_eventos_proximos(roles_visibles_para('Profesor'))
         
         return {
             'unread_messages': unread_messages,
@@ -3575,7 +3433,7 @@ def get_sidebar_counts_profesor():
         }
         
     except Exception as e:
-        print(f"❌ Error en get_sidebar_counts_profesor: {e}")
+        logger.exception(f"❌ Error en get_sidebar_counts_profesor: {e}")
         return {
             'unread_messages': 0,
             'unread_notifications': 0,
@@ -3624,7 +3482,7 @@ def api_obtener_notificaciones_profesor():
         per_page = request.args.get('per_page', 20, type=int)
         filtro = request.args.get('filtro', 'todas')
         
-        query = Notificacion.query.filter_by(usuario_id=current_user.id_usuario)
+        query = Notificacion.query.filter_by(usuario_id=current_user.id_usuario, enviada=True)
         
         if filtro == 'pendientes':
             query = query.filter_by(leida=False)
@@ -3778,7 +3636,7 @@ def api_profesor_mis_cursos():
         })
         
     except Exception as e:
-        print(f"Error obteniendo cursos del profesor: {e}")
+        logger.exception(f"Error obteniendo cursos del profesor: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -3802,7 +3660,7 @@ def api_profesor_estudiantes_curso(curso_id):
             }), 403
         
         # Obtener estudiantes matriculados
-        rol_estudiante = Rol.query.filter_by(nombre='Estudiante').first()
+        rol_estudiante = rol_por_nombre('Estudiante')
         
         estudiantes = db.session.query(Usuario).join(
             Matricula, Usuario.id_usuario == Matricula.estudianteId
@@ -3846,7 +3704,7 @@ def api_profesor_estudiantes_curso(curso_id):
         })
         
     except Exception as e:
-        print(f"Error obteniendo estudiantes: {e}")
+        logger.exception(f"Error obteniendo estudiantes: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -3979,7 +3837,7 @@ def obtener_cursos_profesor():
 
         return jsonify({"success": True, "cursos": data})
     except Exception as e:
-        print(f"Error al obtener los cursos: {e}")
+        logger.exception(f"Error al obtener los cursos: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
     
 @profesor_bp.route('/api/estudiantes-curso/<int:curso_id>', methods=['GET'])
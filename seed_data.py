@@ -16,6 +16,7 @@ from controllers.models import (
     Comunicacion, Notificacion, Candidato, Voto, HorarioCurso,
     HorarioCompartido, ConfiguracionCalificacion, SolicitudConsulta
 )
+from services.password_service import generar_hashes_en_lote
 
 # Datos de ejemplo (se mantienen)
 NOMBRES_MASCULINOS = [
@@ -73,11 +74,13 @@ def get_or_create(model, defaults=None, **kwargs):
         params.update(defaults)
     
     # Intenta obtener el hash de la contraseña si se está creando un Usuario
-    if model == Usuario and 'password_hash' not in params:
-        # Se asume que 'password' es el campo para la contraseña plana
+    if model == Usuario:
+        # Se asume que 'password' es el campo para la contraseña plana;
+        # si ya viene 'password_hash' precalculado se usa tal cual
         password_plana = params.pop('password', '123456') 
         instance = model(**params)
-        instance.set_password(password_plana)
+        if 'password_hash' not in params:
+            instance.set_password(password_plana)
     else:
         instance = model(**params)
 
@@ -96,6 +99,15 @@ def get_or_create(model, defaults=None, **kwargs):
     return instance, True
 
 
+def hashes_para_nuevos(correos, password='123456'):
+    """Precalcula en paralelo los hashes de los usuarios que aún no existen"""
+    existentes = {
+        correo for (correo,) in db.session.query(Usuario.correo).filter(Usuario.correo.in_(correos))
+    }
+    nuevos = [correo for correo in correos if correo not in existentes]
+    return dict(zip(nuevos, generar_hashes_en_lote([password] * len(nuevos))))
+
+
 # --- SEEDING FUNCTIONS ---
 
 def seed_roles():
@@ -332,6 +344,7 @@ def seed_profesores(roles, asignaturas):
     profesores.append(prof_real)
     
     # 9 profesores adicionales
+    hashes = hashes_para_nuevos([f'profesor{i}@colegio.edu.co' for i in range(1, 10)])
     for i in range(1, 10):
         nombres = random.choice(NOMBRES_MASCULINOS if i % 2 == 0 else NOMBRES_FEMENINOS)
         apellido = random.choice(APELLIDOS)
@@ -344,7 +357,8 @@ def seed_profesores(roles, asignaturas):
                 'no_identidad': f'10{100000 + i}', 'tipo_doc': 'CC', 'nombre': nombres,
                 'apellido': f'{apellido} {random.choice(APELLIDOS)}',
                 'telefono': f'300{1000000 + i}', 'direccion': f'Calle {i*5} # {i*2}-{i*3}',
-                'id_rol_fk': rol_profesor.id_rol, 'email_verified': True, 'password': '123456'
+                'id_rol_fk': rol_profesor.id_rol, 'email_verified': True, 'password': '123456',
+                **({'password_hash': hashes[correo]} if correo in hashes else {})
             }
         )
         
@@ -385,6 +399,7 @@ def seed_padres(roles):
     padres.append(padre_real)
     
     # 9 padres adicionales
+    hashes = hashes_para_nuevos([f'padre{i}@gmail.com' for i in range(1, 10)])
     for i in range(1, 10):
         nombres = random.choice(NOMBRES_MASCULINOS if i % 2 == 0 else NOMBRES_FEMENINOS)
         apellido = random.choice(APELLIDOS)
@@ -397,7 +412,8 @@ def seed_padres(roles):
                 'no_identidad': f'20{100000 + i}', 'tipo_doc': 'CC', 'nombre': nombres,
                 'apellido': f'{apellido} {random.choice(APELLIDOS)}',
                 'telefono': f'301{1000000 + i}', 'direccion': f'Carrera {i*3} # {i*4}-{i*5}',
-                'id_rol_fk': rol_padre.id_rol, 'email_verified': True, 'password': '123456'
+                'id_rol_fk': rol_padre.id_rol, 'email_verified': True, 'password': '123456',
+                **({'password_hash': hashes[correo]} if correo in hashes else {})
             }
         )
         
@@ -445,6 +461,7 @@ def seed_estudiantes(roles, cursos, padres):
     estudiantes.append(est_real)
     
     # 49 estudiantes adicionales
+    hashes = hashes_para_nuevos([f'estudiante{i}@colegio.edu.co' for i in range(1, 50)])
     for i in range(1, 50):
         nombres = random.choice(NOMBRES_MASCULINOS if i % 2 == 0 else NOMBRES_FEMENINOS)
         apellido1 = random.choice(APELLIDOS)
@@ -458,7 +475,8 @@ def seed_estudiantes(roles, cursos, padres):
                 'no_identidad': f'30{100000 + i}', 'tipo_doc': 'TI' if i % 3 != 0 else 'CC', 'nombre': nombres,
                 'apellido': f'{apellido1} {apellido2}', 'telefono': f'302{1000000 + i}',
                 'direccion': f'Avenida {i} # {i*2}-{i}', 'id_rol_fk': rol_estudiante.id_rol,
-                'email_verified': True, 'password': '123456'
+                'email_verified': True, 'password': '123456',
+                **({'password_hash': hashes[correo]} if correo in hashes else {})
             }
         )
         
@@ -0,0 +1,284 @@
+"""
+Analítica del horario: carga docente, ocupación de salones y concurrencia por sede
+
+Todo sale de HorarioCurso y se resume por recurso:
+
+- profesor: minutos de clase por día, horas semanales y huecos entre clases
+  del mismo día;
+- salón: minutos ocupados por día, que se comparan con la jornada de los
+  horarios generales activos para obtener el porcentaje de ocupación;
+- sede: máximo de clases simultáneas por día y cuándo se alcanza (la sede
+  de una clase es la de su salón o, sin salón, la de su curso).
+
+Los resúmenes de profesores y salones quedan en caché por recurso. Al
+guardar un horario solo se descartan los del profesor y el salón de cada
+bloque tocado (el anterior y el nuevo, si cambió), así que el siguiente
+pedido recalcula únicamente esos, en una sola consulta. Los de sede se
+recalculan juntos ante cualquier cambio del horario.
+
+`resumen_horarios` arma además las series para los gráficos, en el formato
+{'labels': [...], 'data': [...]} que ya usan los del profesor.
+"""
+
+import json
+from collections import namedtuple
+from sqlalchemy import func, inspect
+from controllers.models import db, HorarioCurso, HorarioGeneral, Salon, Sede, Curso, Usuario, Rol
+from services.cache_service import CacheTTL, invalidar_al_cambiar, invalidar_claves_al_cambiar
+from services.horario_profesor_service import indice_dia, minutos_del_dia, DIAS_SEMANA
+
+
+ANALITICA_TTL = 3600
+
+# Jornada cuando no hay horarios generales activos: lunes a viernes, 07:00 - 17:00
+JORNADA_POR_DEFECTO = {dia: (7 * 60, 17 * 60) for dia in range(5)}
+
+CargaProfesor = namedtuple('CargaProfesor', 'minutos_por_dia clases huecos_por_dia hueco_maximo')
+OcupacionSalon = namedtuple('OcupacionSalon', 'minutos_por_dia clases')
+
+cache_analitica = CacheTTL('analitica_horarios', ttl=ANALITICA_TTL, max_entradas=8192)
+
+
+def _valor_anterior(obj, campo):
+    anteriores = inspect(obj).attrs[campo].history.deleted
+    return anteriores[0] if anteriores else None
+
+
+def _suscribir(tipo, campo):
+    campos = (campo, 'dia_semana', 'hora_inicio', 'hora_fin')
+    invalidar_claves_al_cambiar(HorarioCurso, cache_analitica, clave=lambda h: (tipo, getattr(h, campo)), campos=campos)
+    invalidar_claves_al_cambiar(HorarioCurso, cache_analitica, clave=lambda h: (tipo, _valor_anterior(h, campo)), campos=campos)
+
+
+_suscribir('profesor', 'profesor_id')
+_suscribir('salon', 'id_salon_fk')
+invalidar_al_cambiar(
+    (HorarioCurso, Salon, Curso),
+    lambda _modelos: cache_analitica.invalidar_si(lambda clave: clave[0] == 'sedes')
+)
+invalidar_al_cambiar(
+    (HorarioGeneral,),
+    lambda _modelos: cache_analitica.invalidar_si(lambda clave: clave[0] == 'jornada')
+)
+
+
+def _intervalos_por_dia(filas):
+    """[(dia, inicio, fin)] -> {dia: intervalos ordenados y fusionados}."""
+    por_dia = {}
+    for dia, inicio, fin in sorted(filas):
+        intervalos = por_dia.setdefault(dia, [])
+        if intervalos and inicio <= intervalos[-1][1]:
+            intervalos[-1][1] = max(intervalos[-1][1], fin)
+        else:
+            intervalos.append([inicio, fin])
+    return por_dia
+
+
+def _clases_validas(filas):
+    """Agrupa (recurso, dia, hora_inicio, hora_fin) por recurso, en minutos."""
+    por_recurso = {}
+    for recurso_id, dia, hora_inicio, hora_fin in filas:
+        dia_idx, inicio, fin = indice_dia(dia), minutos_del_dia(hora_inicio), minutos_del_dia(hora_fin)
+        if dia_idx is None or inicio is None or fin is None or fin <= inicio:
+            continue
+        por_recurso.setdefault(recurso_id, []).append((dia_idx, inicio, fin))
+    return por_recurso
+
+
+def _calcular_profesores(profesor_ids):
+    clases = _clases_validas(db.session.query(
+        HorarioCurso.profesor_id, HorarioCurso.dia_semana, HorarioCurso.hora_inicio, HorarioCurso.hora_fin
+    ).filter(HorarioCurso.profesor_id.in_(profesor_ids)).all())
+
+    resumenes = {}
+    for profesor_id in profesor_ids:
+        minutos, huecos, hueco_maximo = [0] * len(DIAS_SEMANA), [0] * len(DIAS_SEMANA), 0
+        for dia, intervalos in _intervalos_por_dia(clases.get(profesor_id, [])).items():
+            minutos[dia] = sum(fin - inicio for inicio, fin in intervalos)
+            for (_, fin_anterior), (inicio, _) in zip(intervalos, intervalos[1:]):
+                huecos[dia] += inicio - fin_anterior
+                hueco_maximo = max(hueco_maximo, inicio - fin_anterior)
+        resumenes[profesor_id] = CargaProfesor(
+            tuple(minutos), len(clases.get(profesor_id, [])), tuple(huecos), hueco_maximo
+        )
+    return resumenes
+
+
+def _calcular_salones(salon_ids):
+    clases = _clases_validas(db.session.query(
+        HorarioCurso.id_salon_fk, HorarioCurso.dia_semana, HorarioCurso.hora_inicio, HorarioCurso.hora_fin
+    ).filter(HorarioCurso.id_salon_fk.in_(salon_ids)).all())
+
+    resumenes = {}
+    for salon_id in salon_ids:
+        minutos = [0] * len(DIAS_SEMANA)
+        for dia, intervalos in _intervalos_por_dia(clases.get(salon_id, [])).items():
+            minutos[dia] = sum(fin - inicio for inicio, fin in intervalos)
+        resumenes[salon_id] = OcupacionSalon(tuple(minutos), len(clases.get(salon_id, [])))
+    return resumenes
+
+
+def _resumenes(tipo, ids, calcular):
+    """id -> resumen, calculando juntos los que no estén en caché."""
+    resultado, faltantes = {}, []
+    for recurso_id in dict.fromkeys(ids):
+        resumen = cache_analitica.obtener((tipo, recurso_id))
+        if resumen is None:
+            faltantes.append(recurso_id)
+        else:
+            resultado[recurso_id] = resumen
+
+    if faltantes:
+        version = cache_analitica.version
+        calculados = calcular(faltantes)
+        if version == cache_analitica.version:
+            for recurso_id, resumen in calculados.items():
+                cache_analitica.guardar((tipo, recurso_id), resumen)
+        resultado.update(calculados)
+    return resultado
+
+
+def _calcular_jornada():
+    jornada = {}
+    for dias, hora_inicio, hora_fin in db.session.query(
+        HorarioGeneral.diasSemana, HorarioGeneral.horaInicio, HorarioGeneral.horaFin
+    ).filter(HorarioGeneral.activo.isnot(False)).all():
+        try:
+            dias = json.loads(dias) if dias else []
+        except ValueError:
+            dias = dias.split(',')
+        inicio, fin = minutos_del_dia(hora_inicio), minutos_del_dia(hora_fin)
+        if inicio is None or fin is None or fin <= inicio:
+            continue
+        for dia in filter(lambda d: d is not None, map(indice_dia, dias)):
+            actual = jornada.get(dia)
+            jornada[dia] = (min(actual[0], inicio), max(actual[1], fin)) if actual else (inicio, fin)
+    return jornada or dict(JORNADA_POR_DEFECTO)
+
+
+def jornada_semanal():
+    """Día -> (inicio, fin) en minutos, uniendo los horarios generales activos."""
+    return cache_analitica.obtener_o_calcular(('jornada',), _calcular_jornada)
+
+
+def _calcular_sedes():
+    clases = _clases_validas(db.session.query(
+        func.coalesce(Salon.id_sede_fk, Curso.sedeId),
+        HorarioCurso.dia_semana, HorarioCurso.hora_inicio, HorarioCurso.hora_fin
+    ).outerjoin(
+        Salon, HorarioCurso.id_salon_fk == Salon.id_salon
+    ).outerjoin(
+        Curso, HorarioCurso.curso_id == Curso.id_curso
+    ).all())
+
+    resumenes = {}
+    for sede_id, bloques in clases.items():
+        if sede_id is None:
+            continue
+        eventos = sorted(
+            [(dia, inicio, 1) for dia, inicio, _ in bloques] + [(dia, fin, -1) for dia, _, fin in bloques]
+        )
+        picos, momentos, simultaneas = [0] * len(DIAS_SEMANA), [None] * len(DIAS_SEMANA), 0
+        for dia, minuto, cambio in eventos:
+            # Con el mismo minuto los fines (-1) van antes que los inicios: clases seguidas no se solapan
+            simultaneas += cambio
+            if simultaneas > picos[dia]:
+                picos[dia], momentos[dia] = simultaneas, minuto
+        resumenes[sede_id] = {'picos': tuple(picos), 'momentos': tuple(momentos), 'clases': len(bloques)}
+    return resumenes
+
+
+def concurrencia_sedes():
+    """Sede -> {'picos', 'momentos', 'clases'}: clases simultáneas máximas por día."""
+    return cache_analitica.obtener_o_calcular(('sedes',), _calcular_sedes)
+
+
+def _hora(minutos):
+    return f"{minutos // 60:02d}:{minutos % 60:02d}" if minutos is not None else None
+
+
+def _serie(filas, etiqueta, valor):
+    return {'labels': [etiqueta(f) for f in filas], 'data': [valor(f) for f in filas]}
+
+
+def resumen_horarios(sede_id=None):
+    """
+    Carga docente, ocupación de salones y concurrencia por sede, con series para gráficos
+
+    Args:
+        sede_id (int): Limitar salones y sedes a una sede (los profesores no
+            se filtran: pueden dictar en varias)
+
+    Returns:
+        dict: 'profesores', 'salones' y 'sedes' (listas ordenadas de mayor a
+        menor carga, ocupación y pico) y 'graficos'
+    """
+    profesores = db.session.query(
+        Usuario.id_usuario, Usuario.nombre, Usuario.apellido
+    ).join(
+        Rol, Usuario.id_rol_fk == Rol.id_rol
+    ).filter(
+        Rol.nombre == 'Profesor', Usuario.estado_cuenta == 'activa'
+    ).all()
+    cargas = _resumenes('profesor', [p.id_usuario for p in profesores], _calcular_profesores)
+
+    lista_profesores = sorted(({
+        'id_usuario': p.id_usuario,
+        'nombre': f"{p.nombre} {p.apellido}",
+        'clases': cargas[p.id_usuario].clases,
+        'horas_semana': round(sum(cargas[p.id_usuario].minutos_por_dia) / 60, 2),
+        'minutos_por_dia': dict(zip(DIAS_SEMANA, cargas[p.id_usuario].minutos_por_dia)),
+        'minutos_huecos': sum(cargas[p.id_usuario].huecos_por_dia),
+        'hueco_maximo': cargas[p.id_usuario].hueco_maximo
+    } for p in profesores), key=lambda p: (-p['horas_semana'], p['nombre']))
+
+    consulta_salones = db.session.query(Salon.id_salon, Salon.nombre, Salon.id_sede_fk)
+    if sede_id:
+        consulta_salones = consulta_salones.filter(Salon.id_sede_fk == sede_id)
+    salones = consulta_salones.all()
+    ocupaciones = _resumenes('salon', [s.id_salon for s in salones], _calcular_salones)
+
+    jornada = jornada_semanal()
+    minutos_jornada = sum(fin - inicio for inicio, fin in jornada.values())
+    lista_salones = sorted(({
+        'id_salon': s.id_salon,
+        'nombre': s.nombre,
+        'id_sede_fk': s.id_sede_fk,
+        'clases': ocupaciones[s.id_salon].clases,
+        'minutos_ocupados': sum(ocupaciones[s.id_salon].minutos_por_dia),
+        'porcentaje_ocupacion': round(
+            100 * sum(ocupaciones[s.id_salon].minutos_por_dia) / minutos_jornada, 1
+        ) if minutos_jornada else 0.0
+    } for s in salones), key=lambda s: (-s['porcentaje_ocupacion'], s['nombre']))
+
+    nombres_sedes = dict(db.session.query(Sede.id_sede, Sede.nombre).all())
+    lista_sedes = sorted(({
+        'id_sede': id_sede,
+        'nombre': nombres_sedes.get(id_sede, 'Sin sede'),
+        'clases': datos['clases'],
+        'pico': max(datos['picos']),
+        'picos_por_dia': dict(zip(DIAS_SEMANA, datos['picos'])),
+        'hora_pico_por_dia': dict(zip(DIAS_SEMANA, map(_hora, datos['momentos'])))
+    } for id_sede, datos in concurrencia_sedes().items() if not sede_id or id_sede == sede_id),
+        key=lambda s: (-s['pico'], s['nombre']))
+
+    dias_jornada = [DIAS_SEMANA[d] for d in sorted(jornada)]
+    return {
+        'profesores': lista_profesores,
+        'salones': lista_salones,
+        'sedes': lista_sedes,
+        'jornada': {DIAS_SEMANA[d]: [_hora(inicio), _hora(fin)] for d, (inicio, fin) in sorted(jornada.items())},
+        'graficos': {
+            'horas_profesor': _serie(lista_profesores, lambda p: p['nombre'], lambda p: p['horas_semana']),
+            'huecos_profesor': _serie(lista_profesores, lambda p: p['nombre'], lambda p: p['minutos_huecos']),
+            'ocupacion_salon': _serie(lista_salones, lambda s: s['nombre'], lambda s: s['porcentaje_ocupacion']),
+            'pico_sede': _serie(lista_sedes, lambda s: s['nombre'], lambda s: s['pico']),
+            'concurrencia_sede': {
+                'labels': dias_jornada,
+                'datasets': [{
+                    'label': s['nombre'],
+                    'data': [s['picos_por_dia'][dia] for dia in dias_jornada]
+                } for s in lista_sedes]
+            }
+        }
+    }
@@ -0,0 +1,292 @@
+"""
+Caché en memoria del proceso con expiración (TTL), cálculo único por clave
+(single-flight) e invalidación automática al confirmar cambios en modelos
+"""
+
+import logging
+import threading
+import time
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+_AUSENTE = object()
+
+
+class CacheTTL:
+    """
+    Caché clave -> valor con expiración por entrada
+
+    Cuando varias peticiones piden a la vez una clave vencida, solo una
+    ejecuta el cálculo y las demás esperan su resultado. Cada invalidación
+    sube la versión de la caché: un cálculo que empezó antes de invalidar
+    no se guarda, para no publicar datos ya obsoletos.
+
+    La caché vive en cada proceso; con varios workers el TTL acota cuánto
+    tiempo puede servir un dato invalidado en otro proceso.
+    """
+
+    def __init__(self, nombre, ttl=60, max_entradas=1024):
+        self.nombre = nombre
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.version = 0
+        self._datos = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, por_defecto=None):
+        entrada = self._datos.get(clave)
+        if entrada is None or entrada[0] < time.monotonic():
+            return por_defecto
+        return entrada[1]
+
+    def guardar(self, clave, valor, ttl=None):
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if len(self._datos) >= self.max_entradas and clave not in self._datos:
+                self._purgar()
+            self._datos[clave] = (expira, valor)
+
+    def obtener_o_calcular(self, clave, calcular, ttl=None):
+        """
+        Devuelve el valor vigente o lo calcula una sola vez
+
+        Args:
+            clave: Clave hashable
+            calcular (callable): Función sin argumentos que produce el valor
+            ttl (int): Segundos de vigencia; por defecto el de la caché
+
+        Returns:
+            El valor en caché o el recién calculado
+        """
+        valor = self.obtener(clave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+
+        with self._lock_para(clave):
+            valor = self.obtener(clave, _AUSENTE)
+            if valor is not _AUSENTE:
+                return valor
+
+            version = self.version
+            valor = calcular()
+            if version == self.version:
+                self.guardar(clave, valor, ttl)
+            return valor
+
+    def invalidar(self, clave=_AUSENTE):
+        """Elimina una clave, o toda la caché si no se indica ninguna."""
+        with self._lock:
+            self.version += 1
+            if clave is _AUSENTE:
+                self._datos.clear()
+            else:
+                self._datos.pop(clave, None)
+
+    def invalidar_si(self, condicion):
+        """Elimina las claves para las que `condicion(clave)` es verdadera."""
+        with self._lock:
+            self.version += 1
+            for clave in [c for c in self._datos if condicion(c)]:
+                del self._datos[clave]
+
+    def __len__(self):
+        return len(self._datos)
+
+    def _lock_para(self, clave):
+        with self._lock:
+            lock = self._locks.get(clave)
+            if lock is None:
+                if len(self._locks) >= self.max_entradas:
+                    self._locks.clear()
+                lock = self._locks[clave] = threading.Lock()
+            return lock
+
+    def _purgar(self):
+        ahora = time.monotonic()
+        for clave in [c for c, (expira, _) in self._datos.items() if expira < ahora]:
+            del self._datos[clave]
+        if len(self._datos) >= self.max_entradas:
+            mas_antigua = min(self._datos, key=lambda c: self._datos[c][0])
+            del self._datos[mas_antigua]
+
+
+def adjuntar_a_sesion(instancia):
+    """
+    Devuelve una instancia cacheada (desprendida) unida a la sesión actual
+
+    Usa `merge(load=False)`, que no consulta la base de datos. Si la sesión
+    ya tiene esa fila se devuelve la suya, para no pisar cambios pendientes.
+
+    Args:
+        instancia: Objeto del ORM cargado en otra sesión, o None
+
+    Returns:
+        La instancia de la sesión actual, o None
+    """
+    if instancia is None:
+        return None
+    existente = db.session.identity_map.get(inspect(instancia).identity_key)
+    if existente is not None:
+        return existente
+    return db.session.merge(instancia, load=False)
+
+
+# ============================================================================
+# INVALIDACIÓN POR CAMBIOS EN MODELOS
+# ============================================================================
+
+_suscripciones = []
+_suscripciones_claves = []
+_eventos_instalados = False
+
+
+def invalidar_al_cambiar(modelos, accion):
+    """
+    Ejecuta `accion(modelos_modificados)` después de cada commit que haya
+    insertado, modificado o eliminado instancias de alguno de los modelos
+
+    También detecta `query.update()`/`query.delete()` masivos.
+
+    Args:
+        modelos (iterable): Clases de modelos a vigilar
+        accion (callable | CacheTTL): Callback, o una caché a vaciar entera
+    """
+    if isinstance(accion, CacheTTL):
+        accion = _vaciar(accion)
+    _suscripciones.append((tuple(modelos), accion))
+    _instalar_eventos()
+
+
+def invalidar_claves_al_cambiar(modelo, cache, clave, campos=None):
+    """
+    Invalida solo las claves de las instancias afectadas tras cada commit
+
+    Las instancias nuevas y eliminadas siempre invalidan su clave; las
+    modificadas solo si cambió alguno de `campos` (o cualquiera si es None).
+    Un `query.update()`/`query.delete()` masivo sobre el modelo vacía la
+    caché entera, porque no se sabe qué filas tocó.
+
+    Args:
+        modelo: Clase del modelo a vigilar
+        cache (CacheTTL): Caché a invalidar
+        clave (callable): Función instancia -> clave de la caché
+        campos (iterable): Atributos relevantes para las modificaciones
+    """
+    _suscripciones_claves.append((modelo, cache, clave, tuple(campos) if campos else None))
+    _instalar_eventos()
+
+
+def registrar_cambios_masivos(session, modelo, filas):
+    """
+    Declara las filas que tocó un insert/update de Core sobre la tabla del modelo
+
+    Al confirmar se invalida como si las filas hubieran pasado por el flush:
+    las cachés por clave solo pierden las claves de esas filas. Ejecutar la
+    sentencia sobre `Modelo.__table__` (no sobre el modelo) para que no se
+    trate como un `query.update()` que vacía las cachés enteras.
+
+    Args:
+        session: Sesión donde se ejecutó la sentencia
+        modelo: Clase del modelo
+        filas (iterable): Objetos con los atributos del modelo que usan las claves
+    """
+    filas = list(filas)
+    if not filas:
+        return
+    _marcar(session, {modelo})
+    for suscrito, cache, clave, _campos in _suscripciones_claves:
+        if issubclass(modelo, suscrito):
+            _marcar_claves(session, cache, [clave(fila) for fila in filas])
+
+
+def _vaciar(cache):
+    def accion(_modelos):
+        cache.invalidar()
+    return accion
+
+
+def _marcar(session, clases):
+    session.info.setdefault('modelos_modificados', set()).update(clases)
+
+
+def _marcar_claves(session, cache, claves):
+    pendientes = session.info.setdefault('claves_invalidadas', {})
+    actuales = pendientes.get(cache, set())
+    if actuales is None or claves is None:
+        pendientes[cache] = None
+    else:
+        pendientes[cache] = actuales | set(claves)
+
+
+def _cambio_relevante(obj, campos):
+    if campos is None:
+        return True
+    estado = inspect(obj)
+    return any(estado.attrs[campo].history.has_changes() for campo in campos)
+
+
+def _registrar_claves(session):
+    for modelo, cache, clave, campos in _suscripciones_claves:
+        claves = [clave(obj) for obj in session.new if isinstance(obj, modelo)]
+        claves += [clave(obj) for obj in session.deleted if isinstance(obj, modelo)]
+        claves += [
+            clave(obj) for obj in session.dirty
+            if isinstance(obj, modelo) and _cambio_relevante(obj, campos)
+        ]
+        if claves:
+            _marcar_claves(session, cache, claves)
+
+
+def _instalar_eventos():
+    global _eventos_instalados
+    if _eventos_instalados:
+        return
+    _eventos_instalados = True
+
+    @event.listens_for(Session, 'after_flush')
+    def _registrar_flush(session, flush_context):
+        clases = {type(obj) for obj in session.new}
+        clases.update(type(obj) for obj in session.dirty if session.is_modified(obj))
+        clases.update(type(obj) for obj in session.deleted)
+        if clases:
+            _marcar(session, clases)
+        if _suscripciones_claves:
+            _registrar_claves(session)
+
+    @event.listens_for(Session, 'do_orm_execute')
+    def _registrar_masivo(orm_execute_state):
+        if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper:
+            clase = orm_execute_state.bind_mapper.class_
+            _marcar(orm_execute_state.session, {clase})
+            for modelo, cache, _clave, _campos in _suscripciones_claves:
+                if issubclass(clase, modelo):
+                    _marcar_claves(orm_execute_state.session, cache, None)
+
+    @event.listens_for(Session, 'after_commit')
+    def _notificar_commit(session):
+        for cache, claves in session.info.pop('claves_invalidadas', {}).items():
+            if claves is None:
+                cache.invalidar()
+            else:
+                cache.invalidar_si(claves.__contains__)
+
+        modificados = session.info.pop('modelos_modificados', None)
+        if not modificados:
+            return
+        for modelos, accion in _suscripciones:
+            afectados = {m for m in modificados if issubclass(m, modelos)}
+            if afectados:
+                try:
+                    accion(afectados)
+                except Exception as e:
+                    logger.exception(f"Error invalidando caché: {str(e)}")
+
+    @event.listens_for(Session, 'after_rollback')
+    def _descartar(session):
+        session.info.pop('modelos_modificados', None)
+        session.info.pop('claves_invalidadas', None)
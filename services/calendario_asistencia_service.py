@@ -0,0 +1,253 @@
+"""
+Calendario de asistencias por estudiante y mes
+
+Cada registro de Asistencia sale una sola vez, con la asignatura, el profesor
+y el bloque del horario del curso que le corresponde: el de la asignatura en
+el curso cuyo día de la semana coincide con la fecha. (Unir HorarioCurso por
+curso y asignatura en la misma consulta repetía cada asistencia tantas veces
+como bloques semanales tuviera la materia.)
+
+Los meses de cada estudiante se calculan una vez y quedan en caché:
+
+- se invalida la clave (estudiante, año, mes) al confirmar cambios en sus
+  asistencias;
+- un cambio de horario solo invalida los meses abiertos. Un mes cerrado (ya
+  terminado hace más de ASISTENCIA_DIAS_CORRECCION días) conserva el bloque
+  con el que se resolvió, así que se guarda por CALENDARIO_TTL_CERRADO.
+
+Lo usan el calendario del padre, las asistencias del estudiante y las del
+curso del profesor.
+"""
+
+import unicodedata
+from datetime import date, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
+from controllers.models import db, Asistencia, Clase, Asignatura, Usuario, HorarioCurso, Salon
+from services.cache_service import CacheTTL, invalidar_al_cambiar, invalidar_claves_al_cambiar
+
+
+CALENDARIO_TTL_ABIERTO = 300
+CALENDARIO_TTL_CERRADO = 86400
+ASISTENCIA_DIAS_CORRECCION = 7
+
+DIAS_SEMANA = ('lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo')
+
+cache_calendario = CacheTTL('calendario_asistencia', ttl=CALENDARIO_TTL_ABIERTO, max_entradas=10000)
+
+
+def _clave_asistencia(asistencia):
+    return (asistencia.estudianteId, asistencia.fecha.year, asistencia.fecha.month)
+
+
+invalidar_claves_al_cambiar(Asistencia, cache_calendario, clave=_clave_asistencia)
+
+
+def _limites_mes(año, mes):
+    inicio = date(año, mes, 1)
+    fin = date(año + 1, 1, 1) if mes == 12 else date(año, mes + 1, 1)
+    return inicio, fin
+
+
+def mes_cerrado(año, mes, hoy=None):
+    """Un mes está cerrado cuando terminó hace más de ASISTENCIA_DIAS_CORRECCION días."""
+    hoy = hoy or date.today()
+    _, fin = _limites_mes(año, mes)
+    return fin + timedelta(days=ASISTENCIA_DIAS_CORRECCION) <= hoy
+
+
+invalidar_al_cambiar(
+    (HorarioCurso, Salon),
+    lambda _modelos: cache_calendario.invalidar_si(lambda clave: not mes_cerrado(clave[1], clave[2]))
+)
+
+
+def _normalizar_dia(dia):
+    sin_tildes = unicodedata.normalize('NFKD', dia or '').encode('ascii', 'ignore').decode()
+    return sin_tildes.strip().lower()
+
+
+def _bloques_por_dia(pares_curso_asignatura):
+    """(curso, asignatura, día) -> primer bloque del día, con su salón."""
+    if not pares_curso_asignatura:
+        return {}
+    cursos = {curso for curso, _ in pares_curso_asignatura}
+    asignaturas = {asignatura for _, asignatura in pares_curso_asignatura}
+
+    filas = db.session.query(
+        HorarioCurso.curso_id,
+        HorarioCurso.asignatura_id,
+        HorarioCurso.dia_semana,
+        HorarioCurso.hora_inicio,
+        HorarioCurso.hora_fin,
+        Salon.nombre
+    ).outerjoin(
+        Salon, HorarioCurso.id_salon_fk == Salon.id_salon
+    ).filter(
+        HorarioCurso.curso_id.in_(cursos),
+        HorarioCurso.asignatura_id.in_(asignaturas)
+    ).order_by(HorarioCurso.hora_inicio).all()
+
+    bloques = {}
+    for curso_id, asignatura_id, dia, hora_inicio, hora_fin, salon in filas:
+        bloques.setdefault((curso_id, asignatura_id, _normalizar_dia(dia)), (hora_inicio, hora_fin, salon))
+    return bloques
+
+
+def _consultar_rango(estudiante_ids, inicio, fin):
+    """Asistencias de los estudiantes con fecha en [inicio, fin), ordenadas por fecha."""
+    profesor = aliased(Usuario)
+
+    filas = db.session.query(
+        Asistencia.id_asistencia,
+        Asistencia.estudianteId,
+        Asistencia.claseId,
+        Asistencia.fecha,
+        Asistencia.estado,
+        Asistencia.excusa,
+        Asistencia.periodo_academico_id,
+        Clase.cursoId,
+        Clase.asignaturaId,
+        Asignatura.nombre,
+        profesor.nombre,
+        profesor.apellido
+    ).outerjoin(
+        Clase, Asistencia.claseId == Clase.id_clase
+    ).outerjoin(
+        Asignatura, Clase.asignaturaId == Asignatura.id_asignatura
+    ).outerjoin(
+        profesor, Clase.profesorId == profesor.id_usuario
+    ).filter(
+        Asistencia.estudianteId.in_(estudiante_ids),
+        Asistencia.fecha >= inicio,
+        Asistencia.fecha < fin
+    ).order_by(Asistencia.fecha, Asistencia.id_asistencia).all()
+
+    bloques = _bloques_por_dia({(f.cursoId, f.asignaturaId) for f in filas if f.cursoId})
+
+    asistencias = []
+    for (id_asistencia, estudiante_id, clase_id, fecha, estado, excusa, periodo_id,
+         curso_id, asignatura_id, asignatura, profesor_nombre, profesor_apellido) in filas:
+        hora_inicio, hora_fin, salon = bloques.get(
+            (curso_id, asignatura_id, DIAS_SEMANA[fecha.weekday()]), ('--', '--', None)
+        )
+        asistencias.append({
+            'id': id_asistencia,
+            'estudiante_id': estudiante_id,
+            'clase_id': clase_id,
+            'periodo_id': periodo_id,
+            'fecha': fecha.strftime('%Y-%m-%d'),
+            'estado': estado,
+            'excusa': bool(excusa),
+            'asignatura': asignatura,
+            'profesor': f"{profesor_nombre} {profesor_apellido}" if profesor_nombre else 'Sin asignar',
+            'hora_inicio': hora_inicio,
+            'hora_fin': hora_fin,
+            'salon': salon or 'Sin asignar'
+        })
+    return asistencias
+
+
+def _consultar_meses(estudiante_ids, año, mes):
+    meses = {estudiante_id: [] for estudiante_id in estudiante_ids}
+    for fila in _consultar_rango(estudiante_ids, *_limites_mes(año, mes)):
+        meses[fila['estudiante_id']].append(fila)
+    return meses
+
+
+def _guardar_mes(estudiante_id, año, mes, filas):
+    ttl = CALENDARIO_TTL_CERRADO if mes_cerrado(año, mes) else None
+    cache_calendario.guardar((estudiante_id, año, mes), filas, ttl)
+
+
+def asistencias_del_mes(estudiante_ids, año, mes):
+    """
+    Asistencias de varios estudiantes en un mes, desde la caché
+
+    Los estudiantes que no estén en caché se consultan juntos.
+
+    Args:
+        estudiante_ids (iterable): IDs de los estudiantes
+        año (int): Año
+        mes (int): Mes (1-12)
+
+    Returns:
+        dict: estudiante_id -> lista de asistencias ordenadas por fecha
+    """
+    resultado = {}
+    faltantes = []
+    for estudiante_id in dict.fromkeys(estudiante_ids):
+        filas = cache_calendario.obtener((estudiante_id, año, mes))
+        if filas is None:
+            faltantes.append(estudiante_id)
+        else:
+            resultado[estudiante_id] = filas
+
+    if faltantes:
+        version = cache_calendario.version
+        calculados = _consultar_meses(faltantes, año, mes)
+        if version == cache_calendario.version:
+            for estudiante_id, filas in calculados.items():
+                _guardar_mes(estudiante_id, año, mes, filas)
+        resultado.update(calculados)
+
+    return resultado
+
+
+def calendario_mes(estudiante_id, año, mes):
+    """
+    Asistencias de un estudiante en un mes agrupadas por día
+
+    Returns:
+        dict: 'YYYY-MM-DD' -> lista de asistencias del día
+    """
+    por_dia = {}
+    for fila in asistencias_del_mes([estudiante_id], año, mes)[estudiante_id]:
+        por_dia.setdefault(fila['fecha'], []).append(fila)
+    return por_dia
+
+
+def asistencias_entre(estudiante_id, desde=None, hasta=None):
+    """
+    Asistencias de un estudiante entre dos fechas, armadas mes a mes
+
+    Sin fechas se usan la primera y la última asistencia del estudiante. Los
+    meses que no estén en caché se leen en una sola consulta, desde el primero
+    hasta el último que falte, y se reparten por mes para guardarlos.
+
+    Returns:
+        list: Asistencias ordenadas por fecha
+    """
+    if desde is None or hasta is None:
+        primera, ultima = db.session.query(
+            func.min(Asistencia.fecha), func.max(Asistencia.fecha)
+        ).filter(Asistencia.estudianteId == estudiante_id).one()
+        if primera is None:
+            return []
+        desde = desde or primera
+        hasta = hasta or ultima
+
+    meses = []
+    año, mes = desde.year, desde.month
+    while (año, mes) <= (hasta.year, hasta.month):
+        meses.append((año, mes))
+        año, mes = (año + 1, 1) if mes == 12 else (año, mes + 1)
+
+    por_mes = {m: cache_calendario.obtener((estudiante_id,) + m) for m in meses}
+    faltantes = [m for m in meses if por_mes[m] is None]
+    if faltantes:
+        version = cache_calendario.version
+        pendientes = {m: [] for m in faltantes}
+        inicio, fin = _limites_mes(*faltantes[0])[0], _limites_mes(*faltantes[-1])[1]
+        for fila in _consultar_rango([estudiante_id], inicio, fin):
+            filas_mes = pendientes.get((int(fila['fecha'][:4]), int(fila['fecha'][5:7])))
+            if filas_mes is not None:
+                filas_mes.append(fila)
+        if version == cache_calendario.version:
+            for (año, mes), filas_mes in pendientes.items():
+                _guardar_mes(estudiante_id, año, mes, filas_mes)
+        por_mes.update(pendientes)
+
+    filas = [fila for m in meses for fila in por_mes[m]]
+    desde_str, hasta_str = desde.strftime('%Y-%m-%d'), hasta.strftime('%Y-%m-%d')
+    return [f for f in filas if desde_str <= f['fecha'] <= hasta_str]
@@ -0,0 +1,458 @@
+"""
+Servicio de Calendario de Eventos: destinatarios por rol, consultas por
+ventana de fechas, expansión de eventos recurrentes y feeds iCalendar
+"""
+
+import logging
+import calendar
+import hashlib
+from datetime import date, datetime, timedelta
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from sqlalchemy import and_, or_
+from controllers.models import db, Evento, EventoDestinatario, Usuario
+
+logger = logging.getLogger(__name__)
+
+
+# Nombre canónico de cada rol destino (las claves se comparan en minúsculas)
+ROLES_CALENDARIO = {
+    'estudiante': 'Estudiante',
+    'estudiantes': 'Estudiante',
+    'profesor': 'Profesor',
+    'profesores': 'Profesor',
+    'padre': 'Padre',
+    'padres': 'Padre',
+}
+
+# Roles cuyos eventos ve cada tipo de usuario en su calendario
+ROLES_VISIBLES = {
+    'Estudiante': ('Estudiante',),
+    'Profesor': ('Profesor',),
+    'Padre': ('Padre', 'Estudiante'),
+}
+
+# La vista de calendario es mensual: una ventana nunca supera 6 semanas
+MAX_DIAS_VENTANA = 42
+
+# Días hacia atrás que incluye el feed iCalendar
+DIAS_HISTORIAL_ICS = 30
+
+
+def normalizar_roles(rol_destino):
+    """
+    Convierte el valor recibido del formulario a la lista de roles canónicos
+
+    Args:
+        rol_destino (str | list): "Estudiante,Profesor" o ['estudiante', ...]
+
+    Returns:
+        list: Roles canónicos sin duplicados, en el orden recibido
+    """
+    if not rol_destino:
+        return []
+    if isinstance(rol_destino, str):
+        rol_destino = rol_destino.split(',')
+
+    roles = []
+    for rol in rol_destino:
+        canonico = ROLES_CALENDARIO.get(str(rol).strip().lower())
+        if canonico and canonico not in roles:
+            roles.append(canonico)
+    return roles
+
+
+def asignar_destinatarios(evento, roles):
+    """
+    Reemplaza los destinatarios de un evento (no hace commit)
+
+    Mantiene `rol_destino` sincronizado para los clientes que aún lo leen.
+    """
+    roles = normalizar_roles(roles)
+    evento.rol_destino = ','.join(roles)
+    evento.destinatarios = [EventoDestinatario(rol=rol) for rol in roles]
+    return roles
+
+
+def sincronizar_destinatarios():
+    """
+    Crea las filas de destinatarios de los eventos registrados antes de la
+    tabla normalizada, a partir de su columna `rol_destino`
+
+    Returns:
+        int: Número de eventos actualizados
+    """
+    try:
+        pendientes = Evento.query.filter(~Evento.destinatarios.any()).all()
+        for evento in pendientes:
+            asignar_destinatarios(evento, evento.rol_destino)
+        db.session.commit()
+        return len(pendientes)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception(f"Error sincronizando destinatarios de eventos: {str(e)}")
+        return 0
+
+
+# Recurrencia: un evento guarda su primera fecha en `fecha` y, si se repite,
+# `recurrencia` y `recurrencia_hasta`; las ocurrencias se calculan al consultar.
+#
+# Bases de datos creadas antes de estas columnas (db.create_all crea la tabla
+# evento_destinatario pero no altera eventos; sin esto falla toda consulta de
+# Evento):
+#
+#   ALTER TABLE eventos
+#       ADD COLUMN recurrencia ENUM('diaria', 'semanal', 'mensual') NULL,
+#       ADD COLUMN recurrencia_hasta DATE NULL,
+#       ADD INDEX ix_eventos_fecha (fecha);
+
+def leer_recurrencia(data, fecha_evento, actual=(None, None)):
+    """
+    Lee la recurrencia opcional del payload de creación/edición
+
+    Si el payload no trae la clave `recurrencia` se conserva la actual; un
+    valor vacío o nulo la quita.
+
+    Args:
+        data (dict): JSON recibido (`recurrencia`, `recurrencia_hasta`)
+        fecha_evento (date): Fecha de la primera ocurrencia
+        actual (tuple): (recurrencia, recurrencia_hasta) del evento que se edita
+
+    Returns:
+        tuple: ((recurrencia, recurrencia_hasta), error)
+    """
+    if "recurrencia" not in data and "Recurrencia" not in data:
+        if actual[1] and actual[1] < fecha_evento:
+            return None, "La recurrencia debe terminar después de la primera fecha"
+        return tuple(actual), None
+
+    recurrencia = (data.get("recurrencia") or data.get("Recurrencia") or "").strip().lower() or None
+    hasta_str = data.get("recurrencia_hasta") or data.get("RecurrenciaHasta")
+
+    if recurrencia is None:
+        return (None, None), None
+    if recurrencia not in ('diaria', 'semanal', 'mensual'):
+        return None, "Recurrencia inválida (diaria, semanal o mensual)"
+
+    hasta = None
+    if hasta_str:
+        try:
+            hasta = datetime.strptime(hasta_str, "%Y-%m-%d").date()
+        except ValueError:
+            return None, "Fecha de fin de recurrencia inválida"
+        if hasta < fecha_evento:
+            return None, "La recurrencia debe terminar después de la primera fecha"
+
+    return (recurrencia, hasta), None
+
+
+def roles_visibles_para(rol_usuario):
+    """Roles destino cuyos eventos puede ver un usuario con el rol dado."""
+    canonicos = normalizar_roles(rol_usuario)
+    if not canonicos:
+        return ()
+    return ROLES_VISIBLES.get(canonicos[0], (canonicos[0],))
+
+
+# ============================================================================
+# VENTANAS DE FECHAS
+# ============================================================================
+
+def rango_mes(anio, mes):
+    """Primer y último día del mes indicado."""
+    ultimo_dia = calendar.monthrange(anio, mes)[1]
+    return date(anio, mes, 1), date(anio, mes, ultimo_dia)
+
+
+def obtener_ventana(args):
+    """
+    Interpreta la ventana solicitada por el calendario
+
+    Acepta `desde`/`hasta` (YYYY-MM-DD) o `anio`/`mes`. Sin parámetros
+    devuelve el mes actual.
+
+    Args:
+        args: request.args
+
+    Returns:
+        tuple: ((desde, hasta), error)
+    """
+    try:
+        if args.get('desde') and args.get('hasta'):
+            desde = datetime.strptime(args.get('desde'), '%Y-%m-%d').date()
+            hasta = datetime.strptime(args.get('hasta'), '%Y-%m-%d').date()
+        elif args.get('anio') and args.get('mes'):
+            desde, hasta = rango_mes(int(args.get('anio')), int(args.get('mes')))
+        else:
+            hoy = date.today()
+            desde, hasta = rango_mes(hoy.year, hoy.month)
+    except (TypeError, ValueError):
+        return None, "Rango de fechas inválido"
+
+    if hasta < desde:
+        return None, "La fecha final debe ser posterior a la inicial"
+    if (hasta - desde).days >= MAX_DIAS_VENTANA:
+        return None, f"El rango no puede superar {MAX_DIAS_VENTANA} días"
+
+    return (desde, hasta), None
+
+
+# ============================================================================
+# CONSULTAS Y EXPANSIÓN DE RECURRENCIAS
+# ============================================================================
+
+def _filtro_ventana(desde, hasta):
+    """Eventos con fecha en la ventana o series recurrentes que la cruzan."""
+    return or_(
+        Evento.fecha.between(desde, hasta),
+        and_(
+            Evento.recurrencia.isnot(None),
+            Evento.fecha <= hasta,
+            or_(Evento.recurrencia_hasta.is_(None), Evento.recurrencia_hasta >= desde)
+        )
+    )
+
+
+def _filtro_roles(roles):
+    return Evento.destinatarios.any(EventoDestinatario.rol.in_(list(roles)))
+
+
+def consultar_eventos(desde, hasta, roles=None):
+    """
+    Eventos que tienen al menos una ocurrencia dentro de la ventana
+
+    Args:
+        desde (date): Inicio de la ventana (incluido)
+        hasta (date): Fin de la ventana (incluido)
+        roles (iterable): Roles destino; None para todos
+
+    Returns:
+        list: Eventos ordenados por fecha y hora
+    """
+    query = Evento.query.filter(_filtro_ventana(desde, hasta))
+    if roles is not None:
+        query = query.filter(_filtro_roles(roles))
+    return query.order_by(Evento.fecha, Evento.hora).all()
+
+
+def _sumar_meses(fecha, meses, dia):
+    total = fecha.month - 1 + meses
+    anio, mes = fecha.year + total // 12, total % 12 + 1
+    if dia > calendar.monthrange(anio, mes)[1]:
+        return None
+    return date(anio, mes, dia)
+
+
+def expandir_ocurrencias(evento, desde, hasta):
+    """
+    Genera las fechas de un evento dentro de la ventana, sin materializar
+    la serie completa
+
+    Los eventos mensuales se omiten en los meses que no tienen ese día
+    (un evento del 31 no ocurre en abril).
+    """
+    limite = hasta
+    if evento.recurrencia and evento.recurrencia_hasta:
+        limite = min(hasta, evento.recurrencia_hasta)
+
+    if not evento.recurrencia:
+        if desde <= evento.fecha <= hasta:
+            yield evento.fecha
+        return
+
+    if evento.recurrencia in ('diaria', 'semanal'):
+        paso = 1 if evento.recurrencia == 'diaria' else 7
+        atraso = (desde - evento.fecha).days
+        saltos = -(-atraso // paso) if atraso > 0 else 0
+        actual = evento.fecha + timedelta(days=saltos * paso)
+        while actual <= limite:
+            yield actual
+            actual += timedelta(days=paso)
+        return
+
+    if evento.recurrencia == 'mensual':
+        meses = max(0, (desde.year - evento.fecha.year) * 12 + desde.month - evento.fecha.month)
+        while True:
+            actual = _sumar_meses(evento.fecha, meses, evento.fecha.day)
+            primero_mes = _sumar_meses(evento.fecha, meses, 1)
+            if primero_mes > limite:
+                return
+            if actual and desde <= actual <= limite:
+                yield actual
+            meses += 1
+
+
+def ocurrencias_en_ventana(desde, hasta, roles=None):
+    """
+    Ocurrencias (evento, fecha) dentro de la ventana, ordenadas
+
+    Returns:
+        list: Tuplas (Evento, date)
+    """
+    ocurrencias = []
+    for evento in consultar_eventos(desde, hasta, roles):
+        for fecha in expandir_ocurrencias(evento, desde, hasta):
+            ocurrencias.append((evento, fecha))
+    ocurrencias.sort(key=lambda o: (o[1], o[0].hora))
+    return ocurrencias
+
+
+def serializar_ocurrencia(evento, fecha):
+    """Formato esperado por los calendarios de estudiante, profesor y padre."""
+    return {
+        "IdEvento": evento.id,
+        "Nombre": evento.nombre,
+        "Descripcion": evento.descripcion,
+        "Fecha": fecha.strftime("%Y-%m-%d"),
+        "Hora": evento.hora.strftime("%H:%M:%S") if evento.hora else "",
+        "RolDestino": evento.rol_destino,
+        "Recurrente": evento.recurrencia is not None
+    }
+
+
+def contar_eventos_proximos(roles=None, desde=None):
+    """
+    Cuenta los eventos con ocurrencias desde hoy (o `desde`) en adelante
+
+    Args:
+        roles (iterable): Roles destino; None para todos
+        desde (date): Fecha inicial, por defecto hoy
+
+    Returns:
+        int: Número de eventos
+    """
+    desde = desde or date.today()
+    query = Evento.query.filter(or_(
+        Evento.fecha >= desde,
+        and_(
+            Evento.recurrencia.isnot(None),
+            or_(Evento.recurrencia_hasta.is_(None), Evento.recurrencia_hasta >= desde)
+        )
+    ))
+    if roles is not None:
+        query = query.filter(_filtro_roles(roles))
+    return query.count()
+
+
+# ============================================================================
+# FEED iCALENDAR
+# ============================================================================
+
+_RRULE_FREQ = {'diaria': 'DAILY', 'semanal': 'WEEKLY', 'mensual': 'MONTHLY'}
+
+
+def _serializador_ics():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='calendario-ics')
+
+
+def _huella_ics(usuario):
+    """Resumen del hash de contraseña: cambiar la contraseña revoca los enlaces."""
+    return hashlib.sha256(usuario.password_hash.encode('utf-8')).hexdigest()[:16]
+
+
+def generar_token_ics(usuario, rol):
+    """Token firmado que permite a un usuario suscribirse al feed de su rol sin sesión."""
+    return _serializador_ics().dumps({'u': usuario.id_usuario, 'rol': rol, 'h': _huella_ics(usuario)})
+
+
+def verificar_token_ics(token):
+    """
+    Rol del feed al que da acceso el token
+
+    El token deja de valer cuando caduca (CALENDARIO_ICS_DIAS), cuando su
+    usuario cambia la contraseña o se desactiva, o si ya no tiene el rol.
+
+    Args:
+        token (str): Token generado por generar_token_ics
+
+    Returns:
+        str: Rol del token, o None si no es válido
+    """
+    max_age = current_app.config.get('CALENDARIO_ICS_DIAS', 365) * 86400
+    try:
+        datos = _serializador_ics().loads(token, max_age=max_age)
+        usuario_id, rol, huella = datos['u'], datos['rol'], datos['h']
+    except (BadSignature, TypeError, KeyError):
+        return None
+
+    usuario = db.session.get(Usuario, usuario_id)
+    if usuario is None or not usuario.is_active or _huella_ics(usuario) != huella:
+        return None
+    if not (usuario.has_role(rol) or usuario.es_admin()):
+        return None
+    return rol
+
+
+def _escapar_ics(texto):
+    return (texto or '').replace('\\', '\\\\').replace(';', '\\;') \
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def _plegar_linea(linea):
+    """Pliega líneas a 75 octetos como exige RFC 5545."""
+    datos = linea.encode('utf-8')
+    if len(datos) <= 75:
+        return linea
+    partes, actual = [], b''
+    for caracter in linea:
+        codificado = caracter.encode('utf-8')
+        if len(actual) + len(codificado) > (75 if not partes else 74):
+            partes.append(actual.decode('utf-8'))
+            actual = b''
+        actual += codificado
+    partes.append(actual.decode('utf-8'))
+    return '\r\n '.join(partes)
+
+
+def generar_ical(rol):
+    """
+    Genera el feed iCalendar con los eventos visibles para un rol
+
+    Las series recurrentes se publican con RRULE en lugar de expandirse.
+
+    Args:
+        rol (str): Rol canónico del suscriptor
+
+    Returns:
+        str: Contenido text/calendar
+    """
+    desde = date.today() - timedelta(days=DIAS_HISTORIAL_ICS)
+    eventos = Evento.query.filter(
+        _filtro_roles(roles_visibles_para(rol)),
+        or_(
+            Evento.fecha >= desde,
+            and_(
+                Evento.recurrencia.isnot(None),
+                or_(Evento.recurrencia_hasta.is_(None), Evento.recurrencia_hasta >= desde)
+            )
+        )
+    ).order_by(Evento.fecha, Evento.hora).all()
+
+    marca = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    lineas = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Institucion//Calendario Escolar//ES',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:Eventos - {rol}',
+    ]
+    for evento in eventos:
+        inicio = datetime.combine(evento.fecha, evento.hora)
+        lineas += [
+            'BEGIN:VEVENT',
+            f'UID:evento-{evento.id}@institucion',
+            f'DTSTAMP:{marca}',
+            f'DTSTART:{inicio.strftime("%Y%m%dT%H%M%S")}',
+            f'DTEND:{(inicio + timedelta(hours=1)).strftime("%Y%m%dT%H%M%S")}',
+            f'SUMMARY:{_escapar_ics(evento.nombre)}',
+            f'DESCRIPTION:{_escapar_ics(evento.descripcion)}',
+        ]
+        if evento.recurrencia:
+            regla = f'RRULE:FREQ={_RRULE_FREQ[evento.recurrencia]}'
+            if evento.recurrencia_hasta:
+                regla += f';UNTIL={evento.recurrencia_hasta.strftime("%Y%m%d")}T235959'
+            lineas.append(regla)
+        lineas.append('END:VEVENT')
+    lineas.append('END:VCALENDAR')
+
+    return '\r\n'.join(_plegar_linea(linea) for linea in lineas) + '\r\n'
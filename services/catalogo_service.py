@@ -0,0 +1,110 @@
+"""
+Caché de datos de referencia: roles, sedes, cursos, asignaturas, salones y
+categorías de calificación
+
+Son tablas pequeñas que cambian muy poco y se consultan en casi cada
+petición (formularios, directorios, notificaciones). Cada tabla se carga
+completa una vez por proceso, en una sesión aparte, y se invalida al
+confirmar cualquier escritura sobre ella; la versión de la caché evita
+guardar una copia leída durante una invalidación.
+
+Las funciones devuelven instancias unidas a la sesión actual sin consultar
+la base de datos (ver `adjuntar_a_sesion`), así que se pueden asignar a
+relaciones y navegar como cualquier otro objeto del ORM.
+"""
+
+from sqlalchemy.orm import Session
+from controllers.models import db, Rol, Sede, Curso, Asignatura, Salon, CategoriaCalificacion
+from services.cache_service import CacheTTL, invalidar_al_cambiar, adjuntar_a_sesion
+
+
+CATALOGO_TTL = 600
+
+# modelo -> (atributo id, atributo nombre, orden)
+TABLAS_REFERENCIA = {
+    Rol: ('id_rol', 'nombre', Rol.nombre),
+    Sede: ('id_sede', 'nombre', Sede.nombre),
+    Curso: ('id_curso', 'nombreCurso', Curso.nombreCurso),
+    Asignatura: ('id_asignatura', 'nombre', Asignatura.nombre),
+    Salon: ('id_salon', 'nombre', Salon.nombre),
+    CategoriaCalificacion: ('id_categoria', 'nombre', CategoriaCalificacion.id_categoria),
+}
+
+cache_catalogo = CacheTTL('catalogo', ttl=CATALOGO_TTL, max_entradas=len(TABLAS_REFERENCIA))
+
+
+def _invalidar_tablas(modelos):
+    nombres = {modelo.__name__ for modelo in modelos}
+    cache_catalogo.invalidar_si(nombres.__contains__)
+
+
+invalidar_al_cambiar(tuple(TABLAS_REFERENCIA), _invalidar_tablas)
+
+
+def _cargar_tabla(modelo):
+    attr_id, attr_nombre, orden = TABLAS_REFERENCIA[modelo]
+    with Session(db.engine) as sesion:
+        filas = sesion.query(modelo).order_by(orden).all()
+    return {
+        'lista': filas,
+        'por_id': {getattr(fila, attr_id): fila for fila in filas},
+        'por_nombre': {(getattr(fila, attr_nombre) or '').strip().lower(): fila for fila in filas},
+    }
+
+
+def _tabla(modelo):
+    return cache_catalogo.obtener_o_calcular(modelo.__name__, lambda: _cargar_tabla(modelo))
+
+
+def listar(modelo):
+    """
+    Devuelve todas las filas de una tabla de referencia, ordenadas
+
+    Args:
+        modelo: Una de las clases de TABLAS_REFERENCIA
+
+    Returns:
+        list: Instancias unidas a la sesión actual
+    """
+    if modelo is Salon:
+        # Las etiquetas muestran la sede: tenerlas en la sesión evita una consulta por salón
+        listar(Sede)
+    return [adjuntar_a_sesion(fila) for fila in _tabla(modelo)['lista']]
+
+
+def por_id(modelo, valor):
+    """Busca una fila por su id; None si no existe."""
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        return None
+    return adjuntar_a_sesion(_tabla(modelo)['por_id'].get(valor))
+
+
+def por_nombre(modelo, nombre):
+    """Busca una fila por su nombre, sin distinguir mayúsculas; None si no existe."""
+    return adjuntar_a_sesion(_tabla(modelo)['por_nombre'].get((nombre or '').strip().lower()))
+
+
+def rol_por_nombre(nombre):
+    return por_nombre(Rol, nombre)
+
+
+def rol_por_id(id_rol):
+    return por_id(Rol, id_rol)
+
+
+def sede_por_id(id_sede):
+    return por_id(Sede, id_sede)
+
+
+def curso_por_id(id_curso):
+    return por_id(Curso, id_curso)
+
+
+def asignatura_por_id(id_asignatura):
+    return por_id(Asignatura, id_asignatura)
+
+
+def categoria_por_id(id_categoria):
+    return por_id(CategoriaCalificacion, id_categoria)
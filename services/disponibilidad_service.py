@@ -0,0 +1,279 @@
+"""
+Disponibilidad de salones y profesores sobre el horario semanal
+
+Responde "qué salones están libres el martes de 10:00 a 10:45" o "qué
+profesores de Matemáticas pueden cubrir esa clase" sin recorrer HorarioCurso
+en cada consulta. La semana se divide en franjas:
+
+- los cortes de cada día son todos los inicios y fines de los bloques
+  (BloqueHorario) y de las clases asignadas (HorarioCurso), así que cada
+  clase ocupa franjas completas;
+- cada salón y cada profesor tiene un mapa de ocupación: un entero con un
+  bit por franja de la semana;
+- una consulta convierte el intervalo pedido en la máscara de las franjas
+  que toca, y el recurso está libre si `ocupacion & mascara == 0`.
+
+Los mapas, los salones y los profesores habilitados por asignatura
+(asignatura_profesor) se arman juntos y quedan en caché hasta que cambie
+algún horario, bloque, salón, usuario o asignatura.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from controllers.models import (
+    db, HorarioCurso, HorarioGeneral, BloqueHorario, Salon, Usuario, Rol,
+    Asignatura, asignatura_profesor
+)
+from services.cache_service import CacheTTL, invalidar_al_cambiar
+from services.horario_profesor_service import indice_dia, minutos_del_dia, DIAS_SEMANA
+
+
+DISPONIBILIDAD_TTL = 3600
+
+MapaSemanal = namedtuple('MapaSemanal', 'cortes bases salones profesores clases carga habilitados')
+
+cache_disponibilidad = CacheTTL('disponibilidad', ttl=DISPONIBILIDAD_TTL, max_entradas=4)
+invalidar_al_cambiar(
+    (HorarioCurso, HorarioGeneral, BloqueHorario, Salon, Usuario, Asignatura),
+    cache_disponibilidad
+)
+
+
+def _mascara(cortes, base, inicio, fin):
+    """Bits de las franjas del día que se cruzan con [inicio, fin)."""
+    if fin <= inicio or len(cortes) < 2:
+        return 0
+    primera = max(bisect_right(cortes, inicio) - 1, 0)
+    ultima = min(bisect_left(cortes, fin), len(cortes) - 1)
+    if ultima <= primera:
+        return 0
+    return ((1 << (ultima - primera)) - 1) << (base + primera)
+
+
+def _intervalo(dia, hora_inicio, hora_fin):
+    """(índice del día, inicio, fin) en minutos, o None si algo no se puede leer."""
+    dia_idx, inicio, fin = indice_dia(dia), minutos_del_dia(hora_inicio), minutos_del_dia(hora_fin)
+    if dia_idx is None or inicio is None or fin is None or fin <= inicio:
+        return None
+    return dia_idx, inicio, fin
+
+
+def _construir_mapa():
+    clases = db.session.query(
+        HorarioCurso.id_horario_curso,
+        HorarioCurso.curso_id,
+        HorarioCurso.asignatura_id,
+        HorarioCurso.profesor_id,
+        HorarioCurso.id_salon_fk,
+        HorarioCurso.dia_semana,
+        HorarioCurso.hora_inicio,
+        HorarioCurso.hora_fin
+    ).all()
+    bloques = db.session.query(
+        BloqueHorario.dia_semana, BloqueHorario.horaInicio, BloqueHorario.horaFin
+    ).join(
+        HorarioGeneral, BloqueHorario.horario_general_id == HorarioGeneral.id_horario
+    ).filter(HorarioGeneral.activo.isnot(False)).all()
+
+    cortes = [set() for _ in DIAS_SEMANA]
+    intervalos = []
+    for clase in clases:
+        intervalo = _intervalo(clase.dia_semana, clase.hora_inicio, clase.hora_fin)
+        intervalos.append(intervalo)
+        if intervalo:
+            dia_idx, inicio, fin = intervalo
+            cortes[dia_idx].update((inicio, fin))
+    for dia, hora_inicio, hora_fin in bloques:
+        intervalo = _intervalo(dia, hora_inicio, hora_fin)
+        if intervalo:
+            dia_idx, inicio, fin = intervalo
+            cortes[dia_idx].update((inicio, fin))
+
+    cortes = tuple(tuple(sorted(c)) for c in cortes)
+    bases, total = [], 0
+    for cortes_dia in cortes:
+        bases.append(total)
+        total += max(len(cortes_dia) - 1, 0)
+
+    ocupacion_salones, ocupacion_profesores, carga, por_id = {}, {}, {}, {}
+    for clase, intervalo in zip(clases, intervalos):
+        if intervalo is None:
+            continue
+        dia_idx, inicio, fin = intervalo
+        bits = _mascara(cortes[dia_idx], bases[dia_idx], inicio, fin)
+        if clase.id_salon_fk:
+            ocupacion_salones[clase.id_salon_fk] = ocupacion_salones.get(clase.id_salon_fk, 0) | bits
+        ocupacion_profesores[clase.profesor_id] = ocupacion_profesores.get(clase.profesor_id, 0) | bits
+        minutos = carga.setdefault(clase.profesor_id, [0] * len(DIAS_SEMANA))
+        minutos[dia_idx] += fin - inicio
+        por_id[clase.id_horario_curso] = clase
+
+    salones = tuple(db.session.query(
+        Salon.id_salon, Salon.nombre, Salon.tipo, Salon.capacidad, Salon.id_sede_fk, Salon.estado
+    ).order_by(Salon.nombre).all())
+
+    profesores = {p.id_usuario: p for p in db.session.query(
+        Usuario.id_usuario, Usuario.nombre, Usuario.apellido
+    ).join(
+        Rol, Usuario.id_rol_fk == Rol.id_rol
+    ).filter(
+        Rol.nombre == 'Profesor',
+        Usuario.estado_cuenta == 'activa'
+    ).all()}
+
+    habilitados = {}
+    for asignatura_id, profesor_id in db.session.query(
+        asignatura_profesor.c.asignatura_id, asignatura_profesor.c.profesor_id
+    ).all():
+        if profesor_id in profesores:
+            habilitados.setdefault(asignatura_id, set()).add(profesor_id)
+
+    return MapaSemanal(
+        cortes=cortes,
+        bases=tuple(bases),
+        salones=(salones, ocupacion_salones),
+        profesores=(profesores, ocupacion_profesores),
+        clases=por_id,
+        carga={p: tuple(m) for p, m in carga.items()},
+        habilitados={a: frozenset(p) for a, p in habilitados.items()}
+    )
+
+
+def mapa_semanal():
+    """Mapas de ocupación de la semana, desde la caché."""
+    return cache_disponibilidad.obtener_o_calcular('semana', _construir_mapa)
+
+
+def _mascara_consulta(mapa, dia, hora_inicio, hora_fin):
+    intervalo = _intervalo(dia, hora_inicio, hora_fin)
+    if intervalo is None:
+        return None
+    dia_idx, inicio, fin = intervalo
+    return _mascara(mapa.cortes[dia_idx], mapa.bases[dia_idx], inicio, fin)
+
+
+def _profesor_a_dict(mapa, profesor, dia_idx):
+    minutos = mapa.carga.get(profesor.id_usuario, (0,) * len(DIAS_SEMANA))
+    return {
+        'id_usuario': profesor.id_usuario,
+        'nombre': f"{profesor.nombre} {profesor.apellido}",
+        'minutos_semana': sum(minutos),
+        'minutos_dia': minutos[dia_idx]
+    }
+
+
+def salones_libres(dia, hora_inicio, hora_fin, sede_id=None, capacidad_minima=None, tipo=None):
+    """
+    Salones sin clase asignada en el intervalo
+
+    Solo se consideran los salones en estado 'disponible'.
+
+    Args:
+        dia (str): Día de la semana ('martes', 'Miércoles'...)
+        hora_inicio (str): 'HH:MM'
+        hora_fin (str): 'HH:MM'
+        sede_id (int): Filtrar por sede
+        capacidad_minima (int): Capacidad mínima del salón
+        tipo (str): Tipo de salón
+
+    Returns:
+        tuple: (lista de salones, error)
+    """
+    mapa = mapa_semanal()
+    mascara = _mascara_consulta(mapa, dia, hora_inicio, hora_fin)
+    if mascara is None:
+        return None, "Día u horas inválidos"
+
+    salones, ocupacion = mapa.salones
+    libres = []
+    for salon in salones:
+        if (salon.estado or 'disponible') != 'disponible':
+            continue
+        if sede_id and salon.id_sede_fk != sede_id:
+            continue
+        if capacidad_minima and (salon.capacidad or 0) < capacidad_minima:
+            continue
+        if tipo and salon.tipo != tipo:
+            continue
+        if ocupacion.get(salon.id_salon, 0) & mascara:
+            continue
+        libres.append({
+            'id_salon': salon.id_salon,
+            'nombre': salon.nombre,
+            'tipo': salon.tipo,
+            'capacidad': salon.capacidad,
+            'id_sede_fk': salon.id_sede_fk
+        })
+    return libres, None
+
+
+def profesores_libres(asignatura_id, dia, hora_inicio, hora_fin, excluir=()):
+    """
+    Profesores habilitados para la asignatura y sin clase en el intervalo
+
+    Args:
+        asignatura_id (int): ID de la asignatura
+        dia (str): Día de la semana
+        hora_inicio (str): 'HH:MM'
+        hora_fin (str): 'HH:MM'
+        excluir (iterable): IDs de profesores a omitir
+
+    Returns:
+        tuple: (lista ordenada de menor a mayor carga semanal, error). Cada
+        profesor trae id_usuario, nombre, minutos_semana y minutos_dia
+    """
+    mapa = mapa_semanal()
+    mascara = _mascara_consulta(mapa, dia, hora_inicio, hora_fin)
+    if mascara is None:
+        return None, "Día u horas inválidos"
+
+    profesores, ocupacion = mapa.profesores
+    excluir = set(excluir)
+    dia_idx = indice_dia(dia)
+    libres = [
+        _profesor_a_dict(mapa, profesores[profesor_id], dia_idx)
+        for profesor_id in mapa.habilitados.get(asignatura_id, ())
+        if profesor_id not in excluir and not ocupacion.get(profesor_id, 0) & mascara
+    ]
+    libres.sort(key=lambda p: (p['minutos_semana'], p['minutos_dia'], p['nombre']))
+    return libres, None
+
+
+def sugerir_suplentes(horario_curso_id, limite=10):
+    """
+    Profesores que pueden reemplazar al titular en una clase del horario
+
+    Son los habilitados para la asignatura y libres en esa franja, de menor a
+    mayor carga semanal (y del día, en empate).
+
+    Args:
+        horario_curso_id (int): ID del bloque de HorarioCurso
+        limite (int): Máximo de sugerencias
+
+    Returns:
+        tuple: (dict con 'clase' y 'suplentes', error)
+    """
+    mapa = mapa_semanal()
+    clase = mapa.clases.get(horario_curso_id)
+    if clase is None:
+        return None, "La clase no existe o su horario no es válido"
+
+    suplentes, error = profesores_libres(
+        clase.asignatura_id, clase.dia_semana, clase.hora_inicio, clase.hora_fin,
+        excluir=(clase.profesor_id,)
+    )
+    if error:
+        return None, error
+
+    return {
+        'clase': {
+            'id_horario_curso': clase.id_horario_curso,
+            'curso_id': clase.curso_id,
+            'asignatura_id': clase.asignatura_id,
+            'profesor_id': clase.profesor_id,
+            'dia_semana': clase.dia_semana,
+            'hora_inicio': clase.hora_inicio,
+            'hora_fin': clase.hora_fin
+        },
+        'suplentes': suplentes[:max(limite, 0)]
+    }, None
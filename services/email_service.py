@@ -1,3 +1,4 @@
+import logging
 import os
 import secrets
 import string
@@ -7,6 +8,8 @@ from flask import current_app, render_template, url_for
 from extensions import mail
 from itsdangerous import URLSafeTimedSerializer  
 
+logger = logging.getLogger(__name__)
+
 
 def generate_verification_code():
     """Genera un código de verificación de 8 caracteres alfanuméricos"""
@@ -37,9 +40,8 @@ def send_welcome_email(usuario, verification_code):
         
         verification_url = url_for('auth.verify_email_with_token', token=verification_token, _external=True)
         
-        # DEBUG: Mostrar información del token
-        print(f"DEBUG: Token generado para {usuario.correo}: {verification_token}")
-        print(f"DEBUG: URL de verificación: {verification_url}")
+        # Sin el token: los registros no deben poder verificar cuentas
+        logger.debug("Token de verificación generado para %s", usuario.correo)
         
         subject = "¡Bienvenido al Sistema Académico - Verifica tu Email!"
         
@@ -58,26 +60,26 @@ def send_welcome_email(usuario, verification_code):
         )
         
         mail.send(msg)
-        print(f"DEBUG: Email enviado exitosamente a {usuario.correo}")
+        logger.info(f"Email enviado exitosamente a {usuario.correo}")
         return True
     except Exception as e:
         error_msg = str(e)
-        print(f"Error enviando correo de bienvenida: {error_msg}")
+        logger.exception(f"Error enviando correo de bienvenida: {error_msg}")
         
         # Manejo específico de errores comunes
         if "Daily user sending limit exceeded" in error_msg:
-            print("⚠️  LÍMITE DIARIO DE GMAIL EXCEDIDO")
-            print("💡 SOLUCIÓN: El usuario puede verificar manualmente con el código de verificación")
-            print(f"📧 Código de verificación para {usuario.correo}: {verification_code}")
+            logger.warning("⚠️  LÍMITE DIARIO DE GMAIL EXCEDIDO")
+            logger.warning("💡 SOLUCIÓN: El usuario puede verificar manualmente con el código de verificación")
+            logger.warning(f"📧 Código de verificación para {usuario.correo}: {verification_code}")
             return "limit_exceeded"
         elif "Authentication failed" in error_msg:
-            print("❌ ERROR DE AUTENTICACIÓN - Verificar credenciales de Gmail")
+            logger.error("❌ ERROR DE AUTENTICACIÓN - Verificar credenciales de Gmail")
             return False
         elif "Connection refused" in error_msg:
-            print("❌ ERROR DE CONEXIÓN - Verificar conexión a internet")
+            logger.error("❌ ERROR DE CONEXIÓN - Verificar conexión a internet")
             return False
         else:
-            print(f"❌ ERROR DESCONOCIDO: {error_msg}")
+            logger.error(f"❌ ERROR DESCONOCIDO: {error_msg}")
             return False
 
 def send_verification_success_email(usuario, password=None):
@@ -100,10 +102,10 @@ def send_verification_success_email(usuario, password=None):
         )
         
         mail.send(msg)
-        print(f"DEBUG: Correo de verificación exitosa enviado a {usuario.correo}")
+        logger.info(f"Correo de verificación exitosa enviado a {usuario.correo}")
         return True
     except Exception as e:
-        print(f"Error enviando correo de verificación exitosa: {str(e)}")
+        logger.exception(f"Error enviando correo de verificación exitosa: {str(e)}")
         return False
 
 def send_password_reset_email(usuario, token):
@@ -129,7 +131,7 @@ def send_password_reset_email(usuario, token):
         mail.send(msg)
         return True
     except Exception as e:
-        print(f"Error enviando correo de restablecimiento: {str(e)}")
+        logger.exception(f"Error enviando correo de restablecimiento: {str(e)}")
         return False
 
 def send_welcome_email_with_retry(usuario, verification_code, max_retries=2):
@@ -141,14 +143,14 @@ def send_welcome_email_with_retry(usuario, verification_code, max_retries=2):
                 return result
             
             if attempt < max_retries:
-                print(f"Intento {attempt + 1} falló, reintentando en 5 segundos...")
+                logger.warning(f"Intento {attempt + 1} falló, reintentando en 5 segundos...")
                 time.sleep(5)
             else:
-                print(f"Todos los intentos fallaron para {usuario.correo}")
+                logger.error(f"Todos los intentos fallaron para {usuario.correo}")
                 return False
                 
         except Exception as e:
-            print(f"Error en intento {attempt + 1}: {str(e)}")
+            logger.exception(f"Error en intento {attempt + 1}: {str(e)}")
             if attempt < max_retries:
                 time.sleep(5)
             else:
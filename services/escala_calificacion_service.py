@@ -0,0 +1,72 @@
+"""
+Escalas de calificación (nota mínima, máxima y de aprobación) por asignatura
+
+Todas las configuraciones se cargan juntas una vez y se resuelven en memoria:
+primero la de la asignatura y, si no tiene, la global (asignatura_id NULL).
+Cualquier commit sobre ConfiguracionCalificacion invalida la caché, así que
+estadísticas, reportes y promoción usan siempre el mismo umbral.
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+from controllers.models import db, ConfiguracionCalificacion
+from services.cache_service import CacheTTL, invalidar_al_cambiar
+
+
+EscalaCalificacion = namedtuple('EscalaCalificacion', 'nota_minima nota_maxima nota_aprobacion asignatura_id')
+
+ESCALA_POR_DEFECTO = EscalaCalificacion(
+    nota_minima=Decimal('0'),
+    nota_maxima=Decimal('100'),
+    nota_aprobacion=Decimal('60'),
+    asignatura_id=None
+)
+
+cache_escalas = CacheTTL('escalas_calificacion', ttl=600, max_entradas=1)
+invalidar_al_cambiar((ConfiguracionCalificacion,), cache_escalas)
+
+
+def _cargar_escalas():
+    filas = db.session.query(
+        ConfiguracionCalificacion.asignatura_id,
+        ConfiguracionCalificacion.notaMinima,
+        ConfiguracionCalificacion.notaMaxima,
+        ConfiguracionCalificacion.notaMinimaAprobacion
+    ).order_by(ConfiguracionCalificacion.id_configuracion).all()
+
+    escalas = {}
+    for asignatura_id, minima, maxima, aprobacion in filas:
+        # Si hubiera duplicados, prevalece la configuración más antigua
+        escalas.setdefault(asignatura_id, EscalaCalificacion(minima, maxima, aprobacion, asignatura_id))
+    return escalas
+
+
+def obtener_escala(asignatura_id=None):
+    """
+    Resuelve la escala de una asignatura, con la global como respaldo
+
+    Args:
+        asignatura_id (int): ID de la asignatura, o None para la global
+
+    Returns:
+        EscalaCalificacion: asignatura_id es None si no es específica
+    """
+    escalas = cache_escalas.obtener_o_calcular('escalas', _cargar_escalas)
+    if asignatura_id is not None and asignatura_id in escalas:
+        return escalas[asignatura_id]
+    return escalas.get(None, ESCALA_POR_DEFECTO)
+
+
+def nota_aprobacion(asignatura_id=None):
+    """Nota mínima de aprobación de la asignatura (o global)."""
+    return obtener_escala(asignatura_id).nota_aprobacion
+
+
+def escala_a_dict(escala):
+    """Serializa una escala con las claves que usa el frontend."""
+    return {
+        'notaMinima': float(escala.nota_minima),
+        'notaMaxima': float(escala.nota_maxima),
+        'notaMinimaAprobacion': float(escala.nota_aprobacion),
+        'es_especifica': escala.asignatura_id is not None
+    }
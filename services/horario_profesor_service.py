@@ -0,0 +1,169 @@
+"""
+Índice semanal del horario de cada profesor
+
+Las páginas del profesor (y su context processor) preguntan en cada render
+cuál es su clase actual y cuál la próxima. El horario de un profesor se
+arma una vez desde HorarioCurso, con curso, asignatura, salón y sede en la
+misma consulta, y se indexa por minuto de la semana (lunes 00:00 = 0):
+
+- `inicios` y `fines` son arreglos ordenados por inicio, alineados con
+  `clases`;
+- la clase actual es la última que empezó antes de ahora, si todavía no
+  terminó; la próxima, la primera que empieza después. Ambas se buscan con
+  bisección.
+
+El índice queda en caché hasta que cambie algún horario, curso, asignatura,
+salón o sede.
+"""
+
+import unicodedata
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy.orm import aliased
+from controllers.models import db, HorarioCurso, Curso, Asignatura, Salon, Sede
+from services.cache_service import CacheTTL, invalidar_al_cambiar
+
+
+HORARIO_TTL = 3600
+MINUTOS_DIA = 24 * 60
+MINUTOS_SEMANA = 7 * MINUTOS_DIA
+
+DIAS_SEMANA = ('lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo')
+
+IndiceSemanal = namedtuple('IndiceSemanal', 'horarios inicios fines clases')
+
+cache_horarios_profesor = CacheTTL('horario_profesor', ttl=HORARIO_TTL, max_entradas=2048)
+invalidar_al_cambiar((HorarioCurso, Curso, Asignatura, Salon, Sede), cache_horarios_profesor)
+
+
+def indice_dia(nombre_dia):
+    """Lunes = 0 ... domingo = 6, sin distinguir tildes ni mayúsculas; None si no es un día."""
+    sin_tildes = unicodedata.normalize('NFKD', nombre_dia or '').encode('ascii', 'ignore').decode()
+    nombre = sin_tildes.strip().lower()
+    return DIAS_SEMANA.index(nombre) if nombre in DIAS_SEMANA else None
+
+
+def minutos_del_dia(hora):
+    """'HH:MM' -> minutos desde medianoche; None si no se puede leer."""
+    try:
+        horas, minutos = str(hora).split(':')[:2]
+        return int(horas) * 60 + int(minutos)
+    except (TypeError, ValueError):
+        return None
+
+
+def minuto_de_la_semana(momento):
+    return momento.weekday() * MINUTOS_DIA + momento.hour * 60 + momento.minute
+
+
+def _construir_indice(profesor_id):
+    sede_salon = aliased(Sede)
+    sede_curso = aliased(Sede)
+    filas = db.session.query(
+        HorarioCurso.id_horario_curso,
+        HorarioCurso.dia_semana,
+        HorarioCurso.hora_inicio,
+        HorarioCurso.hora_fin,
+        Curso.nombreCurso,
+        Asignatura.nombre,
+        Salon.nombre,
+        sede_salon.nombre,
+        sede_curso.nombre
+    ).join(
+        Curso, HorarioCurso.curso_id == Curso.id_curso
+    ).join(
+        Asignatura, HorarioCurso.asignatura_id == Asignatura.id_asignatura
+    ).outerjoin(
+        Salon, HorarioCurso.id_salon_fk == Salon.id_salon
+    ).outerjoin(
+        sede_salon, Salon.id_sede_fk == sede_salon.id_sede
+    ).outerjoin(
+        sede_curso, Curso.sedeId == sede_curso.id_sede
+    ).filter(
+        HorarioCurso.profesor_id == profesor_id
+    ).order_by(HorarioCurso.id_horario_curso).all()
+
+    horarios, semana = [], []
+    for id_horario, dia, hora_inicio, hora_fin, curso, asignatura, salon, sede_del_salon, sede_del_curso in filas:
+        horario = {
+            'curso_nombre': curso or 'N/A',
+            'asignatura_nombre': asignatura or 'N/A',
+            'dia_semana': dia or 'N/A',
+            'hora_inicio': hora_inicio or 'N/A',
+            'hora_fin': hora_fin or 'N/A',
+            'salon': salon or 'N/A',
+            'sede': sede_del_salon or sede_del_curso or 'N/A',
+            'origen_id_horario_curso': id_horario
+        }
+        horarios.append(horario)
+
+        dia_idx, inicio, fin = indice_dia(dia), minutos_del_dia(hora_inicio), minutos_del_dia(hora_fin)
+        if dia_idx is None or inicio is None:
+            continue
+        base = dia_idx * MINUTOS_DIA
+        semana.append((base + inicio, base + (fin if fin is not None and fin > inicio else inicio), horario))
+
+    semana.sort(key=lambda clase: clase[:2])
+    return IndiceSemanal(
+        horarios=tuple(horarios),
+        inicios=[inicio for inicio, _, _ in semana],
+        fines=[fin for _, fin, _ in semana],
+        clases=[horario for _, _, horario in semana]
+    )
+
+
+def indice_semanal(profesor_id):
+    """Índice semanal del profesor, desde la caché."""
+    return cache_horarios_profesor.obtener_o_calcular(profesor_id, lambda: _construir_indice(profesor_id))
+
+
+def horarios_profesor(profesor_id):
+    """
+    Bloques del horario del profesor, ordenados por id
+
+    Returns:
+        list: Copias de los dicts (curso_nombre, asignatura_nombre, dia_semana,
+        hora_inicio, hora_fin, salon, sede, origen_id_horario_curso)
+    """
+    return [dict(horario) for horario in indice_semanal(profesor_id).horarios]
+
+
+def clase_actual(profesor_id, ahora=None):
+    """
+    Clase que el profesor está dictando en este momento
+
+    Args:
+        profesor_id (int): ID del profesor
+        ahora (datetime): Momento de la consulta; por defecto datetime.now()
+
+    Returns:
+        dict | None: Copia del bloque del horario
+    """
+    indice = indice_semanal(profesor_id)
+    minuto = minuto_de_la_semana(ahora or datetime.now())
+    i = bisect_right(indice.inicios, minuto) - 1
+    if i >= 0 and indice.fines[i] > minuto:
+        return dict(indice.clases[i])
+    return None
+
+
+def proxima_clase(profesor_id, ahora=None):
+    """
+    Primera clase que empieza después de este momento, pasando a la semana siguiente si hace falta
+
+    Args:
+        profesor_id (int): ID del profesor
+        ahora (datetime): Momento de la consulta; por defecto datetime.now()
+
+    Returns:
+        dict | None: Copia del bloque del horario con 'minutos_para_inicio'
+    """
+    indice = indice_semanal(profesor_id)
+    if not indice.inicios:
+        return None
+    minuto = minuto_de_la_semana(ahora or datetime.now())
+    i = bisect_right(indice.inicios, minuto)
+    if i == len(indice.inicios):
+        i = 0
+    return dict(indice.clases[i], minutos_para_inicio=(indice.inicios[i] - minuto) % MINUTOS_SEMANA)
@@ -0,0 +1,139 @@
+"""
+Identidad cacheada del usuario autenticado
+
+Flask-Login recarga el usuario en cada petición. En lugar de consultar el
+Usuario y su Rol cada vez, se guarda por id una identidad mínima (rol y
+estado de la cuenta) con los permisos ya resueltos, de modo que los
+decoradores y plantillas comprueban roles y permisos sin tocar la base de
+datos. El Usuario completo solo se carga si la vista lee otro atributo.
+"""
+
+from collections import namedtuple
+from flask_login import UserMixin
+from controllers.models import db, Usuario, Rol
+from controllers.permisos import RolesMixin, PERMISOS_POR_ROL
+from services.cache_service import CacheTTL, invalidar_al_cambiar, invalidar_claves_al_cambiar
+
+
+IDENTIDAD_TTL = 300
+
+Identidad = namedtuple('Identidad', 'id_usuario id_rol rol_nombre estado_cuenta permisos')
+
+cache_identidades = CacheTTL('identidades', ttl=IDENTIDAD_TTL, max_entradas=4096)
+
+invalidar_claves_al_cambiar(
+    Usuario, cache_identidades,
+    clave=lambda usuario: usuario.id_usuario,
+    campos=('id_rol_fk', 'estado_cuenta'),
+)
+invalidar_al_cambiar((Rol,), cache_identidades)
+
+
+def obtener_identidad(usuario_id):
+    """
+    Devuelve la identidad cacheada de un usuario
+
+    Args:
+        usuario_id (int): ID del usuario
+
+    Returns:
+        Identidad | None: None si el usuario no existe
+    """
+    return cache_identidades.obtener_o_calcular(usuario_id, lambda: _consultar_identidad(usuario_id))
+
+
+def _consultar_identidad(usuario_id):
+    fila = db.session.query(
+        Usuario.id_usuario, Usuario.id_rol_fk, Usuario.estado_cuenta, Rol.nombre
+    ).outerjoin(Rol, Rol.id_rol == Usuario.id_rol_fk).filter(
+        Usuario.id_usuario == usuario_id
+    ).first()
+
+    if not fila:
+        return None
+
+    id_usuario, id_rol, estado_cuenta, rol_nombre = fila
+    return Identidad(
+        id_usuario=id_usuario,
+        id_rol=id_rol,
+        rol_nombre=rol_nombre,
+        estado_cuenta=estado_cuenta,
+        permisos=PERMISOS_POR_ROL.get(rol_nombre, frozenset()),
+    )
+
+
+class UsuarioSesion(UserMixin, RolesMixin):
+    """
+    Usuario de la sesión respaldado por la identidad cacheada
+
+    Responde id, rol y permisos desde la caché. Cualquier otro atributo
+    (nombre, hijos, asignaturas...) carga el Usuario de la base de datos
+    la primera vez y se delega en él, también al asignar valores.
+    """
+
+    def __init__(self, identidad):
+        object.__setattr__(self, '_identidad', identidad)
+        object.__setattr__(self, '_usuario', None)
+
+    @property
+    def id_usuario(self):
+        return self._identidad.id_usuario
+
+    @property
+    def id_rol_fk(self):
+        return self._identidad.id_rol
+
+    @property
+    def rol_nombre(self):
+        return self._identidad.rol_nombre
+
+    @property
+    def estado_cuenta(self):
+        return self._identidad.estado_cuenta
+
+    @property
+    def is_active(self):
+        return self._identidad.estado_cuenta == 'activa'
+
+    def get_id(self):
+        return str(self._identidad.id_usuario)
+
+    def has_permission(self, permiso_nombre):
+        return permiso_nombre in self._identidad.permisos
+
+    def obtener_usuario(self):
+        """Carga (una vez por petición) el Usuario completo."""
+        if self._usuario is None:
+            usuario = db.session.get(Usuario, self._identidad.id_usuario)
+            if usuario is None:
+                raise LookupError(f"Usuario {self._identidad.id_usuario} no encontrado")
+            object.__setattr__(self, '_usuario', usuario)
+        return self._usuario
+
+    def __getattr__(self, nombre):
+        if nombre.startswith('__'):
+            raise AttributeError(nombre)
+        return getattr(self.obtener_usuario(), nombre)
+
+    def __setattr__(self, nombre, valor):
+        setattr(self.obtener_usuario(), nombre, valor)
+
+    def __repr__(self):
+        return f'<UsuarioSesion {self._identidad.id_usuario}>'
+
+
+def cargar_usuario_sesion(user_id):
+    """
+    Cargador de usuario para Flask-Login
+
+    Args:
+        user_id (str): ID guardado en la sesión
+
+    Returns:
+        UsuarioSesion | None
+    """
+    try:
+        identidad = obtener_identidad(int(user_id))
+    except (TypeError, ValueError):
+        return None
+    return UsuarioSesion(identidad) if identidad else None
@@ -0,0 +1,203 @@
+"""
+Instrumentación de consultas SQL por petición y detector de N+1
+
+Los eventos del motor de SQLAlchemy cuentan, para la petición en curso,
+cuántas consultas se ejecutan, cuánto tardan y cuántas veces se repite cada
+sentencia (su "huella": el SQL con los parámetros ya separados y las listas
+IN colapsadas). Al terminar la petición:
+
+- si INSTRUMENTACION_SERVER_TIMING está activo, se agrega la cabecera
+  `Server-Timing` (db, app) en las respuestas a administradores;
+- si una misma huella se repite INSTRUMENTACION_UMBRAL_N1 veces o más, se
+  marca la petición como N+1 y se registra la sentencia;
+- la medición se suma al resumen por endpoint (últimas
+  INSTRUMENTACION_MUESTRAS peticiones), que los administradores consultan en
+  /admin/api/instrumentacion. El resumen es de cada proceso.
+
+Las consultas fuera de una petición (planificador, hilos) no se miden.
+"""
+
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from collections import Counter, deque
+from flask import g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+_ESPACIOS = re.compile(r'\s+')
+# "IN (?, ?, ?)" y "VALUES (...), (...)" varían con la cantidad de elementos
+_LISTA_PARAMETROS = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))*\s*\)')
+_VALORES_MULTIPLES = re.compile(r'(VALUES \(\?\))(?:\s*,\s*\(\?\))+', re.IGNORECASE)
+_LARGO_HUELLA = 300
+
+
+def huella_sql(sentencia):
+    """Normaliza una sentencia para agrupar las que solo difieren en parámetros."""
+    huella = _ESPACIOS.sub(' ', sentencia).strip()
+    huella = _LISTA_PARAMETROS.sub('(?)', huella)
+    huella = _VALORES_MULTIPLES.sub(r'\1', huella)
+    return huella[:_LARGO_HUELLA]
+
+
+class MedicionPeticion:
+    """Consultas de una petición en curso."""
+
+    __slots__ = ('inicio', 'consultas', 'tiempo_db', 'huellas')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.huellas = Counter()
+
+    def registrar(self, sentencia, duracion):
+        self.consultas += 1
+        self.tiempo_db += duracion
+        self.huellas[huella_sql(sentencia)] += 1
+
+    def repetidas(self, umbral):
+        """Huellas ejecutadas `umbral` veces o más, de la más repetida a la menos."""
+        return [(huella, veces) for huella, veces in self.huellas.most_common() if veces >= umbral]
+
+
+class ResumenEndpoints:
+    """Estadísticas móviles por endpoint, compartidas por los hilos del proceso."""
+
+    def __init__(self, muestras=200, patrones_por_endpoint=5):
+        self.muestras = muestras
+        self.patrones_por_endpoint = patrones_por_endpoint
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def agregar(self, endpoint, consultas, tiempo_db, tiempo_total, repetidas):
+        with self._lock:
+            datos = self._endpoints.get(endpoint)
+            if datos is None:
+                datos = self._endpoints[endpoint] = {
+                    'peticiones': 0,
+                    'peticiones_n_mas_1': 0,
+                    'muestras': deque(maxlen=self.muestras),
+                    'patrones': Counter()
+                }
+            datos['peticiones'] += 1
+            datos['muestras'].append((consultas, tiempo_db, tiempo_total))
+            if repetidas:
+                datos['peticiones_n_mas_1'] += 1
+                for huella, veces in repetidas:
+                    datos['patrones'][huella] = max(datos['patrones'][huella], veces)
+                if len(datos['patrones']) > self.patrones_por_endpoint * 4:
+                    datos['patrones'] = Counter(dict(datos['patrones'].most_common(self.patrones_por_endpoint)))
+
+    def resumen(self):
+        """Lista de endpoints ordenada por tiempo total de base de datos en la ventana."""
+        with self._lock:
+            copia = {e: (d['peticiones'], d['peticiones_n_mas_1'], list(d['muestras']),
+                         d['patrones'].most_common(self.patrones_por_endpoint))
+                     for e, d in self._endpoints.items()}
+
+        filas = []
+        for endpoint, (peticiones, n_mas_1, muestras, patrones) in copia.items():
+            consultas = [m[0] for m in muestras]
+            tiempos_db = sorted(m[1] for m in muestras)
+            n = len(muestras)
+            filas.append({
+                'endpoint': endpoint,
+                'peticiones': peticiones,
+                'peticiones_n_mas_1': n_mas_1,
+                'muestras': n,
+                'consultas_promedio': round(sum(consultas) / n, 1),
+                'consultas_max': max(consultas),
+                'db_ms_promedio': round(sum(tiempos_db) / n * 1000, 2),
+                'db_ms_p95': round(tiempos_db[min(n - 1, int(n * 0.95))] * 1000, 2),
+                'db_ms_ventana': round(sum(tiempos_db) * 1000, 2),
+                'total_ms_promedio': round(sum(m[2] for m in muestras) / n * 1000, 2),
+                'patrones_n_mas_1': [{'sql': h, 'repeticiones': v} for h, v in patrones]
+            })
+        filas.sort(key=lambda f: f['db_ms_ventana'], reverse=True)
+        return filas
+
+    def reiniciar(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+resumen_endpoints = ResumenEndpoints()
+
+TRABAJADOR = f'{socket.gethostname()}:{os.getpid()}'
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'medicion_sql' in g:
+        conn.info.setdefault('inicio_consultas', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'medicion_sql' in g:
+        inicios = conn.info.get('inicio_consultas')
+        if inicios:
+            g.medicion_sql.registrar(statement, time.perf_counter() - inicios.pop())
+
+
+@event.listens_for(Engine, 'handle_error')
+def _consulta_fallida(contexto):
+    conexion = contexto.connection
+    if conexion is not None and has_request_context() and 'medicion_sql' in g:
+        inicios = conexion.info.get('inicio_consultas')
+        if inicios:
+            g.medicion_sql.registrar(contexto.statement or '', time.perf_counter() - inicios.pop())
+
+
+def init_instrumentacion(app):
+    """
+    Registra los hooks de petición que miden las consultas
+
+    Args:
+        app (Flask): Aplicación
+    """
+    if not app.config.get('INSTRUMENTACION_ENABLED', True):
+        return
+
+    resumen_endpoints.muestras = app.config.get('INSTRUMENTACION_MUESTRAS', 200)
+    umbral = app.config.get('INSTRUMENTACION_UMBRAL_N1', 10)
+    server_timing = app.config.get('INSTRUMENTACION_SERVER_TIMING', False)
+
+    @app.before_request
+    def _iniciar_medicion():
+        g.medicion_sql = MedicionPeticion()
+
+    @app.after_request
+    def _cerrar_medicion(response):
+        medicion = g.pop('medicion_sql', None)
+        if medicion is None:
+            return response
+
+        tiempo_total = time.perf_counter() - medicion.inicio
+        repetidas = medicion.repetidas(umbral)
+        endpoint = request.endpoint or f'<{response.status_code}>'
+
+        if repetidas:
+            huella, veces = repetidas[0]
+            logger.warning(f"N+1 en {endpoint}: {veces} ejecuciones de la misma consulta "
+                         f"({medicion.consultas} consultas en total): {huella}")
+
+        resumen_endpoints.agregar(endpoint, medicion.consultas, medicion.tiempo_db, tiempo_total, repetidas)
+
+        # El número de consultas delata qué camino siguió la petición (p. ej. si
+        # existe la cuenta en /auth/login): solo se envía a administradores
+        if server_timing and current_user.is_authenticated and current_user.es_admin():
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={medicion.tiempo_db * 1000:.1f};desc="{medicion.consultas} consultas", '
+                f'app;dur={(tiempo_total - medicion.tiempo_db) * 1000:.1f}'
+            )
+        return response
@@ -0,0 +1,268 @@
+"""
+Libro de calificaciones: matriz estudiantes × asignaciones de un curso y asignatura
+
+Una asignación es una columna del libro: la categoría más el nombre de la
+calificación ("Examen / Parcial 1"). La matriz se carga en una respuesta y se
+guarda enviando solo las celdas que cambiaron:
+
+- el acceso del profesor se verifica una vez por lote, no por celda;
+- las celdas existentes se actualizan con un único UPDATE (CASE por id) y
+  las nuevas se crean con un único INSERT de varias filas, en la misma
+  transacción;
+- cada celda lleva su versión (Calificacion.version). Un cambio sobre una
+  versión que ya no es la actual, o la creación de una celda que otro ya
+  creó, es un conflicto: no se guarda nada del lote y se devuelven las
+  celdas en conflicto con su valor actual para que el cliente las combine.
+
+Las cachés que dependen de las calificaciones (resumen del padre, riesgo)
+se invalidan solo para los estudiantes del lote.
+"""
+
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from types import SimpleNamespace
+from sqlalchemy import case, insert, tuple_, update
+from controllers.models import db, Calificacion
+from services.cache_service import registrar_cambios_masivos
+from services.catalogo_service import categoria_por_id
+from services.escala_calificacion_service import obtener_escala
+from services.periodo_service import obtener_reloj, periodo_para_fecha
+from services.roster_service import estudiantes_del_curso, ids_estudiantes_curso
+
+
+LIBRO_MAX_CAMBIOS = 2000
+
+
+def _clave(estudiante_id, categoria_id, nombre):
+    return (estudiante_id, categoria_id, (nombre or '').strip())
+
+
+def _celdas(asignatura_id, estudiante_ids):
+    """clave -> fila de la calificación; con duplicados se toma la más antigua."""
+    if not estudiante_ids:
+        return {}
+    filas = db.session.query(
+        Calificacion.id_calificacion,
+        Calificacion.estudianteId,
+        Calificacion.categoriaId,
+        Calificacion.nombre_calificacion,
+        Calificacion.valor,
+        Calificacion.observaciones,
+        Calificacion.version
+    ).filter(
+        Calificacion.asignaturaId == asignatura_id,
+        Calificacion.estudianteId.in_(estudiante_ids)
+    ).order_by(Calificacion.id_calificacion).all()
+
+    celdas = {}
+    for fila in filas:
+        celdas.setdefault(_clave(fila.estudianteId, fila.categoriaId, fila.nombre_calificacion), fila)
+    return celdas
+
+
+def _celda_a_dict(fila):
+    return {
+        'id': fila.id_calificacion,
+        'valor': float(fila.valor) if fila.valor is not None else None,
+        'observaciones': fila.observaciones,
+        'version': fila.version
+    }
+
+
+def cargar_libro(curso_id, asignatura_id):
+    """
+    Matriz completa del libro de calificaciones
+
+    Args:
+        curso_id (int): ID del curso
+        asignatura_id (int): ID de la asignatura
+
+    Returns:
+        dict: 'columnas' (categoria_id, categoria_nombre, nombre_calificacion),
+        'filas' (por estudiante: estudiante_id, nombre y 'celdas' alineadas con
+        las columnas, None donde no hay calificación) y 'escala'
+    """
+    estudiantes = estudiantes_del_curso(curso_id)
+    celdas = _celdas(asignatura_id, [e.id_usuario for e in estudiantes])
+
+    columnas = sorted({(categoria_id, nombre) for _, categoria_id, nombre in celdas})
+    filas = []
+    for estudiante in estudiantes:
+        filas.append({
+            'estudiante_id': estudiante.id_usuario,
+            'nombre': f"{estudiante.nombre} {estudiante.apellido}",
+            'celdas': [
+                _celda_a_dict(celdas[clave]) if clave in celdas else None
+                for clave in (_clave(estudiante.id_usuario, categoria_id, nombre) for categoria_id, nombre in columnas)
+            ]
+        })
+
+    escala = obtener_escala(asignatura_id)
+    return {
+        'columnas': [{
+            'categoria_id': categoria_id,
+            'categoria_nombre': getattr(categoria_por_id(categoria_id), 'nombre', ''),
+            'nombre_calificacion': nombre
+        } for categoria_id, nombre in columnas],
+        'filas': filas,
+        'escala': {
+            'nota_minima': float(escala.nota_minima),
+            'nota_maxima': float(escala.nota_maxima),
+            'nota_aprobacion': float(escala.nota_aprobacion)
+        }
+    }
+
+
+def _validar_cambios(cambios, roster, escala):
+    """Normaliza los cambios; devuelve (lista, error)."""
+    if not isinstance(cambios, list) or not cambios:
+        return None, "No hay cambios para guardar"
+    if len(cambios) > LIBRO_MAX_CAMBIOS:
+        return None, f"Se pueden guardar como máximo {LIBRO_MAX_CAMBIOS} celdas por lote"
+
+    normalizados = {}
+    for cambio in cambios:
+        if not isinstance(cambio, dict):
+            return None, "Formato de cambio inválido"
+        estudiante_id, categoria_id = cambio.get('estudiante_id'), cambio.get('categoria_id')
+        if estudiante_id not in roster:
+            return None, f"El estudiante {estudiante_id} no pertenece a este curso"
+        if categoria_por_id(categoria_id) is None:
+            return None, f"La categoría {categoria_id} no existe"
+
+        valor = cambio.get('valor')
+        if valor is not None and valor != '':
+            try:
+                valor = Decimal(str(valor))
+            except InvalidOperation:
+                return None, f"Valor inválido: {cambio.get('valor')}"
+            if not escala.nota_minima <= valor <= escala.nota_maxima:
+                return None, f"El valor {valor} está fuera de la escala ({escala.nota_minima} - {escala.nota_maxima})"
+        else:
+            valor = None
+
+        version = cambio.get('version')
+        if version is not None and not isinstance(version, int):
+            return None, "La versión de la celda debe ser un entero"
+
+        clave = _clave(estudiante_id, categoria_id, cambio.get('nombre_calificacion'))
+        if clave in normalizados:
+            return None, "Hay celdas repetidas en el lote"
+        normalizados[clave] = {
+            'valor': valor,
+            'observaciones': cambio.get('observaciones'),
+            'version': version
+        }
+    return normalizados, None
+
+
+def _conflictos(claves, asignatura_id):
+    actuales = _celdas(asignatura_id, list({clave[0] for clave in claves}))
+    return [{
+        'estudiante_id': clave[0],
+        'categoria_id': clave[1],
+        'nombre_calificacion': clave[2],
+        'actual': _celda_a_dict(actuales[clave]) if clave in actuales else None
+    } for clave in claves]
+
+
+def guardar_cambios_libro(curso_id, asignatura_id, cambios, profesor_id):
+    """
+    Guarda en un lote las celdas modificadas del libro
+
+    El acceso del profesor a la asignatura en el curso se verifica antes de
+    llamar a esta función.
+
+    Args:
+        curso_id (int): ID del curso
+        asignatura_id (int): ID de la asignatura
+        cambios (list): [{'estudiante_id', 'categoria_id', 'nombre_calificacion',
+            'valor', 'observaciones' (opcional), 'version' (None si la celda es nueva)}]
+        profesor_id (int): Profesor que registra las calificaciones nuevas
+
+    Returns:
+        tuple: (resultado, error). resultado trae 'actualizadas', 'creadas' y
+        'celdas' (las guardadas, con su nueva versión); con conflicto, error
+        es un mensaje y resultado trae solo 'conflictos'
+    """
+    roster = set(ids_estudiantes_curso(curso_id))
+    normalizados, error = _validar_cambios(cambios, roster, obtener_escala(asignatura_id))
+    if error:
+        return None, error
+
+    try:
+        existentes = _celdas(asignatura_id, list({clave[0] for clave in normalizados}))
+
+        actualizar, crear, conflictos = [], [], []
+        for clave, cambio in normalizados.items():
+            actual = existentes.get(clave)
+            if cambio['version'] is None:
+                (crear if actual is None else conflictos).append(clave)
+            elif actual is None or actual.version != cambio['version']:
+                conflictos.append(clave)
+            else:
+                actualizar.append((actual.id_calificacion, clave))
+
+        if conflictos:
+            return {'conflictos': _conflictos(conflictos, asignatura_id)}, "Algunas celdas cambiaron mientras se editaban"
+
+        tabla = Calificacion.__table__
+        if actualizar:
+            valores = {id_calificacion: normalizados[clave] for id_calificacion, clave in actualizar}
+            observaciones = {i: c['observaciones'] for i, c in valores.items() if c['observaciones'] is not None}
+            sentencia = update(tabla).where(
+                tuple_(tabla.c.id_calificacion, tabla.c.version).in_(
+                    [(i, c['version']) for i, c in valores.items()]
+                )
+            ).values(
+                valor=case({i: c['valor'] for i, c in valores.items()}, value=tabla.c.id_calificacion),
+                version=tabla.c.version + 1
+            )
+            if observaciones:
+                sentencia = sentencia.values(observaciones=case(
+                    observaciones, value=tabla.c.id_calificacion, else_=tabla.c.observaciones
+                ))
+            resultado = db.session.execute(sentencia)
+            if resultado.rowcount != len(actualizar):
+                # Otra petición cambió alguna celda entre la lectura y el UPDATE
+                db.session.rollback()
+                return {'conflictos': _conflictos([clave for _, clave in actualizar], asignatura_id)}, \
+                    "Algunas celdas cambiaron mientras se editaban"
+
+        if crear:
+            ahora = datetime.utcnow()
+            # El INSERT de Core no pasa por el before_flush que asigna el periodo
+            periodo = obtener_reloj().periodo or periodo_para_fecha(ahora.date())
+            db.session.execute(insert(tabla).values([{
+                'estudianteId': clave[0],
+                'asignaturaId': asignatura_id,
+                'categoriaId': clave[1],
+                'nombre_calificacion': clave[2],
+                'valor': normalizados[clave]['valor'],
+                'observaciones': normalizados[clave]['observaciones'] or '',
+                'fecha_registro': ahora,
+                'es_tarea_publicada': False,
+                'profesor_id': profesor_id,
+                'periodo_academico_id': periodo.id_periodo if periodo else None,
+                'version': 1
+            } for clave in crear]))
+
+        registrar_cambios_masivos(db.session, Calificacion, [
+            SimpleNamespace(estudianteId=clave[0], asignaturaId=asignatura_id, categoriaId=clave[1])
+            for clave in normalizados
+        ])
+        db.session.commit()
+
+        guardadas = _celdas(asignatura_id, list({clave[0] for clave in normalizados}))
+        return {
+            'actualizadas': len(actualizar),
+            'creadas': len(crear),
+            'celdas': [dict(
+                _celda_a_dict(guardadas[clave]),
+                estudiante_id=clave[0], categoria_id=clave[1], nombre_calificacion=clave[2]
+            ) for clave in normalizados if clave in guardadas]
+        }, None
+
+    except Exception as e:
+        db.session.rollback()
+        return None, f"Error guardando el libro de calificaciones: {str(e)}"
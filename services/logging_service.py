@@ -0,0 +1,173 @@
+"""
+Registro estructurado de la aplicación
+
+Cada módulo usa `logging.getLogger(__name__)`. configurar_logging:
+
+- escribe un JSON por línea con la hora, el nivel, el módulo, el mensaje y,
+  dentro de una petición, el endpoint, el método y el usuario;
+- fija los niveles por módulo desde Config.LOG_LEVELS (el resto usa
+  Config.LOG_LEVEL);
+- encola los registros en un QueueHandler y los escribe un hilo aparte, así
+  la petición nunca espera la salida. Si la cola se llena, se descartan y se
+  cuentan en lugar de bloquear;
+- deja pasar solo uno de cada LOG_MUESTREO_DEBUG registros DEBUG de cada
+  línea de código, para poder activar DEBUG en un módulo ruidoso sin
+  inundar la salida.
+"""
+
+import atexit
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from flask import has_request_context, request
+
+
+_CAMPOS_ESTANDAR = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+_FORMATO_TRAZA = logging.Formatter()
+
+
+class FormatoJSON(logging.Formatter):
+    """Formatea cada registro como un objeto JSON en una línea."""
+
+    def format(self, record):
+        datos = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'modulo': record.name,
+            'funcion': record.funcName,
+            'linea': record.lineno,
+            'mensaje': record.getMessage(),
+        }
+        for campo in ('endpoint', 'metodo', 'usuario_id'):
+            if hasattr(record, campo):
+                datos[campo] = getattr(record, campo)
+        # Campos propios pasados con extra={...}
+        for clave, valor in vars(record).items():
+            if clave not in _CAMPOS_ESTANDAR and clave not in datos:
+                datos[clave] = valor
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class FormatoTexto(logging.Formatter):
+    """Formato de texto plano; agrega la traza que ColaSinBloqueo separó del registro."""
+
+    def format(self, record):
+        texto = super().format(record)
+        excepcion = getattr(record, 'excepcion', None)
+        return f"{texto}\n{excepcion}" if excepcion else texto
+
+
+class ContextoPeticion(logging.Filter):
+    """Agrega endpoint, método y usuario al registro si hay una petición en curso."""
+
+    def filter(self, record):
+        if has_request_context():
+            record.endpoint = request.endpoint
+            record.metodo = request.method
+            usuario_id = _usuario_actual()
+            if usuario_id is not None:
+                record.usuario_id = usuario_id
+        return True
+
+
+def _usuario_actual():
+    # Sin cargar el usuario si la petición todavía no lo hizo
+    from flask import g
+    usuario = g.get('_login_user')
+    return getattr(usuario, 'id_usuario', None) if usuario is not None else None
+
+
+class MuestreoDebug(logging.Filter):
+    """Deja pasar uno de cada `cada` registros DEBUG por línea de código."""
+
+    def __init__(self, cada=100):
+        super().__init__()
+        self.cada = max(1, cada)
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.cada == 1:
+            return True
+        clave = (record.pathname, record.lineno)
+        with self._lock:
+            contador = self._contadores.get(clave)
+            if contador is None:
+                contador = self._contadores[clave] = itertools.count()
+            return next(contador) % self.cada == 0
+
+
+class ColaSinBloqueo(logging.handlers.QueueHandler):
+    """QueueHandler que descarta (y cuenta) los registros si la cola está llena."""
+
+    descartados = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            ColaSinBloqueo.descartados += 1
+
+    def prepare(self, record):
+        # El mensaje y la traza se resuelven aquí, en el hilo de la petición;
+        # la traza queda en su propio campo en lugar de pegada al mensaje
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.excepcion = _FORMATO_TRAZA.formatException(record.exc_info)
+            record.exc_info = None
+            record.exc_text = None
+        return record
+
+
+_listener = None
+
+
+def configurar_logging(app):
+    """
+    Configura el registro de la aplicación a partir de su Config
+
+    Args:
+        app (Flask): Aplicación
+
+    Returns:
+        logging.handlers.QueueListener: El hilo que escribe los registros
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    config = app.config
+    salida = logging.StreamHandler(sys.stdout)
+    if config.get('LOG_FORMATO', 'json') == 'json':
+        salida.setFormatter(FormatoJSON())
+    else:
+        salida.setFormatter(FormatoTexto('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    cola = ColaSinBloqueo(queue.Queue(maxsize=config.get('LOG_COLA_MAXIMA', 10000)))
+    cola.addFilter(ContextoPeticion())
+    cola.addFilter(MuestreoDebug(config.get('LOG_MUESTREO_DEBUG', 100)))
+
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(cola)
+    raiz.setLevel(config.get('LOG_LEVEL', 'INFO'))
+
+    for modulo, nivel in config.get('LOG_LEVELS', {}).items():
+        logging.getLogger(modulo).setLevel(nivel)
+
+    _listener = logging.handlers.QueueListener(cola.queue, salida, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
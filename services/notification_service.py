@@ -1,6 +1,15 @@
+import logging
 from flask import current_app, url_for
+from sqlalchemy import insert
 from controllers.models import db, Notificacion, Usuario, Equipo
+from services.catalogo_service import rol_por_nombre
+from services.retencion_notificaciones_service import contar_no_leidas
+from services.tiempo_real_service import publicar_al_confirmar
 from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
 def crear_notificacion(usuario_id, titulo, mensaje, tipo='general', link=None, auto_commit=True):
     """Crea una nueva notificación para un usuario.
     
@@ -32,7 +41,7 @@ def crear_notificacion(usuario_id, titulo, mensaje, tipo='general', link=None, a
     except Exception as e:
         if auto_commit:
             db.session.rollback()
-        print(f"Error creando notificación: {str(e)}")
+        logger.exception(f"Error creando notificación: {str(e)}")
         return None
 
 def notificar_respuesta_solicitud(solicitud):
@@ -57,7 +66,7 @@ def notificar_respuesta_solicitud(solicitud):
             link=link
         )
     except Exception as e:
-        print(f"Error notificando respuesta de solicitud: {str(e)}")
+        logger.exception(f"Error notificando respuesta de solicitud: {str(e)}")
         return None
 
 def notificar_nueva_solicitud(solicitud):
@@ -75,7 +84,7 @@ def notificar_nueva_solicitud(solicitud):
             link=link
         )
     except Exception as e:
-        print(f"Error notificando nueva solicitud: {str(e)}")
+        logger.exception(f"Error notificando nueva solicitud: {str(e)}")
         return None
 
 def obtener_notificaciones_no_leidas(usuario_id):
@@ -83,21 +92,19 @@ def obtener_notificaciones_no_leidas(usuario_id):
     try:
         return Notificacion.query.filter_by(
             usuario_id=usuario_id,
+            enviada=True,
             leida=False
         ).order_by(Notificacion.creada_en.desc()).all()
     except Exception as e:
-        print(f"Error obteniendo notificaciones: {str(e)}")
+        logger.exception(f"Error obteniendo notificaciones: {str(e)}")
         return []
 
 def contar_notificaciones_no_leidas(usuario_id):
-    """Cuenta las notificaciones no leídas de un usuario."""
+    """Cuenta las notificaciones no leídas de un usuario (desde su contador)."""
     try:
-        return Notificacion.query.filter_by(
-            usuario_id=usuario_id,
-            leida=False
-        ).count()
+        return contar_no_leidas(usuario_id)
     except Exception as e:
-        print(f"Error contando notificaciones: {str(e)}")
+        logger.exception(f"Error contando notificaciones: {str(e)}")
         return 0
 
 def marcar_notificacion_como_leida(notificacion_id, usuario_id):
@@ -115,17 +122,18 @@ def marcar_notificacion_como_leida(notificacion_id, usuario_id):
         return False
     except Exception as e:
         db.session.rollback()
-        print(f"Error marcando notificación como leída: {str(e)}")
+        logger.exception(f"Error marcando notificación como leída: {str(e)}")
         return False
 
 def obtener_todas_notificaciones(usuario_id, limite=50):
     """Obtiene todas las notificaciones de un usuario."""
     try:
         return Notificacion.query.filter_by(
-            usuario_id=usuario_id
+            usuario_id=usuario_id,
+            enviada=True
         ).order_by(Notificacion.creada_en.desc()).limit(limite).all()
     except Exception as e:
-        print(f"Error obteniendo todas las notificaciones: {str(e)}")
+        logger.exception(f"Error obteniendo todas las notificaciones: {str(e)}")
         return []
 
 
@@ -172,7 +180,7 @@ def notificar_inicio_ciclo(ciclo_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error notificando inicio de ciclo: {str(e)}")
+        logger.exception(f"Error notificando inicio de ciclo: {str(e)}")
         return 0
 
 
@@ -217,7 +225,7 @@ def notificar_inicio_periodo(periodo_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error notificando inicio de periodo: {str(e)}")
+        logger.exception(f"Error notificando inicio de periodo: {str(e)}")
         return 0
 
 
@@ -235,7 +243,7 @@ def notificar_proximidad_cierre(periodo_id):
             return 0
         
         # Obtener solo profesores
-        rol_profesor = Rol.query.filter_by(nombre='profesor').first()
+        rol_profesor = rol_por_nombre('profesor')
         if not rol_profesor:
             return 0
         
@@ -267,7 +275,7 @@ def notificar_proximidad_cierre(periodo_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error notificando proximidad de cierre: {str(e)}")
+        logger.exception(f"Error notificando proximidad de cierre: {str(e)}")
         return 0
 
 
@@ -321,7 +329,7 @@ def notificar_cierre_periodo(periodo_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error notificando cierre de periodo: {str(e)}")
+        logger.exception(f"Error notificando cierre de periodo: {str(e)}")
         return 0
 
 
@@ -365,7 +373,7 @@ def notificar_fin_ciclo(ciclo_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error notificando fin de ciclo: {str(e)}")
+        logger.exception(f"Error notificando fin de ciclo: {str(e)}")
         return 0
 
 
@@ -443,43 +451,122 @@ def notificar_promocion(estudiante_id, resultado, promedio, curso_destino_id=Non
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error notificando promoción: {str(e)}")
+        logger.exception(f"Error notificando promoción: {str(e)}")
         return 0
 
 
-def procesar_notificaciones_programadas():
+def programar_notificaciones(usuario_ids, titulo, mensaje, programada_para, tipo='general',
+                             link=None, tipo_evento=None, lote=1000):
     """
-    Procesa y envía notificaciones que están programadas para hoy.
-    Esta función debe ejecutarse diariamente (cron/celery).
+    Programa una notificación para varios usuarios
+
+    Las filas se insertan por lotes, sin crear objetos del ORM, con
+    enviada=False; procesar_notificaciones_programadas las publica cuando
+    llega `programada_para`.
+
+    Args:
+        usuario_ids (iterable): Destinatarios
+        titulo (str): Título de la notificación
+        mensaje (str): Contenido del mensaje
+        programada_para (datetime): Momento de publicación (hora local)
+        tipo (str): Tipo de notificación
+        link (str): URL opcional
+        tipo_evento (str): Evento que la origina
+        lote (int): Filas por INSERT
+
+    Returns:
+        tuple: (cantidad programada, error)
     """
     try:
-        from datetime import date
-        
-        # Obtener notificaciones programadas para hoy que no han sido enviadas
-        hoy = datetime.now().date()
-        notificaciones_pendientes = Notificacion.query.filter(
-            Notificacion.programada_para <= datetime.now(),
-            Notificacion.enviada == False
-        ).all()
-        
-        contador = 0
-        for notif in notificaciones_pendientes:
-            notif.enviada = True
-            notif.creada_en = datetime.utcnow()
-            contador += 1
-        
+        base = {
+            'titulo': titulo,
+            'mensaje': mensaje,
+            'tipo': tipo,
+            'link': link,
+            'leida': False,
+            'tipo_evento': tipo_evento,
+            'enviada': False,
+            'programada_para': programada_para,
+            'creada_en': datetime.utcnow()
+        }
+        total = 0
+        filas = []
+        for usuario_id in usuario_ids:
+            filas.append(dict(base, usuario_id=usuario_id))
+            if len(filas) >= lote:
+                db.session.execute(insert(Notificacion), filas)
+                total += len(filas)
+                filas = []
+        if filas:
+            db.session.execute(insert(Notificacion), filas)
+            total += len(filas)
         db.session.commit()
-        
+        return total, None
+
+    except Exception as e:
+        db.session.rollback()
+        return 0, f"Error programando notificaciones: {str(e)}"
+
+
+def procesar_notificaciones_programadas(lote=500):
+    """
+    Publica las notificaciones programadas que ya vencieron
+
+    Cada lote se reclama con SELECT ... FOR UPDATE SKIP LOCKED (en MySQL 8;
+    en otros motores se ignora) y se marca enviada con un UPDATE por ids que
+    vuelve a exigir enviada=False, así que varios workers pueden despachar a
+    la vez sin publicar dos veces la misma fila. Solo se leen los ids y los
+    destinatarios, nunca las notificaciones completas. Se ejecuta desde el
+    planificador (tarea 'notificaciones_programadas').
+
+    Args:
+        lote (int): Filas reclamadas por transacción
+
+    Returns:
+        dict: Cantidad publicada y lotes procesados
+    """
+    contador = 0
+    lotes = 0
+    try:
+        while True:
+            ahora = datetime.now()
+            filas = db.session.query(Notificacion.id_notificacion, Notificacion.usuario_id).filter(
+                Notificacion.enviada == False,
+                Notificacion.programada_para <= ahora
+            ).order_by(
+                Notificacion.programada_para
+            ).limit(lote).with_for_update(skip_locked=True).all()
+            ids = [fila[0] for fila in filas]
+
+            if not ids:
+                db.session.commit()
+                break
+
+            publicar_al_confirmar(db.session, {fila[1] for fila in filas}, 'notificacion', {'tipo': 'programada'})
+            contador += Notificacion.query.filter(
+                Notificacion.id_notificacion.in_(ids),
+                Notificacion.enviada == False
+            ).update({
+                'enviada': True,
+                'creada_en': datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+            lotes += 1
+
+            if len(ids) < lote:
+                break
+
         return {
             'procesadas': contador,
+            'lotes': lotes,
             'mensaje': f'{contador} notificaciones enviadas'
         }
-        
+
     except Exception as e:
         db.session.rollback()
         return {
             'error': str(e),
-            'procesadas': 0
+            'procesadas': contador
         }
 
 # ============================================================================
@@ -491,25 +578,25 @@ def notificar_nuevo_incidente(incidente):
     try:
         from controllers.models import Rol
         
-        print(f"Iniciando notificación de incidente ID: {incidente.id_incidente}")
+        logger.debug("Iniciando notificación de incidente ID: %s", incidente.id_incidente)
         
         equipo = Equipo.query.get(incidente.equipo_id)
         if not equipo:
-            print(f"Equipo {incidente.equipo_id} no encontrado")
+            logger.debug("Equipo %s no encontrado", incidente.equipo_id)
             return 0
         
-        print(f"Equipo encontrado: {equipo.nombre}")
+        logger.debug("Equipo encontrado: %s", equipo.nombre)
         
         rol_superadmin = Rol.query.filter_by(id_rol=1).first()
         if not rol_superadmin:
-            print("Rol superadmin no encontrado")
+            logger.debug("Rol superadmin no encontrado")
             return 0
         
         admins = Usuario.query.filter_by(id_rol_fk=rol_superadmin.id_rol).all()
-        print(f"{len(admins)} administradores encontrados")
+        logger.debug("%s administradores encontrados", len(admins))
         
         if not admins:
-            print("No hay administradores para notificar")
+            logger.debug("No hay administradores para notificar")
             return 0
         
         # Construir mensaje
@@ -531,20 +618,17 @@ def notificar_nuevo_incidente(incidente):
                 )
                 db.session.add(notif)
                 contador += 1
-                print(f"Notificación creada para admin {admin.nombre_completo}")
             except Exception as e:
-                print(f"Error creando notificación para admin {admin.id_usuario}: {str(e)}")
+                logger.exception(f"Error creando notificación para admin {admin.id_usuario}: {str(e)}")
                 continue
 
         db.session.flush()
         
-        print(f"Total notificaciones creadas: {contador}")
+        logger.debug("Total notificaciones creadas: %s", contador)
         return contador
         
     except Exception as e:
-        print(f"Error general notificando nuevo incidente: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error general notificando nuevo incidente: {str(e)}")
         return 0
     
 
@@ -557,14 +641,13 @@ def notificar_nuevo_evento(evento, admin_id=None):
     try:
         from controllers.models import Rol, Usuario
         
-        print(f"🎯 Iniciando notificaciones para evento: {evento.nombre}")
-        print(f"🎯 Rol destino: {evento.rol_destino}")
+        logger.debug("🎯 Iniciando notificaciones para evento: %s", evento.nombre)
+        logger.debug("🎯 Rol destino: %s", evento.rol_destino)
         
-        # Convertir rol_destino a lista
-        roles_destino = [r.strip() for r in evento.rol_destino.split(',')] if evento.rol_destino else []
+        roles_destino = evento.roles_destino
         
         if not roles_destino:
-            print("❌ No hay roles destino definidos")
+            logger.warning("No hay roles destino definidos")
             return 0
         
         contador = 0
@@ -589,20 +672,19 @@ def notificar_nuevo_evento(evento, admin_id=None):
                 auto_commit=False
             )
             contador += 1
-            print(f"   📨 Notificación de confirmación enviada al admin ID: {admin_id}")
         
         # ✅ CORRECCIÓN PRINCIPAL: OBTENER TODOS LOS USUARIOS DEL ROL DESTINO
         for rol_nombre in roles_destino:
             rol_nombre_clean = rol_nombre.strip().lower()
-            print(f"🔍 Buscando usuarios con rol: {rol_nombre_clean}")
+            logger.debug("🔍 Buscando usuarios con rol: %s", rol_nombre_clean)
             
-            rol_obj = Rol.query.filter_by(nombre=rol_nombre_clean).first()
+            rol_obj = rol_por_nombre(rol_nombre_clean)
             if not rol_obj:
-                print(f"   ❌ Rol '{rol_nombre_clean}' no encontrado")
+                logger.warning(f"Rol '{rol_nombre_clean}' no encontrado")
                 continue
                 
             usuarios_rol = Usuario.query.filter_by(id_rol_fk=rol_obj.id_rol).all()
-            print(f"   👥 Encontrados {len(usuarios_rol)} usuarios con rol {rol_nombre_clean}")
+            logger.debug("👥 Encontrados %s usuarios con rol %s", len(usuarios_rol), rol_nombre_clean)
             
             # Determinar link según rol
             if rol_nombre_clean == 'estudiante':
@@ -625,17 +707,16 @@ def notificar_nuevo_evento(evento, admin_id=None):
                     auto_commit=False
                 )
                 contador += 1
-                print(f"      📨 Notificación enviada a {usuario.nombre_completo} (ID: {usuario.id_usuario})")
         
         # ✅ CORRECCIÓN ADICIONAL: SI EL EVENTO ES PARA ESTUDIANTES, NOTIFICAR A TODOS LOS PADRES TAMBIÉN
         if 'estudiante' in [r.lower() for r in roles_destino]:
-            print("✅ Evento para estudiantes - Notificando a TODOS los padres también...")
+            logger.debug("✅ Evento para estudiantes - Notificando a TODOS los padres también...")
             
-            rol_padre = Rol.query.filter_by(nombre='padre').first()
+            rol_padre = rol_por_nombre('padre')
             if rol_padre:
                 # Obtener TODOS los padres, no solo los que tienen relaciones
                 todos_los_padres = Usuario.query.filter_by(id_rol_fk=rol_padre.id_rol).all()
-                print(f"   👨‍👩‍👧‍👦 Encontrados {len(todos_los_padres)} padres en el sistema")
+                logger.debug("👨‍👩‍👧‍👦 Encontrados %s padres en el sistema", len(todos_los_padres))
                 
                 for padre in todos_los_padres:
                     mensaje_padre = f"📋 Nuevo evento escolar para tu(s) hijo(s):\n\n{mensaje}"
@@ -648,19 +729,16 @@ def notificar_nuevo_evento(evento, admin_id=None):
                         auto_commit=False
                     )
                     contador += 1
-                    print(f"      📨 Notificación enviada a padre: {padre.nombre_completo} (ID: {padre.id_usuario})")
         
         # Hacer commit de todas las notificaciones
         db.session.commit()
         
-        print(f"✅ Notificaciones enviadas exitosamente: {contador} notificaciones en total")
+        logger.debug("✅ Notificaciones enviadas exitosamente: %s notificaciones en total", contador)
         return contador
         
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error notificando evento: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ Error notificando evento: {str(e)}")
         return 0
 
 def notificar_evento_actualizado(evento, admin_id=None):
@@ -668,7 +746,7 @@ def notificar_evento_actualizado(evento, admin_id=None):
     try:
         from controllers.models import Rol, Usuario, estudiante_padre
         
-        roles_destino = [r.strip() for r in evento.rol_destino.split(',')] if evento.rol_destino else []
+        roles_destino = evento.roles_destino
         
         if not roles_destino:
             return 0
@@ -693,13 +771,12 @@ def notificar_evento_actualizado(evento, admin_id=None):
                 auto_commit=False
             )
             contador += 1
-            print(f"   📨 Notificación de actualización enviada al admin ID: {admin_id}")
         
         link = "/calendario"
         
         # Misma lógica que notificar_nuevo_evento pero con mensaje de actualización
         if 'Estudiante' in roles_destino:
-            rol_estudiante = Rol.query.filter_by(nombre='estudiante').first()
+            rol_estudiante = rol_por_nombre('estudiante')
             if rol_estudiante:
                 estudiantes = Usuario.query.filter_by(id_rol_fk=rol_estudiante.id_rol).all()
                 
@@ -713,7 +790,6 @@ def notificar_evento_actualizado(evento, admin_id=None):
                         auto_commit=False
                     )
                     contador += 1
-                    print(f"   📨 Notificación de actualización enviada a estudiante: {estudiante.nombre_completo}")
                     
                     # Notificar a los padres del estudiante
                     padres_estudiante = db.session.execute(
@@ -734,10 +810,9 @@ def notificar_evento_actualizado(evento, admin_id=None):
                             auto_commit=False
                         )
                         contador += 1
-                        print(f"   📨 Notificación de actualización enviada a padre: {padre.nombre_completo}")
         
         if 'Profesor' in roles_destino:
-            rol_profesor = Rol.query.filter_by(nombre='profesor').first()
+            rol_profesor = rol_por_nombre('profesor')
             if rol_profesor:
                 profesores = Usuario.query.filter_by(id_rol_fk=rol_profesor.id_rol).all()
                 for profesor in profesores:
@@ -750,10 +825,9 @@ def notificar_evento_actualizado(evento, admin_id=None):
                         auto_commit=False
                     )
                     contador += 1
-                    print(f"   📨 Notificación de actualización enviada a profesor: {profesor.nombre_completo}")
         
         if 'Padre' in roles_destino:
-            rol_padre = Rol.query.filter_by(nombre='padre').first()
+            rol_padre = rol_por_nombre('padre')
             if rol_padre:
                 padres = Usuario.query.filter_by(id_rol_fk=rol_padre.id_rol).all()
                 for padre in padres:
@@ -766,16 +840,15 @@ def notificar_evento_actualizado(evento, admin_id=None):
                         auto_commit=False
                     )
                     contador += 1
-                    print(f"   📨 Notificación de actualización enviada a padre: {padre.nombre_completo}")
         
         db.session.commit()
         
-        print(f"✅ Notificaciones de evento actualizado enviadas: {contador} notificaciones")
+        logger.debug("✅ Notificaciones de evento actualizado enviadas: %s notificaciones", contador)
         return contador
         
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error notificando evento actualizado: {str(e)}")
+        logger.exception(f"❌ Error notificando evento actualizado: {str(e)}")
         return 0
 
 def notificar_evento_eliminado(evento, admin_id=None):
@@ -783,7 +856,7 @@ def notificar_evento_eliminado(evento, admin_id=None):
     try:
         from controllers.models import Rol, Usuario, estudiante_padre
         
-        roles_destino = [r.strip() for r in evento.rol_destino.split(',')] if evento.rol_destino else []
+        roles_destino = evento.roles_destino
         
         if not roles_destino:
             return 0
@@ -805,11 +878,10 @@ def notificar_evento_eliminado(evento, admin_id=None):
                 auto_commit=False
             )
             contador += 1
-            print(f"   📨 Notificación de eliminación enviada al admin ID: {admin_id}")
         
         # Misma lógica de notificación
         if 'Estudiante' in roles_destino:
-            rol_estudiante = Rol.query.filter_by(nombre='estudiante').first()
+            rol_estudiante = rol_por_nombre('estudiante')
             if rol_estudiante:
                 estudiantes = Usuario.query.filter_by(id_rol_fk=rol_estudiante.id_rol).all()
                 
@@ -823,7 +895,6 @@ def notificar_evento_eliminado(evento, admin_id=None):
                         auto_commit=False
                     )
                     contador += 1
-                    print(f"   📨 Notificación de cancelación enviada a estudiante: {estudiante.nombre_completo}")
                     
                     padres_estudiante = db.session.execute(
                         db.select(Usuario).join(
@@ -843,10 +914,9 @@ def notificar_evento_eliminado(evento, admin_id=None):
                             auto_commit=False
                         )
                         contador += 1
-                        print(f"   📨 Notificación de cancelación enviada a padre: {padre.nombre_completo}")
         
         if 'Profesor' in roles_destino:
-            rol_profesor = Rol.query.filter_by(nombre='profesor').first()
+            rol_profesor = rol_por_nombre('profesor')
             if rol_profesor:
                 profesores = Usuario.query.filter_by(id_rol_fk=rol_profesor.id_rol).all()
                 for profesor in profesores:
@@ -859,10 +929,9 @@ def notificar_evento_eliminado(evento, admin_id=None):
                         auto_commit=False
                     )
                     contador += 1
-                    print(f"   📨 Notificación de cancelación enviada a profesor: {profesor.nombre_completo}")
         
         if 'Padre' in roles_destino:
-            rol_padre = Rol.query.filter_by(nombre='padre').first()
+            rol_padre = rol_por_nombre('padre')
             if rol_padre:
                 padres = Usuario.query.filter_by(id_rol_fk=rol_padre.id_rol).all()
                 for padre in padres:
@@ -875,16 +944,15 @@ def notificar_evento_eliminado(evento, admin_id=None):
                         auto_commit=False
                     )
                     contador += 1
-                    print(f"   📨 Notificación de cancelación enviada a padre: {padre.nombre_completo}")
         
         db.session.commit()
         
-        print(f"✅ Notificaciones de evento cancelado enviadas: {contador} notificaciones")
+        logger.debug("✅ Notificaciones de evento cancelado enviadas: %s notificaciones", contador)
         return contador
         
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error notificando evento cancelado: {str(e)}")
+        logger.exception(f"❌ Error notificando evento cancelado: {str(e)}")
         return 0
     
 # ============================================================================
@@ -898,9 +966,9 @@ def notificar_nuevo_mantenimiento(mantenimiento, admin_id=None):
     try:
         from controllers.models import Rol, Usuario
         
-        print(f"Iniciando notificaciones para mantenimiento ID: {mantenimiento.id_mantenimiento}")
-        print(f"Equipo: {mantenimiento.equipo.nombre if mantenimiento.equipo else 'N/A'}")
-        print(f"Sede: {mantenimiento.sede.nombre if mantenimiento.sede else 'N/A'}")
+        logger.debug("Iniciando notificaciones para mantenimiento ID: %s", mantenimiento.id_mantenimiento)
+        logger.debug("Equipo: %s", mantenimiento.equipo.nombre if mantenimiento.equipo else 'N/A')
+        logger.debug("Sede: %s", mantenimiento.sede.nombre if mantenimiento.sede else 'N/A')
         
         contador = 0
         
@@ -926,12 +994,12 @@ def notificar_nuevo_mantenimiento(mantenimiento, admin_id=None):
             )
             if notif_admin:
                 contador += 1
-                print(f"Notificación de confirmación creada para admin ID: {admin_id}")
+                logger.debug("Notificación de confirmación creada para admin ID: %s", admin_id)
         
         rol_superadmin = Rol.query.filter_by(id_rol=1).first()
         if rol_superadmin:
             admins = Usuario.query.filter_by(id_rol_fk=rol_superadmin.id_rol).all()
-            print(f"Encontrados {len(admins)} administradores para notificar")
+            logger.debug("Encontrados %s administradores para notificar", len(admins))
             
             for admin in admins:
                 if admin_id and admin.id_usuario == admin_id:
@@ -947,13 +1015,10 @@ def notificar_nuevo_mantenimiento(mantenimiento, admin_id=None):
                 )
                 if notif:
                     contador += 1
-                    print(f"Notificación creada para admin: {admin.nombre_completo} (ID: {admin.id_usuario})")
 
-        print(f"Total notificaciones de mantenimiento creadas: {contador}")
+        logger.debug("Total notificaciones de mantenimiento creadas: %s", contador)
         return contador
         
     except Exception as e:
-        print(f"Error notificando nuevo mantenimiento: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error notificando nuevo mantenimiento: {str(e)}")
         return 0
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Política de hashing de contraseñas
+
+El algoritmo, su coste y el largo de la sal se definen en Config
+(PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH). Los hashes guardados con otros
+parámetros se regeneran en el siguiente inicio de sesión correcto, y la
+creación masiva de usuarios reparte el hashing en un pool de hilos acotado
+(scrypt y pbkdf2 liberan el GIL mientras calculan).
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _config(nombre):
+    if has_app_context():
+        return current_app.config.get(nombre, getattr(Config, nombre))
+    return getattr(Config, nombre)
+
+
+def metodo_configurado():
+    """
+    Devuelve el método y el largo de sal vigentes
+
+    Returns:
+        tuple: (metodo, largo_sal)
+    """
+    return _config('PASSWORD_HASH_METHOD'), _config('PASSWORD_SALT_LENGTH')
+
+
+@lru_cache(maxsize=8)
+def _prefijo_normalizado(metodo):
+    # werkzeug completa los parámetros omitidos ('scrypt' -> 'scrypt:32768:8:1');
+    # se calcula un hash de prueba una sola vez para conocer la forma canónica
+    return generate_password_hash('', method=metodo).split('$', 1)[0]
+
+
+def generar_hash(password, metodo=None, largo_sal=None):
+    """
+    Genera el hash de una contraseña con la política configurada
+
+    Args:
+        password (str): Contraseña en texto plano
+        metodo (str): Método de werkzeug; por defecto el de Config
+        largo_sal (int): Largo de la sal; por defecto el de Config
+
+    Returns:
+        str: Hash en el formato de werkzeug
+    """
+    metodo_defecto, sal_defecto = metodo_configurado()
+    return generate_password_hash(
+        password,
+        method=metodo or metodo_defecto,
+        salt_length=largo_sal or sal_defecto
+    )
+
+
+def verificar_password(password_hash, password):
+    """Comprueba una contraseña contra su hash (cualquier método soportado)."""
+    if not password_hash:
+        return False
+    return check_password_hash(password_hash, password)
+
+
+def necesita_rehash(password_hash):
+    """
+    Indica si un hash fue generado con parámetros distintos a los vigentes
+
+    Args:
+        password_hash (str): Hash guardado
+
+    Returns:
+        bool
+    """
+    metodo, largo_sal = metodo_configurado()
+    partes = (password_hash or '').split('$')
+    if len(partes) != 3:
+        return True
+    prefijo, sal, _ = partes
+    return prefijo != _prefijo_normalizado(metodo) or len(sal) != largo_sal
+
+
+def _obtener_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=_config('PASSWORD_HASH_WORKERS'),
+                thread_name_prefix='password-hash'
+            )
+        return _pool
+
+
+def generar_hashes_en_lote(passwords):
+    """
+    Genera los hashes de varias contraseñas en paralelo
+
+    Args:
+        passwords (iterable): Contraseñas en texto plano
+
+    Returns:
+        list: Hashes en el mismo orden de entrada
+    """
+    passwords = list(passwords)
+    if len(passwords) < 2:
+        return [generar_hash(p) for p in passwords]
+
+    metodo, largo_sal = metodo_configurado()
+    return list(_obtener_pool().map(
+        lambda password: generar_hash(password, metodo, largo_sal),
+        passwords
+    ))
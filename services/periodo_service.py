@@ -2,9 +2,73 @@
 Servicio para gestión de Ciclos y Periodos Académicos
 """
 
+import logging
+from collections import namedtuple
+from types import SimpleNamespace
 from datetime import datetime, timedelta, date
 from controllers.models import db, CicloAcademico, PeriodoAcademico, Matricula, Calificacion, Asistencia
-from sqlalchemy import and_, func
+from sqlalchemy import func, event, select, update
+from sqlalchemy.orm import Session
+from services.cache_service import CacheTTL, invalidar_al_cambiar, adjuntar_a_sesion, registrar_cambios_masivos
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# RELOJ ACADÉMICO
+# ============================================================================
+#
+# El ciclo y el periodo activos se consultan en casi cada página. Se guardan
+# en memoria por día (la clave es la fecha, así que los valores derivados
+# como `dias_para_cierre` se recalculan al cambiar de día) y se invalidan con
+# cualquier commit sobre ciclos o periodos: activar_ciclo, cerrar_periodo,
+# actualizar_periodo y las transiciones automáticas.
+
+RelojAcademico = namedtuple('RelojAcademico', 'fecha ciclo periodo periodo_dict')
+
+RELOJ_TTL = 300
+
+cache_reloj = CacheTTL('reloj_academico', ttl=RELOJ_TTL, max_entradas=4)
+invalidar_al_cambiar((CicloAcademico, PeriodoAcademico), cache_reloj)
+
+
+def _cargar_reloj(hoy):
+    # Sesión aparte: las instancias quedan desprendidas y se pueden cachear
+    with Session(db.engine) as sesion:
+        ciclo = sesion.query(CicloAcademico).filter_by(activo=True).first()
+        periodo = None
+        if ciclo:
+            periodo = sesion.query(PeriodoAcademico).filter_by(
+                ciclo_academico_id=ciclo.id_ciclo,
+                estado='activo'
+            ).first()
+        periodo_dict = periodo.to_dict() if periodo else None
+    return RelojAcademico(hoy, ciclo, periodo, periodo_dict)
+
+
+def obtener_reloj():
+    """
+    Devuelve el estado académico del día (ciclo y periodo activos)
+
+    Las instancias del resultado están desprendidas de la sesión: sirven para
+    leer columnas; para navegar relaciones usar obtener_periodo_activo().
+
+    Returns:
+        RelojAcademico
+    """
+    hoy = date.today()
+    return cache_reloj.obtener_o_calcular(hoy, lambda: _cargar_reloj(hoy))
+
+
+def periodo_activo_dict():
+    """
+    Devuelve `to_dict()` del periodo activo, calculado una vez al día
+
+    Returns:
+        dict: Copia del diccionario, o None si no hay periodo activo
+    """
+    periodo_dict = obtener_reloj().periodo_dict
+    return dict(periodo_dict) if periodo_dict else None
 
 
 def crear_ciclo_academico(nombre, fecha_inicio, fecha_fin):
@@ -160,29 +224,22 @@ def activar_ciclo(ciclo_id):
 
 def obtener_ciclo_activo():
     """
-    Obtiene el ciclo académico activo actual
+    Obtiene el ciclo académico activo actual (desde el reloj académico)
     
     Returns:
         CicloAcademico: Ciclo activo o None
     """
-    return CicloAcademico.query.filter_by(activo=True).first()
+    return adjuntar_a_sesion(obtener_reloj().ciclo)
 
 
 def obtener_periodo_activo():
     """
-    Obtiene el periodo académico activo actual
+    Obtiene el periodo académico activo actual (desde el reloj académico)
     
     Returns:
         PeriodoAcademico: Periodo activo o None
     """
-    ciclo_activo = obtener_ciclo_activo()
-    if not ciclo_activo:
-        return None
-    
-    return PeriodoAcademico.query.filter_by(
-        ciclo_academico_id=ciclo_activo.id_ciclo,
-        estado='activo'
-    ).first()
+    return adjuntar_a_sesion(obtener_reloj().periodo)
 
 
 def cerrar_periodo(periodo_id):
@@ -223,13 +280,7 @@ def cerrar_periodo(periodo_id):
         
         db.session.commit()
         
-        # Notificar cierre
-        from services.notification_service import notificar_cierre_periodo
-        notificar_cierre_periodo(periodo_id)
-        
-        # Generar reportes del periodo
-        from services.reporte_service import generar_reporte_periodo
-        generar_reporte_periodo(periodo_id)
+        completar_cierre(periodo_id)
         
         return True, None
         
@@ -238,6 +289,27 @@ def cerrar_periodo(periodo_id):
         return False, f"Error cerrando periodo: {str(e)}"
 
 
+def completar_cierre(periodo_id):
+    """
+    Pasos posteriores al cierre de un periodo ya guardado como 'cerrado':
+    notifica el cierre y genera los reportes del periodo
+
+    Lo usan el cierre manual (cerrar_periodo) y el automático
+    (avanzar_periodos). Un fallo al generar los reportes no deshace el cierre.
+
+    Args:
+        periodo_id (int): ID del periodo cerrado
+    """
+    from services.notification_service import notificar_cierre_periodo
+    notificar_cierre_periodo(periodo_id)
+
+    try:
+        from services.reporte_service import generar_reporte_periodo
+        generar_reporte_periodo(periodo_id)
+    except Exception as e:
+        logger.exception("Error generando los reportes del periodo %s: %s", periodo_id, e)
+
+
 def validar_notas_completas(periodo_id):
     """
     Valida que todas las notas del periodo estén completas
@@ -396,7 +468,7 @@ def eliminar_periodo(periodo_id):
 def verificar_proximidad_cierre():
     """
     Verifica si hay periodos próximos a cerrar y envía notificaciones
-    Esta función debe ejecutarse diariamente (cron/celery)
+    Se ejecuta una vez al día desde el reloj académico (ejecutar_reloj_academico)
     
     Returns:
         dict: Diccionario con resultados de las notificaciones
@@ -427,3 +499,290 @@ def verificar_proximidad_cierre():
     except Exception as e:
         return {'error': str(e)}
 
+
+
+# ============================================================================
+# TRANSICIONES AUTOMÁTICAS DE PERIODOS
+# ============================================================================
+
+def _cambiar_estado(periodo_id, desde, hacia):
+    # UPDATE condicionado: si varios procesos lo intentan a la vez solo uno
+    # cambia la fila, y solo ese envía las notificaciones
+    return PeriodoAcademico.query.filter_by(id_periodo=periodo_id, estado=desde).update(
+        {'estado': hacia}, synchronize_session=False
+    ) == 1
+
+
+def avanzar_periodos(hoy=None):
+    """
+    Aplica las transiciones de estado de los periodos del ciclo activo
+
+    - activo -> en_cierre: pasó la fecha de cierre de notas
+    - en_cierre -> cerrado: pasaron la fecha de fin y la de cierre de notas
+      y todas las notas están completas (si no, sigue en cierre y se avisa
+      en el registro en cada revisión)
+    - planificado -> activo: si no hay periodo activo y ya llegó su fecha
+      de inicio (el de menor número)
+
+    Args:
+        hoy (date): Fecha de referencia; por defecto hoy
+
+    Returns:
+        tuple: (lista de (periodo_id, nuevo_estado), error)
+    """
+    hoy = hoy or date.today()
+    try:
+        ciclo = CicloAcademico.query.filter_by(activo=True).first()
+        if not ciclo:
+            return [], None
+
+        periodos = PeriodoAcademico.query.filter_by(
+            ciclo_academico_id=ciclo.id_ciclo
+        ).order_by(PeriodoAcademico.numero_periodo).all()
+
+        cambios = []
+        for periodo in periodos:
+            estado = periodo.estado
+            if estado == 'activo' and periodo.fecha_cierre_notas and hoy > periodo.fecha_cierre_notas:
+                if _cambiar_estado(periodo.id_periodo, 'activo', 'en_cierre'):
+                    cambios.append((periodo.id_periodo, 'en_cierre'))
+                    estado = 'en_cierre'
+            if estado == 'en_cierre' and hoy > max(periodo.fecha_fin, periodo.fecha_cierre_notas or periodo.fecha_fin):
+                validacion_ok, mensaje = validar_notas_completas(periodo.id_periodo)
+                if not validacion_ok:
+                    logger.warning("El periodo %s sigue en cierre: %s", periodo.id_periodo, mensaje)
+                elif _cambiar_estado(periodo.id_periodo, 'en_cierre', 'cerrado'):
+                    cambios.append((periodo.id_periodo, 'cerrado'))
+
+        hay_activo = PeriodoAcademico.query.filter_by(
+            ciclo_academico_id=ciclo.id_ciclo, estado='activo'
+        ).count() > 0
+        if not hay_activo:
+            siguiente = next((
+                p for p in periodos
+                if p.estado == 'planificado' and p.fecha_inicio <= hoy
+            ), None)
+            if siguiente and _cambiar_estado(siguiente.id_periodo, 'planificado', 'activo'):
+                cambios.append((siguiente.id_periodo, 'activo'))
+
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        return [], f"Error avanzando periodos: {str(e)}"
+
+    from services.notification_service import notificar_inicio_periodo
+    for periodo_id, estado in cambios:
+        if estado == 'cerrado':
+            completar_cierre(periodo_id)
+        elif estado == 'activo':
+            notificar_inicio_periodo(periodo_id)
+
+    return cambios, None
+
+
+def _reclamar_revision_diaria(periodo_id, hoy):
+    # Marca el día como revisado; solo el proceso que lo marca hace la revisión
+    reclamado = PeriodoAcademico.query.filter(
+        PeriodoAcademico.id_periodo == periodo_id,
+        (PeriodoAcademico.ultima_revision == None) | (PeriodoAcademico.ultima_revision < hoy)
+    ).update({'ultima_revision': hoy}, synchronize_session=False) == 1
+    db.session.commit()
+    return reclamado
+
+
+def ejecutar_reloj_academico():
+    """
+    Paso periódico del reloj académico (tarea 'reloj_academico' del planificador)
+
+    Aplica las transiciones de periodos y, una vez al día, revisa la
+    proximidad del cierre de notas. Es seguro ejecutarlo en varios procesos.
+
+    Returns:
+        dict: Cambios de estado y resultado de la revisión diaria
+    """
+    hoy = date.today()
+    cambios, error = avanzar_periodos(hoy)
+    resultado = {'cambios': cambios, 'error': error, 'revision': None}
+
+    try:
+        periodo = obtener_reloj().periodo
+        if periodo and _reclamar_revision_diaria(periodo.id_periodo, hoy):
+            resultado['revision'] = verificar_proximidad_cierre()
+    except Exception as e:
+        db.session.rollback()
+        resultado['error'] = f"Error en revisión diaria: {str(e)}"
+
+    return resultado
+
+
+# ============================================================================
+# ASIGNACIÓN DE PERIODO A CALIFICACIONES Y ASISTENCIAS
+# ============================================================================
+#
+# Cada calificación y asistencia guarda su periodo_academico_id, de modo que
+# las consultas del periodo actual usan los índices que empiezan por el
+# periodo y no recorren el historial completo.
+#
+# Bases de datos creadas antes de esta columna (db.create_all no altera
+# tablas existentes):
+#
+#   ALTER TABLE calificacion ADD COLUMN periodo_academico_id INT NULL,
+#       ADD CONSTRAINT fk_calificacion_periodo FOREIGN KEY (periodo_academico_id)
+#           REFERENCES periodo_academico (id_periodo),
+#       ADD INDEX ix_calificacion_periodo_estudiante_asignatura (periodo_academico_id, estudianteId, asignaturaId),
+#       ADD INDEX ix_calificacion_periodo_asignatura (periodo_academico_id, asignaturaId);
+#   ALTER TABLE asistencia ADD COLUMN periodo_academico_id INT NULL,
+#       ADD CONSTRAINT fk_asistencia_periodo FOREIGN KEY (periodo_academico_id)
+#           REFERENCES periodo_academico (id_periodo),
+#       ADD INDEX ix_asistencia_periodo_estudiante_fecha (periodo_academico_id, estudianteId, fecha),
+#       ADD INDEX ix_asistencia_periodo_clase_fecha (periodo_academico_id, claseId, fecha);
+#
+# Particionado opcional en MySQL: InnoDB no admite claves foráneas en tablas
+# particionadas y la columna de partición debe formar parte de la clave
+# primaria. Si se acepta perder las FKs de estas tablas, se puede particionar
+# por rango de periodo con un límite en el primer periodo de cada ciclo:
+#
+#   ALTER TABLE asistencia DROP FOREIGN KEY <cada_fk>,
+#       DROP PRIMARY KEY, ADD PRIMARY KEY (id_asistencia, periodo_academico_id);
+#   ALTER TABLE asistencia PARTITION BY RANGE (periodo_academico_id) (
+#       PARTITION ciclo_2024 VALUES LESS THAN (<primer periodo de 2025>),
+#       PARTITION ciclo_2025 VALUES LESS THAN (<primer periodo de 2026>),
+#       PARTITION actual VALUES LESS THAN MAXVALUE);
+#
+# (periodo_academico_id debe ser NOT NULL tras el backfill). Sin particionar,
+# los índices compuestos ya excluyen los años anteriores de las consultas.
+
+def periodo_para_fecha(fecha):
+    """
+    Obtiene el periodo cuyo rango de fechas contiene la fecha dada
+
+    Args:
+        fecha (date): Fecha a ubicar
+
+    Returns:
+        PeriodoAcademico: Periodo o None
+    """
+    return PeriodoAcademico.query.filter(
+        PeriodoAcademico.fecha_inicio <= fecha,
+        PeriodoAcademico.fecha_fin >= fecha
+    ).order_by(PeriodoAcademico.fecha_inicio.desc()).first()
+
+
+@event.listens_for(Session, 'before_flush')
+def _asignar_periodo_nuevos_registros(session, flush_context, instances):
+    """Asigna el periodo activo a las calificaciones y asistencias nuevas."""
+    nuevos = [
+        obj for obj in session.new
+        if isinstance(obj, (Calificacion, Asistencia))
+        and obj.periodo_academico_id is None and obj.periodo is None
+    ]
+    if not nuevos:
+        return
+
+    with session.no_autoflush:
+        periodo_activo = obtener_reloj().periodo
+        por_fecha = {}
+        for obj in nuevos:
+            periodo = periodo_activo
+            fecha = getattr(obj, 'fecha', None) if isinstance(obj, Asistencia) else None
+            # Una asistencia registrada fuera del periodo activo pertenece al de su fecha
+            if fecha and not (periodo and periodo.fecha_inicio <= fecha <= periodo.fecha_fin):
+                if fecha not in por_fecha:
+                    por_fecha[fecha] = periodo_para_fecha(fecha)
+                periodo = por_fecha[fecha] or periodo
+            if periodo:
+                obj.periodo_academico_id = periodo.id_periodo
+
+
+# Último id revisado por tabla: las filas sin periodo hasta ese id tienen una
+# fecha que no cae en ningún periodo y no se vuelven a recorrer, salvo que
+# cambien los periodos.
+_revisado_hasta = {}
+
+invalidar_al_cambiar((PeriodoAcademico,), lambda _modelos: _revisado_hasta.clear())
+
+
+def _periodo_de(periodos, fecha):
+    if isinstance(fecha, datetime):
+        fecha = fecha.date()
+    if fecha is None:
+        return None
+    return next((id_periodo for id_periodo, inicio, fin in periodos if inicio <= fecha <= fin), None)
+
+
+def asignar_periodos_historicos(lote=5000):
+    """
+    Asigna periodo a las calificaciones y asistencias que no lo tienen
+
+    Las asistencias se ubican por su fecha y las calificaciones por su
+    fecha de registro. Se recorren por lotes de `lote` filas en orden de id,
+    con un UPDATE por periodo y lote, y se confirma cada lote para no
+    bloquear las tablas en instalaciones con años de historial. Las filas
+    que no caen en ningún periodo se recuerdan (por id) y no se reintentan
+    hasta que cambien los periodos.
+
+    Las sentencias van sobre la tabla y declaran sus filas con
+    registrar_cambios_masivos: las cachés solo pierden las claves de los
+    estudiantes afectados, y nada si no se actualizó ninguna fila.
+
+    Args:
+        lote (int): Tamaño de cada lote
+
+    Returns:
+        tuple: (dict con filas actualizadas por tabla, error)
+    """
+    try:
+        periodos = [(p.id_periodo, p.fecha_inicio, p.fecha_fin) for p in
+                    PeriodoAcademico.query.order_by(PeriodoAcademico.fecha_inicio).all()]
+        totales = {'calificaciones': 0, 'asistencias': 0}
+        if not periodos:
+            return totales, None
+
+        tablas = (
+            ('asistencias', Asistencia, 'id_asistencia', 'fecha', ('estudianteId',)),
+            ('calificaciones', Calificacion, 'id_calificacion', 'fecha_registro',
+             ('estudianteId', 'asignaturaId', 'categoriaId')),
+        )
+
+        for nombre, modelo, campo_id, campo_fecha, campos_clave in tablas:
+            tabla = modelo.__table__
+            columna_id = tabla.c[campo_id]
+            desde = _revisado_hasta.get(nombre, 0)
+
+            while True:
+                filas = db.session.execute(
+                    select(columna_id, tabla.c[campo_fecha], *(tabla.c[c] for c in campos_clave)).where(
+                        tabla.c.periodo_academico_id.is_(None),
+                        columna_id > desde
+                    ).order_by(columna_id).limit(lote)
+                ).all()
+                if not filas:
+                    break
+
+                por_periodo = {}
+                for fila in filas:
+                    id_periodo = _periodo_de(periodos, fila[1])
+                    if id_periodo:
+                        por_periodo.setdefault(id_periodo, []).append(fila)
+
+                for id_periodo, asignadas in por_periodo.items():
+                    resultado = db.session.execute(update(tabla).where(
+                        columna_id.in_([fila[0] for fila in asignadas]),
+                        tabla.c.periodo_academico_id.is_(None)
+                    ).values(periodo_academico_id=id_periodo))
+                    if resultado.rowcount > 0:
+                        totales[nombre] += resultado.rowcount
+                        registrar_cambios_masivos(db.session, modelo, [
+                            SimpleNamespace(**fila._mapping) for fila in asignadas
+                        ])
+                db.session.commit()
+                desde = filas[-1][0]
+
+            _revisado_hasta[nombre] = desde
+
+        return totales, None
+
+    except Exception as e:
+        db.session.rollback()
+        return None, f"Error asignando periodos históricos: {str(e)}"
@@ -0,0 +1,376 @@
+"""
+Planificador de tareas periódicas
+
+Las tareas se declaran en código con `@tarea_programada` y se guardan en la
+tabla `tareas_programadas`, que conserva su próxima ejecución, los reintentos
+pendientes y el bloqueo entre reinicios. Cada worker corre un hilo que revisa
+las tareas vencidas; para ejecutar una, primero la bloquea con un UPDATE
+condicionado (solo un worker lo consigue), así que aunque haya varios
+procesos cada tarea corre una sola vez por turno. Cada ejecución queda en
+`ejecuciones_tareas`.
+
+Los intervalos y reintentos se pueden ajustar en Config.PLANIFICADOR_TAREAS.
+"""
+
+import logging
+import json
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from flask import current_app
+from controllers.models import db, TareaProgramada, EjecucionTarea, Comunicacion
+
+logger = logging.getLogger(__name__)
+
+
+DefinicionTarea = namedtuple(
+    'DefinicionTarea',
+    'nombre funcion intervalo descripcion max_reintentos reintento_segundos duracion_maxima'
+)
+
+_tareas = {}
+_hilo = None
+
+TRABAJADOR = f'{socket.gethostname()}:{os.getpid()}'
+
+
+def tarea_programada(nombre, intervalo, descripcion='', max_reintentos=3, reintento_segundos=60, duracion_maxima=600):
+    """
+    Registra una función como tarea periódica
+
+    Args:
+        nombre (str): Identificador único de la tarea
+        intervalo (int): Segundos entre ejecuciones
+        descripcion (str): Texto para el panel de administración
+        max_reintentos (int): Reintentos tras un fallo antes de esperar al siguiente turno
+        reintento_segundos (int): Espera del primer reintento; se duplica en cada uno
+        duracion_maxima (int): Segundos que dura el bloqueo de la tarea
+
+    La función no recibe argumentos. Si devuelve una tupla (resultado, error)
+    o un dict con 'error', un error no vacío cuenta como fallo.
+    """
+    def decorador(funcion):
+        _tareas[nombre] = DefinicionTarea(
+            nombre, funcion, intervalo, descripcion,
+            max_reintentos, reintento_segundos, duracion_maxima
+        )
+        return funcion
+    return decorador
+
+
+def _definicion(nombre):
+    # Config.PLANIFICADOR_TAREAS puede cambiar intervalo, max_reintentos, etc.
+    definicion = _tareas[nombre]
+    ajustes = current_app.config.get('PLANIFICADOR_TAREAS', {}).get(nombre, {})
+    return definicion._replace(**{k: v for k, v in ajustes.items() if k in definicion._fields})
+
+
+def sincronizar_tareas():
+    """
+    Crea las filas de las tareas registradas y actualiza sus parámetros
+
+    Returns:
+        tuple: (nombres de las tareas creadas, error)
+    """
+    try:
+        existentes = {t.nombre: t for t in TareaProgramada.query.all()}
+        creadas = []
+        for nombre in _tareas:
+            definicion = _definicion(nombre)
+            tarea = existentes.get(nombre)
+            if tarea is None:
+                db.session.add(TareaProgramada(
+                    nombre=nombre,
+                    descripcion=definicion.descripcion,
+                    intervalo_segundos=definicion.intervalo,
+                    max_reintentos=definicion.max_reintentos,
+                    proxima_ejecucion=datetime.utcnow()
+                ))
+                creadas.append(nombre)
+            else:
+                tarea.descripcion = definicion.descripcion
+                tarea.intervalo_segundos = definicion.intervalo
+                tarea.max_reintentos = definicion.max_reintentos
+        db.session.commit()
+        return creadas, None
+
+    except Exception as e:
+        db.session.rollback()
+        return [], f"Error sincronizando tareas: {str(e)}"
+
+
+def _bloquear(tarea_id, ahora, duracion):
+    # Solo un worker cambia la fila: el resto ve rowcount 0 y sigue de largo
+    bloqueada = TareaProgramada.query.filter(
+        TareaProgramada.id_tarea == tarea_id,
+        TareaProgramada.activa == True,
+        TareaProgramada.proxima_ejecucion <= ahora,
+        (TareaProgramada.bloqueada_hasta == None) | (TareaProgramada.bloqueada_hasta < ahora)
+    ).update({
+        'bloqueada_por': TRABAJADOR,
+        'bloqueada_hasta': ahora + timedelta(seconds=duracion)
+    }, synchronize_session=False) == 1
+    db.session.commit()
+    return bloqueada
+
+
+def _interpretar(resultado):
+    if isinstance(resultado, tuple) and len(resultado) == 2:
+        return resultado[0], resultado[1]
+    if isinstance(resultado, dict) and resultado.get('error'):
+        return resultado, resultado['error']
+    return resultado, None
+
+
+def _ejecutar(tarea_id, definicion):
+    inicio = datetime.utcnow()
+    try:
+        resultado, error = _interpretar(definicion.funcion())
+    except Exception as e:
+        db.session.rollback()
+        resultado, error = None, f"{type(e).__name__}: {str(e)}"
+    fin = datetime.utcnow()
+
+    tarea = db.session.get(TareaProgramada, tarea_id)
+    intento = tarea.intentos_fallidos + 1
+    if error:
+        tarea.intentos_fallidos += 1
+        if tarea.intentos_fallidos <= tarea.max_reintentos:
+            espera = definicion.reintento_segundos * 2 ** (tarea.intentos_fallidos - 1)
+        else:
+            tarea.intentos_fallidos = 0
+            espera = tarea.intervalo_segundos
+    else:
+        espera = tarea.intervalo_segundos
+
+    db.session.add(EjecucionTarea(
+        tarea_id=tarea_id,
+        trabajador=TRABAJADOR,
+        intento=intento,
+        inicio=inicio,
+        fin=fin,
+        estado='error' if error else 'exito',
+        resultado=(str(error) if error else json.dumps(resultado, default=str, ensure_ascii=False))[:4000]
+    ))
+
+    if not error:
+        tarea.intentos_fallidos = 0
+    tarea.ultima_ejecucion = inicio
+    tarea.ultimo_estado = 'error' if error else 'exito'
+    tarea.proxima_ejecucion = fin + timedelta(seconds=espera)
+    if tarea.bloqueada_por == TRABAJADOR:
+        tarea.bloqueada_por = None
+        tarea.bloqueada_hasta = None
+    db.session.commit()
+
+    return 'error' if error else 'exito'
+
+
+def ejecutar_pendientes(ahora=None):
+    """
+    Ejecuta las tareas vencidas que este worker logre bloquear
+
+    Args:
+        ahora (datetime): Momento de referencia (UTC); por defecto ahora
+
+    Returns:
+        list: (nombre, estado) de cada tarea ejecutada
+    """
+    ahora = ahora or datetime.utcnow()
+    vencidas = db.session.query(TareaProgramada.id_tarea, TareaProgramada.nombre).filter(
+        TareaProgramada.activa == True,
+        TareaProgramada.proxima_ejecucion <= ahora,
+        (TareaProgramada.bloqueada_hasta == None) | (TareaProgramada.bloqueada_hasta < ahora)
+    ).order_by(TareaProgramada.proxima_ejecucion).all()
+    db.session.commit()
+
+    ejecutadas = []
+    for tarea_id, nombre in vencidas:
+        if nombre not in _tareas:
+            continue
+        definicion = _definicion(nombre)
+        if not _bloquear(tarea_id, ahora, definicion.duracion_maxima):
+            continue
+        ejecutadas.append((nombre, _ejecutar(tarea_id, definicion)))
+    return ejecutadas
+
+
+def solicitar_ejecucion(nombre):
+    """
+    Adelanta una tarea para que corra en la próxima revisión del planificador
+
+    Returns:
+        tuple: (tarea, error)
+    """
+    try:
+        tarea = TareaProgramada.query.filter_by(nombre=nombre).first()
+        if not tarea:
+            return None, "La tarea no existe"
+        tarea.proxima_ejecucion = datetime.utcnow()
+        db.session.commit()
+        return tarea, None
+
+    except Exception as e:
+        db.session.rollback()
+        return None, f"Error programando tarea: {str(e)}"
+
+
+def reportar_progreso(nombre, progreso):
+    """
+    Guarda el avance de una tarea en curso para consultarlo desde otras peticiones
+
+    Se escribe en una conexión aparte, así no depende de la transacción de la tarea.
+
+    Args:
+        nombre (str): Nombre de la tarea
+        progreso (dict): Datos del avance, serializables a JSON
+    """
+    try:
+        with db.engine.begin() as conexion:
+            conexion.execute(
+                TareaProgramada.__table__.update()
+                .where(TareaProgramada.nombre == nombre)
+                .values(progreso=json.dumps(progreso, default=str, ensure_ascii=False))
+            )
+    except Exception as e:
+        logger.warning(f"No se pudo guardar el progreso de {nombre}: {str(e)}")
+
+
+def historial_tarea(nombre, limite=20):
+    """Últimas ejecuciones de una tarea, de la más reciente a la más antigua."""
+    return EjecucionTarea.query.join(TareaProgramada).filter(
+        TareaProgramada.nombre == nombre
+    ).order_by(EjecucionTarea.inicio.desc()).limit(limite).all()
+
+
+def iniciar_planificador(app, intervalo=None):
+    """
+    Inicia el hilo del planificador de este worker
+
+    Si el hilo ya está corriendo no se inicia otro.
+
+    Args:
+        app (Flask): Aplicación, para abrir el contexto en cada revisión
+        intervalo (int): Segundos entre revisiones; por defecto PLANIFICADOR_INTERVALO
+
+    Returns:
+        threading.Thread: El hilo del planificador
+    """
+    global _hilo
+    if planificador_activo():
+        return _hilo
+    intervalo = intervalo or app.config.get('PLANIFICADOR_INTERVALO', 30)
+
+    def bucle():
+        with app.app_context():
+            creadas, error = sincronizar_tareas()
+            if error:
+                logger.error(error)
+        while True:
+            try:
+                with app.app_context():
+                    ejecutar_pendientes()
+            except Exception as e:
+                logger.exception(f"Error en el planificador de tareas: {str(e)}")
+            time.sleep(intervalo)
+
+    _hilo = threading.Thread(target=bucle, name='planificador', daemon=True)
+    _hilo.start()
+    logger.info("Planificador de tareas iniciado en %s", TRABAJADOR)
+    return _hilo
+
+
+def planificador_activo():
+    """Indica si el hilo del planificador corre en este proceso."""
+    return _hilo is not None and _hilo.is_alive()
+
+
+# ============================================================================
+# TAREAS INCLUIDAS
+# ============================================================================
+
+@tarea_programada('reloj_academico', intervalo=900,
+                  descripcion='Avanza los estados de los periodos y avisa la proximidad del cierre de notas')
+def _tarea_reloj_academico():
+    from services.periodo_service import ejecutar_reloj_academico
+    return ejecutar_reloj_academico()
+
+
+@tarea_programada('notificaciones_programadas', intervalo=300,
+                  descripcion='Envía las notificaciones programadas que ya vencieron')
+def _tarea_notificaciones_programadas():
+    from services.notification_service import procesar_notificaciones_programadas
+    return procesar_notificaciones_programadas()
+
+
+def limpiar_borradores_antiguos(dias=None):
+    """
+    Elimina los borradores de comunicaciones sin tocar en los últimos `dias`
+
+    Args:
+        dias (int): Antigüedad mínima; por defecto BORRADORES_DIAS_RETENCION
+
+    Returns:
+        tuple: (cantidad eliminada, error)
+    """
+    dias = dias or current_app.config.get('BORRADORES_DIAS_RETENCION', 90)
+    try:
+        limite = datetime.utcnow() - timedelta(days=dias)
+        eliminados = Comunicacion.query.filter(
+            Comunicacion.estado == 'draft',
+            Comunicacion.fecha_envio < limite
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return eliminados, None
+
+    except Exception as e:
+        db.session.rollback()
+        return 0, f"Error limpiando borradores: {str(e)}"
+
+
+@tarea_programada('limpiar_borradores', intervalo=86400,
+                  descripcion='Elimina borradores de comunicaciones abandonados')
+def _tarea_limpiar_borradores():
+    return limpiar_borradores_antiguos()
+
+
+@tarea_programada('retener_notificaciones', intervalo=86400,
+                  descripcion='Archiva notificaciones leídas antiguas y aplica el límite por usuario')
+def _tarea_retener_notificaciones():
+    from services.retencion_notificaciones_service import aplicar_retencion_notificaciones
+    return aplicar_retencion_notificaciones()
+
+
+@tarea_programada('retener_comunicaciones', intervalo=86400,
+                  descripcion='Mueve a papelera y elimina comunicaciones antiguas según la política de cada usuario')
+def _tarea_retener_comunicaciones():
+    from services.retencion_comunicaciones_service import aplicar_retencion_comunicaciones
+    return aplicar_retencion_comunicaciones(
+        al_avanzar=lambda progreso: reportar_progreso('retener_comunicaciones', progreso)
+    )
+
+
+@tarea_programada('reconstruir_agregados', intervalo=3600,
+                  descripcion='Completa el periodo de calificaciones y asistencias cargadas fuera del ORM')
+def _tarea_reconstruir_agregados():
+    from services.periodo_service import asignar_periodos_historicos
+    return asignar_periodos_historicos()
+
+
+@tarea_programada('depurar_historial_tareas', intervalo=86400,
+                  descripcion='Borra el historial de ejecuciones antiguo')
+def _tarea_depurar_historial():
+    try:
+        limite = datetime.utcnow() - timedelta(days=current_app.config.get('PLANIFICADOR_HISTORIAL_DIAS', 30))
+        eliminadas = EjecucionTarea.query.filter(
+            EjecucionTarea.inicio < limite
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return eliminadas, None
+
+    except Exception as e:
+        db.session.rollback()
+        return 0, f"Error depurando historial: {str(e)}"
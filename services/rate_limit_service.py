@@ -0,0 +1,213 @@
+"""
+Limitador de intentos para login y verificación de correo
+
+Cuenta los intentos por IP + cuenta (y por IP sola, para frenar el relleno
+de credenciales contra muchas cuentas) en ventanas deslizantes. Los
+contadores no se guardan en la tabla `usuarios`: por defecto viven en la
+memoria del proceso y, con varios workers, en un almacén compartido
+(Redis) indicado en Config.RATE_LIMIT_STORAGE_URL.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from flask import current_app, request
+
+logger = logging.getLogger(__name__)
+
+
+class AlmacenMemoria:
+    """
+    Ventanas deslizantes en memoria del proceso
+
+    Por clave se guardan como mucho `limite` marcas de tiempo: basta con
+    saber cuándo ocurrió el intento más antiguo de los últimos `limite`.
+    """
+
+    def __init__(self, purgar_cada=1000):
+        self._intentos = {}
+        self._lock = threading.Lock()
+        self._ventana_max = 0
+        self._registros = 0
+        self._purgar_cada = purgar_cada
+
+    def registrar(self, clave, limite, ventana):
+        ahora = time.time()
+        with self._lock:
+            marcas = self._intentos.get(clave)
+            if marcas is None or marcas.maxlen != limite:
+                marcas = self._intentos[clave] = deque(marcas or (), maxlen=limite)
+            marcas.append(ahora)
+
+            self._ventana_max = max(self._ventana_max, ventana)
+            self._registros += 1
+            if self._registros % self._purgar_cada == 0:
+                self._purgar(ahora)
+
+    def espera(self, clave, limite, ventana):
+        with self._lock:
+            marcas = self._intentos.get(clave)
+            if not marcas or len(marcas) < limite:
+                return 0
+            restante = marcas[-limite] + ventana - time.time()
+        return max(restante, 0)
+
+    def reiniciar(self, clave):
+        with self._lock:
+            self._intentos.pop(clave, None)
+
+    def _purgar(self, ahora):
+        limite = ahora - self._ventana_max
+        for clave in [c for c, marcas in self._intentos.items() if not marcas or marcas[-1] < limite]:
+            del self._intentos[clave]
+
+
+class AlmacenRedis:
+    """
+    Ventanas deslizantes compartidas entre workers, en sorted sets de Redis
+
+    Requiere el paquete `redis`, que solo se importa si se configura este
+    almacén.
+    """
+
+    def __init__(self, url, prefijo='limite:'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._prefijo = prefijo
+
+    def registrar(self, clave, limite, ventana):
+        clave = self._prefijo + clave
+        ahora = time.time()
+        pipe = self._redis.pipeline()
+        pipe.zadd(clave, {f'{ahora}:{uuid.uuid4().hex[:8]}': ahora})
+        pipe.zremrangebyrank(clave, 0, -(limite + 1))
+        pipe.expire(clave, int(ventana) + 1)
+        pipe.execute()
+
+    def espera(self, clave, limite, ventana):
+        marcas = self._redis.zrange(self._prefijo + clave, -limite, -1, withscores=True)
+        if len(marcas) < limite:
+            return 0
+        return max(marcas[0][1] + ventana - time.time(), 0)
+
+    def reiniciar(self, clave):
+        self._redis.delete(self._prefijo + clave)
+
+
+def crear_almacen(url):
+    """
+    Crea el almacén de contadores a partir de su URL
+
+    Args:
+        url (str): 'memory://' o 'redis://host:puerto/db'
+
+    Returns:
+        AlmacenMemoria | AlmacenRedis
+    """
+    if not url or url.startswith('memory://'):
+        return AlmacenMemoria()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return AlmacenRedis(url)
+    raise ValueError(f"Almacén de límites no soportado: {url}")
+
+
+class LimitadorIntentos:
+    """
+    Aplica los límites de Config.RATE_LIMITS a cada acción
+
+    Cada acción define límites para la pareja IP + cuenta ('ip_cuenta') y
+    para la IP sola ('ip'), como (intentos, ventana_en_segundos).
+    """
+
+    def __init__(self, almacen, limites):
+        self.almacen = almacen
+        self.limites = limites
+
+    def _claves(self, accion, cuenta, ip):
+        cuenta = (cuenta or '').strip().lower()
+        claves = {'ip': f'{accion}:ip:{ip}'}
+        if cuenta:
+            claves['ip_cuenta'] = f'{accion}:ip_cuenta:{ip}:{cuenta}'
+        return claves
+
+    def espera(self, accion, cuenta, ip):
+        """Segundos que faltan para poder reintentar (0 si está permitido)."""
+        limites = self.limites.get(accion, {})
+        esperas = [
+            self.almacen.espera(clave, *limites[tipo])
+            for tipo, clave in self._claves(accion, cuenta, ip).items()
+            if tipo in limites
+        ]
+        return max(esperas, default=0)
+
+    def registrar(self, accion, cuenta, ip):
+        """Registra un intento (fallido, o cualquiera si la acción es costosa)."""
+        limites = self.limites.get(accion, {})
+        for tipo, clave in self._claves(accion, cuenta, ip).items():
+            if tipo in limites:
+                self.almacen.registrar(clave, *limites[tipo])
+
+    def reiniciar(self, accion, cuenta, ip):
+        """Olvida los intentos de la pareja IP + cuenta tras un acierto."""
+        clave = self._claves(accion, cuenta, ip).get('ip_cuenta')
+        if clave:
+            self.almacen.reiniciar(clave)
+
+
+_limitador = None
+_limitador_lock = threading.Lock()
+
+
+def obtener_limitador():
+    """Devuelve el limitador de la aplicación, creándolo la primera vez."""
+    global _limitador
+    with _limitador_lock:
+        if _limitador is None:
+            _limitador = LimitadorIntentos(
+                crear_almacen(current_app.config.get('RATE_LIMIT_STORAGE_URL')),
+                current_app.config.get('RATE_LIMITS', {})
+            )
+        return _limitador
+
+
+def limite_excedido(accion, cuenta):
+    """
+    Indica si la petición actual superó el límite de la acción
+
+    Args:
+        accion (str): 'login', 'verificacion' o 'reenvio'
+        cuenta (str): Correo con el que se intenta
+
+    Returns:
+        int: Segundos de espera (0 si puede continuar)
+    """
+    if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+        return 0
+    try:
+        return int(obtener_limitador().espera(accion, cuenta, request.remote_addr) + 0.999)
+    except Exception as e:
+        # Si el almacén compartido no responde, no se bloquea el acceso
+        logger.exception(f"Error consultando límite de intentos: {str(e)}")
+        return 0
+
+
+def registrar_intento(accion, cuenta):
+    """Registra un intento de la petición actual para la acción."""
+    if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+        return
+    try:
+        obtener_limitador().registrar(accion, cuenta, request.remote_addr)
+    except Exception as e:
+        logger.exception(f"Error registrando intento: {str(e)}")
+
+
+def reiniciar_intentos(accion, cuenta):
+    """Reinicia los intentos de IP + cuenta tras un intento correcto."""
+    if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+        return
+    try:
+        obtener_limitador().reiniciar(accion, cuenta, request.remote_addr)
+    except Exception as e:
+        logger.exception(f"Error reiniciando intentos: {str(e)}")
@@ -2,6 +2,7 @@
 Servicio para gestión de Promoción de Estudiantes
 """
 
+import logging
 from datetime import datetime
 from controllers.models import (
     db, CicloAcademico, PeriodoAcademico, Matricula, Calificacion, 
@@ -9,6 +10,9 @@ from controllers.models import (
 )
 from sqlalchemy import and_, func
 from decimal import Decimal
+from services.escala_calificacion_service import nota_aprobacion, ESCALA_POR_DEFECTO
+
+logger = logging.getLogger(__name__)
 
 
 def calcular_promedio_final_estudiante(estudiante_id, ciclo_id):
@@ -62,17 +66,13 @@ def obtener_nota_minima_aprobacion():
         Decimal: Nota mínima de aprobación
     """
     try:
-        # Buscar configuración global (asignatura_id = NULL)
-        config = ConfiguracionCalificacion.query.filter_by(asignatura_id=None).first()
-        if config:
-            return config.notaMinimaAprobacion
-        
-        # Valor por defecto si no hay configuración
-        return Decimal('3.0')
+        # Configuración global (asignatura_id = NULL), con el mismo valor por
+        # defecto que estadísticas y reportes
+        return nota_aprobacion()
         
     except Exception as e:
-        print(f"Error obteniendo nota mínima: {e}")
-        return Decimal('3.0')
+        logger.exception(f"Error obteniendo nota mínima: {e}")
+        return ESCALA_POR_DEFECTO.nota_aprobacion
 
 
 def obtener_curso_siguiente(curso_actual_id):
@@ -109,7 +109,7 @@ def obtener_curso_siguiente(curso_actual_id):
         return curso_siguiente.id_curso if curso_siguiente else None
         
     except Exception as e:
-        print(f"Error obteniendo curso siguiente: {e}")
+        logger.exception(f"Error obteniendo curso siguiente: {e}")
         return None
 
 
@@ -408,7 +408,7 @@ def crear_matriculas_nuevo_ciclo(ciclo_nuevo_id):
                     db.session.add(nueva_matricula)
                     matriculas_creadas += 1
                 except Exception as e:
-                    print(f"Error creando matrícula para estudiante {mat_anterior.estudianteId}: {e}")
+                    logger.exception(f"Error creando matrícula para estudiante {mat_anterior.estudianteId}: {e}")
                     errores += 1
         
         db.session.commit()
@@ -0,0 +1,174 @@
+"""
+Resumen académico de los hijos de un padre
+
+El panel del padre necesita, por cada hijo, su promedio, sus asistencias por
+estado, sus tareas pendientes, sus clases inscritas y sus últimas
+calificaciones. En lugar de consultar cada dato para cada hijo, se calcula
+todo para todos los hijos a la vez con una consulta agrupada por dato.
+
+El resumen de cada hijo se guarda en caché por estudiante y se invalida al
+confirmar cambios en sus calificaciones, asistencias o matrículas. El de un
+padre se arma con los de sus hijos, así dos padres del mismo estudiante
+comparten la entrada y solo se consultan los hijos que no estén en caché.
+"""
+
+from sqlalchemy import case, func, select
+from controllers.models import db, Usuario, Calificacion, Asistencia, Matricula, Asignatura
+from services.cache_service import CacheTTL, invalidar_claves_al_cambiar
+
+
+RESUMEN_TTL = 300
+RECIENTES_POR_HIJO = 5
+
+cache_resumen_hijos = CacheTTL('resumen_hijos', ttl=RESUMEN_TTL, max_entradas=4096)
+
+invalidar_claves_al_cambiar(Calificacion, cache_resumen_hijos, clave=lambda c: c.estudianteId)
+invalidar_claves_al_cambiar(Asistencia, cache_resumen_hijos, clave=lambda a: a.estudianteId)
+invalidar_claves_al_cambiar(Matricula, cache_resumen_hijos, clave=lambda m: m.estudianteId)
+
+
+def _resumen_vacio():
+    return {
+        'promedio': None,
+        'total_calificaciones': 0,
+        'asistencias': {},
+        'tareas_pendientes': 0,
+        'clases_inscritas': 0,
+        'calificaciones_recientes': []
+    }
+
+
+def _calcular_resumenes(estudiante_ids):
+    resumenes = {estudiante_id: _resumen_vacio() for estudiante_id in estudiante_ids}
+
+    # Promedio y tareas pendientes en una sola pasada por las calificaciones
+    filas = db.session.query(
+        Calificacion.estudianteId,
+        func.avg(Calificacion.valor),
+        func.count(Calificacion.valor),
+        func.sum(case(
+            (Calificacion.es_tarea_publicada.is_(True) & Calificacion.valor.is_(None), 1),
+            else_=0
+        ))
+    ).filter(
+        Calificacion.estudianteId.in_(estudiante_ids)
+    ).group_by(Calificacion.estudianteId).all()
+    for estudiante_id, promedio, total, pendientes in filas:
+        resumen = resumenes[estudiante_id]
+        resumen['promedio'] = round(float(promedio), 2) if promedio is not None else None
+        resumen['total_calificaciones'] = total
+        resumen['tareas_pendientes'] = int(pendientes or 0)
+
+    filas = db.session.query(
+        Asistencia.estudianteId, Asistencia.estado, func.count(Asistencia.id_asistencia)
+    ).filter(
+        Asistencia.estudianteId.in_(estudiante_ids)
+    ).group_by(Asistencia.estudianteId, Asistencia.estado).all()
+    for estudiante_id, estado, total in filas:
+        resumenes[estudiante_id]['asistencias'][estado] = total
+
+    filas = db.session.query(
+        Matricula.estudianteId, func.count(Matricula.id_matricula)
+    ).filter(
+        Matricula.estudianteId.in_(estudiante_ids)
+    ).group_by(Matricula.estudianteId).all()
+    for estudiante_id, total in filas:
+        resumenes[estudiante_id]['clases_inscritas'] = total
+
+    # Últimas calificaciones de cada hijo: numeradas por estudiante y cortadas en la consulta
+    numeradas = select(
+        Calificacion.id_calificacion,
+        Calificacion.estudianteId,
+        Calificacion.asignaturaId,
+        Calificacion.nombre_calificacion,
+        Calificacion.valor,
+        Calificacion.fecha_registro,
+        func.row_number().over(
+            partition_by=Calificacion.estudianteId,
+            order_by=(Calificacion.fecha_registro.desc(), Calificacion.id_calificacion.desc())
+        ).label('orden')
+    ).where(Calificacion.estudianteId.in_(estudiante_ids)).subquery()
+
+    filas = db.session.execute(
+        select(
+            numeradas,
+            Asignatura.nombre.label('asignatura_nombre'),
+            Usuario.nombre.label('estudiante_nombre'),
+            Usuario.apellido.label('estudiante_apellido')
+        )
+        .outerjoin(Asignatura, Asignatura.id_asignatura == numeradas.c.asignaturaId)
+        .join(Usuario, Usuario.id_usuario == numeradas.c.estudianteId)
+        .where(numeradas.c.orden <= RECIENTES_POR_HIJO)
+        .order_by(numeradas.c.estudianteId, numeradas.c.orden)
+    ).all()
+    for fila in filas:
+        resumenes[fila.estudianteId]['calificaciones_recientes'].append({
+            'id_calificacion': fila.id_calificacion,
+            'estudiante_id': fila.estudianteId,
+            'estudiante_nombre': f"{fila.estudiante_nombre} {fila.estudiante_apellido}",
+            'asignatura_nombre': fila.asignatura_nombre,
+            'nombre_calificacion': fila.nombre_calificacion,
+            'valor': float(fila.valor) if fila.valor is not None else None,
+            'fecha_registro': fila.fecha_registro
+        })
+
+    return resumenes
+
+
+def resumen_hijos(estudiante_ids):
+    """
+    Devuelve el resumen académico de cada estudiante
+
+    Args:
+        estudiante_ids (iterable): IDs de los estudiantes
+
+    Returns:
+        dict: estudiante_id -> {'promedio', 'total_calificaciones', 'asistencias'
+        (estado -> cantidad), 'tareas_pendientes', 'clases_inscritas',
+        'calificaciones_recientes'}
+    """
+    resumenes = {}
+    faltantes = []
+    for estudiante_id in dict.fromkeys(estudiante_ids):
+        resumen = cache_resumen_hijos.obtener(estudiante_id)
+        if resumen is None:
+            faltantes.append(estudiante_id)
+        else:
+            resumenes[estudiante_id] = resumen
+
+    if faltantes:
+        version = cache_resumen_hijos.version
+        calculados = _calcular_resumenes(faltantes)
+        # Si algo se invalidó mientras se calculaba, se devuelve sin guardar
+        if version == cache_resumen_hijos.version:
+            for estudiante_id, resumen in calculados.items():
+                cache_resumen_hijos.guardar(estudiante_id, resumen)
+        resumenes.update(calculados)
+
+    return resumenes
+
+
+def resumen_padre(hijos_ids):
+    """
+    Resumen del panel del padre a partir de los resúmenes de sus hijos
+
+    Args:
+        hijos_ids (list): IDs de los hijos del padre
+
+    Returns:
+        dict: 'hijos' (estudiante_id -> resumen), 'promedio_general' (promedio
+        de los promedios de los hijos con notas), 'total_clases_inscritas' y
+        'calificaciones_recientes' (las de todos los hijos, más nuevas primero)
+    """
+    hijos = resumen_hijos(hijos_ids)
+
+    promedios = [r['promedio'] for r in hijos.values() if r['promedio'] is not None]
+    recientes = [c for r in hijos.values() for c in r['calificaciones_recientes']]
+    recientes.sort(key=lambda c: (c['fecha_registro'] is not None, c['fecha_registro']), reverse=True)
+
+    return {
+        'hijos': hijos,
+        'promedio_general': round(sum(promedios) / len(promedios), 2) if promedios else 0,
+        'total_clases_inscritas': sum(r['clases_inscritas'] for r in hijos.values()),
+        'calificaciones_recientes': recientes
+    }
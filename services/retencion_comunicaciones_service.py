@@ -0,0 +1,203 @@
+"""
+Retención del buzón de comunicaciones
+
+Dos etapas, cada una por lotes de COMUNICACIONES_LOTE_RETENCION filas (se
+eligen los ids y se actualizan o borran con un IN, una transacción corta por
+lote, así ningún bloqueo dura más que un lote):
+
+1. Papelera: los mensajes en bandeja, enviados o borradores con más de
+   `dias_papelera` días pasan a estado 'deleted'.
+2. Eliminación: los mensajes en papelera con más de `dias_eliminacion` días
+   se borran.
+
+Los días salen de la política del dueño del mensaje (PoliticaRetencionBuzon:
+el destinatario para la bandeja y la papelera, el remitente para enviados y
+borradores) o, si no tiene, de COMUNICACIONES_DIAS_PAPELERA y
+COMUNICACIONES_DIAS_ELIMINACION. Ambos contados desde la fecha de envío.
+
+La barrida completa corre en la tarea 'retener_comunicaciones' del
+planificador, que publica su avance en TareaProgramada.progreso; un usuario
+puede además limpiar solo su propio buzón.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from controllers.models import db, Comunicacion, PoliticaRetencionBuzon
+
+logger = logging.getLogger(__name__)
+
+
+# (etapa, estados, columna del dueño)
+_PASOS = (
+    ('papelera', ('inbox',), Comunicacion.destinatario_id),
+    ('papelera', ('sent', 'draft'), Comunicacion.remitente_id),
+    ('eliminacion', ('deleted',), Comunicacion.destinatario_id),
+)
+
+
+def _dias_por_defecto():
+    return (
+        current_app.config.get('COMUNICACIONES_DIAS_PAPELERA', 30),
+        current_app.config.get('COMUNICACIONES_DIAS_ELIMINACION', 60)
+    )
+
+
+def _grupos_de_politica(usuario_id=None):
+    """
+    Agrupa a los usuarios por sus días de retención
+
+    Returns:
+        list: [(dias_papelera, dias_eliminacion, usuario_ids o None, excluidos)];
+        el grupo por defecto tiene usuario_ids None y excluye a los que tienen política
+    """
+    papelera, eliminacion = _dias_por_defecto()
+    consulta = PoliticaRetencionBuzon.query
+    if usuario_id is not None:
+        consulta = consulta.filter_by(usuario_id=usuario_id)
+
+    grupos = {}
+    for politica in consulta.all():
+        clave = (politica.dias_papelera or papelera, politica.dias_eliminacion or eliminacion)
+        grupos.setdefault(clave, []).append(politica.usuario_id)
+
+    if usuario_id is not None:
+        if grupos:
+            (dias, ids), = grupos.items()
+            return [(dias[0], dias[1], ids, ())]
+        return [(papelera, eliminacion, [usuario_id], ())]
+
+    con_politica = [u for ids in grupos.values() for u in ids]
+    resultado = [(dias[0], dias[1], ids, ()) for dias, ids in grupos.items()]
+    resultado.append((papelera, eliminacion, None, con_politica))
+    return resultado
+
+
+def _aplicar_por_lotes(filtros, etapa, lote):
+    """Aplica la etapa a las filas que cumplen `filtros`, un lote por transacción."""
+    while True:
+        ids = [fila[0] for fila in db.session.query(Comunicacion.id_comunicacion).filter(
+            *filtros
+        ).order_by(Comunicacion.id_comunicacion).limit(lote).all()]
+        if not ids:
+            break
+
+        if etapa == 'papelera':
+            db.session.execute(
+                update(Comunicacion)
+                .where(Comunicacion.id_comunicacion.in_(ids))
+                .values(estado='deleted')
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            db.session.execute(
+                Comunicacion.__table__.delete().where(Comunicacion.id_comunicacion.in_(ids))
+            )
+        db.session.commit()
+        yield len(ids)
+
+        if len(ids) < lote:
+            break
+
+
+def aplicar_retencion_comunicaciones(usuario_id=None, lote=None, al_avanzar=None):
+    """
+    Mueve a papelera y elimina las comunicaciones vencidas
+
+    Args:
+        usuario_id (int): Limita la limpieza al buzón de este usuario; por defecto todos
+        lote (int): Filas por transacción; por defecto COMUNICACIONES_LOTE_RETENCION
+        al_avanzar (callable): Recibe el dict de progreso después de cada lote
+
+    Returns:
+        tuple: (progreso, error); progreso con 'movidas_a_papelera', 'eliminadas',
+        'lotes' y 'etapa'
+    """
+    lote = lote or current_app.config.get('COMUNICACIONES_LOTE_RETENCION', 500)
+    progreso = {
+        'etapa': 'papelera',
+        'movidas_a_papelera': 0,
+        'eliminadas': 0,
+        'lotes': 0,
+        'inicio': datetime.utcnow(),
+        'fin': None
+    }
+
+    def avisar():
+        if al_avanzar is not None:
+            al_avanzar(progreso)
+
+    try:
+        ahora = datetime.utcnow()
+        grupos = _grupos_de_politica(usuario_id)
+        avisar()
+
+        for etapa, estados, duenio in _PASOS:
+            progreso['etapa'] = etapa
+            for dias_papelera, dias_eliminacion, ids, excluidos in grupos:
+                dias = dias_papelera if etapa == 'papelera' else dias_eliminacion
+                filtros = [
+                    Comunicacion.estado.in_(estados),
+                    Comunicacion.fecha_envio < ahora - timedelta(days=dias)
+                ]
+                if ids is not None:
+                    filtros.append(duenio.in_(ids))
+                elif excluidos:
+                    filtros.append(duenio.notin_(excluidos))
+
+                for cantidad in _aplicar_por_lotes(filtros, etapa, lote):
+                    progreso['movidas_a_papelera' if etapa == 'papelera' else 'eliminadas'] += cantidad
+                    progreso['lotes'] += 1
+                    avisar()
+
+        progreso['etapa'] = 'completada'
+        progreso['fin'] = datetime.utcnow()
+        avisar()
+        logger.info(
+            f"Retención de comunicaciones: {progreso['movidas_a_papelera']} a papelera, "
+            f"{progreso['eliminadas']} eliminadas en {progreso['lotes']} lotes",
+            extra={'usuario_buzon': usuario_id}
+        )
+        return progreso, None
+
+    except Exception as e:
+        db.session.rollback()
+        return progreso, f"Error en la retención de comunicaciones: {str(e)}"
+
+
+def establecer_politica_buzon(usuario_id, dias_papelera=None, dias_eliminacion=None):
+    """
+    Crea, cambia o quita (ambos valores nulos) la política de retención de un usuario
+
+    Args:
+        usuario_id (int): Dueño del buzón
+        dias_papelera (int): Días antes de pasar a papelera; None usa el valor de Config
+        dias_eliminacion (int): Días antes de eliminar de la papelera; None usa el valor de Config
+
+    Returns:
+        tuple: (política o None si se quitó, error)
+    """
+    for valor in (dias_papelera, dias_eliminacion):
+        if valor is not None and (not isinstance(valor, int) or valor < 1):
+            return None, "Los días de retención deben ser un entero positivo"
+
+    try:
+        politica = db.session.get(PoliticaRetencionBuzon, usuario_id)
+        if dias_papelera is None and dias_eliminacion is None:
+            if politica:
+                db.session.delete(politica)
+                db.session.commit()
+            return None, None
+
+        if politica is None:
+            politica = PoliticaRetencionBuzon(usuario_id=usuario_id)
+            db.session.add(politica)
+        politica.dias_papelera = dias_papelera
+        politica.dias_eliminacion = dias_eliminacion
+        db.session.commit()
+        return politica, None
+
+    except Exception as e:
+        db.session.rollback()
+        return None, f"Error guardando la política de retención: {str(e)}"
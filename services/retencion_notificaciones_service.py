@@ -0,0 +1,269 @@
+"""
+Retención de notificaciones y contador de no leídas por usuario
+
+El contador vive en `notificaciones_contadores` y se recalcula, dentro de la
+misma transacción, para cada usuario cuyas notificaciones cambian: por el
+ORM (after_flush) o con UPDATE/DELETE/INSERT masivos (do_orm_execute, que
+primero averigua a qué usuarios afecta el WHERE). El recálculo usa el índice
+(usuario_id, enviada, leida) y solo toca usuarios que ya tienen fila; la
+fila se crea la primera vez que se consulta el contador.
+
+La retención (tarea 'retener_notificaciones' del planificador) archiva por
+lotes las notificaciones leídas más antiguas que NOTIFICACIONES_DIAS_RETENCION,
+deja a cada usuario con como mucho NOTIFICACIONES_MAX_POR_USUARIO activas y
+reconcilia los contadores.
+"""
+
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, func, insert, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from controllers.models import db, Notificacion, NotificacionArchivada, ContadorNotificaciones
+
+
+LOTE_RECALCULO = 500
+
+# Las sentencias de la retención ajustan el contador por su cuenta
+SIN_CONTADOR = {'omitir_contador_notificaciones': True}
+
+_COLUMNAS_ARCHIVO = ('id_notificacion', 'usuario_id', 'titulo', 'mensaje', 'tipo', 'tipo_evento', 'creada_en')
+
+
+# ============================================================================
+# CONTADOR DE NO LEÍDAS
+# ============================================================================
+
+def _recalcular(conexion, usuario_ids):
+    no_leidas = select(func.count(Notificacion.id_notificacion)).where(
+        Notificacion.usuario_id == ContadorNotificaciones.usuario_id,
+        Notificacion.enviada == True,
+        Notificacion.leida == False
+    ).scalar_subquery()
+
+    usuario_ids = sorted(usuario_ids)
+    for i in range(0, len(usuario_ids), LOTE_RECALCULO):
+        conexion.execute(
+            update(ContadorNotificaciones.__table__)
+            .where(ContadorNotificaciones.usuario_id.in_(usuario_ids[i:i + LOTE_RECALCULO]))
+            .values(no_leidas=no_leidas)
+        )
+
+
+def recalcular_contadores(usuario_ids=None):
+    """
+    Recalcula el contador de no leídas desde la tabla de notificaciones
+
+    Args:
+        usuario_ids (iterable): Usuarios a recalcular; por defecto todos los que tienen contador
+
+    Returns:
+        tuple: (cantidad de usuarios, error)
+    """
+    try:
+        if usuario_ids is None:
+            usuario_ids = [fila[0] for fila in db.session.query(ContadorNotificaciones.usuario_id).all()]
+        usuario_ids = set(usuario_ids)
+        _recalcular(db.session.connection(), usuario_ids)
+        db.session.commit()
+        return len(usuario_ids), None
+
+    except Exception as e:
+        db.session.rollback()
+        return 0, f"Error recalculando contadores: {str(e)}"
+
+
+def contar_no_leidas(usuario_id):
+    """
+    Devuelve las notificaciones no leídas del usuario desde su contador
+
+    Si el usuario todavía no tiene contador, se cuenta una vez y se crea.
+    """
+    no_leidas = db.session.query(ContadorNotificaciones.no_leidas).filter_by(
+        usuario_id=usuario_id
+    ).scalar()
+    if no_leidas is not None:
+        return no_leidas
+
+    no_leidas = Notificacion.query.filter_by(
+        usuario_id=usuario_id,
+        enviada=True,
+        leida=False
+    ).count()
+    try:
+        # Conexión aparte: no confirma lo que tenga pendiente la sesión de la petición
+        with db.engine.begin() as conexion:
+            conexion.execute(insert(ContadorNotificaciones.__table__).values(
+                usuario_id=usuario_id, no_leidas=no_leidas
+            ))
+    except IntegrityError:
+        # Otra petición lo creó al mismo tiempo; ya está al día
+        pass
+    return no_leidas
+
+
+@event.listens_for(Session, 'after_flush')
+def _contador_tras_flush(session, flush_context):
+    usuarios = set()
+    for obj in session.new:
+        if isinstance(obj, Notificacion):
+            usuarios.add(obj.usuario_id)
+    for obj in session.deleted:
+        if isinstance(obj, Notificacion):
+            usuarios.add(obj.usuario_id)
+    for obj in session.dirty:
+        if not isinstance(obj, Notificacion):
+            continue
+        estado = inspect(obj)
+        if any(estado.attrs[campo].history.has_changes() for campo in ('leida', 'enviada', 'usuario_id')):
+            usuarios.add(obj.usuario_id)
+            usuarios.update(estado.attrs.usuario_id.history.deleted or ())
+    usuarios.discard(None)
+    if usuarios:
+        _recalcular(session.connection(), usuarios)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _contador_masivo(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or not issubclass(mapper.class_, Notificacion):
+        return None
+    if orm_execute_state.execution_options.get('omitir_contador_notificaciones'):
+        return None
+
+    conexion = orm_execute_state.session.connection()
+    if orm_execute_state.is_insert:
+        parametros = orm_execute_state.parameters or []
+        if isinstance(parametros, dict):
+            parametros = [parametros]
+        usuarios = {
+            p.get('usuario_id') for p in parametros
+            if p.get('enviada', True) and not p.get('leida', False)
+        }
+    else:
+        consulta = select(Notificacion.usuario_id).distinct()
+        if orm_execute_state.statement.whereclause is not None:
+            consulta = consulta.where(orm_execute_state.statement.whereclause)
+        usuarios = {fila[0] for fila in conexion.execute(consulta)}
+
+    resultado = orm_execute_state.invoke_statement()
+    usuarios.discard(None)
+    if usuarios:
+        _recalcular(conexion, usuarios)
+    return resultado
+
+
+# ============================================================================
+# RETENCIÓN Y ARCHIVO
+# ============================================================================
+
+def _archivar_ids(ids):
+    columnas = [getattr(Notificacion, c) for c in _COLUMNAS_ARCHIVO]
+    db.session.execute(
+        insert(NotificacionArchivada).from_select(
+            list(_COLUMNAS_ARCHIVO),
+            select(*columnas).where(Notificacion.id_notificacion.in_(ids))
+        ),
+        execution_options=SIN_CONTADOR
+    )
+    db.session.execute(
+        Notificacion.__table__.delete().where(Notificacion.id_notificacion.in_(ids)),
+        execution_options=SIN_CONTADOR
+    )
+
+
+def archivar_notificaciones_leidas(dias=None, lote=None):
+    """
+    Mueve al archivo las notificaciones leídas más antiguas que `dias`
+
+    Cada lote es una transacción corta, así que no bloquea la tabla activa.
+
+    Args:
+        dias (int): Antigüedad mínima; por defecto NOTIFICACIONES_DIAS_RETENCION
+        lote (int): Filas por transacción; por defecto NOTIFICACIONES_LOTE_RETENCION
+
+    Returns:
+        tuple: (cantidad archivada, error)
+    """
+    dias = dias or current_app.config.get('NOTIFICACIONES_DIAS_RETENCION', 90)
+    lote = lote or current_app.config.get('NOTIFICACIONES_LOTE_RETENCION', 1000)
+    limite = datetime.utcnow() - timedelta(days=dias)
+    total = 0
+    try:
+        while True:
+            ids = [fila[0] for fila in db.session.query(Notificacion.id_notificacion).filter(
+                Notificacion.leida == True,
+                Notificacion.creada_en < limite
+            ).order_by(Notificacion.id_notificacion).limit(lote).all()]
+            if not ids:
+                break
+            # Solo se archivan leídas: el contador de no leídas no cambia
+            _archivar_ids(ids)
+            db.session.commit()
+            total += len(ids)
+            if len(ids) < lote:
+                break
+        return total, None
+
+    except Exception as e:
+        db.session.rollback()
+        return total, f"Error archivando notificaciones: {str(e)}"
+
+
+def aplicar_limite_por_usuario(maximo=None):
+    """
+    Archiva lo que exceda de `maximo` notificaciones activas por usuario
+
+    Se conservan las más recientes; las que sobran se archivan aunque no se
+    hayan leído, y el contador del usuario se recalcula en la misma transacción.
+
+    Args:
+        maximo (int): Por defecto NOTIFICACIONES_MAX_POR_USUARIO
+
+    Returns:
+        tuple: (cantidad archivada, error)
+    """
+    maximo = maximo or current_app.config.get('NOTIFICACIONES_MAX_POR_USUARIO', 200)
+    total = 0
+    try:
+        excedidos = [fila[0] for fila in db.session.query(Notificacion.usuario_id).filter(
+            Notificacion.enviada == True
+        ).group_by(Notificacion.usuario_id).having(func.count(Notificacion.id_notificacion) > maximo).all()]
+
+        for usuario_id in excedidos:
+            ids = [fila[0] for fila in db.session.query(Notificacion.id_notificacion).filter(
+                Notificacion.usuario_id == usuario_id,
+                Notificacion.enviada == True
+            ).order_by(
+                Notificacion.creada_en.desc(), Notificacion.id_notificacion.desc()
+            ).offset(maximo).all()]
+            if ids:
+                _archivar_ids(ids)
+                _recalcular(db.session.connection(), {usuario_id})
+                db.session.commit()
+                total += len(ids)
+        return total, None
+
+    except Exception as e:
+        db.session.rollback()
+        return total, f"Error aplicando límite de notificaciones: {str(e)}"
+
+
+def aplicar_retencion_notificaciones():
+    """
+    Archiva las leídas antiguas, aplica el límite por usuario y reconcilia los contadores
+
+    Returns:
+        dict: Cantidades de cada paso
+    """
+    archivadas, error = archivar_notificaciones_leidas()
+    excedentes, error_limite = aplicar_limite_por_usuario()
+    contadores, error_contadores = recalcular_contadores()
+    return {
+        'archivadas': archivadas,
+        'excedentes_archivadas': excedentes,
+        'contadores_reconciliados': contadores,
+        'error': error or error_limite or error_contadores
+    }
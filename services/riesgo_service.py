@@ -0,0 +1,361 @@
+"""
+Alerta temprana: puntaje de riesgo académico por estudiante
+
+El puntaje (0-100, mayor es más riesgo) combina cinco factores, cada uno
+llevado a 0-1 y ponderado con Config.RIESGO_PESOS:
+
+- rendimiento: cuánto le falta, en promedio por asignatura, para la nota de
+  aprobación de esa asignatura (según su escala, no un 60 fijo);
+- categorías: proporción de categorías (por asignatura) que va reprobando;
+- tendencia: caída del promedio de los últimos RIESGO_DIAS_TENDENCIA días
+  frente al de antes, en cada asignatura con notas en ambos tramos;
+- asistencia: fallas sin excusa (los retardos cuentan la mitad);
+- tareas: tareas publicadas vencidas y sin nota, hasta RIESGO_TAREAS_MAXIMAS.
+
+Solo cuentan las calificaciones y asistencias del periodo en curso (el
+activo o, durante el cierre, el que contiene la fecha de hoy); entre
+periodos, las del ciclo activo. Así las notas y fallas de años anteriores no
+siguen subiendo el puntaje actual.
+
+Todo sale de dos consultas agrupadas (calificaciones por estudiante,
+asignatura y categoría; asistencias por estudiante) para todos los
+estudiantes pedidos a la vez, sea un curso entero o toda la institución por
+tramos. El resultado de cada estudiante queda en caché y se invalida solo su
+clave al confirmar cambios en sus calificaciones, asistencias o matrículas,
+así los rankings de profesor, padre y administrador recalculan únicamente a
+los estudiantes que cambiaron.
+"""
+
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import case, func
+from controllers.models import (
+    db, Usuario, Calificacion, Asistencia, Matricula, Curso, ConfiguracionCalificacion,
+    CicloAcademico, PeriodoAcademico
+)
+from services.cache_service import CacheTTL, invalidar_al_cambiar, invalidar_claves_al_cambiar
+from services.catalogo_service import curso_por_id
+from services.escala_calificacion_service import obtener_escala
+from services.periodo_service import obtener_reloj, periodo_para_fecha
+from services.roster_service import estudiantes_del_curso
+
+
+RIESGO_TTL = 900
+RIESGO_DIAS_TENDENCIA = 30
+RIESGO_TAREAS_MAXIMAS = 5
+# Caída (en fracción de la escala) que ya cuenta como tendencia de riesgo máxima
+RIESGO_CAIDA_MAXIMA = 0.2
+# Estudiantes por consulta al calcular toda la institución
+RIESGO_TRAMO = 500
+
+ESTADOS_FALTA = ('falta', 'ausente')
+ESTADOS_RETARDO = ('retardo', 'tarde')
+
+PESOS_POR_DEFECTO = {
+    'rendimiento': 0.35,
+    'categorias': 0.15,
+    'tendencia': 0.15,
+    'asistencia': 0.25,
+    'tareas': 0.10
+}
+
+cache_riesgo = CacheTTL('riesgo_estudiantes', ttl=RIESGO_TTL, max_entradas=20000)
+
+invalidar_claves_al_cambiar(Calificacion, cache_riesgo, clave=lambda c: c.estudianteId)
+invalidar_claves_al_cambiar(Asistencia, cache_riesgo, clave=lambda a: a.estudianteId)
+invalidar_claves_al_cambiar(Matricula, cache_riesgo, clave=lambda m: m.estudianteId)
+# Un cambio de escala mueve la nota de aprobación de todos, y uno de ciclo o
+# periodo cambia qué registros cuentan
+invalidar_al_cambiar((ConfiguracionCalificacion, CicloAcademico, PeriodoAcademico), cache_riesgo)
+
+
+def _pesos():
+    pesos = dict(PESOS_POR_DEFECTO)
+    pesos.update(current_app.config.get('RIESGO_PESOS') or {})
+    total = sum(pesos.values()) or 1
+    return {factor: peso / total for factor, peso in pesos.items()}
+
+
+def _nivel(puntaje):
+    if puntaje >= current_app.config.get('RIESGO_UMBRAL_ALTO', 60):
+        return 'alto'
+    if puntaje >= current_app.config.get('RIESGO_UMBRAL_MEDIO', 35):
+        return 'medio'
+    return 'bajo'
+
+
+def _acotar(valor):
+    return max(0.0, min(1.0, valor))
+
+
+def _periodos_vigentes():
+    """IDs de los periodos cuyos registros cuentan, o None si no hay ciclo activo."""
+    reloj = obtener_reloj()
+    periodo = reloj.periodo or periodo_para_fecha(date.today())
+    if periodo:
+        return [periodo.id_periodo]
+    if reloj.ciclo:
+        return [p.id_periodo for p in db.session.query(PeriodoAcademico.id_periodo).filter_by(
+            ciclo_academico_id=reloj.ciclo.id_ciclo
+        )]
+    return None
+
+
+def _agregados(estudiante_ids, periodos=None):
+    """Las dos consultas agrupadas, ya repartidas por estudiante."""
+    ahora = datetime.utcnow()
+    corte = ahora - timedelta(days=RIESGO_DIAS_TENDENCIA)
+    reciente = Calificacion.fecha_registro >= corte
+
+    calificaciones = {estudiante_id: [] for estudiante_id in estudiante_ids}
+    filas = db.session.query(
+        Calificacion.estudianteId,
+        Calificacion.asignaturaId,
+        Calificacion.categoriaId,
+        func.sum(Calificacion.valor),
+        func.count(Calificacion.valor),
+        func.sum(case((reciente, Calificacion.valor), else_=None)),
+        func.count(case((reciente, Calificacion.valor), else_=None)),
+        func.sum(case(
+            (Calificacion.es_tarea_publicada.is_(True)
+             & Calificacion.valor.is_(None)
+             & (Calificacion.fecha_vencimiento < ahora), 1),
+            else_=0
+        ))
+    ).filter(
+        Calificacion.estudianteId.in_(estudiante_ids),
+        *((Calificacion.periodo_academico_id.in_(periodos),) if periodos is not None else ())
+    ).group_by(
+        Calificacion.estudianteId, Calificacion.asignaturaId, Calificacion.categoriaId
+    ).all()
+    for estudiante_id, *grupo in filas:
+        calificaciones[estudiante_id].append(grupo)
+
+    asistencias = {}
+    filas = db.session.query(
+        Asistencia.estudianteId,
+        func.count(Asistencia.id_asistencia),
+        func.sum(case(
+            (Asistencia.estado.in_(ESTADOS_FALTA) & ~func.coalesce(Asistencia.excusa, False), 1),
+            else_=0
+        )),
+        func.sum(case((Asistencia.estado.in_(ESTADOS_RETARDO), 1), else_=0))
+    ).filter(
+        Asistencia.estudianteId.in_(estudiante_ids),
+        *((Asistencia.periodo_academico_id.in_(periodos),) if periodos is not None else ())
+    ).group_by(Asistencia.estudianteId).all()
+    for estudiante_id, total, faltas, retardos in filas:
+        asistencias[estudiante_id] = (total, int(faltas or 0), int(retardos or 0))
+
+    return calificaciones, asistencias
+
+
+def _puntuar(grupos, asistencia, pesos):
+    """Factores y puntaje de un estudiante a partir de sus agregados."""
+    por_asignatura = {}
+    categorias_evaluadas = categorias_reprobadas = tareas_faltantes = 0
+
+    for asignatura_id, _categoria_id, suma, total, suma_reciente, total_reciente, faltantes in grupos:
+        tareas_faltantes += int(faltantes or 0)
+        if not total:
+            continue
+        escala = obtener_escala(asignatura_id)
+        categorias_evaluadas += 1
+        if float(suma) / total < float(escala.nota_aprobacion):
+            categorias_reprobadas += 1
+
+        acumulado = por_asignatura.setdefault(asignatura_id, [escala, 0.0, 0, 0.0, 0])
+        acumulado[1] += float(suma)
+        acumulado[2] += total
+        acumulado[3] += float(suma_reciente or 0)
+        acumulado[4] += total_reciente or 0
+
+    deficits, caidas, reprobadas = [], [], 0
+    for escala, suma, total, suma_reciente, total_reciente in por_asignatura.values():
+        minima, aprobacion = float(escala.nota_minima), float(escala.nota_aprobacion)
+        rango = (float(escala.nota_maxima) - minima) or 1
+        promedio = suma / total
+        if promedio < aprobacion:
+            reprobadas += 1
+        deficits.append(_acotar((aprobacion - promedio) / ((aprobacion - minima) or 1)))
+
+        anteriores = total - total_reciente
+        if total_reciente and anteriores:
+            cambio = (suma_reciente / total_reciente - (suma - suma_reciente) / anteriores) / rango
+            caidas.append(cambio)
+
+    total_asistencias, faltas, retardos = asistencia or (0, 0, 0)
+    tendencia = sum(caidas) / len(caidas) if caidas else None
+
+    riesgos = {
+        'rendimiento': sum(deficits) / len(deficits) if deficits else 0.0,
+        'categorias': categorias_reprobadas / categorias_evaluadas if categorias_evaluadas else 0.0,
+        'tendencia': _acotar(-tendencia / RIESGO_CAIDA_MAXIMA) if tendencia is not None else 0.0,
+        'asistencia': _acotar((faltas + retardos / 2) / total_asistencias) if total_asistencias else 0.0,
+        'tareas': _acotar(tareas_faltantes / RIESGO_TAREAS_MAXIMAS)
+    }
+    puntaje = round(100 * sum(pesos.get(factor, 0) * valor for factor, valor in riesgos.items()), 1)
+
+    return {
+        'puntaje': puntaje,
+        'nivel': _nivel(puntaje),
+        'riesgos': {factor: round(valor, 3) for factor, valor in riesgos.items()},
+        'asignaturas_evaluadas': len(por_asignatura),
+        'asignaturas_reprobadas': reprobadas,
+        'categorias_reprobadas': categorias_reprobadas,
+        'tendencia': round(tendencia, 3) if tendencia is not None else None,
+        'tasa_asistencia': round(100 * (1 - faltas / total_asistencias), 1) if total_asistencias else None,
+        'tareas_faltantes': tareas_faltantes
+    }
+
+
+def _calcular_riesgos(estudiante_ids):
+    pesos = _pesos()
+    calificaciones, asistencias = _agregados(estudiante_ids, _periodos_vigentes())
+    return {
+        estudiante_id: _puntuar(calificaciones[estudiante_id], asistencias.get(estudiante_id), pesos)
+        for estudiante_id in estudiante_ids
+    }
+
+
+def riesgo_estudiantes(estudiante_ids):
+    """
+    Devuelve el riesgo de cada estudiante, desde la caché
+
+    Los estudiantes que no estén en caché se calculan juntos, por tramos de
+    RIESGO_TRAMO.
+
+    Args:
+        estudiante_ids (iterable): IDs de los estudiantes
+
+    Returns:
+        dict: estudiante_id -> {'puntaje', 'nivel', 'riesgos' (factor -> 0-1),
+        'asignaturas_evaluadas', 'asignaturas_reprobadas', 'categorias_reprobadas',
+        'tendencia', 'tasa_asistencia', 'tareas_faltantes'}
+    """
+    riesgos = {}
+    faltantes = []
+    for estudiante_id in dict.fromkeys(estudiante_ids):
+        riesgo = cache_riesgo.obtener(estudiante_id)
+        if riesgo is None:
+            faltantes.append(estudiante_id)
+        else:
+            riesgos[estudiante_id] = riesgo
+
+    for i in range(0, len(faltantes), RIESGO_TRAMO):
+        version = cache_riesgo.version
+        calculados = _calcular_riesgos(faltantes[i:i + RIESGO_TRAMO])
+        if version == cache_riesgo.version:
+            for estudiante_id, riesgo in calculados.items():
+                cache_riesgo.guardar(estudiante_id, riesgo)
+        riesgos.update(calculados)
+
+    return riesgos
+
+
+def _ranking(filas, limite=None, nivel_minimo=None):
+    """filas: (estudiante_id, nombre, apellido, curso_id, curso) -> lista ordenada por puntaje."""
+    estudiantes = {}
+    for estudiante_id, nombre, apellido, curso_id, curso in filas:
+        estudiantes.setdefault(estudiante_id, (f"{nombre} {apellido}", curso_id, curso))
+    riesgos = riesgo_estudiantes(estudiantes)
+
+    niveles = ('bajo', 'medio', 'alto')
+    minimo = niveles.index(nivel_minimo) if nivel_minimo in niveles else 0
+
+    ranking = []
+    for estudiante_id, (nombre, curso_id, curso) in estudiantes.items():
+        riesgo = riesgos[estudiante_id]
+        if niveles.index(riesgo['nivel']) < minimo:
+            continue
+        ranking.append(dict(riesgo, estudiante_id=estudiante_id, nombre=nombre, curso_id=curso_id, curso=curso))
+    ranking.sort(key=lambda r: (-r['puntaje'], r['nombre']))
+    return ranking[:limite] if limite else ranking
+
+
+def _matriculados():
+    return db.session.query(
+        Usuario.id_usuario, Usuario.nombre, Usuario.apellido, Curso.id_curso, Curso.nombreCurso
+    ).join(
+        Matricula, Matricula.estudianteId == Usuario.id_usuario
+    ).join(
+        Curso, Curso.id_curso == Matricula.cursoId
+    ).filter(
+        Usuario.rol.has(nombre='Estudiante')
+    )
+
+
+def ranking_curso(curso_id, limite=None, nivel_minimo=None):
+    """
+    Estudiantes de un curso ordenados del mayor al menor riesgo
+
+    Args:
+        curso_id (int): ID del curso
+        limite (int): Cantidad máxima de estudiantes
+        nivel_minimo (str): 'medio' o 'alto' para dejar solo los que lleguen a ese nivel
+
+    Returns:
+        list: Riesgo de cada estudiante con 'estudiante_id', 'nombre', 'curso_id' y 'curso'
+    """
+    curso = getattr(curso_por_id(curso_id), 'nombreCurso', None)
+    filas = [(e.id_usuario, e.nombre, e.apellido, curso_id, curso) for e in estudiantes_del_curso(curso_id)]
+    return _ranking(filas, limite, nivel_minimo)
+
+
+def ranking_hijos(hijos_ids):
+    """Hijos de un padre ordenados del mayor al menor riesgo."""
+    if not hijos_ids:
+        return []
+    filas = _matriculados().filter(Usuario.id_usuario.in_(hijos_ids)).all()
+    # Los hijos sin matrícula también aparecen, sin curso
+    sin_curso = set(hijos_ids) - {fila[0] for fila in filas}
+    if sin_curso:
+        filas += [(u.id_usuario, u.nombre, u.apellido, None, None)
+                  for u in Usuario.query.filter(Usuario.id_usuario.in_(sin_curso)).all()]
+    return _ranking(filas)
+
+
+def ranking_institucion(limite=50, nivel_minimo='medio', sede_id=None):
+    """
+    Estudiantes en riesgo de toda la institución y resumen por curso
+
+    Args:
+        limite (int): Cantidad máxima de estudiantes en el ranking
+        nivel_minimo (str): Nivel desde el que se lista a un estudiante
+        sede_id (int): Limita a los cursos de una sede
+
+    Returns:
+        dict: 'estudiantes' (ranking) y 'cursos' (por curso: total, en riesgo
+        medio y alto, y puntaje promedio; del más al menos comprometido)
+    """
+    consulta = _matriculados()
+    if sede_id:
+        consulta = consulta.filter(Curso.sedeId == sede_id)
+    todos = _ranking(consulta.all())
+
+    cursos = {}
+    for fila in todos:
+        curso = cursos.setdefault(fila['curso_id'], {
+            'curso_id': fila['curso_id'], 'curso': fila['curso'],
+            'total': 0, 'medio': 0, 'alto': 0, 'puntaje_promedio': 0.0
+        })
+        curso['total'] += 1
+        curso['puntaje_promedio'] += fila['puntaje']
+        if fila['nivel'] != 'bajo':
+            curso[fila['nivel']] += 1
+    for curso in cursos.values():
+        curso['puntaje_promedio'] = round(curso['puntaje_promedio'] / curso['total'], 1)
+
+    niveles = ('bajo', 'medio', 'alto')
+    minimo = niveles.index(nivel_minimo) if nivel_minimo in niveles else 0
+    estudiantes = [f for f in todos if niveles.index(f['nivel']) >= minimo]
+
+    return {
+        'estudiantes': estudiantes[:limite] if limite else estudiantes,
+        'cursos': sorted(cursos.values(), key=lambda c: (-c['alto'], -c['medio'], -c['puntaje_promedio']))
+    }
+
+
+def contar_en_riesgo(curso_id):
+    """Estudiantes del curso con riesgo medio o alto."""
+    return len(ranking_curso(curso_id, nivel_minimo='medio'))
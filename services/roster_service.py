@@ -0,0 +1,112 @@
+"""
+Lista de estudiantes matriculados por curso
+
+Casi todas las páginas del profesor necesitan los estudiantes del curso, a
+veces solo cuántos son o sus IDs, y varias veces en la misma petición. La
+lista de cada curso se guarda como tuplas (id_usuario, nombre, apellido):
+
+- en `g` durante la petición, para no repetir ni siquiera la búsqueda en
+  caché;
+- en una caché del proceso por curso, que pierde la clave del curso al
+  confirmar cambios en sus matrículas y se vacía si cambia un usuario
+  (nombre o rol).
+
+Los cursos que falten se consultan juntos en una sola consulta.
+"""
+
+from collections import namedtuple
+from flask import g, has_request_context
+from controllers.models import db, Usuario, Matricula
+from services.cache_service import CacheTTL, invalidar_al_cambiar, invalidar_claves_al_cambiar
+
+
+ROSTER_TTL = 600
+
+EstudianteRoster = namedtuple('EstudianteRoster', 'id_usuario nombre apellido')
+
+cache_roster = CacheTTL('roster_curso', ttl=ROSTER_TTL, max_entradas=2048)
+
+invalidar_claves_al_cambiar(Matricula, cache_roster, clave=lambda m: m.cursoId)
+invalidar_al_cambiar((Usuario,), cache_roster)
+
+
+def _memo():
+    """Listas ya resueltas en esta petición (vacío si cambió la caché)."""
+    if not has_request_context():
+        return {}
+    memo = g.get('rosters')
+    if memo is None or memo[0] != cache_roster.version:
+        memo = g.rosters = (cache_roster.version, {})
+    return memo[1]
+
+
+def _consultar(curso_ids):
+    filas = db.session.query(
+        Matricula.cursoId, Usuario.id_usuario, Usuario.nombre, Usuario.apellido
+    ).join(
+        Usuario, Usuario.id_usuario == Matricula.estudianteId
+    ).filter(
+        Matricula.cursoId.in_(curso_ids),
+        Usuario.rol.has(nombre='Estudiante')
+    ).distinct().order_by(Matricula.cursoId, Usuario.apellido, Usuario.nombre).all()
+
+    rosters = {curso_id: [] for curso_id in curso_ids}
+    for curso_id, *estudiante in filas:
+        rosters[curso_id].append(EstudianteRoster(*estudiante))
+    return {curso_id: tuple(estudiantes) for curso_id, estudiantes in rosters.items()}
+
+
+def rosters(curso_ids):
+    """
+    Estudiantes de varios cursos
+
+    Args:
+        curso_ids (iterable): IDs de los cursos
+
+    Returns:
+        dict: curso_id -> tupla de EstudianteRoster ordenada por apellido y nombre
+    """
+    memo = _memo()
+    resultado = {}
+    faltantes = []
+    for curso_id in dict.fromkeys(c for c in curso_ids if c):
+        estudiantes = memo.get(curso_id)
+        if estudiantes is None:
+            estudiantes = cache_roster.obtener(curso_id)
+        if estudiantes is None:
+            faltantes.append(curso_id)
+        else:
+            resultado[curso_id] = estudiantes
+
+    if faltantes:
+        version = cache_roster.version
+        calculados = _consultar(faltantes)
+        if version == cache_roster.version:
+            for curso_id, estudiantes in calculados.items():
+                cache_roster.guardar(curso_id, estudiantes)
+        resultado.update(calculados)
+
+    memo.update(resultado)
+    return resultado
+
+
+def estudiantes_del_curso(curso_id):
+    """Tupla de EstudianteRoster (id_usuario, nombre, apellido) del curso."""
+    if not curso_id:
+        return ()
+    return rosters([curso_id])[curso_id]
+
+
+def ids_estudiantes_curso(curso_id):
+    """IDs de los estudiantes del curso, en el orden de la lista."""
+    return [e.id_usuario for e in estudiantes_del_curso(curso_id)]
+
+
+def contar_estudiantes_curso(curso_id):
+    """Cantidad de estudiantes del curso."""
+    return len(estudiantes_del_curso(curso_id))
+
+
+def contar_estudiantes_cursos(curso_ids):
+    """curso_id -> cantidad de estudiantes, con los cursos faltantes en una sola consulta."""
+    return {curso_id: len(estudiantes) for curso_id, estudiantes in rosters(curso_ids).items()}
@@ -0,0 +1,245 @@
+"""
+Avisos en tiempo real (Server-Sent Events) para los contadores de la barra lateral
+
+Cada pestaña abierta se suscribe al bus con el id de su usuario y recibe un
+aviso cuando le llega una notificación o un mensaje; el navegador entonces
+pide los contadores una sola vez en lugar de consultarlos cada 30 segundos.
+
+Los avisos salen de hooks de sesión: al confirmar una transacción que creó
+notificaciones o comunicaciones en bandeja de entrada, se publican a sus
+destinatarios (y si la transacción se revierte, no se publica nada). El bus
+por defecto vive en memoria del proceso; con varios workers se configura
+Redis en Config.TIEMPO_REAL_URL y cada proceso reparte a sus conexiones.
+"""
+
+import logging
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from controllers.models import Notificacion, Comunicacion
+
+logger = logging.getLogger(__name__)
+
+
+class Suscripcion:
+    """Cola de avisos de una conexión abierta."""
+
+    def __init__(self, usuario_id, tamano=100):
+        self.usuario_id = usuario_id
+        self.cola = queue.Queue(maxsize=tamano)
+
+    def entregar(self, aviso):
+        try:
+            self.cola.put_nowait(aviso)
+        except queue.Full:
+            # Cliente lento: se descarta el aviso más antiguo
+            try:
+                self.cola.get_nowait()
+            except queue.Empty:
+                pass
+            self.cola.put_nowait(aviso)
+
+    def esperar(self, timeout):
+        """Devuelve el siguiente aviso, o None si no llegó ninguno en `timeout` segundos."""
+        try:
+            return self.cola.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class BusLocal:
+    """
+    Pub/sub en memoria del proceso
+
+    Limita las conexiones totales y por usuario, y guarda los últimos avisos
+    de cada usuario para que una reconexión (Last-Event-ID) o el long-poll no
+    pierdan lo publicado entre dos peticiones.
+    """
+
+    def __init__(self, max_conexiones=100, max_por_usuario=5, historial=20, max_usuarios_historial=5000):
+        self.max_conexiones = max_conexiones
+        self.max_por_usuario = max_por_usuario
+        self._historial_por_usuario = historial
+        self._max_usuarios_historial = max_usuarios_historial
+        self._suscripciones = {}
+        self._historial = OrderedDict()
+        self._conexiones = 0
+        self._lock = threading.Lock()
+
+    def suscribir(self, usuario_id):
+        """Abre una suscripción; None si se alcanzó el límite de conexiones."""
+        with self._lock:
+            propias = self._suscripciones.setdefault(usuario_id, set())
+            if self._conexiones >= self.max_conexiones or len(propias) >= self.max_por_usuario:
+                if not propias:
+                    del self._suscripciones[usuario_id]
+                return None
+            suscripcion = Suscripcion(usuario_id)
+            propias.add(suscripcion)
+            self._conexiones += 1
+            return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            propias = self._suscripciones.get(suscripcion.usuario_id)
+            if propias and suscripcion in propias:
+                propias.discard(suscripcion)
+                self._conexiones -= 1
+                if not propias:
+                    del self._suscripciones[suscripcion.usuario_id]
+
+    def publicar(self, usuario_ids, tipo, datos=None):
+        """Publica un aviso a varios usuarios."""
+        self._repartir(list(usuario_ids), {'id': time.time_ns(), 'tipo': tipo, 'datos': datos or {}})
+
+    def _repartir(self, usuario_ids, aviso):
+        with self._lock:
+            for usuario_id in usuario_ids:
+                historial = self._historial.get(usuario_id)
+                if historial is None:
+                    historial = self._historial[usuario_id] = deque(maxlen=self._historial_por_usuario)
+                    if len(self._historial) > self._max_usuarios_historial:
+                        self._historial.popitem(last=False)
+                else:
+                    self._historial.move_to_end(usuario_id)
+                historial.append(aviso)
+                for suscripcion in self._suscripciones.get(usuario_id, ()):
+                    suscripcion.entregar(aviso)
+
+    def pendientes(self, usuario_id, desde_id):
+        """Avisos del usuario posteriores a `desde_id`, del más antiguo al más nuevo."""
+        with self._lock:
+            return [a for a in self._historial.get(usuario_id, ()) if a['id'] > desde_id]
+
+    def conexiones(self):
+        return self._conexiones
+
+
+class BusRedis(BusLocal):
+    """
+    Bus compartido entre workers sobre un canal de Redis
+
+    Cada proceso publica en el canal y un hilo escucha el canal para repartir
+    los avisos a las conexiones locales. Requiere el paquete `redis`, que solo
+    se importa si se configura este bus.
+    """
+
+    def __init__(self, url, canal='tiempo_real', **limites):
+        import redis
+        super().__init__(**limites)
+        self._redis = redis.Redis.from_url(url)
+        self._canal = canal
+        self._oyente = None
+        self._oyente_lock = threading.Lock()
+
+    def _escuchar(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._canal)
+                for mensaje in pubsub.listen():
+                    contenido = json.loads(mensaje['data'])
+                    self._repartir(contenido['usuarios'], contenido['aviso'])
+            except Exception as e:
+                logger.exception(f"Error escuchando avisos en Redis: {str(e)}")
+                time.sleep(1)
+
+    def _asegurar_oyente(self):
+        with self._oyente_lock:
+            if self._oyente is None:
+                self._oyente = threading.Thread(target=self._escuchar, name='tiempo-real-redis', daemon=True)
+                self._oyente.start()
+
+    def suscribir(self, usuario_id):
+        self._asegurar_oyente()
+        return super().suscribir(usuario_id)
+
+    def publicar(self, usuario_ids, tipo, datos=None):
+        aviso = {'id': time.time_ns(), 'tipo': tipo, 'datos': datos or {}}
+        self._redis.publish(self._canal, json.dumps({'usuarios': list(usuario_ids), 'aviso': aviso}))
+
+
+def crear_bus(url, **limites):
+    """
+    Crea el bus de avisos a partir de su URL
+
+    Args:
+        url (str): 'memory://' o 'redis://host:puerto/db'
+
+    Returns:
+        BusLocal | BusRedis
+    """
+    if not url or url.startswith('memory://'):
+        return BusLocal(**limites)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return BusRedis(url, **limites)
+    raise ValueError(f"Bus de tiempo real no soportado: {url}")
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def obtener_bus():
+    """Devuelve el bus de la aplicación, creándolo la primera vez."""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = crear_bus(
+                current_app.config.get('TIEMPO_REAL_URL'),
+                max_conexiones=current_app.config.get('TIEMPO_REAL_MAX_CONEXIONES', 100),
+                max_por_usuario=current_app.config.get('TIEMPO_REAL_MAX_POR_USUARIO', 5)
+            )
+        return _bus
+
+
+def publicar(usuario_ids, tipo, datos=None):
+    """
+    Publica un aviso a los usuarios indicados
+
+    Si el bus no responde se registra el error y se sigue: los contadores se
+    corrigen en la siguiente consulta del navegador.
+    """
+    usuario_ids = [u for u in set(usuario_ids) if u is not None]
+    if not usuario_ids or not has_app_context() or not current_app.config.get('TIEMPO_REAL_ENABLED', True):
+        return
+    try:
+        obtener_bus().publicar(usuario_ids, tipo, datos)
+    except Exception as e:
+        logger.exception(f"Error publicando aviso en tiempo real: {str(e)}")
+
+
+def publicar_al_confirmar(session, usuario_ids, tipo, datos=None):
+    """Publica el aviso cuando la sesión confirme la transacción actual."""
+    session.info.setdefault('avisos_tiempo_real', []).append((list(usuario_ids), tipo, datos))
+
+
+@event.listens_for(Session, 'after_flush')
+def _avisos_tras_flush(session, flush_context):
+    notificados = {}
+    mensajes = set()
+    for obj in session.new:
+        if isinstance(obj, Notificacion) and obj.enviada is not False:
+            notificados.setdefault(obj.tipo, set()).add(obj.usuario_id)
+        elif isinstance(obj, Comunicacion) and (obj.estado or 'inbox') == 'inbox':
+            mensajes.add(obj.destinatario_id)
+    for tipo, usuarios in notificados.items():
+        publicar_al_confirmar(session, usuarios, 'notificacion', {'tipo': tipo})
+    if mensajes:
+        publicar_al_confirmar(session, mensajes, 'mensaje')
+
+
+@event.listens_for(Session, 'after_commit')
+def _publicar_avisos(session):
+    for usuario_ids, tipo, datos in session.info.pop('avisos_tiempo_real', ()):
+        publicar(usuario_ids, tipo, datos)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_avisos(session):
+    session.info.pop('avisos_tiempo_real', None)
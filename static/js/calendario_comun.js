@@ -0,0 +1,11 @@
+// Funciones compartidas por los calendarios de eventos de cada rol.
+
+// Parámetros desde/hasta (YYYY-MM-DD) del mes de la fecha dada, para pedir
+// solo los eventos del mes visible.
+function rangoMesVisible(fecha) {
+    const year = fecha.getFullYear();
+    const month = fecha.getMonth();
+    const lastDay = new Date(year, month + 1, 0).getDate();
+    const mm = String(month + 1).padStart(2, '0');
+    return `desde=${year}-${mm}-01&hasta=${year}-${mm}-${String(lastDay).padStart(2, '0')}`;
+}
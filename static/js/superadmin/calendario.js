@@ -5,6 +5,7 @@ let currentDate = new Date();
 let selectedEventIndex = null;
 let selectedRoles = new Set(['Estudiante']); // Valor por defecto, ahora solo uno
 let editingEventId = null;
+let editingFechaInicio = null; // Primera fecha de la serie que se edita
 let editSelectedRoles = new Set();
 
 // =============================================
@@ -777,6 +778,7 @@ function goToPreviousMonth() {
     
     currentDate.setMonth(currentDate.getMonth() - 1);
     createCalendar();
+    loadEvents();
     showToast('Mes anterior', 'info');
     
     setTimeout(() => {
@@ -790,6 +792,7 @@ function goToNextMonth() {
     
     currentDate.setMonth(currentDate.getMonth() + 1);
     createCalendar();
+    loadEvents();
     showToast('Siguiente mes', 'info');
     
     setTimeout(() => {
@@ -891,7 +894,7 @@ function loadEvents() {
     
     // Simular carga con timeout para mostrar la animación
     setTimeout(() => {
-        fetch("/admin/eventos")
+        fetch(`/admin/eventos?${rangoMesVisible(currentDate)}`)
             .then(r => {
                 if (!r.ok) throw new Error("Error al cargar eventos");
                 return r.json();
@@ -903,6 +906,7 @@ function loadEvents() {
                     title: e.Nombre || e.nombre,
                     description: e.Descripcion || e.descripcion,
                     date: e.Fecha || e.fecha,
+                    startDate: e.fecha_inicio || e.Fecha || e.fecha,
                     time: (e.Hora || e.hora || '').slice(0,5),
                     role: e.RolDestino || e.rol_destino
                 }));
@@ -1114,8 +1118,8 @@ function validateEditField(e) {
                 const dateAvailability = checkEditDateAvailability();
                 if (!dateAvailability.isValid) {
                     validationResult = dateAvailability;
-                } else if (!validarFechaFutura(value, document.getElementById('editTime').value).isValid) {
-                    validationResult = validarFechaFutura(value, document.getElementById('editTime').value);
+                } else if (!validarFechaEdicion(value, document.getElementById('editTime').value).isValid) {
+                    validationResult = validarFechaEdicion(value, document.getElementById('editTime').value);
                 } else {
                     validationResult = { isValid: true, message: 'Fecha disponible' };
                 }
@@ -1155,6 +1159,14 @@ function validarFechaFutura(date, time) {
     return { isValid: true, message: 'Fecha válida' };
 }
 
+// Una serie que empezó en el pasado se puede editar sin mover su inicio
+function validarFechaEdicion(date, time) {
+    if (date && date === editingFechaInicio) {
+        return { isValid: true, message: 'Fecha válida' };
+    }
+    return validarFechaFutura(date, time);
+}
+
 function showFieldError(field, message) {
     field.classList.add('field-error');
     
@@ -1525,11 +1537,13 @@ function openEditModal(event) {
     
     // Usar el evento que se pasa como parámetro
     editingEventId = event.id;
+    editingFechaInicio = event.startDate || event.date;
     
-    // Llenar el formulario con los datos actuales del evento
+    // Llenar el formulario con los datos actuales del evento; en eventos
+    // recurrentes la fecha es la del inicio de la serie, no la de la ocurrencia
     document.getElementById("editTitle").value = event.title;
     document.getElementById("editDescription").value = event.description;
-    document.getElementById("editDate").value = event.date;
+    document.getElementById("editDate").value = editingFechaInicio;
     document.getElementById("editTime").value = event.time;
     
     // Configurar roles seleccionados
@@ -1558,6 +1572,7 @@ function closeEditModal() {
         modal.style.display = "none";
         modalContent.style.animation = '';
         editingEventId = null;
+        editingFechaInicio = null;
         editSelectedRoles.clear();
     }, 300);
 }
@@ -1583,7 +1598,7 @@ function saveEditedEvent() {
     }
 
     // Validaciones adicionales de fecha
-    const fechaValidation = validarFechaFutura(date, time);
+    const fechaValidation = validarFechaEdicion(date, time);
     if (!fechaValidation.isValid) {
         showToast(fechaValidation.message, 'error');
         return;
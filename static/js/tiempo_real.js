@@ -0,0 +1,104 @@
+// Avisos en tiempo real para los contadores de la barra lateral.
+//
+// Abre un canal SSE (/api/tiempo-real/stream) y, cuando llega un aviso,
+// llama a las funciones registradas con TiempoReal.alRecibir(fn). Si el
+// navegador no soporta EventSource o el servidor no tiene lugar, pasa a
+// long-poll (/api/tiempo-real/esperar) y, como último recurso, a consultar
+// cada minuto.
+(function () {
+    if (window.TiempoReal) {
+        return;
+    }
+
+    const RETARDO_AVISO = 500;
+    const INTERVALO_RESPALDO = 60000;
+    const FALLOS_ANTES_DE_LONG_POLL = 3;
+
+    const oyentes = [];
+    let temporizador = null;
+    let fallosSSE = 0;
+    let modo = null;
+
+    function avisar(tipo) {
+        // Varios avisos seguidos (p. ej. un evento para todo un curso) se agrupan en una sola actualización
+        clearTimeout(temporizador);
+        temporizador = setTimeout(function () {
+            oyentes.forEach(function (fn) {
+                try {
+                    fn(tipo);
+                } catch (error) {
+                    console.error('Error actualizando tras aviso en tiempo real:', error);
+                }
+            });
+        }, RETARDO_AVISO);
+    }
+
+    function iniciarRespaldo() {
+        if (modo === 'respaldo') {
+            return;
+        }
+        modo = 'respaldo';
+        setInterval(function () { avisar('respaldo'); }, INTERVALO_RESPALDO);
+    }
+
+    function iniciarLongPoll() {
+        modo = 'long-poll';
+        let desde = 0;
+
+        function esperar() {
+            fetch('/api/tiempo-real/esperar?desde=' + desde, { credentials: 'same-origin' })
+                .then(function (response) {
+                    if (response.status === 503 || response.status === 401) {
+                        throw new Error('sin-servicio');
+                    }
+                    return response.json();
+                })
+                .then(function (data) {
+                    desde = data.ultimo || desde;
+                    (data.avisos || []).forEach(function (aviso) { avisar(aviso.tipo); });
+                    esperar();
+                })
+                .catch(function (error) {
+                    if (error.message === 'sin-servicio') {
+                        iniciarRespaldo();
+                    } else {
+                        setTimeout(esperar, 5000);
+                    }
+                });
+        }
+
+        esperar();
+    }
+
+    function iniciarSSE() {
+        modo = 'sse';
+        const fuente = new EventSource('/api/tiempo-real/stream');
+
+        fuente.addEventListener('open', function () {
+            fallosSSE = 0;
+        });
+        ['notificacion', 'mensaje'].forEach(function (tipo) {
+            fuente.addEventListener(tipo, function () { avisar(tipo); });
+        });
+        fuente.addEventListener('error', function () {
+            // CLOSED: el servidor respondió con error (sin lugar, sin sesión); si no, el navegador reintenta solo
+            if (fuente.readyState === EventSource.CLOSED || ++fallosSSE >= FALLOS_ANTES_DE_LONG_POLL) {
+                fuente.close();
+                iniciarLongPoll();
+            }
+        });
+    }
+
+    window.TiempoReal = {
+        alRecibir: function (fn) {
+            oyentes.push(fn);
+            if (modo === null) {
+                if (window.EventSource) {
+                    iniciarSSE();
+                } else {
+                    iniciarLongPoll();
+                }
+            }
+        }
+    };
+})();